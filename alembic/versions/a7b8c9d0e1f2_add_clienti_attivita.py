@@ -0,0 +1,89 @@
+"""add clienti_attivita table and agenda.id_cliente index
+
+Revision ID: a7b8c9d0e1f2
+Revises: f6a7b8c9d0e1
+Create Date: 2026-10-18 18:00:00.000000
+
+Ultima attivita' per cliente mantenuta in scrittura (api.services.client_activity):
+ultimo evento (non cancellato / completato / programmato), ultimo allenamento
+eseguito, ultima misurazione. Indice agenda.id_cliente per il ricalcolo per
+cliente. Backfill: INSERT ... SELECT da agenda, allenamenti_eseguiti,
+misurazioni_cliente, stessa regola di reconcile_client_activity() (che resta
+la riparazione a runtime).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7b8c9d0e1f2'
+down_revision: Union[str, Sequence[str], None] = 'f6a7b8c9d0e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Crea clienti_attivita + indice agenda.id_cliente e popola dai dati esistenti."""
+    op.create_index("ix_agenda_id_cliente", "agenda", ["id_cliente"])
+
+    op.create_table(
+        "clienti_attivita",
+        sa.Column("client_id", sa.Integer(), sa.ForeignKey("clienti.id"), primary_key=True),
+        sa.Column("trainer_id", sa.Integer(), sa.ForeignKey("trainers.id"), nullable=True),
+        sa.Column("ultimo_evento_at", sa.DateTime(), nullable=True),
+        sa.Column("ultimo_evento_categoria", sa.String(), nullable=True),
+        sa.Column("ultimo_completato_at", sa.DateTime(), nullable=True),
+        sa.Column("ultimo_programmato_at", sa.DateTime(), nullable=True),
+        sa.Column("ultimo_allenamento_data", sa.Date(), nullable=True),
+        sa.Column("ultima_misurazione_data", sa.Date(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_clienti_attivita_trainer_id", "clienti_attivita", ["trainer_id"])
+    op.create_index("ix_clienti_attivita_ultimo_evento_at", "clienti_attivita", ["ultimo_evento_at"])
+    op.create_index(
+        "ix_clienti_attivita_ultima_misurazione_data", "clienti_attivita", ["ultima_misurazione_data"],
+    )
+
+    # Una riga per cliente con almeno un'attivita'; eventi/log/misure eliminati esclusi
+    op.execute(sa.text("""
+        INSERT INTO clienti_attivita (
+            client_id, trainer_id, ultimo_evento_at, ultimo_evento_categoria,
+            ultimo_completato_at, ultimo_programmato_at,
+            ultimo_allenamento_data, ultima_misurazione_data, updated_at
+        )
+        SELECT client_id, trainer_id, ev, cat, comp, prog, allen, mis, CURRENT_TIMESTAMP
+        FROM (
+            SELECT
+                cl.id AS client_id,
+                cl.trainer_id AS trainer_id,
+                (SELECT MAX(e.data_inizio) FROM agenda e
+                 WHERE e.id_cliente = cl.id AND e.deleted_at IS NULL
+                   AND e.stato != 'Cancellato') AS ev,
+                (SELECT e.categoria FROM agenda e
+                 WHERE e.id_cliente = cl.id AND e.deleted_at IS NULL AND e.stato != 'Cancellato'
+                 ORDER BY e.data_inizio DESC, e.id DESC LIMIT 1) AS cat,
+                (SELECT MAX(e.data_inizio) FROM agenda e
+                 WHERE e.id_cliente = cl.id AND e.deleted_at IS NULL
+                   AND e.stato = 'Completato') AS comp,
+                (SELECT MAX(e.data_inizio) FROM agenda e
+                 WHERE e.id_cliente = cl.id AND e.deleted_at IS NULL
+                   AND e.stato = 'Programmato') AS prog,
+                (SELECT MAX(w.data_esecuzione) FROM allenamenti_eseguiti w
+                 WHERE w.id_cliente = cl.id AND w.deleted_at IS NULL) AS allen,
+                (SELECT MAX(m.data_misurazione) FROM misurazioni_cliente m
+                 WHERE m.id_cliente = cl.id AND m.deleted_at IS NULL) AS mis
+            FROM clienti cl
+        )
+        WHERE ev IS NOT NULL OR allen IS NOT NULL OR mis IS NOT NULL
+    """))
+
+
+def downgrade() -> None:
+    """Rimuove clienti_attivita (ricostruibile) e l'indice su agenda."""
+    op.drop_index("ix_clienti_attivita_ultima_misurazione_data", "clienti_attivita")
+    op.drop_index("ix_clienti_attivita_ultimo_evento_at", "clienti_attivita")
+    op.drop_index("ix_clienti_attivita_trainer_id", "clienti_attivita")
+    op.drop_table("clienti_attivita")
+    op.drop_index("ix_agenda_id_cliente", "agenda")
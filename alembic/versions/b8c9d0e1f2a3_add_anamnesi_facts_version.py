@@ -0,0 +1,101 @@
+"""add clienti_anamnesi_facts.facts_version
+
+Revision ID: b8c9d0e1f2a3
+Revises: a7b8c9d0e1f2
+Create Date: 2026-10-19 09:00:00.000000
+
+Versione della derivazione (FACTS_VERSION: hash di regole keyword, flag
+strutturali e regole farmaci) salvata con i fatti anamnesi: in lettura una
+riga di una versione diversa viene ignorata e i fatti riderivati dal JSON.
+Backfill: ricostruzione completa di clienti_anamnesi_facts e clienti_condizioni
+con la derivazione corrente (le righe esistenti non dicono con quali regole
+sono state calcolate). Tabelle locali alla migrazione, derivazione pura.
+"""
+import json
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8c9d0e1f2a3'
+down_revision: Union[str, Sequence[str], None] = 'a7b8c9d0e1f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Aggiunge facts_version e ricalcola i fatti con la derivazione corrente."""
+    with op.batch_alter_table("clienti_anamnesi_facts") as batch_op:
+        batch_op.add_column(sa.Column("facts_version", sa.String(), nullable=True))
+
+    _rebuild()
+
+
+def _rebuild() -> None:
+    """Rideriva i fatti da clienti.anamnesi_json, senza passare dai modelli ORM."""
+    from api.services.anamnesi_facts import FACTS_VERSION, derive_anamnesi_facts
+
+    clienti = sa.table(
+        "clienti",
+        sa.column("id", sa.Integer),
+        sa.column("trainer_id", sa.Integer),
+        sa.column("anamnesi_json", sa.String),
+    )
+    facts_table = sa.table(
+        "clienti_anamnesi_facts",
+        sa.column("client_id", sa.Integer),
+        sa.column("trainer_id", sa.Integer),
+        sa.column("stato", sa.String),
+        sa.column("data_riferimento", sa.Date),
+        sa.column("medication_flags", sa.String),
+        sa.column("peso_kg", sa.Float),
+        sa.column("altezza_cm", sa.Float),
+        sa.column("facts_version", sa.String),
+        sa.column("updated_at", sa.DateTime),
+    )
+    conditions_table = sa.table(
+        "clienti_condizioni",
+        sa.column("client_id", sa.Integer),
+        sa.column("condition_id", sa.Integer),
+        sa.column("trainer_id", sa.Integer),
+    )
+
+    bind = op.get_bind()
+    now = datetime.now(timezone.utc)
+    facts_rows: list[dict] = []
+    condition_rows: list[dict] = []
+    for client_id, trainer_id, anamnesi_json in bind.execute(
+        sa.select(clienti.c.id, clienti.c.trainer_id, clienti.c.anamnesi_json)
+    ):
+        facts = derive_anamnesi_facts(anamnesi_json)
+        facts_rows.append({
+            "client_id": client_id,
+            "trainer_id": trainer_id,
+            "stato": facts.stato,
+            "data_riferimento": facts.data_riferimento,
+            "medication_flags": json.dumps(list(facts.medication_flags)) if facts.medication_flags else None,
+            "peso_kg": facts.peso_kg,
+            "altezza_cm": facts.altezza_cm,
+            "facts_version": FACTS_VERSION,
+            "updated_at": now,
+        })
+        condition_rows.extend(
+            {"client_id": client_id, "condition_id": condition_id, "trainer_id": trainer_id}
+            for condition_id in sorted(facts.condition_ids)
+        )
+
+    bind.execute(sa.delete(conditions_table))
+    bind.execute(sa.delete(facts_table))
+    if facts_rows:
+        op.bulk_insert(facts_table, facts_rows)
+    if condition_rows:
+        op.bulk_insert(conditions_table, condition_rows)
+
+
+def downgrade() -> None:
+    """Rimuove facts_version (i fatti restano validi per la derivazione corrente)."""
+    with op.batch_alter_table("clienti_anamnesi_facts") as batch_op:
+        batch_op.drop_column("facts_version")
@@ -0,0 +1,125 @@
+"""add clienti_anamnesi_facts and clienti_condizioni tables
+
+Revision ID: c3d4e5f6a7b8
+Revises: b7c8d9e0f1a2
+Create Date: 2026-10-18 10:00:00.000000
+
+Fatti derivati da clienti.anamnesi_json, calcolati in scrittura:
+  - clienti_anamnesi_facts: stato, data riferimento, flag farmaci, peso/altezza
+  - clienti_condizioni: condition_id rilevate dal safety engine (1 riga per coppia)
+Backfill: ricalcolo per tutti i clienti esistenti. Lettura e scrittura con
+tabelle locali alla migrazione (solo colonne esistenti a questa revisione);
+dal JSON si usa solo la derivazione pura derive_anamnesi_facts().
+"""
+import json
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3d4e5f6a7b8'
+down_revision: Union[str, Sequence[str], None] = 'b7c8d9e0f1a2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Crea le tabelle dei fatti anamnesi e le popola dai JSON esistenti."""
+    op.create_table(
+        "clienti_anamnesi_facts",
+        sa.Column("client_id", sa.Integer(), sa.ForeignKey("clienti.id"), primary_key=True),
+        sa.Column("trainer_id", sa.Integer(), sa.ForeignKey("trainers.id"), nullable=True),
+        sa.Column("stato", sa.String(), nullable=False, server_default="missing"),
+        sa.Column("data_riferimento", sa.Date(), nullable=True),
+        sa.Column("medication_flags", sa.String(), nullable=True),
+        sa.Column("peso_kg", sa.Float(), nullable=True),
+        sa.Column("altezza_cm", sa.Float(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_clienti_anamnesi_facts_trainer_id", "clienti_anamnesi_facts", ["trainer_id"])
+    op.create_index("ix_clienti_anamnesi_facts_stato", "clienti_anamnesi_facts", ["stato"])
+    op.create_index(
+        "ix_clienti_anamnesi_facts_data_riferimento", "clienti_anamnesi_facts", ["data_riferimento"],
+    )
+
+    op.create_table(
+        "clienti_condizioni",
+        sa.Column("client_id", sa.Integer(), sa.ForeignKey("clienti.id"), primary_key=True),
+        sa.Column("condition_id", sa.Integer(), primary_key=True),
+        sa.Column("trainer_id", sa.Integer(), sa.ForeignKey("trainers.id"), nullable=True),
+    )
+    op.create_index("ix_clienti_condizioni_condition_id", "clienti_condizioni", ["condition_id"])
+    op.create_index("ix_clienti_condizioni_trainer_id", "clienti_condizioni", ["trainer_id"])
+
+    _backfill()
+
+
+def _backfill() -> None:
+    """Deriva i fatti da clienti.anamnesi_json, senza passare dai modelli ORM."""
+    from api.services.anamnesi_facts import derive_anamnesi_facts
+
+    clienti = sa.table(
+        "clienti",
+        sa.column("id", sa.Integer),
+        sa.column("trainer_id", sa.Integer),
+        sa.column("anamnesi_json", sa.String),
+    )
+    facts_table = sa.table(
+        "clienti_anamnesi_facts",
+        sa.column("client_id", sa.Integer),
+        sa.column("trainer_id", sa.Integer),
+        sa.column("stato", sa.String),
+        sa.column("data_riferimento", sa.Date),
+        sa.column("medication_flags", sa.String),
+        sa.column("peso_kg", sa.Float),
+        sa.column("altezza_cm", sa.Float),
+        sa.column("updated_at", sa.DateTime),
+    )
+    conditions_table = sa.table(
+        "clienti_condizioni",
+        sa.column("client_id", sa.Integer),
+        sa.column("condition_id", sa.Integer),
+        sa.column("trainer_id", sa.Integer),
+    )
+
+    bind = op.get_bind()
+    now = datetime.now(timezone.utc)
+    facts_rows: list[dict] = []
+    condition_rows: list[dict] = []
+    for client_id, trainer_id, anamnesi_json in bind.execute(
+        sa.select(clienti.c.id, clienti.c.trainer_id, clienti.c.anamnesi_json)
+    ):
+        facts = derive_anamnesi_facts(anamnesi_json)
+        facts_rows.append({
+            "client_id": client_id,
+            "trainer_id": trainer_id,
+            "stato": facts.stato,
+            "data_riferimento": facts.data_riferimento,
+            "medication_flags": json.dumps(list(facts.medication_flags)) if facts.medication_flags else None,
+            "peso_kg": facts.peso_kg,
+            "altezza_cm": facts.altezza_cm,
+            "updated_at": now,
+        })
+        condition_rows.extend(
+            {"client_id": client_id, "condition_id": condition_id, "trainer_id": trainer_id}
+            for condition_id in sorted(facts.condition_ids)
+        )
+
+    if facts_rows:
+        op.bulk_insert(facts_table, facts_rows)
+    if condition_rows:
+        op.bulk_insert(conditions_table, condition_rows)
+
+
+def downgrade() -> None:
+    """Rimuove le tabelle dei fatti anamnesi (anamnesi_json resta intatto)."""
+    op.drop_index("ix_clienti_condizioni_trainer_id", "clienti_condizioni")
+    op.drop_index("ix_clienti_condizioni_condition_id", "clienti_condizioni")
+    op.drop_table("clienti_condizioni")
+    op.drop_index("ix_clienti_anamnesi_facts_data_riferimento", "clienti_anamnesi_facts")
+    op.drop_index("ix_clienti_anamnesi_facts_stato", "clienti_anamnesi_facts")
+    op.drop_index("ix_clienti_anamnesi_facts_trainer_id", "clienti_anamnesi_facts")
+    op.drop_table("clienti_anamnesi_facts")
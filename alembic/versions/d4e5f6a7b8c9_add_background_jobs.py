@@ -0,0 +1,52 @@
+"""add background_jobs table
+
+Revision ID: d4e5f6a7b8c9
+Revises: c3d4e5f6a7b8
+Create Date: 2026-10-18 12:00:00.000000
+
+Job in background (backup, export, verifiche) gestiti da api.services.job_runner:
+stato, avanzamento, risultato e artefatto su disco per ogni job.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4e5f6a7b8c9'
+down_revision: Union[str, Sequence[str], None] = 'c3d4e5f6a7b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Crea la tabella background_jobs."""
+    op.create_table(
+        "background_jobs",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("trainer_id", sa.Integer(), sa.ForeignKey("trainers.id"), nullable=False),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False, server_default="queued"),
+        sa.Column("progress", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("message", sa.String(), nullable=True),
+        sa.Column("params_json", sa.String(), nullable=True),
+        sa.Column("result_json", sa.String(), nullable=True),
+        sa.Column("error", sa.String(), nullable=True),
+        sa.Column("artifact", sa.String(), nullable=True),
+        sa.Column("cancel_requested", sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_background_jobs_trainer_id", "background_jobs", ["trainer_id"])
+    op.create_index("ix_background_jobs_kind", "background_jobs", ["kind"])
+    op.create_index("ix_background_jobs_status", "background_jobs", ["status"])
+
+
+def downgrade() -> None:
+    """Rimuove la tabella background_jobs (gli artefatti su disco restano)."""
+    op.drop_index("ix_background_jobs_status", "background_jobs")
+    op.drop_index("ix_background_jobs_kind", "background_jobs")
+    op.drop_index("ix_background_jobs_trainer_id", "background_jobs")
+    op.drop_table("background_jobs")
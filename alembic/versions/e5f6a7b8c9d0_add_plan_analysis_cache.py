@@ -0,0 +1,44 @@
+"""add schede_analisi_cache table
+
+Revision ID: e5f6a7b8c9d0
+Revises: d4e5f6a7b8c9
+Create Date: 2026-10-18 14:00:00.000000
+
+Cache persistente di analyze_plan() per hash del contenuto del piano
+(api.services.plan_analysis_cache). Nessun backfill: si riempie al primo
+caricamento della worklist o dopo il salvataggio di una scheda.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5f6a7b8c9d0'
+down_revision: Union[str, Sequence[str], None] = 'd4e5f6a7b8c9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Crea la tabella schede_analisi_cache."""
+    op.create_table(
+        "schede_analisi_cache",
+        sa.Column("content_hash", sa.String(), primary_key=True),
+        sa.Column("analyzer_version", sa.String(), nullable=False),
+        sa.Column("score", sa.Float(), nullable=False),
+        sa.Column("analysis_json", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index(
+        "ix_schede_analisi_cache_analyzer_version", "schede_analisi_cache", ["analyzer_version"],
+    )
+    op.create_index("ix_schede_analisi_cache_created_at", "schede_analisi_cache", ["created_at"])
+
+
+def downgrade() -> None:
+    """Rimuove la cache analisi (ricostruibile)."""
+    op.drop_index("ix_schede_analisi_cache_created_at", "schede_analisi_cache")
+    op.drop_index("ix_schede_analisi_cache_analyzer_version", "schede_analisi_cache")
+    op.drop_table("schede_analisi_cache")
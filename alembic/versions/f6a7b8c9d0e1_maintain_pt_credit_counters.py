@@ -0,0 +1,59 @@
+"""maintain PT credit counters on contratti and clienti
+
+Revision ID: f6a7b8c9d0e1
+Revises: e5f6a7b8c9d0
+Create Date: 2026-10-18 16:00:00.000000
+
+contratti.crediti_usati (colonna legacy, mai aggiornata) e il nuovo
+clienti.crediti_residui diventano contatori mantenuti dall'agenda
+(api.services.pt_credits). Backfill: ricalcolo dagli eventi PT esistenti in
+SQL, stessa regola di reconcile_credits() (che resta la riparazione a runtime).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6a7b8c9d0e1'
+down_revision: Union[str, Sequence[str], None] = 'e5f6a7b8c9d0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Aggiunge clienti.crediti_residui e ricalcola i contatori dagli eventi."""
+    with op.batch_alter_table("clienti") as batch_op:
+        batch_op.add_column(
+            sa.Column("crediti_residui", sa.Integer(), nullable=False, server_default="0"),
+        )
+
+    # Evento che consuma un credito: PT, non cancellato, non eliminato
+    op.execute(sa.text("""
+        UPDATE contratti SET crediti_usati = (
+            SELECT COUNT(*) FROM agenda e
+            WHERE e.id_contratto = contratti.id
+              AND e.categoria = 'PT' AND e.stato != 'Cancellato' AND e.deleted_at IS NULL
+        )
+        WHERE deleted_at IS NULL
+    """))
+    # Residui = acquistati - consumati, per cliente e trainer del cliente
+    op.execute(sa.text("""
+        UPDATE clienti SET crediti_residui = (
+            SELECT COALESCE(SUM(c.crediti_totali), 0) FROM contratti c
+            WHERE c.id_cliente = clienti.id AND c.trainer_id IS clienti.trainer_id
+              AND c.deleted_at IS NULL
+        ) - (
+            SELECT COUNT(*) FROM agenda e
+            WHERE e.id_cliente = clienti.id AND e.trainer_id IS clienti.trainer_id
+              AND e.categoria = 'PT' AND e.stato != 'Cancellato' AND e.deleted_at IS NULL
+        )
+        WHERE deleted_at IS NULL
+    """))
+
+
+def downgrade() -> None:
+    """Rimuove clienti.crediti_residui (crediti_usati resta: colonna legacy)."""
+    with op.batch_alter_table("clienti") as batch_op:
+        batch_op.drop_column("crediti_residui")
@@ -71,11 +71,62 @@ NUTRITION_DATABASE_URL: str = os.getenv(
     f"sqlite:///{DATA_DIR / 'nutrition.db'}",
 )
 
+# Cross-DB join: ATTACH read-only di nutrition.db sulle connessioni business.
+# Attivo solo se tutti i database sono file SQLite; altrimenti le letture restano a
+# query separate + merge in Python (fallback, es. PostgreSQL).
+REFERENCE_DB_ATTACH: bool = os.getenv("REFERENCE_DB_ATTACH", "false").strip().lower() in (
+    "true", "1", "yes",
+)
+
 # Logging locale applicativo
 LOG_DIR: Path = DATA_DIR / "logs"
 APP_LOG_LEVEL: str = os.getenv("APP_LOG_LEVEL", "INFO").upper()
 APP_LOG_MAX_BYTES: int = int(os.getenv("APP_LOG_MAX_BYTES", "1000000"))
 APP_LOG_BACKUP_COUNT: int = int(os.getenv("APP_LOG_BACKUP_COUNT", "5"))
+# - APP_LOG_FORMAT: "text" (default) | "json" (una riga JSON con request_id, route, duration_ms)
+# - APP_LOG_QUEUE_SIZE / APP_LOG_OVERFLOW: coda log limitata, "drop" | "block" quando piena
+# - APP_LOG_ACCESS: una riga di log per richiesta (metodo, route, status, durata)
+APP_LOG_FORMAT: str = os.getenv("APP_LOG_FORMAT", "text").strip().lower()
+APP_LOG_QUEUE_SIZE: int = int(os.getenv("APP_LOG_QUEUE_SIZE", "10000"))
+APP_LOG_OVERFLOW: str = os.getenv("APP_LOG_OVERFLOW", "drop").strip().lower()
+APP_LOG_ACCESS: bool = os.getenv("APP_LOG_ACCESS", "false").strip().lower() in ("true", "1", "yes")
+
+# Modello di esecuzione
+# - API_THREADPOOL_SIZE: thread condivisi dagli endpoint sync (default anyio: 40)
+# - EXECUTION_POOLS: capacita' dedicata per famiglia di endpoint pesanti
+#   (vedi api/services/execution_pools.py); override con POOL_WORKERS_<NOME>
+# - HEAVY_POOL_MAX_QUEUE: richieste in attesa per pool prima del 503
+# - API_LIMIT_CONCURRENCY: connessioni concorrenti max per uvicorn (0 = nessun limite)
+API_THREADPOOL_SIZE: int = int(os.getenv("API_THREADPOOL_SIZE", "40"))
+HEAVY_POOL_WORKERS: int = int(os.getenv("HEAVY_POOL_WORKERS", "2"))
+HEAVY_POOL_MAX_QUEUE: int = int(os.getenv("HEAVY_POOL_MAX_QUEUE", "8"))
+EXECUTION_POOLS: dict[str, int] = {
+    name: int(os.getenv(f"POOL_WORKERS_{name.upper()}", str(default)))
+    for name, default in (
+        ("training_science", HEAVY_POOL_WORKERS),
+        ("nutrition", HEAVY_POOL_WORKERS),
+        ("analytics", HEAVY_POOL_WORKERS),
+        ("export", 1),
+    )
+}
+API_LIMIT_CONCURRENCY: int = int(os.getenv("API_LIMIT_CONCURRENCY", "0"))
+
+# Risposte JSON con orjson come classe di default (api/responses.py) — opt-in
+FAST_JSON_RESPONSES: bool = os.getenv("FAST_JSON_RESPONSES", "false").strip().lower() in ("true", "1", "yes")
+
+# Metriche runtime (GET /metrics): soglia query lenta in millisecondi
+SLOW_QUERY_MS: float = float(os.getenv("SLOW_QUERY_MS", "200"))
+
+# Cache risposte dati di riferimento (api/services/response_cache.py): voci max in memoria
+RESPONSE_CACHE_MAX_ENTRIES: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+
+# Job in background (api/services/job_runner.py)
+# - JOB_WORKERS: thread dedicati ai job lunghi (backup, export, verifiche)
+# - JOB_ARTIFACTS_DIR: file prodotti dai job (export JSON, ecc.)
+# - JOB_RETENTION_DAYS: job conclusi + artefatti eliminati all'avvio oltre questa eta'
+JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "2"))
+JOB_ARTIFACTS_DIR: Path = DATA_DIR / "jobs"
+JOB_RETENTION_DAYS: int = int(os.getenv("JOB_RETENTION_DAYS", "7"))
 
 # JWT Authentication — bootstrap automatico al primo avvio
 def _resolve_jwt_secret() -> str:
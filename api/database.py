@@ -5,6 +5,11 @@ Database layer con SQLModel (SQLAlchemy + Pydantic).
 Architettura dual-database:
   - business engine (data.db / crm.db): dati trainer, clienti, contratti, workout
   - catalog engine (catalog.db): tassonomia scientifica (muscoli, articolazioni, condizioni, metriche)
+  - nutrition engine (nutrition.db): catalogo alimenti
+
+Modalita' ATTACH opzionale (REFERENCE_DB_ATTACH=true, solo SQLite): nutrition.db viene
+agganciato read-only alle connessioni business come schema `nutrition`, cosi' le
+letture cross-DB dei piani alimentari diventano una sola query joined.
 
 Perche' SQLModel e non sqlite3 raw:
 - Cambi DATABASE_URL e passi a PostgreSQL senza toccare una query
@@ -14,12 +19,21 @@ Perche' SQLModel e non sqlite3 raw:
 """
 
 import logging
-from typing import Generator
+import sys
+from pathlib import Path
+from typing import Generator, Optional
 
 from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
 from sqlmodel import SQLModel, Session, create_engine
 
-from api.config import CATALOG_DATABASE_URL, DATABASE_URL, NUTRITION_DATABASE_URL
+from api.config import (
+    CATALOG_DATABASE_URL,
+    DATABASE_URL,
+    NUTRITION_DATABASE_URL,
+    REFERENCE_DB_ATTACH,
+)
+from api.services.runtime_metrics import instrument_engine
 import api.models.share_token  # noqa: F401 — registra ShareToken nel metadata SQLModel
 import api.models.nutrition  # noqa: F401 — registra modelli nutrition nel metadata SQLModel
 
@@ -43,11 +57,78 @@ def _setup_sqlite_pragmas(dbapi_conn, connection_record):
     cursor.close()
 
 
+# --- ATTACH read-only dei DB di riferimento ---
+
+NUTRITION_ATTACH_SCHEMA = "nutrition"
+
+# Chiave in connection_record.info: schemi effettivamente agganciati alla connessione
+_ATTACHED_INFO_KEY = "reference_attached_schemas"
+
+
+def sqlite_file_path(url: str) -> Optional[Path]:
+    """Path del file SQLite di un URL, None per DB non-SQLite o in-memory."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite":
+        return None
+    if not parsed.database or parsed.database == ":memory:":
+        return None
+    return Path(parsed.database).resolve()
+
+
+def attach_reference_databases(target_engine: Engine, databases: dict[str, Path]) -> None:
+    """
+    Aggancia in read-only i DB di riferimento alle connessioni dell'engine.
+
+    L'engine deve essere creato con connect_args uri=True: l'ATTACH usa un URI
+    `file:...?mode=ro`, cosi' il catalogo resta immodificabile dalla session business.
+    Un file non ancora creato (prima installazione: il business DB nasce prima dei
+    DB di riferimento) viene saltato e agganciato al primo checkout successivo.
+    """
+    def _attach_available(dbapi_conn, info: dict) -> None:
+        attached: set[str] = info.setdefault(_ATTACHED_INFO_KEY, set())
+        missing = [s for s in databases if s not in attached and databases[s].exists()]
+        if not missing:
+            return
+        cursor = dbapi_conn.cursor()
+        for schema in missing:
+            cursor.execute(
+                f"ATTACH DATABASE ? AS {schema}",
+                (f"{databases[schema].as_uri()}?mode=ro",),
+            )
+            attached.add(schema)
+        cursor.close()
+
+    def _on_connect(dbapi_conn, connection_record):
+        _attach_available(dbapi_conn, connection_record.info)
+
+    def _on_checkout(dbapi_conn, connection_record, connection_proxy):
+        if len(connection_record.info.get(_ATTACHED_INFO_KEY, ())) < len(databases):
+            _attach_available(dbapi_conn, connection_record.info)
+
+    event.listen(target_engine, "connect", _on_connect)
+    event.listen(target_engine, "checkout", _on_checkout)
+
+
+def has_reference_attach(session: Session, schema: str = NUTRITION_ATTACH_SCHEMA) -> bool:
+    """True se la connessione della session business vede `schema` come DB attached."""
+    return schema in session.connection().info.get(_ATTACHED_INFO_KEY, ())
+
+
 # --- Business Engine (data.db / crm.db) ---
 
+_reference_attach_paths: dict[str, Path] = {}
+if REFERENCE_DB_ATTACH and sqlite_file_path(DATABASE_URL) is not None:
+    _nutrition_path = sqlite_file_path(NUTRITION_DATABASE_URL)
+    if _nutrition_path is not None:
+        _reference_attach_paths = {NUTRITION_ATTACH_SCHEMA: _nutrition_path}
+    else:
+        logger.warning("REFERENCE_DB_ATTACH ignorato: nutrition non e' un file SQLite")
+
 _connect_args = {}
 if DATABASE_URL.startswith("sqlite"):
     _connect_args = {"check_same_thread": False}
+    if _reference_attach_paths:
+        _connect_args["uri"] = True
 
 engine = create_engine(
     DATABASE_URL,
@@ -58,6 +139,11 @@ engine = create_engine(
 if DATABASE_URL.startswith("sqlite"):
     event.listen(engine, "connect", _setup_sqlite_pragmas)
 
+if _reference_attach_paths:
+    attach_reference_databases(engine, _reference_attach_paths)
+
+instrument_engine("business", engine)
+
 # --- Catalog Engine (catalog.db) ---
 
 _catalog_connect_args = {}
@@ -73,6 +159,8 @@ catalog_engine = create_engine(
 if CATALOG_DATABASE_URL.startswith("sqlite"):
     event.listen(catalog_engine, "connect", _setup_sqlite_pragmas)
 
+instrument_engine("catalog", catalog_engine)
+
 # --- Nutrition Engine (nutrition.db) ---
 
 _nutrition_connect_args = {}
@@ -88,6 +176,8 @@ nutrition_engine = create_engine(
 if NUTRITION_DATABASE_URL.startswith("sqlite"):
     event.listen(nutrition_engine, "connect", _setup_sqlite_pragmas)
 
+instrument_engine("nutrition", nutrition_engine)
+
 
 # --- Table creation ---
 
@@ -152,6 +242,18 @@ def create_nutrition_tables() -> None:
     SQLModel.metadata.create_all(nutrition_engine, tables=tables)
 
 
+def close_legacy_connections() -> None:
+    """
+    Chiude le connessioni riusate del layer legacy (core/repositories), se caricato.
+
+    Niente import se il layer non e' in uso: core.error_handler configura il
+    logging root al primo import.
+    """
+    legacy = sys.modules.get("core.repositories.base_repository")
+    if legacy is not None:
+        legacy.close_pooled_connections()
+
+
 # --- Session factories ---
 
 
@@ -5,17 +5,37 @@ Obiettivo:
 - scrivere log applicativi in data/logs/
 - evitare duplicazione handler su reload/import multipli
 - lasciare intatti gli handler console configurati da uvicorn
+- nessun I/O su disco nel thread della richiesta
+
+Pipeline non bloccante: i logger scrivono su una coda limitata
+(QueueHandler), un thread dedicato (QueueListener) la svuota sul
+RotatingFileHandler. Scrittura e rotazione del file non rallentano piu'
+le richieste. Coda piena (disco lento, burst):
+  - "drop":  DEBUG/INFO scartati (contati), WARNING+ attendono fino a 1s
+  - "block": il chiamante attende sempre (nessuna perdita)
+
+Formato "json": una riga JSON per record con request_id, route e
+duration_ms quando presenti (contesto richiesta via bind_request_context).
 """
 
 from __future__ import annotations
 
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+import threading
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
+from typing import Optional
 
 DEFAULT_LOG_FILENAME = "fitmanager.log"
 DEFAULT_LOG_FORMAT = "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
 DEFAULT_LOG_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+DEFAULT_QUEUE_SIZE = 10_000
+LOG_FORMATS = ("text", "json")
+OVERFLOW_POLICIES = ("drop", "block")
+_PRIORITY_PUT_TIMEOUT = 1.0
 
 
 def get_log_dir(data_dir: Path) -> Path:
@@ -44,31 +64,228 @@ def _has_file_handler(logger: logging.Logger, log_path: Path) -> bool:
     return False
 
 
-def _attach_rotating_file_handler(
+# ════════════════════════════════════════════════════════════
+# CONTESTO RICHIESTA
+# ════════════════════════════════════════════════════════════
+
+_request_id: ContextVar[Optional[str]] = ContextVar("log_request_id", default=None)
+_route: ContextVar[Optional[str]] = ContextVar("log_route", default=None)
+
+
+def bind_request_context(request_id: Optional[str], route: Optional[str]) -> None:
+    """Associa request id e route ai log emessi nel contesto corrente."""
+    _request_id.set(request_id)
+    _route.set(route)
+
+
+class RequestContextFilter(logging.Filter):
+    """Copia request_id/route sul record nel thread chiamante (il listener non ha contesto)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "request_id", None) is None:
+            record.request_id = _request_id.get()
+        if getattr(record, "route", None) is None:
+            record.route = _route.get()
+        return True
+
+
+class JsonLineFormatter(logging.Formatter):
+    """Una riga JSON per record; campi di contesto solo se valorizzati."""
+
+    _CONTEXT_FIELDS = ("request_id", "route", "method", "status_code", "duration_ms")
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": self.formatTime(record, DEFAULT_LOG_DATE_FORMAT),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for name in self._CONTEXT_FIELDS:
+            value = getattr(record, name, None)
+            if value is not None:
+                payload[name] = value
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+# ════════════════════════════════════════════════════════════
+# PIPELINE A CODA
+# ════════════════════════════════════════════════════════════
+
+
+class _DrainingListener(QueueListener):
+    """Sentinel di stop accodato anche a coda piena: attende il drain invece di fallire."""
+
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel)
+
+
+class _LogPipeline:
+    """Coda limitata + listener + file handler per un singolo file di log."""
+
+    def __init__(self, file_handler: logging.Handler, queue_size: int, overflow: str):
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.file_handler = file_handler
+        self.overflow = overflow
+        self.dropped = 0
+        self._listener: Optional[QueueListener] = _DrainingListener(
+            self.queue, file_handler, respect_handler_level=True,
+        )
+        self._listener.start()
+
+    def put(self, record: logging.LogRecord) -> None:
+        if self._listener is None:  # pipeline fermata (shutdown): scrittura diretta
+            self.file_handler.handle(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+        if self.overflow == "block":
+            self.queue.put(record)
+            return
+        if record.levelno >= logging.WARNING:
+            try:
+                self.queue.put(record, timeout=_PRIORITY_PUT_TIMEOUT)
+                return
+            except queue.Full:
+                pass
+        self.dropped += 1
+
+    def flush(self) -> None:
+        """Attende che il listener abbia scritto tutto cio' che e' in coda."""
+        if self._listener is not None:
+            self.queue.join()
+        self.file_handler.flush()
+
+    def stop(self) -> None:
+        listener, self._listener = self._listener, None
+        if listener is None:
+            return
+        listener.stop()  # svuota la coda prima di terminare
+        if self.dropped:
+            self.file_handler.handle(logging.makeLogRecord({
+                "name": __name__,
+                "levelno": logging.WARNING,
+                "levelname": "WARNING",
+                "msg": f"Coda log piena: {self.dropped} record scartati",
+            }))
+        self.file_handler.close()
+
+
+class AppQueueHandler(QueueHandler):
+    """
+    QueueHandler verso una _LogPipeline.
+
+    baseFilename replica il file di destinazione (come i FileHandler):
+    serve al de-dup degli handler e alla diagnostica.
+    """
+
+    def __init__(self, pipeline: _LogPipeline, log_path: Path, level: int):
+        super().__init__(pipeline.queue)
+        self.pipeline = pipeline
+        self.baseFilename = str(log_path)
+        self.setLevel(level)
+        self.addFilter(RequestContextFilter())
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        self.pipeline.put(record)
+
+    def flush(self) -> None:
+        self.pipeline.flush()
+
+    def close(self) -> None:
+        self.pipeline.stop()
+        super().close()
+
+
+_pipelines_lock = threading.Lock()
+_pipelines: dict[str, _LogPipeline] = {}
+
+
+def _get_pipeline(
+    log_path: Path,
+    level: int,
+    max_bytes: int,
+    backup_count: int,
+    log_format: str,
+    queue_size: int,
+    overflow: str,
+) -> _LogPipeline:
+    """Una pipeline per file: root e uvicorn.error condividono coda e listener."""
+    key = str(log_path.resolve())
+    with _pipelines_lock:
+        pipeline = _pipelines.get(key)
+        if pipeline is not None and pipeline._listener is not None:
+            return pipeline
+
+        handler = RotatingFileHandler(
+            filename=str(log_path),
+            maxBytes=max_bytes,
+            backupCount=backup_count,
+            encoding="utf-8",
+            delay=True,
+        )
+        handler.setLevel(level)
+        if log_format == "json":
+            handler.setFormatter(JsonLineFormatter())
+        else:
+            handler.setFormatter(
+                logging.Formatter(
+                    fmt=DEFAULT_LOG_FORMAT,
+                    datefmt=DEFAULT_LOG_DATE_FORMAT,
+                )
+            )
+        pipeline = _LogPipeline(handler, queue_size=queue_size, overflow=overflow)
+        _pipelines[key] = pipeline
+        return pipeline
+
+
+def _attach_queued_file_handler(
     logger: logging.Logger,
     log_path: Path,
     level: int,
     max_bytes: int,
     backup_count: int,
+    log_format: str,
+    queue_size: int,
+    overflow: str,
 ) -> None:
     if _has_file_handler(logger, log_path):
         return
 
-    handler = RotatingFileHandler(
-        filename=str(log_path),
-        maxBytes=max_bytes,
-        backupCount=backup_count,
-        encoding="utf-8",
-        delay=True,
+    pipeline = _get_pipeline(
+        log_path, level, max_bytes, backup_count, log_format, queue_size, overflow,
     )
-    handler.setLevel(level)
-    handler.setFormatter(
-        logging.Formatter(
-            fmt=DEFAULT_LOG_FORMAT,
-            datefmt=DEFAULT_LOG_DATE_FORMAT,
-        )
-    )
-    logger.addHandler(handler)
+    logger.addHandler(AppQueueHandler(pipeline, log_path, level))
+
+
+def log_pipeline_stats() -> dict[str, dict[str, int]]:
+    """Per file di log: record in coda, capacita', record scartati."""
+    with _pipelines_lock:
+        return {
+            path: {
+                "queued": p.queue.qsize(),
+                "capacity": p.queue.maxsize,
+                "dropped": p.dropped,
+            }
+            for path, p in _pipelines.items()
+        }
+
+
+def shutdown_app_logging() -> None:
+    """
+    Svuota le code e chiude i file (shutdown app, dal lifespan). Idempotente.
+
+    Gli handler restano agganciati: i record successivi (es. log di uvicorn
+    a fine processo) vengono scritti in modo sincrono, senza coda.
+    """
+    with _pipelines_lock:
+        pipelines = list(_pipelines.values())
+        _pipelines.clear()
+    for pipeline in pipelines:
+        pipeline.stop()
 
 
 def _set_minimum_level(logger: logging.Logger, level: int) -> None:
@@ -81,15 +298,25 @@ def configure_app_logging(
     level_name: str = "INFO",
     max_bytes: int = 1_000_000,
     backup_count: int = 5,
+    log_format: str = "text",
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    overflow: str = "drop",
 ) -> Path:
     """
     Configura il logging locale dell'app.
 
     Strategia:
-    - aggiunge un RotatingFileHandler al root logger
-    - se `uvicorn.error` non propaga al root, gli aggiunge lo stesso file handler
+    - aggiunge al root logger un QueueHandler verso il RotatingFileHandler
+    - se `uvicorn.error` non propaga al root, gli aggiunge un handler sulla stessa coda
     - non tocca gli handler console gia presenti
+
+    log_format: "text" | "json"; overflow: "drop" | "block" (coda piena).
     """
+    if log_format not in LOG_FORMATS:
+        raise ValueError(f"log_format non valido: {log_format!r} (ammessi: {', '.join(LOG_FORMATS)})")
+    if overflow not in OVERFLOW_POLICIES:
+        raise ValueError(f"overflow non valido: {overflow!r} (ammessi: {', '.join(OVERFLOW_POLICIES)})")
+
     log_dir = get_log_dir(data_dir)
     log_dir.mkdir(parents=True, exist_ok=True)
 
@@ -98,23 +325,29 @@ def configure_app_logging(
 
     root_logger = logging.getLogger()
     _set_minimum_level(root_logger, level)
-    _attach_rotating_file_handler(
+    _attach_queued_file_handler(
         root_logger,
         log_path=log_path,
         level=level,
         max_bytes=max_bytes,
         backup_count=backup_count,
+        log_format=log_format,
+        queue_size=queue_size,
+        overflow=overflow,
     )
 
     uvicorn_error_logger = logging.getLogger("uvicorn.error")
     _set_minimum_level(uvicorn_error_logger, level)
     if not uvicorn_error_logger.propagate:
-        _attach_rotating_file_handler(
+        _attach_queued_file_handler(
             uvicorn_error_logger,
             log_path=log_path,
             level=level,
             max_bytes=max_bytes,
             backup_count=backup_count,
+            log_format=log_format,
+            queue_size=queue_size,
+            overflow=overflow,
         )
 
     return log_path
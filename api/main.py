@@ -14,12 +14,16 @@ Migrazioni schema gestite da Alembic: `alembic upgrade head`
 
 import logging
 import sqlite3
+import time
+import uuid
 from contextlib import asynccontextmanager
 from pathlib import Path
 
+import anyio.to_thread
 from fastapi import Depends, FastAPI, Request, Response, status
+from fastapi.datastructures import Default
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, PlainTextResponse
 from starlette.staticfiles import StaticFiles
 from sqlmodel import Session
 
@@ -29,16 +33,26 @@ from api.database import get_catalog_session, get_session
 
 from api.config import (
     API_PREFIX,
+    API_THREADPOOL_SIZE,
+    APP_LOG_ACCESS,
     APP_LOG_BACKUP_COUNT,
+    APP_LOG_FORMAT,
     APP_LOG_LEVEL,
     APP_LOG_MAX_BYTES,
+    APP_LOG_OVERFLOW,
+    APP_LOG_QUEUE_SIZE,
     CATALOG_DATABASE_URL,
     DATA_DIR,
     DATABASE_URL,
+    FAST_JSON_RESPONSES,
     NUTRITION_DATABASE_URL,
 )
-from api.database import create_catalog_tables, create_db_and_tables, create_nutrition_tables, engine
-from api.logging_config import configure_app_logging
+from api.database import (
+    catalog_engine, close_legacy_connections, create_catalog_tables, create_db_and_tables,
+    create_nutrition_tables, engine,
+)
+from api.responses import FastJSONResponse, log_json_backend
+from api.logging_config import bind_request_context, configure_app_logging, shutdown_app_logging
 from api.seed_exercises import seed_builtin_exercises, seed_exercise_media, seed_exercise_relations
 from api.services.license import check_license
 from api.auth.router import router as auth_router
@@ -63,6 +77,19 @@ from api.routers.training_science import router as training_science_router
 from api.routers.training_methodology import router as training_methodology_router
 from api.routers.workspace import router as workspace_router
 from api.routers.nutrition import router as nutrition_router
+from api.routers.jobs import router as jobs_router
+from api.services.catalog_registry import warm_catalog
+from api.services.job_runner import get_job_runner, shutdown_job_runner
+from api.services.plan_analysis_cache import purge_plan_analysis_cache
+from api.services.client_activity import reconcile_client_activity
+from api.services.pt_credits import reconcile_credits
+from api.services.response_cache import serve_cached
+from api.services.runtime_metrics import (
+    render_prometheus,
+    request_finished,
+    request_started,
+    route_template,
+)
 from api.services.system_runtime import (
     BACKUP_DIR,
     build_health_response,
@@ -74,13 +101,18 @@ APP_LOG_PATH = configure_app_logging(
     level_name=APP_LOG_LEVEL,
     max_bytes=APP_LOG_MAX_BYTES,
     backup_count=APP_LOG_BACKUP_COUNT,
+    log_format=APP_LOG_FORMAT,
+    queue_size=APP_LOG_QUEUE_SIZE,
+    overflow=APP_LOG_OVERFLOW,
 )
 logger = logging.getLogger("fitmanager.api")
+access_logger = logging.getLogger("fitmanager.access")
 
 MAX_AUTO_BACKUPS = 5  # solo gli ultimi 5 backup automatici
 
 LICENSE_EXEMPT_PATHS = {
     "/health",
+    "/metrics",
     "/docs",
     "/redoc",
     "/openapi.json",
@@ -164,27 +196,43 @@ async def lifespan(app: FastAPI):
     Lifecycle dell'app.
 
     Startup sequence:
+    0. Log configurazione (file log, database, backend JSON)
     1. Auto-backup (solo prod, non dev — protegge dati reali)
     2. Crea tabelle business (CREATE IF NOT EXISTS)
-    3. Inizializza catalog DB
+    3. Inizializza catalog DB + registro catalogo in memoria; 3b. nutrition DB
     4. Seed esercizi builtin
     5. Integrity check
+    6. Dimensionamento threadpool (API_THREADPOOL_SIZE)
+    7. Job in background: recupero job interrotti + pulizia job scaduti
+    8. Pulizia cache analisi piani (versioni precedenti / righe vecchie)
+    9. Riconciliazione contatori crediti PT (drift da import / modifiche esterne)
+    10. Riconciliazione ultima attivita' clienti (clienti_attivita)
+
+    I passi 3 (registro catalogo) e 7-10 sono di manutenzione: un errore viene
+    loggato e l'avvio prosegue.
+
+    Shutdown: stop del job runner, chiusura delle connessioni legacy (core/),
+    poi svuotamento della coda log su file.
     """
     db_label = "DEV (crm_dev.db)" if "crm_dev" in DATABASE_URL else "PROD (crm.db)"
     is_dev = "crm_dev" in DATABASE_URL
     logger.info(f"API startup: database {db_label}")
     logger.info(f"  LOG_FILE = {APP_LOG_PATH}")
     logger.info(
-        "  LOG_POLICY = level=%s max_bytes=%s backup_count=%s",
+        "  LOG_POLICY = level=%s max_bytes=%s backup_count=%s format=%s queue=%s overflow=%s",
         APP_LOG_LEVEL,
         APP_LOG_MAX_BYTES,
         APP_LOG_BACKUP_COUNT,
+        APP_LOG_FORMAT,
+        APP_LOG_QUEUE_SIZE,
+        APP_LOG_OVERFLOW,
     )
     # Maschera credenziali per PostgreSQL (user:pass@host)
     safe_url = DATABASE_URL
     if "@" in DATABASE_URL:
         safe_url = DATABASE_URL.split("@", 1)[0].rsplit(":", 1)[0] + ":***@" + DATABASE_URL.split("@", 1)[1]
     logger.info(f"  DATABASE_URL = {safe_url}")
+    log_json_backend(logger)
 
     # ── 1. Auto-backup (solo prod) ──
     if not is_dev and DATABASE_URL.startswith("sqlite"):
@@ -200,6 +248,10 @@ async def lifespan(app: FastAPI):
                        "Eseguire: python -m tools.admin_scripts.build_catalog")
     create_catalog_tables()
     logger.info(f"  CATALOG_DB = {catalog_path}")
+    try:
+        warm_catalog(catalog_engine)
+    except Exception as e:
+        logger.warning("Registro catalogo non caricato all'avvio (caricamento lazy): %s", e)
 
     # ── 3b. Nutrition DB ──
     nutrition_path = NUTRITION_DATABASE_URL.replace("sqlite:///", "")
@@ -222,9 +274,48 @@ async def lifespan(app: FastAPI):
     if Path(nutrition_path).exists():
         _integrity_check_on_startup(NUTRITION_DATABASE_URL, NUTRITION_DATABASE_URL)
 
+    # ── 6. Threadpool endpoint sync (gli endpoint pesanti usano pool dedicati) ──
+    anyio.to_thread.current_default_thread_limiter().total_tokens = API_THREADPOOL_SIZE
+    logger.info(f"  THREADPOOL = {API_THREADPOOL_SIZE}")
+
+    # ── 7. Job in background (non bloccante: i job restano gestibili al primo uso) ──
+    try:
+        job_runner = get_job_runner()
+        job_runner.recover_interrupted()
+        job_runner.purge_expired()
+    except Exception as e:
+        logger.warning("Recupero/pulizia job in background non eseguiti: %s", e)
+
+    # ── 8. Cache analisi piani (non bloccante: le chiavi di versioni precedenti non vengono lette) ──
+    try:
+        with SyncSession(engine) as session:
+            purge_plan_analysis_cache(session)
+    except Exception as e:
+        logger.warning("Pulizia cache analisi piani non eseguita: %s", e)
+
+    # ── 9. Contatori crediti PT (non bloccante: es. DB non ancora migrato) ──
+    try:
+        with SyncSession(engine) as session:
+            reconcile_credits(session)
+    except Exception as e:
+        logger.warning("Riconciliazione crediti PT non eseguita: %s", e)
+
+    # ── 10. Ultima attivita' clienti (clienti_attivita) ──
+    try:
+        with SyncSession(engine) as session:
+            reconcile_client_activity(session)
+    except Exception as e:
+        logger.warning("Riconciliazione attivita' clienti non eseguita: %s", e)
+
     logger.info("API pronta")
     yield
+    try:
+        shutdown_job_runner()
+    except Exception as e:
+        logger.warning("Stop job runner non riuscito: %s", e)
+    close_legacy_connections()
     logger.info("API shutdown")
+    shutdown_app_logging()  # ultimo: svuota la coda log su file
 
 
 # --- App FastAPI ---
@@ -234,8 +325,18 @@ app = FastAPI(
     version=__version__,
     description="REST API per il CRM fitness. Multi-tenant, JWT auth, database-agnostic.",
     lifespan=lifespan,
+    # Default(...): le route con response_model tipizzato mantengono la serializzazione Pydantic diretta
+    default_response_class=Default(FastJSONResponse if FAST_JSON_RESPONSES else JSONResponse),
 )
 
+
+# Cache ETag dati di riferimento: registrato per primo → piu' interno, sotto CORS e licenza
+@app.middleware("http")
+async def response_cache_middleware(request: Request, call_next):
+    """Risposte @cache_response servite dalla memoria / 304 su If-None-Match."""
+    return await serve_cached(request, call_next)
+
+
 # CORS: regex per accettare localhost, LAN (192.168.x.x), Tailscale (100.x.x.x)
 # Nessun IP hardcodato — funziona da qualsiasi rete automaticamente.
 app.add_middleware(
@@ -269,6 +370,7 @@ async def license_middleware(request: Request, call_next):
     if result.is_valid:
         return await call_next(request)
 
+    request.state.metrics_route = "license_denied"
     return JSONResponse(
         status_code=status.HTTP_403_FORBIDDEN,
         content={
@@ -277,6 +379,41 @@ async def license_middleware(request: Request, call_next):
         },
     )
 
+
+# Registrato per ultimo → piu' esterno: la durata copre licenza, cache e CORS
+@app.middleware("http")
+async def request_context_middleware(request: Request, call_next):
+    """
+    Request id + route nel contesto dei log, metriche runtime (conteggi,
+    latenze, in corso), riga di accesso opzionale (APP_LOG_ACCESS).
+    """
+    request_id = (request.headers.get("x-request-id") or uuid.uuid4().hex[:12])[:64]
+    bind_request_context(request_id, request.url.path)
+    started = time.perf_counter()
+    status_code = 500
+    request_started()
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+    finally:
+        # Template della route, non il path: cardinalita' limitata
+        route_path = route_template(request.scope)
+        elapsed = time.perf_counter() - started
+        request_finished(request.method, route_path, status_code, elapsed)
+    response.headers["X-Request-ID"] = request_id
+    if APP_LOG_ACCESS:
+        duration_ms = round(elapsed * 1000, 1)
+        access_logger.info(
+            "%s %s %s %.1fms", request.method, route_path, status_code, duration_ms,
+            extra={
+                "route": route_path,
+                "method": request.method,
+                "status_code": status_code,
+                "duration_ms": duration_ms,
+            },
+        )
+    return response
+
 # Static files: serve media (immagini/video esercizi)
 # Usa DATA_DIR da config.py (gestisce PyInstaller frozen correttamente)
 _media_dir = DATA_DIR / "media"
@@ -306,6 +443,7 @@ app.include_router(training_science_router, prefix=API_PREFIX)
 app.include_router(training_methodology_router, prefix=API_PREFIX)
 app.include_router(workspace_router, prefix=API_PREFIX)
 app.include_router(nutrition_router, prefix=API_PREFIX)
+app.include_router(jobs_router, prefix=API_PREFIX)
 
 
 @app.get("/health", response_model=HealthResponse)
@@ -319,3 +457,18 @@ def health_check(
     if health.status != "ok":
         response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
     return health
+
+
+_LOCAL_HOSTS = {"127.0.0.1", "::1", "localhost"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """Metriche runtime in formato Prometheus — solo da localhost (nessun JWT)."""
+    host = request.client.host if request.client else None
+    if host not in _LOCAL_HOSTS:
+        return JSONResponse(
+            status_code=status.HTTP_403_FORBIDDEN,
+            content={"detail": "Metriche disponibili solo da localhost"},
+        )
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
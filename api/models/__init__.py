@@ -1,5 +1,7 @@
 from .trainer import Trainer
 from .client import Client
+from .anamnesi_facts import ClientAnamnesiFacts, ClientConditionFact
+from .client_activity import ClientActivity
 from .contract import Contract
 from .rate import Rate
 from .event import Event
@@ -17,10 +19,15 @@ from .medical_condition import MedicalCondition, ExerciseCondition
 from .measurement import Metric, ClientMeasurement, MeasurementValue
 from .goal import ClientGoal
 from .workout_log import WorkoutLog
+from .background_job import BackgroundJob
+from .plan_analysis import PlanAnalysisCache
 
 __all__ = [
     "Trainer",
     "Client",
+    "ClientAnamnesiFacts",
+    "ClientConditionFact",
+    "ClientActivity",
     "Contract",
     "Rate",
     "Event",
@@ -45,4 +52,6 @@ __all__ = [
     "MeasurementValue",
     "ClientGoal",
     "WorkoutLog",
+    "BackgroundJob",
+    "PlanAnalysisCache",
 ]
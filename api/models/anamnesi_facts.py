@@ -0,0 +1,42 @@
+"""
+Modelli fatti derivati dall'anamnesi — calcolati una volta in scrittura.
+
+ClientAnamnesiFacts: 1:1 con clienti — stato, data di riferimento, flag
+    farmacologici, peso/altezza estratti da `clienti.anamnesi_json`.
+ClientConditionFact: condition_id rilevate (safety engine), una riga per
+    coppia cliente/condizione → filtri roster-wide in SQL puro.
+
+Aggiornati da api.services.anamnesi_facts.refresh_anamnesi_facts() ad ogni
+scrittura di anamnesi_json; facts_version diverso da FACTS_VERSION (regole
+cambiate) → riga ignorata in lettura e fatti riderivati. condition_id punta a condizioni_mediche in
+catalog.db: nessuna FK (cross-DB).
+"""
+
+from datetime import date, datetime, timezone
+from typing import Optional
+
+from sqlmodel import Field, SQLModel
+
+
+class ClientAnamnesiFacts(SQLModel, table=True):
+    """Fatti scalari derivati dall'anamnesi di un cliente."""
+    __tablename__ = "clienti_anamnesi_facts"
+
+    client_id: int = Field(foreign_key="clienti.id", primary_key=True)
+    trainer_id: Optional[int] = Field(default=None, foreign_key="trainers.id", index=True)
+    stato: str = Field(default="missing", index=True)          # missing | legacy | structured
+    data_riferimento: Optional[date] = Field(default=None, index=True)
+    medication_flags: Optional[str] = None                     # JSON lista flag (MEDICATION_RULES)
+    peso_kg: Optional[float] = None
+    altezza_cm: Optional[float] = None
+    facts_version: Optional[str] = None                        # FACTS_VERSION della derivazione
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class ClientConditionFact(SQLModel, table=True):
+    """Condizione medica rilevata nell'anamnesi di un cliente."""
+    __tablename__ = "clienti_condizioni"
+
+    client_id: int = Field(foreign_key="clienti.id", primary_key=True)
+    condition_id: int = Field(primary_key=True, index=True)
+    trainer_id: Optional[int] = Field(default=None, foreign_key="trainers.id", index=True)
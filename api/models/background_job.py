@@ -0,0 +1,35 @@
+"""
+Modello BackgroundJob — operazioni lunghe eseguite fuori dalla richiesta HTTP.
+
+Una riga per job: tipo, parametri, stato, avanzamento, risultato e path
+dell'eventuale artefatto su disco (relativo a JOB_ARTIFACTS_DIR).
+Gestito da api.services.job_runner; letto da GET /api/jobs.
+"""
+
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlmodel import Field, SQLModel
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed", "cancelled")
+JOB_FINAL_STATUSES = ("succeeded", "failed", "cancelled")
+
+
+class BackgroundJob(SQLModel, table=True):
+    """Job in background di un trainer."""
+    __tablename__ = "background_jobs"
+
+    id: str = Field(primary_key=True)                          # uuid4 hex
+    trainer_id: int = Field(foreign_key="trainers.id", index=True)
+    kind: str = Field(index=True)                              # es. backup_create, backup_export
+    status: str = Field(default="queued", index=True)          # JOB_STATUSES
+    progress: int = Field(default=0)                           # 0-100
+    message: Optional[str] = None
+    params_json: Optional[str] = None
+    result_json: Optional[str] = None
+    error: Optional[str] = None
+    artifact: Optional[str] = None                             # nome file in JOB_ARTIFACTS_DIR
+    cancel_requested: bool = Field(default=False)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -31,6 +31,8 @@ class Client(SQLModel, table=True):
     sesso: Optional[str] = None
     anamnesi_json: Optional[str] = None
     stato: str = Field(default="Attivo")
+    # Mantenuto in scrittura da api/services/pt_credits.py (mai ricontato in lettura)
+    crediti_residui: int = Field(default=0)
     note_interne: Optional[str] = None
     data_creazione: Optional[datetime] = Field(default_factory=lambda: datetime.now(timezone.utc))
     deleted_at: Optional[datetime] = None
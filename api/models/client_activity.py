@@ -0,0 +1,29 @@
+"""
+Modello ClientActivity — ultima attivita' per cliente, mantenuta in scrittura.
+
+1:1 con clienti. Date dell'ultimo evento (qualsiasi stato non cancellato,
+completato, programmato), dell'ultimo allenamento eseguito e dell'ultima
+misurazione. Aggiornato da api.services.client_activity ad ogni scrittura su
+agenda, allenamenti_eseguiti e misurazioni_cliente: le query di inattivita'
+e freschezza leggono colonne indicizzate invece di MAX() / NOT EXISTS.
+"""
+
+from datetime import date, datetime, timezone
+from typing import Optional
+
+from sqlmodel import Field, SQLModel
+
+
+class ClientActivity(SQLModel, table=True):
+    """Ultime attivita' registrate di un cliente."""
+    __tablename__ = "clienti_attivita"
+
+    client_id: int = Field(foreign_key="clienti.id", primary_key=True)
+    trainer_id: Optional[int] = Field(default=None, foreign_key="trainers.id", index=True)
+    ultimo_evento_at: Optional[datetime] = Field(default=None, index=True)   # non cancellato, anche futuro
+    ultimo_evento_categoria: Optional[str] = None
+    ultimo_completato_at: Optional[datetime] = None
+    ultimo_programmato_at: Optional[datetime] = None
+    ultimo_allenamento_data: Optional[date] = None
+    ultima_misurazione_data: Optional[date] = Field(default=None, index=True)
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
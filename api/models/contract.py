@@ -44,6 +44,7 @@ class Contract(SQLModel, table=True):
     data_inizio: Optional[date] = None
     data_scadenza: Optional[date] = None
     crediti_totali: Optional[int] = None
+    # Eventi PT che consumano il contratto — mantenuto da api/services/pt_credits.py
     crediti_usati: int = Field(default=0)
     prezzo_totale: Optional[float] = None
     acconto: float = Field(default=0)
@@ -35,7 +35,7 @@ class Event(SQLModel, table=True):
     data_fine: datetime
     categoria: str
     titolo: Optional[str] = None
-    id_cliente: Optional[int] = Field(default=None, foreign_key="clienti.id")
+    id_cliente: Optional[int] = Field(default=None, foreign_key="clienti.id", index=True)
     id_contratto: Optional[int] = Field(default=None, foreign_key="contratti.id")
     stato: str = Field(default="Programmato")
     note: Optional[str] = None
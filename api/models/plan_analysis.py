@@ -0,0 +1,24 @@
+"""
+Modello PlanAnalysisCache — risultati di analyze_plan() per contenuto.
+
+Chiave: sha256 di (versione analizzatore + versione app + TemplatePiano JSON).
+Piani con lo stesso contenuto condividono la riga; una modifica a sessioni,
+esercizi o profilo cliente produce un hash nuovo, quindi niente invalidazione
+esplicita. Righe di versioni precedenti o troppo vecchie eliminate all'avvio.
+Gestito da api.services.plan_analysis_cache.
+"""
+
+from datetime import datetime, timezone
+
+from sqlmodel import Field, SQLModel
+
+
+class PlanAnalysisCache(SQLModel, table=True):
+    """Analisi di un TemplatePiano (AnalisiPiano serializzata)."""
+    __tablename__ = "schede_analisi_cache"
+
+    content_hash: str = Field(primary_key=True)
+    analyzer_version: str = Field(index=True)
+    score: float
+    analysis_json: str
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), index=True)
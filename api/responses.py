@@ -0,0 +1,72 @@
+"""
+Serializzazione JSON veloce per le risposte API (orjson).
+
+- FastJSONResponse: JSONResponse con orjson (json stdlib se orjson non e'
+  installato: percorso lento, segnalato all'avvio da log_json_backend()). Modelli Pydantic serializzati dal core Rust (model_dump_json),
+  senza dict intermedi ne' jsonable_encoder.
+- fast_response(): per gli endpoint che costruiscono gia' il modello di
+  risposta. Restituisce direttamente una Response: FastAPI salta la
+  ri-validazione contro response_model e l'encoder generico. Il
+  response_model resta sulla route (OpenAPI + contratto): il contenuto
+  passato DEVE essere gia' quel modello.
+- FAST_JSON_RESPONSES=true: FastJSONResponse come classe di default
+  dell'app, per le route senza modello tipizzato (es. response_model=dict).
+  Le route tipizzate mantengono la serializzazione diretta di Pydantic.
+"""
+
+import json
+import logging
+from decimal import Decimal
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # dipendenza opzionale: fallback stdlib
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    """Tipi non nativi per orjson: modelli annidati in dict/list, Decimal, set."""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Tipo non serializzabile in JSON: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """Contenuto → JSON bytes compatto (stesso output di JSONResponse, piu' veloce)."""
+    if isinstance(content, BaseModel):
+        return content.model_dump_json().encode("utf-8")
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        jsonable_encoder(content),
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse serializzata con orjson / core Pydantic."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def log_json_backend(logger: logging.Logger) -> None:
+    """Avvio: segnala una volta se le risposte usano il fallback json stdlib."""
+    if orjson is None:
+        logger.warning("orjson non installato: risposte JSON con json stdlib (percorso lento)")
+
+
+def fast_response(content: Any, status_code: int = 200) -> FastJSONResponse:
+    """Risposta gia' validata: nessun passaggio da response_model / jsonable_encoder."""
+    return FastJSONResponse(content=content, status_code=status_code)
@@ -15,12 +15,17 @@ Validazioni:
 - durata massima 4 ore
 - categoria in SessionCategory enum
 - Conflict Prevention: no sovrapposizioni temporali per lo stesso trainer
+
+Crediti PT: create / cambio stato / delete aggiornano nella stessa transazione
+contratti.crediti_usati e clienti.crediti_residui (api/services/pt_credits.py).
+Ultima attivita' del cliente (clienti_attivita) aggiornata nella stessa
+transazione (api/services/client_activity.py).
 """
 
 from datetime import datetime, timezone
 from typing import Dict, List, Optional, Tuple
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlmodel import Session, select, func
+from sqlmodel import Session, select
 from pydantic import BaseModel, Field, field_validator, model_validator
 
 from api.database import get_session
@@ -29,7 +34,10 @@ from api.models.trainer import Trainer
 from api.models.event import Event
 from api.models.client import Client
 from api.models.contract import Contract
+from api.responses import fast_response
 from api.routers._audit import log_audit
+from api.services.client_activity import refresh_client_activity
+from api.services.pt_credits import apply_event_credit, consumes_credit
 
 router = APIRouter(prefix="/events", tags=["events"])
 
@@ -251,9 +259,8 @@ def _auto_assign_contract(
     Auto-FIFO: assegna l'evento PT al contratto attivo piu' vecchio
     con crediti residui > 0.
 
-    2 query batch:
-    1. Contratti attivi del cliente, ordinati per data_inizio ASC (FIFO)
-    2. Conteggio PT events (non cancellati) per contratto
+    1 query: contratti attivi del cliente, ordinati per data_inizio ASC (FIFO);
+    crediti_usati e' mantenuto in scrittura.
 
     Returns: contract.id oppure None se nessun contratto ha crediti.
     """
@@ -266,28 +273,10 @@ def _auto_assign_contract(
         ).order_by(Contract.data_inizio.asc())
     ).all()
 
-    if not contracts:
-        return None
-
-    # Batch count PT events per contratto (zero N+1)
-    contract_ids = [c.id for c in contracts]
-    usage_rows = session.exec(
-        select(Event.id_contratto, func.count(Event.id))
-        .where(
-            Event.id_contratto.in_(contract_ids),
-            Event.categoria == "PT",
-            Event.stato != "Cancellato",
-            Event.deleted_at == None,
-        )
-        .group_by(Event.id_contratto)
-    ).all()
-    usage_map: Dict[int, int] = {row[0]: int(row[1]) for row in usage_rows}
-
     # FIFO: primo contratto con crediti residui
     for contract in contracts:
         totali = contract.crediti_totali or 0
-        usati = usage_map.get(contract.id, 0)
-        if totali - usati > 0:
+        if totali - (contract.crediti_usati or 0) > 0:
             return contract.id
 
     return None
@@ -302,22 +291,14 @@ def _sync_contract_chiuso(session: Session, contract_id: int) -> None:
     il contratto viene riaperto.
 
     Simmetrico con auto-close in create_event e pay_rate.
+    Da chiamare dopo apply_event_credit() (legge crediti_usati aggiornato).
     """
     contract = session.get(Contract, contract_id)
     if not contract or not contract.crediti_totali:
         return
 
-    crediti_usati = session.exec(
-        select(func.count(Event.id)).where(
-            Event.id_contratto == contract.id,
-            Event.categoria == "PT",
-            Event.stato != "Cancellato",
-            Event.deleted_at == None,
-        )
-    ).one()
-
     should_be_chiuso = (
-        crediti_usati >= contract.crediti_totali
+        (contract.crediti_usati or 0) >= contract.crediti_totali
         and contract.stato_pagamento == "SALDATO"
     )
 
@@ -373,13 +354,13 @@ def list_events(
             return (None, None)
         return client_names.get(cid, (None, None))
 
-    return EventListResponse(
+    return fast_response(EventListResponse(
         items=[
             _to_response(e, *_names(e.id_cliente))
             for e in events
         ],
         total=len(events),
-    )
+    ))
 
 
 @router.get("/{event_id}", response_model=EventResponse)
@@ -451,15 +432,7 @@ def create_event(
 
         # Bouncer 2c: Credit guard — crediti esauriti?
         if contract.crediti_totali and contract.crediti_totali > 0:
-            crediti_usati = session.exec(
-                select(func.count(Event.id)).where(
-                    Event.id_contratto == contract.id,
-                    Event.categoria == "PT",
-                    Event.stato != "Cancellato",
-                    Event.deleted_at == None,
-                )
-            ).one()
-            if crediti_usati >= contract.crediti_totali:
+            if (contract.crediti_usati or 0) >= contract.crediti_totali:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="Crediti esauriti per questo contratto",
@@ -490,6 +463,8 @@ def create_event(
     session.add(event)
     session.flush()
     log_audit(session, "event", event.id, "CREATE", trainer.id)
+    apply_event_credit(session, event, int(consumes_credit(event)))
+    refresh_client_activity(session, event.id_cliente, "agenda")
 
     # Auto-close: se evento PT con contratto, verifica crediti esauriti + saldato
     if event.categoria == "PT" and event.id_contratto:
@@ -553,6 +528,7 @@ def update_event(
         _check_overlap(session, trainer.id, new_inizio, new_fine, exclude_event_id=event_id)
 
     # Tutto ok: applica partial update
+    consumed_before = consumes_credit(event)
     update_data = data.model_dump(exclude_unset=True)
     changes = {}
     for field, value in update_data.items():
@@ -563,6 +539,9 @@ def update_event(
 
     log_audit(session, "event", event.id, "UPDATE", trainer.id, changes or None)
     session.add(event)
+    apply_event_credit(session, event, int(consumes_credit(event)) - int(consumed_before))
+    if changes:
+        refresh_client_activity(session, event.id_cliente, "agenda")
 
     # Auto-close/reopen: se stato cambiato su evento PT con contratto, ricalcola chiuso
     if "stato" in changes and event.categoria == "PT" and event.id_contratto:
@@ -597,9 +576,12 @@ def delete_event(
     if not event:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Evento non trovato")
 
+    consumed_before = consumes_credit(event)
     event.deleted_at = datetime.now(timezone.utc)
     session.add(event)
     log_audit(session, "event", event.id, "DELETE", trainer.id)
+    apply_event_credit(session, event, -int(consumed_before))
+    refresh_client_activity(session, event.id_cliente, "agenda")
 
     # Auto-reopen: se era PT con contratto, i crediti usati calano → potrebbe riaprirsi
     if event.categoria == "PT" and event.id_contratto:
@@ -11,6 +11,10 @@ Endpoint Backup e Restore — gestione sicura del database.
 - POST /backup/verify/{f}   — verifica integrita' backup (SHA-256 + PRAGMA integrity_check)
 - POST /backup/pre-update   — backup pre-aggiornamento app
 
+Modalita' background (`?background=true`) su create, verify ed export:
+risposta 202 con il job (api/services/job_runner.py), stato e file prodotto
+su /api/jobs/{id}.
+
 Sicurezza:
 - Tutti gli endpoint richiedono autenticazione JWT
 - Path traversal prevention su download (resolve + is_relative_to)
@@ -21,19 +25,20 @@ Sicurezza:
 """
 
 import hashlib
+import json
 import logging
 import sqlite3
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, status
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, status
 from fastapi.responses import FileResponse
 from pydantic import BaseModel
 from sqlmodel import Session, select
 
 from api.config import DATA_DIR, DATABASE_URL
-from api.database import engine, get_session
+from api.database import close_legacy_connections, engine, get_session
 from api.dependencies import get_current_trainer
 from api.models.audit_log import AuditLog
 from api.models.client import Client
@@ -55,6 +60,13 @@ from api.models.workout import (
     WorkoutSession,
 )
 from api.models.workout_log import WorkoutLog
+from api.schemas.job import JobResponse
+from api.services.execution_pools import run_in_pool
+from api.routers.jobs import job_accepted
+from api.services.job_runner import JobContext, JobRunner, get_job_runner, register_job
+from api.services.client_activity import reconcile_client_activity
+from api.services.pt_credits import reconcile_credits
+from api.services.response_cache import bump_cache_version, clear_response_cache
 
 logger = logging.getLogger("fitmanager.backup")
 
@@ -205,11 +217,115 @@ def _apply_retention(max_backups: int = 30) -> int:
     return removed
 
 
+def _create_regular_backup() -> BackupCreateResponse:
+    """Backup regolare backup_{timestamp}.sqlite + retention."""
+    _ensure_backup_dir()
+
+    timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+    filename = f"backup_{timestamp}.sqlite"
+    dest_path = BACKUP_DIR / filename
+
+    size, checksum = _create_backup_file(dest_path)
+    _apply_retention()
+
+    return BackupCreateResponse(
+        filename=filename,
+        size_bytes=size,
+        checksum=checksum,
+        message=f"Backup creato e verificato: {filename}",
+    )
+
+
+def _existing_backup(filename: str) -> Path:
+    """Path di un backup esistente (400 path traversal, 404 se assente)."""
+    file_path = _safe_resolve(filename)
+    if not file_path.exists():
+        raise HTTPException(status_code=404, detail="Backup non trovato")
+    return file_path
+
+
+def _verify_backup_file(filename: str) -> BackupVerifyResponse:
+    """SHA-256 vs sidecar + PRAGMA integrity_check su un backup esistente."""
+    file_path = _existing_backup(filename)
+
+    # SHA-256
+    actual_checksum = _compute_sha256(file_path)
+    expected_checksum = _read_checksum_sidecar(file_path)
+    checksum_match = expected_checksum is not None and actual_checksum == expected_checksum
+
+    # Integrity
+    integrity_ok = _check_sqlite_integrity(file_path)
+
+    valid = checksum_match and integrity_ok
+    details = []
+    if not checksum_match:
+        if expected_checksum is None:
+            details.append("nessun checksum sidecar trovato")
+        else:
+            details.append(f"checksum mismatch: atteso {expected_checksum[:12]}..., trovato {actual_checksum[:12]}...")
+    if not integrity_ok:
+        details.append("PRAGMA integrity_check fallito")
+    if valid:
+        details.append("backup integro e verificato")
+
+    return BackupVerifyResponse(
+        filename=filename,
+        valid=valid,
+        checksum_match=checksum_match,
+        integrity_ok=integrity_ok,
+        detail="; ".join(details),
+    )
+
+
+# --- Job in background ---
+
+@register_job("backup_create")
+def _backup_create_job(ctx: JobContext) -> dict:
+    ctx.progress(10, "Copia del database")
+    result = _create_regular_backup()
+    logger.info(
+        "Backup creato (job %s): %s (%d bytes, sha256=%s) da trainer %d",
+        ctx.job_id, result.filename, result.size_bytes, result.checksum[:12], ctx.trainer_id,
+    )
+    return result.model_dump()
+
+
+@register_job("backup_verify")
+def _backup_verify_job(ctx: JobContext) -> dict:
+    ctx.progress(10, "Verifica checksum e integrita'")
+    return _verify_backup_file(ctx.params["filename"]).model_dump()
+
+
+@register_job("backup_export")
+def _backup_export_job(ctx: JobContext) -> dict:
+    ctx.progress(5, "Lettura dati")
+    with ctx.session() as session:
+        trainer = session.get(Trainer, ctx.trainer_id)
+        if trainer is None:
+            raise HTTPException(status_code=404, detail="Trainer non trovato")
+        payload = _build_trainer_export(session, trainer)
+
+    ctx.progress(80, "Scrittura file")
+    with open(ctx.artifact_path(".json"), "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, default=str)
+    return {
+        "version": payload["version"],
+        "exported_at": payload["exported_at"],
+        "counts": payload["counts"],
+    }
+
+
 # --- Endpoints ---
 
-@router.post("/create", response_model=BackupCreateResponse)
+@router.post(
+    "/create",
+    response_model=BackupCreateResponse,
+    responses={202: {"model": JobResponse}},
+)
 def create_backup(
+    background: bool = Query(False, description="Esegui come job: 202 + id job"),
     trainer: Trainer = Depends(get_current_trainer),
+    runner: JobRunner = Depends(get_job_runner),
 ):
     """
     Backup atomico del database SQLite.
@@ -218,26 +334,16 @@ def create_backup(
     Post-backup: PRAGMA integrity_check + SHA-256 checksum + sidecar.
     Applica retention policy (max 30 backup regolari).
     """
-    _ensure_backup_dir()
+    if background:
+        return job_accepted(runner, trainer, "backup_create")
 
-    timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
-    filename = f"backup_{timestamp}.sqlite"
-    dest_path = BACKUP_DIR / filename
-
-    size, checksum = _create_backup_file(dest_path)
-    _apply_retention()
+    result = _create_regular_backup()
 
     logger.info(
         "Backup creato: %s (%d bytes, sha256=%s) da trainer %d",
-        filename, size, checksum[:12], trainer.id,
-    )
-
-    return BackupCreateResponse(
-        filename=filename,
-        size_bytes=size,
-        checksum=checksum,
-        message=f"Backup creato e verificato: {filename}",
+        result.filename, result.size_bytes, result.checksum[:12], trainer.id,
     )
+    return result
 
 
 @router.get("/list", response_model=List[BackupInfo])
@@ -353,6 +459,9 @@ def restore_backup(
 
     # ── Restore via sqlite3.backup() — sovrascrive il DB live pagina per pagina ──
     # Funziona anche con connessioni SQLAlchemy aperte (nessun lock file-level).
+    # Le connessioni thread-local del layer legacy si chiudono prima: niente
+    # transazioni aperte sul DB durante la copia.
+    close_legacy_connections()
     try:
         restore_source = sqlite3.connect(str(temp_path))
         restore_target = sqlite3.connect(str(DB_PATH))
@@ -382,6 +491,18 @@ def restore_backup(
     from api.database import create_db_and_tables
     create_db_and_tables()
 
+    # 4. Contatori crediti PT e ultima attivita' clienti: ricalcolati dai dati ripristinati
+    try:
+        with Session(engine) as session:
+            reconcile_credits(session)
+            reconcile_client_activity(session)
+    except Exception as e:
+        logger.warning("Riconciliazione crediti/attivita' post-restore fallita: %s", e)
+
+    # 5. Risposte in cache (ETag) calcolate sul DB precedente: invalidate
+    bump_cache_version("exercises")
+    clear_response_cache()
+
     logger.warning(
         "Database ripristinato via sqlite3.backup(): %d bytes, trainer %d. Safety: %s",
         len(content), trainer.id, safety_filename,
@@ -393,10 +514,16 @@ def restore_backup(
     )
 
 
-@router.post("/verify/{filename}", response_model=BackupVerifyResponse)
+@router.post(
+    "/verify/{filename}",
+    response_model=BackupVerifyResponse,
+    responses={202: {"model": JobResponse}},
+)
 def verify_backup(
     filename: str,
+    background: bool = Query(False, description="Esegui come job: 202 + id job"),
     trainer: Trainer = Depends(get_current_trainer),
+    runner: JobRunner = Depends(get_job_runner),
 ):
     """
     Verifica integrita' di un backup esistente.
@@ -404,37 +531,11 @@ def verify_backup(
     1. Ricalcola SHA-256 e confronta con sidecar
     2. Esegue PRAGMA integrity_check sul file
     """
-    file_path = _safe_resolve(filename)
-    if not file_path.exists():
-        raise HTTPException(status_code=404, detail="Backup non trovato")
+    if background:
+        _existing_backup(filename)
+        return job_accepted(runner, trainer, "backup_verify", {"filename": filename})
 
-    # SHA-256
-    actual_checksum = _compute_sha256(file_path)
-    expected_checksum = _read_checksum_sidecar(file_path)
-    checksum_match = expected_checksum is not None and actual_checksum == expected_checksum
-
-    # Integrity
-    integrity_ok = _check_sqlite_integrity(file_path)
-
-    valid = checksum_match and integrity_ok
-    details = []
-    if not checksum_match:
-        if expected_checksum is None:
-            details.append("nessun checksum sidecar trovato")
-        else:
-            details.append(f"checksum mismatch: atteso {expected_checksum[:12]}..., trovato {actual_checksum[:12]}...")
-    if not integrity_ok:
-        details.append("PRAGMA integrity_check fallito")
-    if valid:
-        details.append("backup integro e verificato")
-
-    return BackupVerifyResponse(
-        filename=filename,
-        valid=valid,
-        checksum_match=checksum_match,
-        integrity_ok=integrity_ok,
-        detail="; ".join(details),
-    )
+    return _verify_backup_file(filename)
 
 
 @router.post("/pre-update", response_model=BackupCreateResponse)
@@ -470,10 +571,13 @@ def create_pre_update_backup(
     )
 
 
-@router.get("/export")
+@router.get("/export", responses={202: {"model": JobResponse}})
+@run_in_pool("export")
 def export_trainer_data(
+    background: bool = Query(False, description="Esegui come job: 202 + id job, file su /jobs/{id}/artifact"),
     trainer: Trainer = Depends(get_current_trainer),
     session: Session = Depends(get_session),
+    runner: JobRunner = Depends(get_job_runner),
 ):
     """
     Export JSON completo di TUTTI i dati del trainer (GDPR data portability).
@@ -482,6 +586,13 @@ def export_trainer_data(
     Esclude: record soft-deleted, esercizi builtin, tassonomia (catalog data).
     Filtra per trainer_id (multi-tenancy).
     """
+    if background:
+        return job_accepted(runner, trainer, "backup_export")
+    return _build_trainer_export(session, trainer)
+
+
+def _build_trainer_export(session: Session, trainer: Trainer) -> dict:
+    """Payload export v2.0 del trainer (usato dall'endpoint e dal job backup_export)."""
     tid = trainer.id
 
     def _serialize(records: list) -> list:
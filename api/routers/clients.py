@@ -27,13 +27,14 @@ from api.models.workout_log import WorkoutLog
 from api.dependencies import get_current_trainer
 from api.models.trainer import Trainer
 from api.models.client import Client
+from api.models.client_activity import ClientActivity
 from api.models.contract import Contract
 from api.models.event import Event
 from api.models.rate import Rate
 from api.routers._audit import log_audit
 from api.schemas.clinical import ClinicalReadinessClientItem
+from api.services.anamnesi_facts import get_anamnesi_facts, refresh_anamnesi_facts
 from api.services.clinical_readiness import compute_clinical_readiness_data
-from api.services.safety_engine import extract_client_conditions
 
 router = APIRouter(prefix="/clients", tags=["clients"])
 
@@ -156,6 +157,8 @@ class ClientEnrichedResponse(ClientResponse):
     prezzo_totale_attivo: float = 0.0
     ha_rate_scadute: bool = False
     ultimo_evento_data: Optional[str] = None
+    ultimo_allenamento_data: Optional[str] = None
+    ultima_misurazione_data: Optional[str] = None
 
 
 class ClientListResponse(BaseModel):
@@ -242,56 +245,6 @@ class ClientDossierResponse(BaseModel):
     recent_activity: List[ClientDossierActivityItem] = Field(default_factory=list)
 
 
-# --- Credit Engine helpers ---
-
-def _calc_credits_batch(
-    session: Session, client_ids: List[int], trainer_id: int
-) -> Dict[int, int]:
-    """
-    Calcola crediti_residui per un batch di clienti in 2 query SQL.
-
-    crediti_residui = crediti_acquistati - sedute_PT_usate
-
-    - crediti_acquistati: SUM(crediti_totali) da TUTTI i contratti non eliminati
-      (chiuso NON filtrato — chiuso blocca nuove operazioni, non invalida crediti)
-    - sedute_PT_usate: COUNT(eventi) con categoria='PT' e stato!='Cancellato'
-    """
-    if not client_ids:
-        return {}
-
-    # Query 1: crediti acquistati per cliente (tutti i contratti non eliminati)
-    # NOTA: chiuso NON filtrato — chiuso blocca nuove operazioni, non invalida i crediti
-    credit_rows = session.exec(
-        select(Contract.id_cliente, func.coalesce(func.sum(Contract.crediti_totali), 0))
-        .where(
-            Contract.id_cliente.in_(client_ids),
-            Contract.trainer_id == trainer_id,
-            Contract.deleted_at == None,
-        )
-        .group_by(Contract.id_cliente)
-    ).all()
-    credits_map: Dict[int, int] = {row[0]: int(row[1]) for row in credit_rows}
-
-    # Query 2: sedute PT usate per cliente (non cancellate, non eliminate)
-    usage_rows = session.exec(
-        select(Event.id_cliente, func.count(Event.id))
-        .where(
-            Event.id_cliente.in_(client_ids),
-            Event.categoria == "PT",
-            Event.stato != "Cancellato",
-            Event.trainer_id == trainer_id,
-            Event.deleted_at == None,
-        )
-        .group_by(Event.id_cliente)
-    ).all()
-    usage_map: Dict[int, int] = {row[0]: int(row[1]) for row in usage_rows}
-
-    return {
-        cid: credits_map.get(cid, 0) - usage_map.get(cid, 0)
-        for cid in client_ids
-    }
-
-
 def _stringify_date(value: Optional[date | datetime | str]) -> Optional[str]:
     if value is None:
         return None
@@ -323,6 +276,21 @@ def _is_plan_active(plan: WorkoutPlan, reference_date: date) -> bool:
     return end_date >= reference_date
 
 
+def _activity_fields(activity: Optional[ClientActivity]) -> dict:
+    """Date ultima attivita' (ISO, solo giorno) per ClientEnrichedResponse."""
+    if activity is None:
+        return {}
+    return {
+        "ultimo_evento_data": str(activity.ultimo_evento_at)[:10] if activity.ultimo_evento_at else None,
+        "ultimo_allenamento_data": (
+            activity.ultimo_allenamento_data.isoformat() if activity.ultimo_allenamento_data else None
+        ),
+        "ultima_misurazione_data": (
+            activity.ultima_misurazione_data.isoformat() if activity.ultima_misurazione_data else None
+        ),
+    }
+
+
 def _build_client_enriched_response(
     session: Session,
     trainer_id: int,
@@ -331,8 +299,6 @@ def _build_client_enriched_response(
     if client.id is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Cliente non trovato")
 
-    credits = _calc_credits_batch(session, [client.id], trainer_id)
-
     contract_row = session.exec(
         select(
             func.count(Contract.id),
@@ -362,15 +328,7 @@ def _build_client_enriched_response(
         )
     ).one()
 
-    last_event_row = session.exec(
-        select(func.max(Event.data_inizio))
-        .where(
-            Event.id_cliente == client.id,
-            Event.trainer_id == trainer_id,
-            Event.deleted_at == None,
-            Event.stato != "Cancellato",
-        )
-    ).one()
+    activity = session.get(ClientActivity, client.id)
 
     return ClientEnrichedResponse(
         id=client.id,
@@ -382,13 +340,13 @@ def _build_client_enriched_response(
         sesso=client.sesso,
         stato=client.stato,
         note_interne=client.note_interne,
-        crediti_residui=credits.get(client.id, 0),
+        crediti_residui=client.crediti_residui,
         anamnesi=json.loads(client.anamnesi_json) if client.anamnesi_json else None,
         contratti_attivi=int(contract_row[0]),
         totale_versato=float(contract_row[1]),
         prezzo_totale_attivo=float(contract_row[2]),
         ha_rate_scadute=overdue_count > 0,
-        ultimo_evento_data=str(last_event_row)[:10] if last_event_row else None,
+        **_activity_fields(activity),
     )
 
 
@@ -411,7 +369,7 @@ def _build_client_dossier_response(
     )
     readiness = next((item for item in readiness_items if item.client_id == client.id), None)
 
-    condition_ids = extract_client_conditions(client.anamnesi_json)
+    condition_ids = get_anamnesi_facts(session, client).condition_ids
     clinical_alerts: List[ClientDossierClinicalAlert] = []
     if condition_ids:
         with Session(catalog_engine) as catalog:
@@ -622,7 +580,7 @@ def list_clients(
 
     Filtro multi-tenancy: WHERE trainer_id = <trainer_corrente>.
     Supporta paginazione, filtro per stato, ricerca per nome.
-    Include crediti_residui calcolati in batch (3 query totali, zero N+1).
+    crediti_residui e' la colonna mantenuta in scrittura (api/services/pt_credits.py).
     """
     # Query base: solo clienti di QUESTO trainer, non eliminati
     query = select(Client).where(Client.trainer_id == trainer.id, Client.deleted_at == None)
@@ -650,12 +608,9 @@ def list_clients(
     clients = session.exec(query).all()
     client_ids = [c.id for c in clients]
 
-    # ── Batch enrichment (5 query totali, zero N+1) ──
-
-    # Q1-Q2: crediti residui (gia' esistente)
-    credits = _calc_credits_batch(session, client_ids, trainer.id)
+    # ── Batch enrichment (3 query totali, zero N+1) ──
 
-    # Q3: contratti attivi + totale versato + prezzo totale per cliente
+    # Q1: contratti attivi + totale versato + prezzo totale per cliente
     contract_map: Dict[int, Dict] = {}
     if client_ids:
         contract_rows = session.exec(
@@ -678,7 +633,7 @@ def list_clients(
             for row in contract_rows
         }
 
-    # Q4: clienti con rate scadute (non saldate, data < oggi O contratto scaduto)
+    # Q2: clienti con rate scadute (non saldate, data < oggi O contratto scaduto)
     today = date.today()
     overdue_set: set = set()
     if client_ids:
@@ -698,24 +653,14 @@ def list_clients(
         ).all()
         overdue_set = set(overdue_rows)
 
-    # Q5: ultimo evento per cliente (non cancellato)
-    last_event_map: Dict[int, str] = {}
+    # Q3: ultima attivita' per cliente (clienti_attivita, mantenuta in scrittura)
+    activity_map: Dict[int, ClientActivity] = {}
     if client_ids:
-        last_event_rows = session.exec(
-            select(
-                Event.id_cliente,
-                func.max(Event.data_inizio),
-            )
-            .where(
-                Event.id_cliente.in_(client_ids),
-                Event.trainer_id == trainer.id,
-                Event.deleted_at == None,
-                Event.stato != "Cancellato",
-            )
-            .group_by(Event.id_cliente)
-        ).all()
-        last_event_map = {
-            row[0]: str(row[1])[:10] for row in last_event_rows if row[1]
+        activity_map = {
+            row.client_id: row
+            for row in session.exec(
+                select(ClientActivity).where(ClientActivity.client_id.in_(client_ids))
+            ).all()
         }
 
     # ── KPI aggregati (pre-filtro: intero dataset del trainer) ──
@@ -724,7 +669,6 @@ def list_clients(
     )
     all_clients = session.exec(all_query).all()
     all_ids = [c.id for c in all_clients]
-    all_credits = _calc_credits_batch(session, all_ids, trainer.id) if all_ids else {}
 
     # Clienti con rate scadute — tutti (non solo la pagina corrente)
     all_overdue_set: set = set()
@@ -747,7 +691,7 @@ def list_clients(
 
     kpi_attivi = sum(1 for c in all_clients if c.stato == "Attivo")
     kpi_inattivi = sum(1 for c in all_clients if c.stato == "Inattivo")
-    kpi_con_crediti = sum(1 for cid in all_ids if all_credits.get(cid, 0) > 0)
+    kpi_con_crediti = sum(1 for c in all_clients if (c.crediti_residui or 0) > 0)
     kpi_rate_scadute = len(all_overdue_set)
 
     # ── Build enriched response ──
@@ -764,13 +708,13 @@ def list_clients(
             sesso=c.sesso,
             stato=c.stato,
             note_interne=c.note_interne,
-            crediti_residui=credits.get(c.id, 0),
+            crediti_residui=c.crediti_residui,
             anamnesi=json.loads(c.anamnesi_json) if c.anamnesi_json else None,
             contratti_attivi=cdata["count"],
             totale_versato=cdata["versato"],
             prezzo_totale_attivo=cdata["prezzo"],
             ha_rate_scadute=c.id in overdue_set,
-            ultimo_evento_data=last_event_map.get(c.id),
+            **_activity_fields(activity_map.get(c.id)),
         ))
 
     return ClientListResponse(
@@ -795,7 +739,7 @@ def get_client(
     Dettaglio singolo cliente enriched.
 
     Bouncer: query filtra per trainer_id.
-    Enrichment: stesse 5 query di list_clients, semplificate per 1 client.
+    Enrichment: stesse 3 query di list_clients, semplificate per 1 client.
     """
     client = session.exec(
         select(Client).where(
@@ -857,11 +801,12 @@ def create_client(
     )
     session.add(client)
     session.flush()
+    refresh_anamnesi_facts(session, client)
     log_audit(session, "client", client.id, "CREATE", trainer.id)
     session.commit()
     session.refresh(client)
 
-    return _to_response(client, 0)
+    return _to_response(client)
 
 
 # --- PUT: Aggiorna cliente (partial update) ---
@@ -899,6 +844,7 @@ def update_client(
             client.anamnesi_json = json.dumps(value) if value else None
             if client.anamnesi_json != old_val:
                 changes[field] = {"old": old_val, "new": client.anamnesi_json}
+                refresh_anamnesi_facts(session, client)
         else:
             old_val = getattr(client, field)
             setattr(client, field, value)
@@ -910,9 +856,7 @@ def update_client(
     session.commit()
     session.refresh(client)
 
-    credits = _calc_credits_batch(session, [client.id], trainer.id)
-
-    return _to_response(client, credits.get(client.id, 0))
+    return _to_response(client)
 
 
 # --- DELETE: Elimina cliente ---
@@ -963,7 +907,7 @@ def delete_client(
 
 # --- Helper ---
 
-def _to_response(client: Client, crediti_residui: int = 0) -> ClientResponse:
+def _to_response(client: Client) -> ClientResponse:
     """Converte un Client ORM in ClientResponse. Centralizza la conversione."""
     return ClientResponse(
         id=client.id,
@@ -975,6 +919,6 @@ def _to_response(client: Client, crediti_residui: int = 0) -> ClientResponse:
         sesso=client.sesso,
         stato=client.stato,
         note_interne=client.note_interne,
-        crediti_residui=crediti_residui,
+        crediti_residui=client.crediti_residui,
         anamnesi=json.loads(client.anamnesi_json) if client.anamnesi_json else None,
     )
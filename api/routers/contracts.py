@@ -9,6 +9,9 @@ Sicurezza multi-tenant:
 
 Regola 404: se il contratto non esiste O non appartiene al trainer -> 404.
 Mai 403, mai rivelare l'esistenza di dati altrui.
+
+Crediti PT: crediti_usati e' mantenuto dall'agenda; create / rinnovo / modifica
+crediti_totali / delete aggiornano clienti.crediti_residui (api/services/pt_credits.py).
 """
 
 from typing import Optional
@@ -24,12 +27,18 @@ from api.models.contract import Contract
 from api.models.rate import Rate
 from api.models.movement import CashMovement
 from api.models.event import Event
+from api.responses import fast_response
 from api.schemas.financial import (
     ContractCreate, ContractUpdate,
     ContractResponse, ContractListResponse, ContractWithRatesResponse,
+    CreditDriftItem, CreditReconciliationResponse,
     RateResponse, RatePaymentReceipt, RenewalChainItem,
 )
+from api.schemas.job import JobResponse
 from api.routers._audit import log_audit
+from api.routers.jobs import job_accepted
+from api.services.job_runner import JobContext, JobRunner, get_job_runner, register_job
+from api.services.pt_credits import CreditReconciliation, adjust_client_purchased, reconcile_credits
 
 # Categoria movimento cassa per acconto (allineata a ContractRepository)
 CATEGORIA_ACCONTO = "ACCONTO_CONTRATTO"
@@ -123,17 +132,15 @@ def _to_response_with_rates(
     importo_da_rateizzare = residuo
     disallineamento = round(importo_da_rateizzare - somma_pendenti, 2)
 
-    # ── Credit breakdown (computed on read) ──
+    # ── Credit breakdown per stato (crediti_usati e' mantenuto in scrittura) ──
     cb = credit_breakdown or {}
     programmate = cb.get("Programmato", 0)
     completate = cb.get("Completato", 0)
     rinviate = cb.get("Rinviato", 0)
     crediti_totali = contract.crediti_totali or 0
-    crediti_usati_computed = programmate + completate + rinviate
+    crediti_usati = contract.crediti_usati or 0
 
-    # Override crediti_usati nel dict base (sovrascrive il valore ORM = 0)
     contract_data = ContractResponse.model_validate(contract).model_dump()
-    contract_data["crediti_usati"] = crediti_usati_computed
 
     return ContractWithRatesResponse(
         **contract_data,
@@ -152,7 +159,7 @@ def _to_response_with_rates(
         sedute_programmate=programmate,
         sedute_completate=completate,
         sedute_rinviate=rinviate,
-        crediti_residui=max(0, crediti_totali - crediti_usati_computed),
+        crediti_residui=max(0, crediti_totali - crediti_usati),
     )
 
 
@@ -251,7 +258,7 @@ def list_contracts(
     }
 
     if not contracts:
-        return {"items": [], "total": total, "page": page, "page_size": page_size, **kpi_data}
+        return fast_response({"items": [], "total": total, "page": page, "page_size": page_size, **kpi_data})
 
     # ── Batch fetch: rate per tutti i contratti (1 query) ──
     contract_ids = [c.id for c in contracts]
@@ -270,19 +277,6 @@ def list_contracts(
     ).all()
     client_map = {c.id: c for c in clients}
 
-    # ── Batch fetch: crediti usati per contratto (1 query, zero N+1) ──
-    credit_rows = session.exec(
-        select(Event.id_contratto, func.count(Event.id))
-        .where(
-            Event.id_contratto.in_(contract_ids),
-            Event.categoria == "PT",
-            Event.stato != "Cancellato",
-            Event.deleted_at == None,
-        )
-        .group_by(Event.id_contratto)
-    ).all()
-    credits_used_map: dict[int, int] = {row[0]: int(row[1]) for row in credit_rows}
-
     # ── Build enriched responses ──
     results = []
 
@@ -290,32 +284,28 @@ def list_contracts(
         client = client_map.get(contract.id_cliente)
         rates = rates_by_contract.get(contract.id, [])
 
-        # Override crediti_usati: computed on read (non dal valore ORM)
-        contract_data = ContractResponse.model_validate(contract).model_dump()
-        contract_data["crediti_usati"] = credits_used_map.get(contract.id, 0)
-
         # Contratto scaduto? Se si', ogni rata non pagata e' in ritardo
         contract_expired = contract.data_scadenza and contract.data_scadenza < today
 
-        results.append(ContractListResponse(
-            **contract_data,
-            client_nome=client.nome if client else "",
-            client_cognome=client.cognome if client else "",
-            rate_totali=len(rates),
-            rate_pagate=sum(1 for r in rates if r.stato == "SALDATA"),
-            ha_rate_scadute=any(
-                (r.data_scadenza < today or contract_expired) and r.stato != "SALDATA"
-                for r in rates
-            ),
-        ))
-
-    return {
+        # Validazione unica dall'ORM, campi calcolati assegnati dopo
+        item = ContractListResponse.model_validate(contract)
+        item.client_nome = client.nome if client else ""
+        item.client_cognome = client.cognome if client else ""
+        item.rate_totali = len(rates)
+        item.rate_pagate = sum(1 for r in rates if r.stato == "SALDATA")
+        item.ha_rate_scadute = any(
+            (r.data_scadenza < today or contract_expired) and r.stato != "SALDATA"
+            for r in rates
+        )
+        results.append(item)
+
+    return fast_response({
         "items": results,
         "total": total,
         "page": page,
         "page_size": page_size,
         **kpi_data,
-    }
+    })
 
 
 # ════════════════════════════════════════════════════════════
@@ -464,6 +454,7 @@ def create_contract(
 
     # Flush per ottenere l'ID del contratto (necessario per il CashMovement)
     session.flush()
+    adjust_client_purchased(session, data.id_cliente, data.crediti_totali or 0)
 
     # 3. Se acconto > 0, registra nel libro mastro (CashMovement ENTRATA)
     if data.acconto > 0:
@@ -553,6 +544,10 @@ def update_contract(
         if value != old_val:
             changes[field] = {"old": old_val, "new": value}
 
+    if "crediti_totali" in changes:
+        old_totali = changes["crediti_totali"]["old"] or 0
+        adjust_client_purchased(session, contract.id_cliente, (contract.crediti_totali or 0) - old_totali)
+
     log_audit(session, "contract", contract.id, "UPDATE", trainer.id, changes or None)
     session.add(contract)
     session.commit()
@@ -614,14 +609,7 @@ def delete_contract(
         # RESTRICT 2: crediti residui (sedute PT non ancora consumate)
         crediti_totali = contract.crediti_totali or 0
         if crediti_totali > 0:
-            crediti_usati = session.exec(
-                select(func.count(Event.id)).where(
-                    Event.id_contratto == contract_id,
-                    Event.categoria == "PT",
-                    Event.stato != "Cancellato",
-                    Event.deleted_at == None,
-                )
-            ).one()
+            crediti_usati = contract.crediti_usati or 0
             crediti_residui = crediti_totali - crediti_usati
             if crediti_residui > 0:
                 raise HTTPException(
@@ -704,6 +692,7 @@ def delete_contract(
 
     contract.deleted_at = now
     session.add(contract)
+    adjust_client_purchased(session, contract.id_cliente, -(contract.crediti_totali or 0))
     audit_changes = None
     if force:
         audit_changes = {
@@ -769,6 +758,7 @@ def renew_contract(
     )
     session.add(renewed)
     session.flush()
+    adjust_client_purchased(session, data.id_cliente, data.crediti_totali or 0)
 
     # 4. Se acconto > 0, registra nel libro mastro
     if data.acconto > 0:
@@ -793,3 +783,50 @@ def renew_contract(
     session.refresh(renewed)
 
     return _to_response(renewed)
+
+
+# ════════════════════════════════════════════════════════════
+# POST: Riconciliazione crediti PT (contatori vs agenda)
+# ════════════════════════════════════════════════════════════
+
+def _to_credit_reconciliation(result: CreditReconciliation, repaired: bool) -> CreditReconciliationResponse:
+    return CreditReconciliationResponse(
+        contratti_verificati=result.contratti_verificati,
+        clienti_verificati=result.clienti_verificati,
+        contratti=[CreditDriftItem(id=d.id, salvato=d.salvato, atteso=d.atteso) for d in result.contratti],
+        clienti=[CreditDriftItem(id=d.id, salvato=d.salvato, atteso=d.atteso) for d in result.clienti],
+        corretto=repaired and result.drift > 0,
+    )
+
+
+@register_job("credits_reconcile")
+def _credits_reconcile_job(ctx: JobContext) -> dict:
+    ctx.progress(10, "Ricalcolo crediti dagli eventi")
+    repair = not ctx.params.get("dry_run", False)
+    with ctx.session() as session:
+        result = reconcile_credits(session, ctx.trainer_id, repair=repair)
+    return _to_credit_reconciliation(result, repair).model_dump()
+
+
+@router.post(
+    "/credits/reconcile",
+    response_model=CreditReconciliationResponse,
+    responses={202: {"model": JobResponse}},
+)
+def reconcile_contract_credits(
+    dry_run: bool = Query(False, description="Solo verifica, nessuna correzione"),
+    background: bool = Query(False, description="Esegui come job: 202 + id job"),
+    trainer: Trainer = Depends(get_current_trainer),
+    session: Session = Depends(get_session),
+    runner: JobRunner = Depends(get_job_runner),
+):
+    """
+    Verifica (e corregge) crediti_usati dei contratti e crediti_residui dei clienti.
+
+    I contatori sono mantenuti dall'agenda; la riconciliazione li ricalcola dagli
+    eventi PT del trainer e ripara eventuali divergenze (import, modifiche manuali al DB).
+    """
+    if background:
+        return job_accepted(runner, trainer, "credits_reconcile", {"dry_run": dry_run})
+    result = reconcile_credits(session, trainer.id, repair=not dry_run)
+    return _to_credit_reconciliation(result, not dry_run)
@@ -7,17 +7,24 @@ tramite func.count() e func.sum(). Nessun record viene caricato
 in Python — latenza zero, scalabile anche con migliaia di record.
 
 Multi-tenancy: ogni query filtra per trainer_id dal JWT.
+
+Primo paint: GET /dashboard/bundle calcola le sezioni scelte (summary,
+alert, liste, readiness) in una richiesta, con intermedi condivisi.
 """
 
-from datetime import date, datetime, timedelta
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy import bindparam
-from sqlmodel import Session, select, func, text
+import time
+from datetime import date, datetime, timedelta, timezone
+from functools import cached_property
+from typing import Any, Callable, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import Session, select, func, or_, text
 
 from api.database import get_session
 from api.dependencies import get_current_trainer
 from api.models.trainer import Trainer
 from api.models.client import Client
+from api.models.client_activity import ClientActivity
 from api.models.movement import CashMovement
 from api.models.rate import Rate
 from api.models.event import Event
@@ -25,7 +32,7 @@ from api.models.contract import Contract
 from api.models.exercise import Exercise
 from api.schemas.financial import (
     DashboardSummary, ReconciliationItem, ReconciliationResponse,
-    AlertItem, DashboardAlerts,
+    AlertItem, DashboardAlerts, DashboardBundle,
 )
 from api.schemas.clinical import (
     ClinicalReadinessResponse,
@@ -37,27 +44,94 @@ from api.services.clinical_readiness import (
     filter_clinical_readiness_items,
     sort_clinical_readiness_items,
 )
+from api.services.execution_pools import run_in_pool
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 
 
-@router.get("/summary", response_model=DashboardSummary)
-def get_dashboard_summary(
-    trainer: Trainer = Depends(get_current_trainer),
-    session: Session = Depends(get_session),
-):
-    """
-    KPI aggregati per la dashboard del trainer.
+# ════════════════════════════════════════════════════════════
+# SEZIONI (endpoint singoli + /bundle)
+# ════════════════════════════════════════════════════════════
 
-    Metriche:
-    - active_clients: clienti con stato 'Attivo'
-    - monthly_revenue: somma ENTRATE del mese corrente
-    - pending_rates: rate scadute o in scadenza nei prossimi 7 giorni
-    - todays_appointments: eventi di oggi
+class _DashboardData:
+    """
+    Intermedi di una richiesta dashboard, calcolati al primo uso.
 
-    Tutte le query usano func.count/func.sum — aggregazione SQL pura.
+    Rate scadute, contratti in scadenza e clienti inattivi servono sia alle
+    liste delle sezioni sia ai conteggi degli alert: nel bundle una query sola.
     """
-    today = date.today()
+
+    def __init__(self, session: Session, trainer: Trainer, today: Optional[date] = None) -> None:
+        self.session = session
+        self.trainer = trainer
+        self.today = today or date.today()
+
+    @cached_property
+    def overdue_rows(self) -> list[tuple[Rate, Contract, Client]]:
+        """Rate PENDENTI/PARZIALI con data_scadenza < oggi, piu' vecchie prima."""
+        return self.session.exec(
+            select(Rate, Contract, Client)
+            .join(Contract, Rate.id_contratto == Contract.id)
+            .join(Client, Contract.id_cliente == Client.id)
+            .where(
+                Contract.trainer_id == self.trainer.id,
+                Rate.stato.in_(["PENDENTE", "PARZIALE"]),
+                Rate.data_scadenza < self.today,
+                Rate.deleted_at == None,
+                Contract.deleted_at == None,
+                Contract.chiuso == False,
+            )
+            .order_by(Rate.data_scadenza.asc())
+        ).all()
+
+    @cached_property
+    def expiring_rows(self) -> list[tuple[Contract, Client]]:
+        """Contratti in scadenza (30gg) con crediti residui, scadenza piu' vicina prima."""
+        deadline_30 = self.today + timedelta(days=30)
+        # crediti_usati e' mantenuto dall'agenda: filtro diretto sulla colonna
+        return self.session.exec(
+            select(Contract, Client)
+            .join(Client, Contract.id_cliente == Client.id)
+            .where(
+                Contract.trainer_id == self.trainer.id,
+                Contract.deleted_at == None,
+                Contract.chiuso == False,
+                Contract.data_scadenza != None,
+                Contract.data_scadenza <= deadline_30,
+                Contract.data_scadenza >= self.today,
+                Contract.crediti_totali != None,
+                func.coalesce(Contract.crediti_usati, 0) < Contract.crediti_totali,
+            )
+            .order_by(Contract.data_scadenza.asc())
+        ).all()
+
+    @cached_property
+    def inactive_rows(self) -> list[tuple]:
+        """
+        Clienti attivi senza eventi negli ultimi 14 giorni.
+
+        (id, nome, cognome, telefono, email, ultimo_evento_at, ultimo_evento_categoria)
+        da clienti_attivita: nessuna riga = nessun evento.
+        """
+        cutoff_start = datetime.combine(self.today - timedelta(days=14), datetime.min.time(), tzinfo=timezone.utc)
+        return self.session.exec(
+            select(
+                Client.id, Client.nome, Client.cognome, Client.telefono, Client.email,
+                ClientActivity.ultimo_evento_at, ClientActivity.ultimo_evento_categoria,
+            )
+            .outerjoin(ClientActivity, ClientActivity.client_id == Client.id)
+            .where(
+                Client.trainer_id == self.trainer.id,
+                Client.stato == "Attivo",
+                Client.deleted_at == None,
+                or_(ClientActivity.ultimo_evento_at == None, ClientActivity.ultimo_evento_at < cutoff_start),
+            )
+            .order_by(Client.nome, Client.cognome)
+        ).all()
+
+
+def _summary(data: _DashboardData) -> DashboardSummary:
+    session, trainer, today = data.session, data.trainer, data.today
 
     # 1. Clienti attivi
     active_clients = session.exec(
@@ -152,144 +226,10 @@ def get_dashboard_summary(
     )
 
 
-@router.get("/reconciliation", response_model=ReconciliationResponse)
-def get_reconciliation(
-    trainer: Trainer = Depends(get_current_trainer),
-    session: Session = Depends(get_session),
-):
-    """
-    Audit riconciliazione: confronta totale_versato di ogni contratto
-    con la somma dei CashMovement ENTRATA legati.
-
-    Rileva divergenze in entrambe le direzioni:
-    - totale_versato > ledger: pagamenti registrati su contratto ma senza CashMovement
-    - ledger > totale_versato: CashMovement orfani o doppi
-
-    Soglia: 0.01 EUR (tolleranza arrotondamento).
-    """
-    rows = session.execute(text("""
-        SELECT c.id, cl.nome, cl.cognome, c.totale_versato,
-               COALESCE(SUM(CASE WHEN m.tipo = 'ENTRATA' THEN m.importo ELSE 0 END), 0) as ledger
-        FROM contratti c
-        LEFT JOIN clienti cl ON cl.id = c.id_cliente
-        LEFT JOIN movimenti_cassa m ON m.id_contratto = c.id AND m.deleted_at IS NULL
-        WHERE c.trainer_id = :tid AND c.deleted_at IS NULL
-        GROUP BY c.id
-    """), {"tid": trainer.id}).fetchall()
-
-    items = []
-    aligned = 0
-    for row in rows:
-        cid, nome, cognome, versato, ledger = row
-        delta = round(versato - ledger, 2)
-        if abs(delta) > 0.01:
-            items.append(ReconciliationItem(
-                contract_id=cid,
-                client_name=f"{nome or ''} {cognome or ''}".strip(),
-                totale_versato=round(versato, 2),
-                ledger_total=round(ledger, 2),
-                delta=delta,
-            ))
-        else:
-            aligned += 1
-
-    return ReconciliationResponse(
-        total_contracts=len(rows),
-        aligned=aligned,
-        divergent=len(items),
-        items=items,
-    )
-
-
-@router.get("/ghost-events")
-def get_ghost_events(
-    trainer: Trainer = Depends(get_current_trainer),
-    session: Session = Depends(get_session),
-):
-    """
-    Eventi fantasma: sessioni passate ancora in stato 'Programmato'.
-
-    Restituisce la lista completa con dati cliente per risoluzione inline
-    dalla Dashboard (Sheet con azioni 'Completata'/'Cancellata').
-
-    Ordinamento: piu' vecchi prima (urgenza decrescente).
-    """
-    today_start = datetime.combine(date.today(), datetime.min.time())
-
-    stmt = (
-        select(Event)
-        .where(
-            Event.trainer_id == trainer.id,
-            Event.data_fine < today_start,
-            Event.stato == "Programmato",
-            Event.deleted_at == None,
-        )
-        .order_by(Event.data_inizio.asc())
-    )
-    events = session.exec(stmt).all()
-
-    # Batch fetch nomi clienti (anti-N+1)
-    client_ids = {e.id_cliente for e in events if e.id_cliente}
-    clients_map: dict[int, Client] = {}
-    if client_ids:
-        clients = session.exec(
-            select(Client).where(Client.id.in_(client_ids))
-        ).all()
-        clients_map = {c.id: c for c in clients}
-
+def _overdue_rates(data: _DashboardData) -> dict:
+    today = data.today
     items = []
-    for e in events:
-        cl = clients_map.get(e.id_cliente) if e.id_cliente else None
-        items.append({
-            "id": e.id,
-            "data_inizio": e.data_inizio.isoformat() if isinstance(e.data_inizio, datetime) else str(e.data_inizio),
-            "data_fine": e.data_fine.isoformat() if isinstance(e.data_fine, datetime) else str(e.data_fine),
-            "categoria": e.categoria,
-            "titolo": e.titolo,
-            "id_cliente": e.id_cliente,
-            "id_contratto": e.id_contratto,
-            "stato": e.stato,
-            "note": e.note,
-            "cliente_nome": cl.nome if cl else None,
-            "cliente_cognome": cl.cognome if cl else None,
-        })
-
-    return {"items": items, "total": len(items)}
-
-
-@router.get("/overdue-rates")
-def get_overdue_rates(
-    trainer: Trainer = Depends(get_current_trainer),
-    session: Session = Depends(get_session),
-):
-    """
-    Rate scadute: rate PENDENTI/PARZIALI con data_scadenza < oggi.
-
-    Restituisce dati completi per risoluzione inline dalla Dashboard
-    (Sheet con pagamento rapido). Include dati cliente e contratto.
-
-    Ordinamento: piu' vecchie prima (urgenza decrescente).
-    """
-    today = date.today()
-
-    stmt = (
-        select(Rate, Contract, Client)
-        .join(Contract, Rate.id_contratto == Contract.id)
-        .join(Client, Contract.id_cliente == Client.id)
-        .where(
-            Contract.trainer_id == trainer.id,
-            Rate.stato.in_(["PENDENTE", "PARZIALE"]),
-            Rate.data_scadenza < today,
-            Rate.deleted_at == None,
-            Contract.deleted_at == None,
-            Contract.chiuso == False,
-        )
-        .order_by(Rate.data_scadenza.asc())
-    )
-    rows = session.exec(stmt).all()
-
-    items = []
-    for rate, contract, client in rows:
+    for rate, contract, client in data.overdue_rows:
         residuo = round(rate.importo_previsto - rate.importo_saldato, 2)
         giorni = (today - rate.data_scadenza).days if isinstance(rate.data_scadenza, date) else 0
         items.append({
@@ -310,68 +250,13 @@ def get_overdue_rates(
     return {"items": items, "total": len(items)}
 
 
-@router.get("/expiring-contracts")
-def get_expiring_contracts(
-    trainer: Trainer = Depends(get_current_trainer),
-    session: Session = Depends(get_session),
-):
-    """
-    Contratti in scadenza con crediti inutilizzati (30 giorni).
-
-    Restituisce dati completi per risoluzione inline dalla Dashboard
-    (Sheet con progress bar crediti e countdown). Include credit engine
-    computed-on-read: crediti_usati da COUNT eventi PT non cancellati.
-
-    Ordinamento: scadenza piu' vicina prima.
-    """
-    today = date.today()
-    deadline_30 = today + timedelta(days=30)
-
-    # Step 1: contratti in finestra scadenza con crediti
-    contracts = session.exec(
-        select(Contract, Client)
-        .join(Client, Contract.id_cliente == Client.id)
-        .where(
-            Contract.trainer_id == trainer.id,
-            Contract.deleted_at == None,
-            Contract.chiuso == False,
-            Contract.data_scadenza != None,
-            Contract.data_scadenza <= deadline_30,
-            Contract.data_scadenza >= today,
-            Contract.crediti_totali != None,
-        )
-        .order_by(Contract.data_scadenza.asc())
-    ).all()
-
-    if not contracts:
-        return {"items": [], "total": 0}
-
-    # Step 2: batch fetch crediti usati (anti-N+1)
-    contract_ids = [c.id for c, _ in contracts]
-    credit_rows = session.execute(
-        text("""
-        SELECT e.id_contratto, COUNT(*) as usati
-        FROM agenda e
-        WHERE e.id_contratto IN :contract_ids
-          AND e.categoria = 'PT'
-          AND e.stato != 'Cancellato'
-          AND e.deleted_at IS NULL
-        GROUP BY e.id_contratto
-    """).bindparams(bindparam("contract_ids", expanding=True)),
-        {"contract_ids": contract_ids},
-    ).fetchall()
-
-    credits_map = {row[0]: row[1] for row in credit_rows}
-
+def _expiring_contracts(data: _DashboardData) -> dict:
+    today = data.today
     items = []
-    for contract, client in contracts:
-        usati = credits_map.get(contract.id, 0)
+    for contract, client in data.expiring_rows:
+        usati = contract.crediti_usati or 0
         totali = contract.crediti_totali or 0
-        residui = max(totali - usati, 0)
-
-        # Solo contratti con crediti residui
-        if residui <= 0:
-            continue
+        residui = totali - usati
 
         scadenza = contract.data_scadenza
         if isinstance(scadenza, str):
@@ -395,91 +280,16 @@ def get_expiring_contracts(
     return {"items": items, "total": len(items)}
 
 
-@router.get("/inactive-clients")
-def get_inactive_clients(
-    trainer: Trainer = Depends(get_current_trainer),
-    session: Session = Depends(get_session),
-):
-    """
-    Clienti inattivi: attivi senza eventi negli ultimi 14 giorni.
-
-    Restituisce dati completi per risoluzione inline dalla Dashboard
-    (Sheet con info contatto e ultimo evento). Include telefono, email,
-    data/categoria ultimo evento.
-
-    Ordinamento: piu' a lungo inattivi prima.
-    """
-    today = date.today()
-    cutoff_14 = today - timedelta(days=14)
-    cutoff_start = datetime.combine(cutoff_14, datetime.min.time())
-
-    # Step 1: clienti attivi senza eventi recenti
-    inactive_clients = session.execute(text("""
-        SELECT cl.id, cl.nome, cl.cognome, cl.telefono, cl.email
-        FROM clienti cl
-        WHERE cl.trainer_id = :tid
-          AND cl.stato = 'Attivo'
-          AND cl.deleted_at IS NULL
-          AND NOT EXISTS (
-              SELECT 1 FROM agenda e
-              WHERE e.id_cliente = cl.id
-                AND e.data_inizio >= :cutoff
-                AND e.stato != 'Cancellato'
-                AND e.deleted_at IS NULL
-          )
-        ORDER BY cl.nome, cl.cognome
-    """), {"tid": trainer.id, "cutoff": cutoff_start.isoformat()}).fetchall()
-
+def _inactive_clients(data: _DashboardData) -> dict:
+    today = data.today
+    inactive_clients = data.inactive_rows
     if not inactive_clients:
         return {"items": [], "total": 0}
 
-    # Step 2: batch fetch ultimo evento per ciascuno (anti-N+1)
-    client_ids = [row[0] for row in inactive_clients]
-    last_events = session.execute(
-        text("""
-        SELECT e.id_cliente, e.data_inizio, e.categoria
-        FROM agenda e
-        INNER JOIN (
-            SELECT id_cliente, MAX(data_inizio) as max_data
-            FROM agenda
-            WHERE id_cliente IN :client_ids
-              AND stato != 'Cancellato'
-              AND deleted_at IS NULL
-            GROUP BY id_cliente
-        ) latest ON e.id_cliente = latest.id_cliente AND e.data_inizio = latest.max_data
-        WHERE e.deleted_at IS NULL AND e.stato != 'Cancellato'
-    """).bindparams(bindparam("client_ids", expanding=True)),
-        {"client_ids": client_ids},
-    ).fetchall()
-
-    last_event_map: dict[int, tuple] = {}
-    for row in last_events:
-        last_event_map[row[0]] = (row[1], row[2])
-
     items = []
-    for cid, nome, cognome, telefono, email in inactive_clients:
-        last = last_event_map.get(cid)
-        last_data = None
-        last_cat = None
-        giorni_inattivo = 14  # minimo
-
-        if last:
-            last_data_raw = last[0]
-            last_cat = last[1]
-            # Parse datetime string
-            if isinstance(last_data_raw, str):
-                try:
-                    last_dt = datetime.fromisoformat(last_data_raw.replace(" ", "T"))
-                    last_data = last_dt.date().isoformat()
-                    giorni_inattivo = (today - last_dt.date()).days
-                except ValueError:
-                    last_data = last_data_raw
-            elif isinstance(last_data_raw, datetime):
-                last_data = last_data_raw.date().isoformat()
-                giorni_inattivo = (today - last_data_raw.date()).days
-            elif isinstance(last_data_raw, date):
-                last_data = last_data_raw.isoformat()
-                giorni_inattivo = (today - last_data_raw).days
+    for cid, nome, cognome, telefono, email, last_at, last_cat in inactive_clients:
+        last_data = last_at.date().isoformat() if last_at else None
+        giorni_inattivo = (today - last_at.date()).days if last_at else 14  # minimo
 
         items.append({
             "client_id": cid,
@@ -498,21 +308,8 @@ def get_inactive_clients(
     return {"items": items, "total": len(items)}
 
 
-@router.get("/alerts", response_model=DashboardAlerts)
-def get_dashboard_alerts(
-    trainer: Trainer = Depends(get_current_trainer),
-    session: Session = Depends(get_session),
-):
-    """
-    Warning proattivi — "Cosa richiede la mia attenzione ORA?"
-
-    4 categorie di alert (query SQL aggregate, zero N+1):
-    1. ghost_events: eventi passati ancora 'Programmato'
-    2. expiring_contracts: contratti in scadenza (30gg) con crediti residui
-    3. overdue_rates: rate scadute (data_scadenza < oggi)
-    4. inactive_clients: clienti attivi senza eventi da >14 giorni
-    """
-    today = date.today()
+def _alerts(data: _DashboardData) -> DashboardAlerts:
+    session, trainer, today = data.session, data.trainer, data.today
     items: list[AlertItem] = []
 
     # ── 1. Eventi fantasma: ieri o prima, ancora "Programmato" ──
@@ -537,74 +334,33 @@ def get_dashboard_alerts(
         ))
 
     # ── 2. Contratti in scadenza con crediti inutilizzati ──
-    deadline_30 = today + timedelta(days=30)
-
-    # Wrapped subquery: SQLite non accetta HAVING senza GROUP BY.
-    # Calcoliamo crediti_usati come subquery scalare, poi filtriamo nel WHERE esterno.
-    expiring_rows = session.execute(text("""
-        SELECT * FROM (
-            SELECT c.id, cl.nome, cl.cognome, c.tipo_pacchetto,
-                   c.data_scadenza, c.crediti_totali,
-                   COALESCE(
-                       (SELECT COUNT(*) FROM agenda e
-                        WHERE e.id_contratto = c.id
-                          AND e.categoria = 'PT'
-                          AND e.stato != 'Cancellato'
-                          AND e.deleted_at IS NULL), 0
-                   ) as crediti_usati
-            FROM contratti c
-            JOIN clienti cl ON cl.id = c.id_cliente
-            WHERE c.trainer_id = :tid
-              AND c.deleted_at IS NULL
-              AND c.chiuso = 0
-              AND c.data_scadenza IS NOT NULL
-              AND c.data_scadenza <= :deadline
-              AND c.data_scadenza >= :today
-              AND c.crediti_totali IS NOT NULL
-        ) sub
-        WHERE sub.crediti_usati < sub.crediti_totali
-    """), {"tid": trainer.id, "deadline": deadline_30.isoformat(), "today": today.isoformat()}).fetchall()
-
-    if expiring_rows:
-        for row in expiring_rows:
-            cid, nome, cognome, pacchetto, scadenza_raw, totali, usati = row
-            residui = totali - usati
-            # Raw SQL restituisce date come stringa ISO — parse esplicito
-            scadenza = date.fromisoformat(scadenza_raw) if isinstance(scadenza_raw, str) else scadenza_raw
-            days_left = (scadenza - today).days if isinstance(scadenza, date) else 0
-            # Grammatica condizionale: singolare/plurale
-            crediti_label = "credito inutilizzato" if residui == 1 else "crediti inutilizzati"
-            if days_left == 0:
-                scadenza_label = f"{pacchetto or 'Contratto'} scade oggi"
-            elif days_left == 1:
-                scadenza_label = f"{pacchetto or 'Contratto'} scade domani"
-            else:
-                scadenza_label = f"{pacchetto or 'Contratto'} scade tra {days_left} giorni"
-            items.append(AlertItem(
-                severity="warning" if days_left > 7 else "critical",
-                category="expiring_contracts",
-                title=f"{nome} {cognome} — {residui} {crediti_label}",
-                detail=scadenza_label,
-                count=1,
-                link="/contratti",
-            ))
+    for contract, client in data.expiring_rows:
+        residui = contract.crediti_totali - (contract.crediti_usati or 0)
+        pacchetto = contract.tipo_pacchetto
+        scadenza = contract.data_scadenza
+        if isinstance(scadenza, str):
+            scadenza = date.fromisoformat(scadenza)
+        days_left = (scadenza - today).days if isinstance(scadenza, date) else 0
+        # Grammatica condizionale: singolare/plurale
+        crediti_label = "credito inutilizzato" if residui == 1 else "crediti inutilizzati"
+        if days_left == 0:
+            scadenza_label = f"{pacchetto or 'Contratto'} scade oggi"
+        elif days_left == 1:
+            scadenza_label = f"{pacchetto or 'Contratto'} scade domani"
+        else:
+            scadenza_label = f"{pacchetto or 'Contratto'} scade tra {days_left} giorni"
+        items.append(AlertItem(
+            severity="warning" if days_left > 7 else "critical",
+            category="expiring_contracts",
+            title=f"{client.nome} {client.cognome} — {residui} {crediti_label}",
+            detail=scadenza_label,
+            count=1,
+            link="/contratti",
+        ))
 
     # ── 3. Rate scadute (non solo "in scadenza", ma GIA' scadute) ──
-    overdue_data = session.execute(text("""
-        SELECT COUNT(*) as cnt,
-               COALESCE(SUM(r.importo_previsto - r.importo_saldato), 0) as tot
-        FROM rate_programmate r
-        JOIN contratti c ON r.id_contratto = c.id
-        WHERE c.trainer_id = :tid
-          AND r.stato IN ('PENDENTE', 'PARZIALE')
-          AND r.data_scadenza < :today
-          AND r.deleted_at IS NULL
-          AND c.deleted_at IS NULL
-          AND c.chiuso = 0
-    """), {"tid": trainer.id, "today": today.isoformat()}).fetchone()
-
-    overdue_count = overdue_data[0] if overdue_data else 0
-    overdue_amount = overdue_data[1] if overdue_data else 0
+    overdue_count = len(data.overdue_rows)
+    overdue_amount = sum(rate.importo_previsto - rate.importo_saldato for rate, _, _ in data.overdue_rows)
 
     if overdue_count > 0:
         items.append(AlertItem(
@@ -617,22 +373,7 @@ def get_dashboard_alerts(
         ))
 
     # ── 4. Clienti inattivi: attivi senza eventi negli ultimi 14 giorni ──
-    cutoff_14 = today - timedelta(days=14)
-    cutoff_start = datetime.combine(cutoff_14, datetime.min.time())
-
-    inactive_count = session.execute(text("""
-        SELECT COUNT(*) FROM clienti cl
-        WHERE cl.trainer_id = :tid
-          AND cl.stato = 'Attivo'
-          AND cl.deleted_at IS NULL
-          AND NOT EXISTS (
-              SELECT 1 FROM agenda e
-              WHERE e.id_cliente = cl.id
-                AND e.data_inizio >= :cutoff
-                AND e.stato != 'Cancellato'
-                AND e.deleted_at IS NULL
-          )
-    """), {"tid": trainer.id, "cutoff": cutoff_start.isoformat()}).scalar() or 0
+    inactive_count = len(data.inactive_rows)
 
     if inactive_count > 0:
         items.append(AlertItem(
@@ -646,7 +387,7 @@ def get_dashboard_alerts(
 
     # ── 5. Azioni cliniche: schede vecchie (>35gg) e misurazioni scadute (>35gg) ──
     scheda_cutoff = (today - timedelta(days=35)).isoformat()
-    misura_cutoff = (today - timedelta(days=35)).isoformat()
+    misura_cutoff = today - timedelta(days=35)
 
     # Clienti attivi con scheda piu' recente creata/aggiornata >35gg fa
     stale_schede_count = session.execute(text("""
@@ -667,22 +408,17 @@ def get_dashboard_alerts(
           )
     """), {"tid": trainer.id, "cutoff": scheda_cutoff}).scalar() or 0
 
-    # Clienti attivi con ultima misurazione >35gg fa
-    stale_misure_count = session.execute(text("""
-        SELECT COUNT(DISTINCT cl.id) FROM clienti cl
-        WHERE cl.trainer_id = :tid
-          AND cl.stato = 'Attivo'
-          AND cl.deleted_at IS NULL
-          AND EXISTS (
-              SELECT 1 FROM misurazioni_cliente m
-              WHERE m.id_cliente = cl.id
-          )
-          AND NOT EXISTS (
-              SELECT 1 FROM misurazioni_cliente m
-              WHERE m.id_cliente = cl.id
-                AND m.data_misurazione > :cutoff
-          )
-    """), {"tid": trainer.id, "cutoff": misura_cutoff}).scalar() or 0
+    # Clienti attivi con ultima misurazione >35gg fa (clienti_attivita)
+    stale_misure_count = session.exec(
+        select(func.count(Client.id))
+        .join(ClientActivity, ClientActivity.client_id == Client.id)
+        .where(
+            Client.trainer_id == trainer.id,
+            Client.stato == "Attivo",
+            Client.deleted_at == None,
+            ClientActivity.ultima_misurazione_data <= misura_cutoff,
+        )
+    ).one()
 
     if stale_schede_count > 0:
         items.append(AlertItem(
@@ -718,6 +454,267 @@ def get_dashboard_alerts(
     )
 
 
+def _clinical_readiness(data: _DashboardData) -> ClinicalReadinessResponse:
+    summary, items = compute_clinical_readiness_data(
+        trainer_id=data.trainer.id,
+        session=data.session,
+        reference_date=data.today,
+    )
+    return ClinicalReadinessResponse(summary=summary, items=items)
+
+
+# Ordine di calcolo nel bundle: le liste prima degli alert che ne riusano le righe
+DASHBOARD_SECTIONS: dict[str, Callable[[_DashboardData], Any]] = {
+    "summary": _summary,
+    "overdue_rates": _overdue_rates,
+    "expiring_contracts": _expiring_contracts,
+    "inactive_clients": _inactive_clients,
+    "alerts": _alerts,
+    "clinical_readiness": _clinical_readiness,
+}
+
+
+def _parse_sections(sections: Optional[str]) -> list[str]:
+    """Sezioni richieste (virgola) nell'ordine di DASHBOARD_SECTIONS; None = tutte."""
+    if sections is None:
+        return list(DASHBOARD_SECTIONS)
+    requested = {s.strip() for s in sections.split(",") if s.strip()}
+    unknown = requested - DASHBOARD_SECTIONS.keys()
+    if unknown or not requested:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Sezioni non valide: {', '.join(sorted(unknown)) or '(nessuna)'}. "
+                   f"Disponibili: {', '.join(DASHBOARD_SECTIONS)}",
+        )
+    return [name for name in DASHBOARD_SECTIONS if name in requested]
+
+
+@router.get("/summary", response_model=DashboardSummary)
+def get_dashboard_summary(
+    trainer: Trainer = Depends(get_current_trainer),
+    session: Session = Depends(get_session),
+):
+    """
+    KPI aggregati per la dashboard del trainer.
+
+    Metriche:
+    - active_clients: clienti con stato 'Attivo'
+    - monthly_revenue: somma ENTRATE del mese corrente
+    - pending_rates: rate scadute o in scadenza nei prossimi 7 giorni
+    - todays_appointments: eventi di oggi
+
+    Tutte le query usano func.count/func.sum — aggregazione SQL pura.
+    """
+    return _summary(_DashboardData(session, trainer))
+
+
+@router.get("/bundle", response_model=DashboardBundle)
+def get_dashboard_bundle(
+    sections: Optional[str] = Query(
+        default=None, max_length=200,
+        description="Sezioni separate da virgola (default: tutte)",
+    ),
+    trainer: Trainer = Depends(get_current_trainer),
+    session: Session = Depends(get_session),
+):
+    """
+    Dashboard in una richiesta: stesse sezioni degli endpoint singoli.
+
+    Una sessione, intermedi condivisi (_DashboardData) e tempo di calcolo
+    per sezione in timings_ms. Un intermedio condiviso pesa sulla prima
+    sezione che lo usa (ordine di DASHBOARD_SECTIONS).
+    """
+    requested = _parse_sections(sections)
+    data = _DashboardData(session, trainer)
+
+    results: dict[str, Any] = {}
+    timings: dict[str, float] = {}
+    started = time.perf_counter()
+    for name in requested:
+        section_start = time.perf_counter()
+        results[name] = DASHBOARD_SECTIONS[name](data)
+        timings[name] = round((time.perf_counter() - section_start) * 1000, 2)
+
+    return DashboardBundle(
+        **results,
+        sections=requested,
+        timings_ms=timings,
+        total_ms=round((time.perf_counter() - started) * 1000, 2),
+    )
+
+
+@router.get("/reconciliation", response_model=ReconciliationResponse)
+def get_reconciliation(
+    trainer: Trainer = Depends(get_current_trainer),
+    session: Session = Depends(get_session),
+):
+    """
+    Audit riconciliazione: confronta totale_versato di ogni contratto
+    con la somma dei CashMovement ENTRATA legati.
+
+    Rileva divergenze in entrambe le direzioni:
+    - totale_versato > ledger: pagamenti registrati su contratto ma senza CashMovement
+    - ledger > totale_versato: CashMovement orfani o doppi
+
+    Soglia: 0.01 EUR (tolleranza arrotondamento).
+    """
+    rows = session.execute(text("""
+        SELECT c.id, cl.nome, cl.cognome, c.totale_versato,
+               COALESCE(SUM(CASE WHEN m.tipo = 'ENTRATA' THEN m.importo ELSE 0 END), 0) as ledger
+        FROM contratti c
+        LEFT JOIN clienti cl ON cl.id = c.id_cliente
+        LEFT JOIN movimenti_cassa m ON m.id_contratto = c.id AND m.deleted_at IS NULL
+        WHERE c.trainer_id = :tid AND c.deleted_at IS NULL
+        GROUP BY c.id
+    """), {"tid": trainer.id}).fetchall()
+
+    items = []
+    aligned = 0
+    for row in rows:
+        cid, nome, cognome, versato, ledger = row
+        delta = round(versato - ledger, 2)
+        if abs(delta) > 0.01:
+            items.append(ReconciliationItem(
+                contract_id=cid,
+                client_name=f"{nome or ''} {cognome or ''}".strip(),
+                totale_versato=round(versato, 2),
+                ledger_total=round(ledger, 2),
+                delta=delta,
+            ))
+        else:
+            aligned += 1
+
+    return ReconciliationResponse(
+        total_contracts=len(rows),
+        aligned=aligned,
+        divergent=len(items),
+        items=items,
+    )
+
+
+@router.get("/ghost-events")
+def get_ghost_events(
+    trainer: Trainer = Depends(get_current_trainer),
+    session: Session = Depends(get_session),
+):
+    """
+    Eventi fantasma: sessioni passate ancora in stato 'Programmato'.
+
+    Restituisce la lista completa con dati cliente per risoluzione inline
+    dalla Dashboard (Sheet con azioni 'Completata'/'Cancellata').
+
+    Ordinamento: piu' vecchi prima (urgenza decrescente).
+    """
+    today_start = datetime.combine(date.today(), datetime.min.time())
+
+    stmt = (
+        select(Event)
+        .where(
+            Event.trainer_id == trainer.id,
+            Event.data_fine < today_start,
+            Event.stato == "Programmato",
+            Event.deleted_at == None,
+        )
+        .order_by(Event.data_inizio.asc())
+    )
+    events = session.exec(stmt).all()
+
+    # Batch fetch nomi clienti (anti-N+1)
+    client_ids = {e.id_cliente for e in events if e.id_cliente}
+    clients_map: dict[int, Client] = {}
+    if client_ids:
+        clients = session.exec(
+            select(Client).where(Client.id.in_(client_ids))
+        ).all()
+        clients_map = {c.id: c for c in clients}
+
+    items = []
+    for e in events:
+        cl = clients_map.get(e.id_cliente) if e.id_cliente else None
+        items.append({
+            "id": e.id,
+            "data_inizio": e.data_inizio.isoformat() if isinstance(e.data_inizio, datetime) else str(e.data_inizio),
+            "data_fine": e.data_fine.isoformat() if isinstance(e.data_fine, datetime) else str(e.data_fine),
+            "categoria": e.categoria,
+            "titolo": e.titolo,
+            "id_cliente": e.id_cliente,
+            "id_contratto": e.id_contratto,
+            "stato": e.stato,
+            "note": e.note,
+            "cliente_nome": cl.nome if cl else None,
+            "cliente_cognome": cl.cognome if cl else None,
+        })
+
+    return {"items": items, "total": len(items)}
+
+
+@router.get("/overdue-rates")
+def get_overdue_rates(
+    trainer: Trainer = Depends(get_current_trainer),
+    session: Session = Depends(get_session),
+):
+    """
+    Rate scadute: rate PENDENTI/PARZIALI con data_scadenza < oggi.
+
+    Restituisce dati completi per risoluzione inline dalla Dashboard
+    (Sheet con pagamento rapido). Include dati cliente e contratto.
+
+    Ordinamento: piu' vecchie prima (urgenza decrescente).
+    """
+    return _overdue_rates(_DashboardData(session, trainer))
+
+
+@router.get("/expiring-contracts")
+def get_expiring_contracts(
+    trainer: Trainer = Depends(get_current_trainer),
+    session: Session = Depends(get_session),
+):
+    """
+    Contratti in scadenza con crediti inutilizzati (30 giorni).
+
+    Restituisce dati completi per risoluzione inline dalla Dashboard
+    (Sheet con progress bar crediti e countdown). crediti_usati e' la
+    colonna mantenuta dall'agenda (api/services/pt_credits.py).
+
+    Ordinamento: scadenza piu' vicina prima.
+    """
+    return _expiring_contracts(_DashboardData(session, trainer))
+
+
+@router.get("/inactive-clients")
+def get_inactive_clients(
+    trainer: Trainer = Depends(get_current_trainer),
+    session: Session = Depends(get_session),
+):
+    """
+    Clienti inattivi: attivi senza eventi negli ultimi 14 giorni.
+
+    Restituisce dati completi per risoluzione inline dalla Dashboard
+    (Sheet con info contatto e ultimo evento). Include telefono, email,
+    data/categoria ultimo evento.
+
+    Ordinamento: piu' a lungo inattivi prima.
+    """
+    return _inactive_clients(_DashboardData(session, trainer))
+
+
+@router.get("/alerts", response_model=DashboardAlerts)
+def get_dashboard_alerts(
+    trainer: Trainer = Depends(get_current_trainer),
+    session: Session = Depends(get_session),
+):
+    """
+    Warning proattivi — "Cosa richiede la mia attenzione ORA?"
+
+    Categorie di alert (query SQL aggregate, zero N+1):
+    1. ghost_events: eventi passati ancora 'Programmato'
+    2. expiring_contracts: contratti in scadenza (30gg) con crediti residui
+    3. overdue_rates: rate scadute (data_scadenza < oggi)
+    4. inactive_clients: clienti attivi senza eventi da >14 giorni
+    """
+    return _alerts(_DashboardData(session, trainer))
+
+
 @router.get("/clinical-readiness", response_model=ClinicalReadinessResponse)
 def get_clinical_readiness(
     trainer: Trainer = Depends(get_current_trainer),
@@ -731,15 +728,11 @@ def get_clinical_readiness(
     2) baseline misurazioni presente?
     3) scheda allenamento assegnata?
     """
-    summary, items = compute_clinical_readiness_data(
-        trainer_id=trainer.id,
-        session=session,
-        reference_date=date.today(),
-    )
-    return ClinicalReadinessResponse(summary=summary, items=items)
+    return _clinical_readiness(_DashboardData(session, trainer))
 
 
 @router.get("/clinical-readiness/worklist", response_model=ClinicalReadinessWorklistResponse)
+@run_in_pool("analytics")
 def get_clinical_readiness_worklist(
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=25, ge=1, le=200),
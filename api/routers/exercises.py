@@ -27,10 +27,8 @@ from api.models.exercise import Exercise
 from api.models.exercise_media import ExerciseMedia
 from api.models.exercise_relation import ExerciseRelation
 from api.models.trainer import Trainer
+from api.responses import fast_response
 from api.routers._audit import log_audit
-from api.models.muscle import Muscle, ExerciseMuscle
-from api.models.joint import Joint, ExerciseJoint
-from api.models.medical_condition import MedicalCondition, ExerciseCondition
 from api.schemas.exercise import (
     ExerciseCreate,
     ExerciseListResponse,
@@ -43,6 +41,8 @@ from api.schemas.exercise import (
     TaxonomyJointResponse,
     TaxonomyMuscleResponse,
 )
+from api.services.catalog_registry import CatalogSnapshot, get_catalog
+from api.services.response_cache import bump_cache_version, cache_response
 
 logger = logging.getLogger("fitmanager.api")
 
@@ -111,12 +111,12 @@ def _get_media(session: Session, exercise_id: int) -> list[ExerciseMedia]:
     ).all())
 
 
-def _get_taxonomy_muscles(catalog_session: Session, exercise_id: int) -> list[TaxonomyMuscleResponse]:
-    rows = catalog_session.exec(
-        select(ExerciseMuscle, Muscle)
-        .join(Muscle, ExerciseMuscle.id_muscolo == Muscle.id)
-        .where(ExerciseMuscle.id_esercizio == exercise_id)
-    ).all()
+def _get_taxonomy_muscles(catalog: CatalogSnapshot, exercise_id: int) -> list[TaxonomyMuscleResponse]:
+    rows = [
+        (em, catalog.muscles[em.id_muscolo])
+        for em in catalog.exercise_muscles.get(exercise_id, ())
+        if em.id_muscolo in catalog.muscles
+    ]
     return [
         TaxonomyMuscleResponse(
             id=m.id, nome=m.nome, nome_en=m.nome_en, gruppo=m.gruppo,
@@ -126,12 +126,12 @@ def _get_taxonomy_muscles(catalog_session: Session, exercise_id: int) -> list[Ta
     ]
 
 
-def _get_taxonomy_joints(catalog_session: Session, exercise_id: int) -> list[TaxonomyJointResponse]:
-    rows = catalog_session.exec(
-        select(ExerciseJoint, Joint)
-        .join(Joint, ExerciseJoint.id_articolazione == Joint.id)
-        .where(ExerciseJoint.id_esercizio == exercise_id)
-    ).all()
+def _get_taxonomy_joints(catalog: CatalogSnapshot, exercise_id: int) -> list[TaxonomyJointResponse]:
+    rows = [
+        (ej, catalog.joints[ej.id_articolazione])
+        for ej in catalog.exercise_joints.get(exercise_id, ())
+        if ej.id_articolazione in catalog.joints
+    ]
     return [
         TaxonomyJointResponse(
             id=j.id, nome=j.nome, nome_en=j.nome_en, tipo=j.tipo,
@@ -141,12 +141,12 @@ def _get_taxonomy_joints(catalog_session: Session, exercise_id: int) -> list[Tax
     ]
 
 
-def _get_taxonomy_conditions(catalog_session: Session, exercise_id: int) -> list[TaxonomyConditionResponse]:
-    rows = catalog_session.exec(
-        select(ExerciseCondition, MedicalCondition)
-        .join(MedicalCondition, ExerciseCondition.id_condizione == MedicalCondition.id)
-        .where(ExerciseCondition.id_esercizio == exercise_id)
-    ).all()
+def _get_taxonomy_conditions(catalog: CatalogSnapshot, exercise_id: int) -> list[TaxonomyConditionResponse]:
+    rows = [
+        (ec, catalog.conditions[ec.id_condizione])
+        for ec in catalog.exercise_conditions.get(exercise_id, ())
+        if ec.id_condizione in catalog.conditions
+    ]
     return [
         TaxonomyConditionResponse(
             id=mc.id, nome=mc.nome, nome_en=mc.nome_en, categoria=mc.categoria,
@@ -257,6 +257,7 @@ def _validate_exercise(exercise: Exercise) -> list[str]:
 # ═══════════════════════════════════════════════════════════════
 
 @router.get("/archive-stats")
+@cache_response("exercises")
 def get_archive_stats(
     trainer: Trainer = Depends(get_current_trainer),
     session: Session = Depends(get_session),
@@ -356,12 +357,12 @@ def list_exercises(
         query.order_by(Exercise.nome).offset(offset).limit(page_size)
     ).all()
 
-    return ExerciseListResponse(
+    return fast_response(ExerciseListResponse(
         items=[_to_response(e) for e in exercises],
         total=total,
         page=page,
         page_size=page_size,
-    )
+    ))
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -369,6 +370,7 @@ def list_exercises(
 # ═══════════════════════════════════════════════════════════════
 
 @router.get("/{exercise_id}", response_model=ExerciseResponse)
+@cache_response("exercises", "catalog")
 def get_exercise(
     exercise_id: int,
     trainer: Trainer = Depends(get_current_trainer),
@@ -379,9 +381,10 @@ def get_exercise(
     exercise = _bouncer_exercise(session, exercise_id, trainer.id)
     media = _get_media(session, exercise_id)
     relazioni = _get_relazioni(session, exercise_id)
-    muscoli = _get_taxonomy_muscles(catalog_session, exercise_id)
-    joints = _get_taxonomy_joints(catalog_session, exercise_id)
-    conditions = _get_taxonomy_conditions(catalog_session, exercise_id)
+    catalog = get_catalog(catalog_session)
+    muscoli = _get_taxonomy_muscles(catalog, exercise_id)
+    joints = _get_taxonomy_joints(catalog, exercise_id)
+    conditions = _get_taxonomy_conditions(catalog, exercise_id)
     return _to_response(exercise, media=media, relazioni=relazioni,
                         muscoli_dettaglio=muscoli, articolazioni=joints,
                         condizioni=conditions)
@@ -430,6 +433,7 @@ def create_exercise(
     session.flush()
     log_audit(session, "exercise", exercise.id, "CREATE", trainer.id)
     session.commit()
+    bump_cache_version("exercises")
     session.refresh(exercise)
     return _to_response(exercise)
 
@@ -463,6 +467,7 @@ def update_exercise(
     log_audit(session, "exercise", exercise.id, "UPDATE", trainer.id, changes or None)
     session.add(exercise)
     session.commit()
+    bump_cache_version("exercises")
     session.refresh(exercise)
 
     resp = _to_response(exercise)
@@ -488,6 +493,7 @@ def delete_exercise(
     session.add(exercise)
     log_audit(session, "exercise", exercise.id, "DELETE", trainer.id)
     session.commit()
+    bump_cache_version("exercises")
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -550,6 +556,7 @@ def upload_exercise_media(
     session.add(media)
     log_audit(session, "exercise_media", exercise_id, "UPLOAD", trainer.id, {"file": filename})
     session.commit()
+    bump_cache_version("exercises")
     session.refresh(media)
     return ExerciseMediaResponse.model_validate(media)
 
@@ -582,6 +589,7 @@ def delete_exercise_media(
     session.delete(media)
     log_audit(session, "exercise_media", exercise_id, "DELETE_MEDIA", trainer.id, {"media_id": media_id})
     session.commit()
+    bump_cache_version("exercises")
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -633,6 +641,7 @@ def create_exercise_relation(
         "related_id": data.related_exercise_id, "tipo": data.tipo_relazione,
     })
     session.commit()
+    bump_cache_version("exercises")
     session.refresh(relation)
 
     return ExerciseRelationResponse(
@@ -667,3 +676,4 @@ def delete_exercise_relation(
         "relation_id": relation_id,
     })
     session.commit()
+    bump_cache_version("exercises")
@@ -31,6 +31,7 @@ from api.schemas.goal import (
     GoalCreate, GoalUpdate,
     GoalResponse, GoalProgress, GoalListResponse,
 )
+from api.services.catalog_registry import get_catalog
 
 router = APIRouter(tags=["goals"])
 
@@ -75,12 +76,6 @@ def _bouncer_goal(
     return goal
 
 
-def _load_metric_map(session: Session) -> dict[int, Metric]:
-    """Carica catalogo metriche in memoria per enrichment (anti-N+1)."""
-    metrics = session.exec(select(Metric)).all()
-    return {m.id: m for m in metrics}
-
-
 def _get_latest_values(
     session: Session, client_id: int, trainer_id: int
 ) -> dict[int, tuple[float, str]]:
@@ -307,7 +302,7 @@ def list_goals(
         return GoalListResponse(items=[], total=0, attivi=0, raggiunti=0)
 
     # Batch enrichment (anti-N+1) — metriche dal catalog
-    metric_map = _load_metric_map(catalog_session)
+    metric_map = get_catalog(catalog_session).metrics
     latest_values = _get_latest_values(session, client_id, trainer.id)
 
     # Fetch storico metriche per rate of change (anti-N+1: 2 query batch)
@@ -346,7 +341,7 @@ def create_goal(
     _bouncer_client(session, client_id, trainer.id)
 
     # Verifica che la metrica esista (catalog)
-    metric = catalog_session.get(Metric, data.id_metrica)
+    metric = get_catalog(catalog_session).metrics.get(data.id_metrica)
     if not metric:
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
@@ -411,7 +406,7 @@ def create_goal(
     session.commit()
     session.refresh(goal)
 
-    metric_map = _load_metric_map(catalog_session)
+    metric_map = get_catalog(catalog_session).metrics
     return _build_goal_response(goal, metric_map, latest_values)
 
 
@@ -461,7 +456,7 @@ def update_goal(
     session.commit()
     session.refresh(goal)
 
-    metric_map = _load_metric_map(catalog_session)
+    metric_map = get_catalog(catalog_session).metrics
     latest_values = _get_latest_values(session, client_id, trainer.id)
     return _build_goal_response(goal, metric_map, latest_values)
 
@@ -0,0 +1,93 @@
+# api/routers/jobs.py
+"""
+Endpoint Job — stato, cancellazione e artefatti dei job in background.
+
+I job nascono dagli endpoint che supportano `?background=true`
+(es. POST /backup/create, GET /backup/export, POST /backup/verify/{f},
+POST /contracts/credits/reconcile) tramite job_accepted().
+
+Bouncer diretto: BackgroundJob.trainer_id == trainer.id (404 altrimenti).
+"""
+
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse, JSONResponse
+
+from api.config import API_PREFIX
+from api.dependencies import get_current_trainer
+from api.models.background_job import JOB_FINAL_STATUSES
+from api.models.trainer import Trainer
+from api.schemas.job import JobResponse
+from api.services.job_runner import JobRunner, get_job_runner
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+def job_accepted(runner: JobRunner, trainer: Trainer, kind: str, params: Optional[dict] = None) -> JSONResponse:
+    """Accoda il job e risponde 202 con lo stato iniziale + Location (endpoint `?background=true`)."""
+    job = runner.submit(trainer.id, kind, params)
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=JobResponse.from_job(job).model_dump(mode="json"),
+        headers={"Location": f"{API_PREFIX}/jobs/{job.id}"},
+    )
+
+
+def _get_job_or_404(runner: JobRunner, job_id: str, trainer: Trainer):
+    job = runner.get(job_id, trainer.id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job non trovato")
+    return job
+
+
+@router.get("", response_model=List[JobResponse])
+def list_jobs(
+    limit: int = Query(50, ge=1, le=200),
+    trainer: Trainer = Depends(get_current_trainer),
+    runner: JobRunner = Depends(get_job_runner),
+):
+    """Job del trainer, piu' recenti prima."""
+    return [JobResponse.from_job(job) for job in runner.list(trainer.id, limit)]
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+def get_job(
+    job_id: str,
+    trainer: Trainer = Depends(get_current_trainer),
+    runner: JobRunner = Depends(get_job_runner),
+):
+    """Stato e avanzamento di un job."""
+    return JobResponse.from_job(_get_job_or_404(runner, job_id, trainer))
+
+
+@router.post("/{job_id}/cancel", response_model=JobResponse)
+def cancel_job(
+    job_id: str,
+    trainer: Trainer = Depends(get_current_trainer),
+    runner: JobRunner = Depends(get_job_runner),
+):
+    """
+    Annulla un job: subito se ancora in coda, al prossimo checkpoint se in esecuzione.
+
+    409 se il job e' gia' concluso.
+    """
+    job = _get_job_or_404(runner, job_id, trainer)
+    if job.status in JOB_FINAL_STATUSES:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Job gia' concluso")
+    runner.cancel(job_id)
+    return JobResponse.from_job(_get_job_or_404(runner, job_id, trainer))
+
+
+@router.get("/{job_id}/artifact")
+def download_job_artifact(
+    job_id: str,
+    trainer: Trainer = Depends(get_current_trainer),
+    runner: JobRunner = Depends(get_job_runner),
+):
+    """Scarica il file prodotto dal job (es. export JSON). 404 se assente o scaduto."""
+    job = _get_job_or_404(runner, job_id, trainer)
+    path = runner.artifact_file(job) if job.status == "succeeded" else None
+    if path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Nessun file disponibile per questo job")
+    return FileResponse(path=str(path), filename=f"{job.kind}_{job.id[:8]}{path.suffix}")
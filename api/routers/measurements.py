@@ -30,7 +30,10 @@ from api.schemas.measurement import (
     MetricResponse, MeasurementResponse, GoalCompletionInfo,
     MeasurementValueResponse, MeasurementListResponse,
 )
+from api.services.catalog_registry import get_catalog
+from api.services.client_activity import refresh_client_activity
 from api.services.goal_engine import sync_goal_completion
+from api.services.response_cache import cache_response
 
 router = APIRouter(tags=["measurements"])
 
@@ -75,12 +78,6 @@ def _bouncer_measurement(
     return measurement
 
 
-def _load_metric_map(session: Session) -> dict[int, Metric]:
-    """Carica catalogo metriche in memoria per enrichment (anti-N+1)."""
-    metrics = session.exec(select(Metric)).all()
-    return {m.id: m for m in metrics}
-
-
 def _build_measurement_response(
     measurement: ClientMeasurement,
     values: List[MeasurementValue],
@@ -111,15 +108,13 @@ def _build_measurement_response(
 # ════════════════════════════════════════════════════════════
 
 @router.get("/metrics", response_model=List[MetricResponse])
+@cache_response("catalog")
 def list_metrics(
     catalog_session: Session = Depends(get_catalog_session),
     trainer: Trainer = Depends(get_current_trainer),
 ):
     """Catalogo metriche standard — raggruppabili per categoria lato frontend."""
-    metrics = catalog_session.exec(
-        select(Metric).order_by(Metric.categoria, Metric.ordinamento)
-    ).all()
-    return metrics
+    return get_catalog(catalog_session).metrics_ordered
 
 
 # ════════════════════════════════════════════════════════════
@@ -165,7 +160,7 @@ def list_measurements(
         values_by_measurement.setdefault(v.id_misurazione, []).append(v)
 
     # Metric map per enrichment (catalog)
-    metric_map = _load_metric_map(catalog_session)
+    metric_map = get_catalog(catalog_session).metrics
 
     items = [
         _build_measurement_response(m, values_by_measurement.get(m.id, []), metric_map)
@@ -208,7 +203,7 @@ def get_latest_measurement(
         )
     ).all()
 
-    metric_map = _load_metric_map(catalog_session)
+    metric_map = get_catalog(catalog_session).metrics
     return _build_measurement_response(measurement, values, metric_map)
 
 
@@ -237,7 +232,7 @@ def create_measurement(
         raise HTTPException(status_code=422, detail="Data futura non ammessa")
 
     # Valida metric IDs (catalog)
-    metric_map = _load_metric_map(catalog_session)
+    metric_map = get_catalog(catalog_session).metrics
     valid_metric_ids = set(metric_map.keys())
     for v in data.valori:
         if v.id_metrica not in valid_metric_ids:
@@ -269,6 +264,7 @@ def create_measurement(
 
     # Auto-check obiettivi (prima del commit — atomico)
     completed_goals = sync_goal_completion(session, catalog_session, client_id, trainer.id)
+    refresh_client_activity(session, client_id, "misurazioni")
 
     session.commit()
     session.refresh(measurement)
@@ -318,7 +314,7 @@ def update_measurement(
         measurement.note = data.note
 
     # Full-replace valori (se forniti — catalog)
-    metric_map = _load_metric_map(catalog_session)
+    metric_map = get_catalog(catalog_session).metrics
     if data.valori is not None:
         valid_metric_ids = set(metric_map.keys())
         for v in data.valori:
@@ -356,6 +352,7 @@ def update_measurement(
 
     # Auto-check obiettivi (prima del commit — atomico)
     completed_goals = sync_goal_completion(session, catalog_session, client_id, trainer.id)
+    refresh_client_activity(session, client_id, "misurazioni")
 
     session.commit()
     session.refresh(measurement)
@@ -388,4 +385,5 @@ def delete_measurement(
         )
 
     measurement.deleted_at = datetime.now(timezone.utc)
+    refresh_client_activity(session, client_id, "misurazioni")
     session.commit()
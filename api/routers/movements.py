@@ -41,6 +41,7 @@ from api.models.audit_log import AuditLog
 from api.models.rate import Rate
 from api.models.contract import Contract
 from api.models.recurring_expense import RecurringExpense
+from api.responses import fast_response
 from api.schemas.financial import (
     MovementManualCreate, MovementResponse,
 )
@@ -50,6 +51,7 @@ from api.services.recurring_expense_schedule import (
     get_recurring_expense_occurrences_in_month,
     get_recurring_expense_start_date,
     list_pending_recurring_expense_occurrences,
+    load_recurring_expense_calendar,
 )
 
 logger = logging.getLogger("fitmanager.api")
@@ -270,20 +272,6 @@ def _build_impact_preview(
     )
 
 
-def _estimate_monthly_expense(expense: RecurringExpense) -> float:
-    """Stima mensile pesata della spesa ricorrente in base alla frequenza."""
-    freq = expense.frequenza or "MENSILE"
-    if freq == "SETTIMANALE":
-        return expense.importo * 4.33
-    if freq == "TRIMESTRALE":
-        return expense.importo / 3
-    if freq == "SEMESTRALE":
-        return expense.importo / 6
-    if freq == "ANNUALE":
-        return expense.importo / 12
-    return expense.importo
-
-
 def _compute_variable_burn_rate(session: Session, trainer: Trainer, today: date) -> float:
     """Media uscite variabili/mese sugli ultimi 3 mesi chiusi."""
     past_months = _prev_months(today.year, today.month, 3)
@@ -320,15 +308,8 @@ def _build_cash_protection(
     - margine_sicurezza: saldo reale - soglia
     - copertura_giorni: autonomia stimata con saldo reale corrente
     """
-    recurring = session.exec(
-        select(RecurringExpense).where(
-            RecurringExpense.trainer_id == trainer.id,
-            RecurringExpense.attiva == True,
-            RecurringExpense.deleted_at == None,
-        )
-    ).all()
-
-    uscite_fisse_stimate = round(sum(_estimate_monthly_expense(e) for e in recurring), 2)
+    schedule = load_recurring_expense_calendar(trainer_id=trainer.id, session=session, months=())
+    uscite_fisse_stimate = round(schedule.monthly_estimate, 2)
     burn_rate = _compute_variable_burn_rate(session, trainer, today)
     costo_operativo_mensile = round(uscite_fisse_stimate + burn_rate, 2)
 
@@ -1069,13 +1050,13 @@ def list_movements(
     # saldo_fine_periodo: saldo alla fine di tutte le righe del periodo
     saldo_fine_periodo = round(saldo_pre + saldo_totale_periodo, 2)
 
-    return {
+    return fast_response({
         "items": [MovementResponse.model_validate(m) for m in movements],
         "total": total,
         "page": page,
         "page_size": page_size,
         "saldo_fine_periodo": saldo_fine_periodo,
-    }
+    })
 
 
 # ════════════════════════════════════════════════════════════
@@ -1451,29 +1432,22 @@ def get_forecast(
             "importo": residuo,
         })
 
-    # ── 3. Uscite fisse: spese ricorrenti per ogni mese futuro ──
-    recurring = session.exec(
-        select(RecurringExpense).where(
-            RecurringExpense.trainer_id == trainer.id,
-            RecurringExpense.attiva == True,
-            RecurringExpense.deleted_at == None,
-        )
-    ).all()
+    # ── 3. Uscite fisse: calendario occorrenze spese ricorrenti sui mesi futuri ──
+    schedule = load_recurring_expense_calendar(
+        trainer_id=trainer.id, session=session, months=future_months,
+    )
 
     uscite_fisse_per_mese: dict[tuple[int, int], float] = defaultdict(float)
 
-    for a, m in future_months:
-        for expense in recurring:
-            occurrences = _get_occurrences_in_month(expense, a, m)
-            for data_prevista, _key in occurrences:
-                importo = expense.importo
-                uscite_fisse_per_mese[(a, m)] += importo
-                timeline_items.append({
-                    "data": data_prevista,
-                    "descrizione": expense.nome,
-                    "tipo": "USCITA",
-                    "importo": importo,
-                })
+    for occurrence in schedule.occurrences:
+        data_prevista = occurrence.due_date
+        uscite_fisse_per_mese[(data_prevista.year, data_prevista.month)] += occurrence.importo
+        timeline_items.append({
+            "data": data_prevista,
+            "descrizione": occurrence.nome,
+            "tipo": "USCITA",
+            "importo": occurrence.importo,
+        })
 
     # ── 4. Uscite variabili stimate: media ultimi 3 mesi ──
     past_months = _prev_months(current_anno, current_mese, 3)
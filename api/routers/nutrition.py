@@ -32,6 +32,7 @@ from datetime import datetime, timezone
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import insert
 from sqlmodel import Session, select, func
 
 from api.database import get_nutrition_session, get_session
@@ -85,6 +86,14 @@ from api.schemas.nutrition import (
     TIPO_PASTO_LABELS,
     GIORNO_LABELS,
 )
+from api.services.anamnesi_facts import get_anamnesi_facts
+from api.services.execution_pools import run_in_pool
+from api.services.response_cache import cache_response
+from api.services.nutrition_plan_reads import (
+    MACRO_FIELDS,
+    load_plan_components,
+    sum_plan_nutrients,
+)
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["nutrition"])
@@ -165,6 +174,52 @@ def _enrich_meal(
     )
 
 
+# ---------------------------------------------------------------------------
+# Helper: persistenza bulk gerarchia pasti → componenti
+# ---------------------------------------------------------------------------
+
+
+def _persist_meals(
+    session: Session,
+    meals: list[tuple[dict, list[dict]]],
+) -> int:
+    """
+    Inserisce pasti e componenti con un numero fisso di statement.
+
+    meals: [(colonne PlanMeal, [colonne MealComponent senza pasto_id]), ...]
+
+    - Pasti: un solo INSERT multi-row con RETURNING id. Su SQLite i rowid di
+      un singolo statement sono assegnati in ordine crescente di VALUES, quindi
+      gli id ordinati corrispondono posizionalmente; altri dialetti usano
+      l'ordinamento per parametro di SQLAlchemy.
+    - Componenti: un solo executemany con i pasto_id appena ottenuti.
+
+    Non fa commit — la transazione resta del chiamante. Ritorna il numero di componenti.
+    """
+    if not meals:
+        return 0
+
+    meal_rows = [meal for meal, _ in meals]
+    if session.get_bind().dialect.name == "sqlite":
+        meal_ids = sorted(session.scalars(
+            insert(PlanMeal).values(meal_rows).returning(PlanMeal.id)
+        ).all())
+    else:
+        meal_ids = list(session.scalars(
+            insert(PlanMeal).returning(PlanMeal.id, sort_by_parameter_order=True),
+            meal_rows,
+        ).all())
+
+    component_rows = [
+        {**comp, "pasto_id": meal_id}
+        for meal_id, (_, meal_components) in zip(meal_ids, meals)
+        for comp in meal_components
+    ]
+    if component_rows:
+        session.execute(insert(MealComponent), component_rows)
+    return len(component_rows)
+
+
 # ---------------------------------------------------------------------------
 # Bouncer helpers
 # ---------------------------------------------------------------------------
@@ -242,6 +297,7 @@ def _bouncer_client(session: Session, client_id: int, trainer_id: int) -> None:
 
 
 @router.get("/nutrition/categories", response_model=list[FoodCategoryResponse])
+@cache_response("nutrition")
 def get_food_categories(
     trainer: Trainer = Depends(get_current_trainer),
     nutrition_session: Session = Depends(get_nutrition_session),
@@ -440,30 +496,9 @@ def get_nutrition_plan_by_id(
     ).all()
     meal_ids = [m.id for m in meals]
 
-    components_all: list[MealComponent] = []
-    food_map: dict[int, Food] = {}
-    cat_map: dict[int, str] = {}
-
-    if meal_ids:
-        components_all = session.exec(
-            select(MealComponent).where(
-                MealComponent.pasto_id.in_(meal_ids),
-                MealComponent.deleted_at == None,
-            )
-        ).all()
-
-        if components_all:
-            food_ids = list({c.alimento_id for c in components_all})
-            foods = nutrition_session.exec(
-                select(Food).where(Food.id.in_(food_ids))
-            ).all()
-            food_map = {f.id: f for f in foods}
-
-            cat_ids = list({f.categoria_id for f in foods})
-            cats = nutrition_session.exec(
-                select(FoodCategory).where(FoodCategory.id.in_(cat_ids))
-            ).all()
-            cat_map = {c.id: c.nome for c in cats}
+    components_all, food_map, cat_map = load_plan_components(
+        session, nutrition_session, meal_ids,
+    )
 
     comp_by_meal: dict[int, list[MealComponent]] = {m.id: [] for m in meals}
     for c in components_all:
@@ -547,39 +582,16 @@ def get_nutrition_summary(
 
     media_kcal = media_prot = media_carb = media_gras = None
 
-    if meal_ids:
-        components = session.exec(
-            select(MealComponent).where(
-                MealComponent.pasto_id.in_(meal_ids),
-                MealComponent.deleted_at == None,
-            )
-        ).all()
+    totals = sum_plan_nutrients(session, nutrition_session, meal_ids)
+    if totals is not None:
+        # Giorni unici nel piano (0 = ogni giorno conta come 1)
+        giorni_unici = {m.giorno_settimana for m in meals}
+        n_giorni = max(len(giorni_unici), 1)
 
-        if components:
-            food_ids = list({c.alimento_id for c in components})
-            foods = nutrition_session.exec(
-                select(Food).where(Food.id.in_(food_ids))
-            ).all()
-            food_map = {f.id: f for f in foods}
-
-            # Giorni unici nel piano (0 = ogni giorno conta come 1)
-            giorni_unici = {m.giorno_settimana for m in meals}
-            n_giorni = max(len(giorni_unici), 1)
-
-            totale_kcal = totale_prot = totale_carb = totale_gras = 0.0
-            for comp in components:
-                food = food_map.get(comp.alimento_id)
-                if food:
-                    factor = comp.quantita_g / 100
-                    totale_kcal += food.energia_kcal * factor
-                    totale_prot += food.proteine_g * factor
-                    totale_carb += food.carboidrati_g * factor
-                    totale_gras += food.grassi_g * factor
-
-            media_kcal = round(totale_kcal / n_giorni, 1)
-            media_prot = round(totale_prot / n_giorni, 1)
-            media_carb = round(totale_carb / n_giorni, 1)
-            media_gras = round(totale_gras / n_giorni, 1)
+        media_kcal = round((totals["energia_kcal"] or 0.0) / n_giorni, 1)
+        media_prot = round((totals["proteine_g"] or 0.0) / n_giorni, 1)
+        media_carb = round((totals["carboidrati_g"] or 0.0) / n_giorni, 1)
+        media_gras = round((totals["grassi_g"] or 0.0) / n_giorni, 1)
 
     delta_kcal = None
     if media_kcal is not None and piano_attivo.obiettivo_calorico:
@@ -709,30 +721,9 @@ def get_nutrition_plan(
     ).all()
     meal_ids = [m.id for m in meals]
 
-    components_all: list[MealComponent] = []
-    food_map: dict[int, Food] = {}
-    cat_map: dict[int, str] = {}
-
-    if meal_ids:
-        components_all = session.exec(
-            select(MealComponent).where(
-                MealComponent.pasto_id.in_(meal_ids),
-                MealComponent.deleted_at == None,
-            )
-        ).all()
-
-        if components_all:
-            food_ids = list({c.alimento_id for c in components_all})
-            foods = nutrition_session.exec(
-                select(Food).where(Food.id.in_(food_ids))
-            ).all()
-            food_map = {f.id: f for f in foods}
-
-            cat_ids = list({f.categoria_id for f in foods})
-            cats = nutrition_session.exec(
-                select(FoodCategory).where(FoodCategory.id.in_(cat_ids))
-            ).all()
-            cat_map = {c.id: c.nome for c in cats}
+    components_all, food_map, cat_map = load_plan_components(
+        session, nutrition_session, meal_ids,
+    )
 
     # Raggruppa componenti per pasto
     comp_by_meal: dict[int, list[MealComponent]] = {m.id: [] for m in meals}
@@ -1110,40 +1101,39 @@ def copy_day(
         )
     ).all()
 
-    pasti_copiati = 0
-    componenti_copiati = 0
-
-    for meal in source_meals:
-        new_meal = PlanMeal(
-            piano_id=plan_id,
-            giorno_settimana=data.target_giorno,
-            tipo_pasto=meal.tipo_pasto,
-            ordine=meal.ordine,
-            nome=meal.nome,
-            note=meal.note,
+    # Batch componenti sorgente (anti N+1)
+    source_components = session.exec(
+        select(MealComponent).where(
+            MealComponent.pasto_id.in_([m.id for m in source_meals]),
+            MealComponent.deleted_at == None,
         )
-        session.add(new_meal)
-        session.flush()  # ottieni new_meal.id senza commit
-
-        # Carica componenti del pasto sorgente
-        source_components = session.exec(
-            select(MealComponent).where(
-                MealComponent.pasto_id == meal.id,
-                MealComponent.deleted_at == None,
-            )
-        ).all()
-
-        for comp in source_components:
-            new_comp = MealComponent(
-                pasto_id=new_meal.id,
-                alimento_id=comp.alimento_id,
-                quantita_g=comp.quantita_g,
-                note=comp.note,
-            )
-            session.add(new_comp)
-            componenti_copiati += 1
-
-        pasti_copiati += 1
+    ).all() if source_meals else []
+    comp_by_meal: dict[int, list[MealComponent]] = {m.id: [] for m in source_meals}
+    for comp in source_components:
+        comp_by_meal[comp.pasto_id].append(comp)
+
+    componenti_copiati = _persist_meals(session, [
+        (
+            {
+                "piano_id": plan_id,
+                "giorno_settimana": data.target_giorno,
+                "tipo_pasto": meal.tipo_pasto,
+                "ordine": meal.ordine,
+                "nome": meal.nome,
+                "note": meal.note,
+            },
+            [
+                {
+                    "alimento_id": comp.alimento_id,
+                    "quantita_g": comp.quantita_g,
+                    "note": comp.note,
+                }
+                for comp in comp_by_meal[meal.id]
+            ],
+        )
+        for meal in source_meals
+    ])
+    pasti_copiati = len(source_meals)
 
     session.commit()
     return CopyDayResult(pasti_copiati=pasti_copiati, componenti_copiati=componenti_copiati)
@@ -1493,26 +1483,27 @@ def create_plan_from_template(
         for c in tmpl_components:
             comp_by_meal.setdefault(c.meal_id, []).append(c)
 
-        for tmpl_meal in tmpl_meals:
-            meal = PlanMeal(
-                piano_id=plan.id,
-                giorno_settimana=tmpl_meal.giorno_settimana,
-                tipo_pasto=tmpl_meal.tipo_pasto,
-                ordine=tmpl_meal.ordine,
-                nome=tmpl_meal.nome,
-                note=tmpl_meal.note,
+        _persist_meals(session, [
+            (
+                {
+                    "piano_id": plan.id,
+                    "giorno_settimana": tmpl_meal.giorno_settimana,
+                    "tipo_pasto": tmpl_meal.tipo_pasto,
+                    "ordine": tmpl_meal.ordine,
+                    "nome": tmpl_meal.nome,
+                    "note": tmpl_meal.note,
+                },
+                [
+                    {
+                        "alimento_id": tc.alimento_id,
+                        "quantita_g": tc.quantita_g,
+                        "note": tc.note,
+                    }
+                    for tc in comp_by_meal.get(tmpl_meal.id, [])
+                ],
             )
-            session.add(meal)
-            session.flush()  # get meal.id
-
-            for tc in comp_by_meal.get(tmpl_meal.id, []):
-                comp = MealComponent(
-                    pasto_id=meal.id,
-                    alimento_id=tc.alimento_id,
-                    quantita_g=tc.quantita_g,
-                    note=tc.note,
-                )
-                session.add(comp)
+            for tmpl_meal in tmpl_meals
+        ])
 
     session.commit()
     session.refresh(plan)
@@ -1586,27 +1577,14 @@ def validate_plan_larn(
             422, "Sesso del cliente non specificato — necessario per validazione LARN"
         )
 
-    # Peso (opzionale — da anamnesi JSON se disponibile)
-    peso_kg = None
-    altezza_cm = None
-    if client.anamnesi_json:
-        import json
-        try:
-            anamnesi = json.loads(client.anamnesi_json)
-            peso_kg = anamnesi.get("peso_kg") or anamnesi.get("peso")
-            altezza_cm = anamnesi.get("altezza_cm") or anamnesi.get("altezza")
-            if peso_kg is not None:
-                peso_kg = float(peso_kg)
-            if altezza_cm is not None:
-                altezza_cm = float(altezza_cm)
-        except (json.JSONDecodeError, ValueError, TypeError):
-            pass
+    # Peso/altezza (opzionali — fatti derivati dall'anamnesi)
+    facts = get_anamnesi_facts(session, client)
 
     profile = ClientProfile(
         eta=eta,
         sesso=sesso,
-        peso_kg=peso_kg,
-        altezza_cm=altezza_cm,
+        peso_kg=facts.peso_kg,
+        altezza_cm=facts.altezza_cm,
     )
 
     # --- Fetch plan data (same pattern as get_nutrition_plan_by_id) ---
@@ -1623,28 +1601,6 @@ def validate_plan_larn(
         )
 
     meal_ids = [m.id for m in meals]
-    components_all = session.exec(
-        select(MealComponent).where(
-            MealComponent.pasto_id.in_(meal_ids),
-            MealComponent.deleted_at == None,
-        )
-    ).all()
-
-    if not components_all:
-        raise HTTPException(
-            422, "Piano senza alimenti — impossibile validare"
-        )
-
-    # Fetch foods with all micronutrient data
-    food_ids = list({c.alimento_id for c in components_all})
-    foods = nutrition_session.exec(
-        select(Food).where(Food.id.in_(food_ids))
-    ).all()
-    food_map = {f.id: f for f in foods}
-
-    # --- Calcola totali per giorno, poi media ---
-    giorni_unici = {m.giorno_settimana for m in meals}
-    n_giorni = max(len(giorni_unici), 1)
 
     # Campi micronutrienti da sommare
     MICRO_FIELDS = [
@@ -1655,39 +1611,28 @@ def validate_plan_larn(
         "vitamina_b9_ug", "vitamina_b12_ug",
     ]
 
-    total_kcal = 0.0
-    total_prot = 0.0
-    total_carb = 0.0
-    total_fat = 0.0
-    micro_totals: dict[str, float] = {f: 0.0 for f in MICRO_FIELDS}
-    micro_has_data: dict[str, bool] = {f: False for f in MICRO_FIELDS}
-
-    for comp in components_all:
-        food = food_map.get(comp.alimento_id)
-        if not food:
-            continue
-        ratio = comp.quantita_g / 100.0
-        total_kcal += food.energia_kcal * ratio
-        total_prot += food.proteine_g * ratio
-        total_carb += food.carboidrati_g * ratio
-        total_fat += food.grassi_g * ratio
-
-        for field in MICRO_FIELDS:
-            val = getattr(food, field, None)
-            if val is not None:
-                micro_totals[field] += val * ratio
-                micro_has_data[field] = True
+    # Totali macro + micro in un solo passaggio (query aggregata se ATTACH attivo)
+    totals = sum_plan_nutrients(
+        session, nutrition_session, meal_ids, (*MACRO_FIELDS, *MICRO_FIELDS),
+    )
+    if totals is None:
+        raise HTTPException(
+            422, "Piano senza alimenti — impossibile validare"
+        )
+
+    # --- Media giornaliera ---
+    giorni_unici = {m.giorno_settimana for m in meals}
+    n_giorni = max(len(giorni_unici), 1)
 
-    # Media giornaliera
-    kcal_die = total_kcal / n_giorni
-    prot_die = total_prot / n_giorni
-    carb_die = total_carb / n_giorni
-    fat_die = total_fat / n_giorni
+    kcal_die = (totals["energia_kcal"] or 0.0) / n_giorni
+    prot_die = (totals["proteine_g"] or 0.0) / n_giorni
+    carb_die = (totals["carboidrati_g"] or 0.0) / n_giorni
+    fat_die = (totals["grassi_g"] or 0.0) / n_giorni
 
     daily_nutrients: dict[str, float | None] = {}
     for field in MICRO_FIELDS:
-        if micro_has_data[field]:
-            daily_nutrients[field] = micro_totals[field] / n_giorni
+        if totals[field] is not None:
+            daily_nutrients[field] = totals[field] / n_giorni
         else:
             daily_nutrients[field] = None
 
@@ -1749,6 +1694,7 @@ def validate_plan_larn(
     response_model=GeneratePlanResponse,
     status_code=status.HTTP_201_CREATED,
 )
+@run_in_pool("nutrition")
 def generate_nutrition_plan(
     body: GeneratePlanInput,
     trainer: Trainer = Depends(get_current_trainer),
@@ -1796,23 +1742,10 @@ def generate_nutrition_plan(
     else:
         raise HTTPException(422, "Sesso del cliente non specificato")
 
-    peso_kg = None
-    altezza_cm = None
-    if client.anamnesi_json:
-        import json as json_mod
-        try:
-            anamnesi = json_mod.loads(client.anamnesi_json)
-            peso_kg = anamnesi.get("peso_kg") or anamnesi.get("peso")
-            altezza_cm = anamnesi.get("altezza_cm") or anamnesi.get("altezza")
-            if peso_kg is not None:
-                peso_kg = float(peso_kg)
-            if altezza_cm is not None:
-                altezza_cm = float(altezza_cm)
-        except (json_mod.JSONDecodeError, ValueError, TypeError):
-            pass
+    facts = get_anamnesi_facts(session, client)
 
     profile = ClientProfile(
-        eta=eta, sesso=sesso, peso_kg=peso_kg, altezza_cm=altezza_cm,
+        eta=eta, sesso=sesso, peso_kg=facts.peso_kg, altezza_cm=facts.altezza_cm,
     )
 
     # Genera piano
@@ -1841,25 +1774,24 @@ def generate_nutrition_plan(
     session.add(plan)
     session.flush()
 
-    total_components = 0
-    for gen_meal in generated.pasti:
-        meal = PlanMeal(
-            piano_id=plan.id,
-            giorno_settimana=gen_meal.giorno_settimana,
-            tipo_pasto=gen_meal.tipo_pasto,
-            ordine=gen_meal.ordine,
+    total_components = _persist_meals(session, [
+        (
+            {
+                "piano_id": plan.id,
+                "giorno_settimana": gen_meal.giorno_settimana,
+                "tipo_pasto": gen_meal.tipo_pasto,
+                "ordine": gen_meal.ordine,
+            },
+            [
+                {
+                    "alimento_id": gen_comp.food_id,
+                    "quantita_g": gen_comp.quantita_g,
+                }
+                for gen_comp in gen_meal.componenti
+            ],
         )
-        session.add(meal)
-        session.flush()
-
-        for gen_comp in gen_meal.componenti:
-            comp = MealComponent(
-                pasto_id=meal.id,
-                alimento_id=gen_comp.food_id,
-                quantita_g=gen_comp.quantita_g,
-            )
-            session.add(comp)
-            total_components += 1
+        for gen_meal in generated.pasti
+    ])
 
     session.commit()
     session.refresh(plan)
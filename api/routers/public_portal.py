@@ -9,7 +9,8 @@ Portale Clienti Self-Service — Anamnesi.
 
 Architettura sicurezza:
   - Token UUID4 (122 bit entropia), monouso (used_at), 48h scadenza
-  - Endpoint pubblici: rate limiting IP-based in-process (10 req/min, 30 req/h)
+  - Endpoint pubblici: rate limiting IP-based in-process (10 req/min, 30 req/h),
+    token bucket a stato fisso con LRU sugli IP inattivi
   - Nome cliente mascherato: "Marco R." — nessun dato sensibile senza token valido
   - Feature flag: PUBLIC_PORTAL_ENABLED=false → tutti gli endpoint 404
 """
@@ -17,7 +18,6 @@ Architettura sicurezza:
 import json
 import logging
 import os
-from collections import defaultdict
 from datetime import datetime, timedelta, timezone
 from uuid import uuid4
 
@@ -35,6 +35,8 @@ from api.schemas.public import (
     AnamnesiValidateResponse,
     ShareTokenResponse,
 )
+from api.services.anamnesi_facts import refresh_anamnesi_facts
+from api.services.rate_limiter import RateLimit, TokenBucketLimiter
 
 logger = logging.getLogger(__name__)
 
@@ -53,34 +55,28 @@ def _require_enabled() -> None:
 
 # ── Rate limiting in-process (zero dipendenze) ──────────────────────────────
 
-_rate_log: dict[str, list[float]] = defaultdict(list)
 _WINDOW_MIN = 60.0    # 1 minuto in secondi
 _WINDOW_HOUR = 3600.0
 _MAX_PER_MIN = 10
 _MAX_PER_HOUR = 30
+_MAX_TRACKED_IPS = 10_000
+
+_rate_limiter = TokenBucketLimiter(
+    [RateLimit(_MAX_PER_MIN, _WINDOW_MIN), RateLimit(_MAX_PER_HOUR, _WINDOW_HOUR)],
+    max_keys=_MAX_TRACKED_IPS,
+)
 
 
 def _check_rate_limit(request: Request) -> None:
-    """Rate limiting IP-based leggero per endpoint pubblici."""
+    """Rate limiting IP-based leggero per endpoint pubblici (token bucket, O(1))."""
     ip = request.client.host if request.client else "unknown"
-    now = datetime.now(timezone.utc).timestamp()
-
-    timestamps = _rate_log[ip]
 
-    # Pulizia: mantieni solo ultimi 60 minuti
-    timestamps[:] = [t for t in timestamps if now - t < _WINDOW_HOUR]
-
-    per_min = sum(1 for t in timestamps if now - t < _WINDOW_MIN)
-    per_hour = len(timestamps)
-
-    if per_min >= _MAX_PER_MIN or per_hour >= _MAX_PER_HOUR:
+    if not _rate_limiter.allow(ip):
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail="Troppe richieste. Riprova tra qualche minuto.",
         )
 
-    timestamps.append(now)
-
 
 # ── Helper: bouncer token pubblico ───────────────────────────────────────────
 
@@ -239,8 +235,9 @@ def submit_anamnesi(
     share = _get_valid_token(session, body.token)
     client = session.get(Client, share.client_id)
 
-    # Salva anamnesi sul cliente
+    # Salva anamnesi sul cliente (+ fatti derivati per le letture)
     client.anamnesi_json = json.dumps(body.anamnesi, ensure_ascii=False)
+    refresh_anamnesi_facts(session, client)
 
     # Invalida token (monouso)
     share.used_at = datetime.now(timezone.utc)
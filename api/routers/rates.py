@@ -21,8 +21,9 @@ Pagamento Atomico (POST /api/rates/{id}/pay):
 """
 
 from typing import Optional
-from datetime import date, datetime, timezone
+from datetime import date, datetime, timedelta, timezone
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import and_, case
 from sqlmodel import Session, select, func
 
 from api.database import get_session
@@ -32,11 +33,10 @@ from api.models.client import Client
 from api.models.contract import Contract
 from api.models.rate import Rate
 from api.models.movement import CashMovement
-from api.models.event import Event
 from api.schemas.financial import (
     RateCreate, RateUpdate, RatePayment,
     RateResponse, PaymentPlanCreate,
-    AgingItem, AgingBucket, AgingResponse,
+    AgingItem, AgingBucket, AgingResponse, AgingItemsPage,
 )
 from api.routers._audit import log_audit
 
@@ -158,99 +158,180 @@ def list_rates(
 OVERDUE_BUCKETS = [("0-30", 0, 31), ("31-60", 31, 61), ("61-90", 61, 91), ("90+", 91, 999_999)]
 UPCOMING_BUCKETS = [("0-7", 0, 8), ("8-30", 8, 31), ("31-60", 31, 61), ("61-90", 61, 91)]
 
+# Chiave bucket esposta al client: "overdue:0-30", "upcoming:8-30", ...
+_AGING_DIRECTIONS = (("overdue", OVERDUE_BUCKETS), ("upcoming", UPCOMING_BUCKETS))
+AGING_BUCKET_KEYS = [
+    f"{direction}:{label}"
+    for direction, buckets in _AGING_DIRECTIONS
+    for label, _, _ in buckets
+]
+AGING_PAGE_SIZE = 20
 
-@router.get("/aging", response_model=AgingResponse)
-def get_aging_report(
-    trainer: Trainer = Depends(get_current_trainer),
-    session: Session = Depends(get_session),
-):
+
+def _shift_days(day: date, days: int) -> Optional[date]:
+    """day + days, None se fuori dal range di `date` (bucket aperto)."""
+    try:
+        return day + timedelta(days=days)
+    except OverflowError:
+        return None
+
+
+def _aging_bucket_ranges(today: date) -> dict[str, tuple[Optional[date], Optional[date]]]:
     """
-    Orizzonte finanziario: rate scadute (passato) + in arrivo (futuro).
+    Chiave bucket -> intervallo [da, a) su data_scadenza.
 
-    Una sola query con 2 JOIN (Rate → Contract → Client).
-    Bucket scaduti: 0-30, 31-60, 61-90, 90+ giorni.
-    Bucket in arrivo: 0-7, 8-30, 31-60, 61-90 giorni.
-    Confini: min_days incluso, max_days escluso.
+    giorni = today - data_scadenza: scaduta se giorni > 0, altrimenti in arrivo
+    tra abs(giorni). Tradurre i confini in date evita aritmetica di date
+    dialect-specific nel SQL e sfrutta l'indice su data_scadenza.
     """
-    today = date.today()
+    ranges: dict[str, tuple[Optional[date], Optional[date]]] = {}
+    for label, min_d, max_d in OVERDUE_BUCKETS:
+        # max(min_d, 1) <= giorni < max_d
+        ranges[f"overdue:{label}"] = (
+            _shift_days(today, -(max_d - 1)), _shift_days(today, -max(min_d, 1) + 1),
+        )
+    for label, min_d, max_d in UPCOMING_BUCKETS:
+        # min_d <= abs(giorni) < max_d
+        ranges[f"upcoming:{label}"] = (_shift_days(today, min_d), _shift_days(today, max_d))
+    return ranges
+
+
+def _date_range_clause(start: Optional[date], end: Optional[date]):
+    conditions = []
+    if start is not None:
+        conditions.append(Rate.data_scadenza >= start)
+    if end is not None:
+        conditions.append(Rate.data_scadenza < end)
+    return and_(*conditions)
+
+
+def _aging_filters(trainer_id: int) -> tuple:
+    """Rate non saldate di contratti attivi del trainer (JOIN Rate → Contract → Client)."""
+    return (
+        Contract.trainer_id == trainer_id,
+        Rate.stato.in_(["PENDENTE", "PARZIALE"]),
+        Rate.deleted_at == None,
+        Contract.deleted_at == None,
+        Contract.chiuso == False,
+    )
 
-    # Query unica: tutte le rate non saldate di contratti attivi
+
+def _aging_items(
+    session: Session,
+    trainer_id: int,
+    today: date,
+    start: Optional[date],
+    end: Optional[date],
+    offset: int,
+    limit: int,
+) -> list[AgingItem]:
+    """Pagina di rate di un singolo bucket, ordinate per scadenza."""
     results = session.exec(
         select(Rate, Contract, Client)
         .join(Contract, Rate.id_contratto == Contract.id)
         .join(Client, Contract.id_cliente == Client.id)
-        .where(
-            Contract.trainer_id == trainer.id,
-            Rate.stato.in_(["PENDENTE", "PARZIALE"]),
-            Rate.deleted_at == None,
-            Contract.deleted_at == None,
-            Contract.chiuso == False,
-        )
-        .order_by(Rate.data_scadenza)
+        .where(*_aging_filters(trainer_id), _date_range_clause(start, end))
+        .order_by(Rate.data_scadenza, Rate.id)
+        .offset(offset)
+        .limit(limit)
     ).all()
 
-    # Classifica ogni rata in overdue o upcoming
-    overdue_items: list[list[AgingItem]] = [[] for _ in OVERDUE_BUCKETS]
-    upcoming_items: list[list[AgingItem]] = [[] for _ in UPCOMING_BUCKETS]
-    clienti_scaduto: set[int] = set()
-
-    for rate, contract, client in results:
-        giorni = (today - rate.data_scadenza).days
-        residuo = round(rate.importo_previsto - rate.importo_saldato, 2)
-
-        item = AgingItem(
+    return [
+        AgingItem(
             rate_id=rate.id,
             contract_id=contract.id,
             client_id=client.id,
             client_nome=client.nome,
             client_cognome=client.cognome,
             data_scadenza=rate.data_scadenza,
-            giorni=giorni,
+            giorni=(today - rate.data_scadenza).days,
             importo_previsto=rate.importo_previsto,
             importo_saldato=rate.importo_saldato,
-            importo_residuo=residuo,
+            importo_residuo=round(rate.importo_previsto - rate.importo_saldato, 2),
             stato=rate.stato,
         )
+        for rate, contract, client in results
+    ]
 
-        if giorni > 0:
-            # Scaduta — assegna al bucket corretto
-            clienti_scaduto.add(client.id)
-            for i, (_, min_d, max_d) in enumerate(OVERDUE_BUCKETS):
-                if min_d <= giorni < max_d:
-                    overdue_items[i].append(item)
-                    break
-        else:
-            # Futura — giorni_mancanti = abs(giorni)
-            giorni_mancanti = abs(giorni)
-            for i, (_, min_d, max_d) in enumerate(UPCOMING_BUCKETS):
-                if min_d <= giorni_mancanti < max_d:
-                    upcoming_items[i].append(item)
-                    break
-
-    # Costruisci bucket response
-    overdue_buckets = []
-    for i, (label, min_d, max_d) in enumerate(OVERDUE_BUCKETS):
-        items = overdue_items[i]
-        overdue_buckets.append(AgingBucket(
-            label=label,
-            min_days=min_d,
-            max_days=max_d,
-            totale=round(sum(it.importo_residuo for it in items), 2),
-            count=len(items),
-            items=items,
-        ))
-
-    upcoming_buckets = []
-    for i, (label, min_d, max_d) in enumerate(UPCOMING_BUCKETS):
-        items = upcoming_items[i]
-        upcoming_buckets.append(AgingBucket(
-            label=label,
-            min_days=min_d,
-            max_days=max_d,
-            totale=round(sum(it.importo_residuo for it in items), 2),
-            count=len(items),
-            items=items,
-        ))
+
+def _validate_bucket_keys(keys: list[str]) -> None:
+    unknown = [k for k in keys if k not in AGING_BUCKET_KEYS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Bucket non valido: {', '.join(unknown)}",
+        )
+
+
+@router.get("/aging", response_model=AgingResponse)
+def get_aging_report(
+    expand: list[str] = Query(default=[], description="Bucket da espandere, es. overdue:0-30"),
+    limit: int = Query(default=AGING_PAGE_SIZE, ge=1, le=200),
+    trainer: Trainer = Depends(get_current_trainer),
+    session: Session = Depends(get_session),
+):
+    """
+    Orizzonte finanziario: rate scadute (passato) + in arrivo (futuro).
+
+    Totali e conteggi: una sola GROUP BY con CASE sul bucket, calcolata in SQL.
+    Le rate (items) sono caricate solo per i bucket in `expand` (prima pagina,
+    max `limit`); le pagine successive arrivano da GET /rates/aging/items.
+    Bucket scaduti: 0-30, 31-60, 61-90, 90+ giorni.
+    Bucket in arrivo: 0-7, 8-30, 31-60, 61-90 giorni.
+    Confini: min_days incluso, max_days escluso.
+    """
+    _validate_bucket_keys(expand)
+    today = date.today()
+    ranges = _aging_bucket_ranges(today)
+
+    bucket_key = case(
+        *[(_date_range_clause(start, end), key) for key, (start, end) in ranges.items()],
+        else_=None,
+    ).label("bucket")
+
+    rows = session.exec(
+        select(
+            bucket_key,
+            func.count(Rate.id),
+            func.coalesce(func.sum(Rate.importo_previsto - Rate.importo_saldato), 0.0),
+        )
+        .join(Contract, Rate.id_contratto == Contract.id)
+        .join(Client, Contract.id_cliente == Client.id)
+        .where(*_aging_filters(trainer.id))
+        .group_by(bucket_key)
+    ).all()
+    aggregates = {key: (count, totale) for key, count, totale in rows if key is not None}
+
+    clienti_con_scaduto = session.exec(
+        select(func.count(func.distinct(Client.id)))
+        .select_from(Rate)
+        .join(Contract, Rate.id_contratto == Contract.id)
+        .join(Client, Contract.id_cliente == Client.id)
+        .where(*_aging_filters(trainer.id), Rate.data_scadenza < today)
+    ).one()
+
+    def _build(direction: str, definitions) -> list[AgingBucket]:
+        buckets = []
+        for label, min_d, max_d in definitions:
+            key = f"{direction}:{label}"
+            count, totale = aggregates.get(key, (0, 0.0))
+            items = []
+            if key in expand and count:
+                start, end = ranges[key]
+                items = _aging_items(session, trainer.id, today, start, end, 0, limit)
+            buckets.append(AgingBucket(
+                key=key,
+                label=label,
+                min_days=min_d,
+                max_days=max_d,
+                totale=round(totale, 2),
+                count=count,
+                items=items,
+            ))
+        return buckets
+
+    overdue_buckets = _build("overdue", OVERDUE_BUCKETS)
+    upcoming_buckets = _build("upcoming", UPCOMING_BUCKETS)
 
     totale_scaduto = round(sum(b.totale for b in overdue_buckets), 2)
     totale_in_arrivo = round(sum(b.totale for b in upcoming_buckets), 2)
@@ -260,12 +341,41 @@ def get_aging_report(
         totale_in_arrivo=totale_in_arrivo,
         rate_scadute=sum(b.count for b in overdue_buckets),
         rate_in_arrivo=sum(b.count for b in upcoming_buckets),
-        clienti_con_scaduto=len(clienti_scaduto),
+        clienti_con_scaduto=clienti_con_scaduto,
         overdue_buckets=overdue_buckets,
         upcoming_buckets=upcoming_buckets,
     )
 
 
+@router.get("/aging/items", response_model=AgingItemsPage)
+def get_aging_bucket_items(
+    bucket: str = Query(..., description="Chiave bucket, es. overdue:0-30"),
+    offset: int = Query(default=0, ge=0),
+    limit: int = Query(default=AGING_PAGE_SIZE, ge=1, le=500),
+    trainer: Trainer = Depends(get_current_trainer),
+    session: Session = Depends(get_session),
+):
+    """Rate di un singolo bucket aging, paginate (espansione lazy dalla UI)."""
+    _validate_bucket_keys([bucket])
+    today = date.today()
+    start, end = _aging_bucket_ranges(today)[bucket]
+
+    total = session.exec(
+        select(func.count(Rate.id))
+        .join(Contract, Rate.id_contratto == Contract.id)
+        .join(Client, Contract.id_cliente == Client.id)
+        .where(*_aging_filters(trainer.id), _date_range_clause(start, end))
+    ).one()
+
+    return AgingItemsPage(
+        bucket=bucket,
+        items=_aging_items(session, trainer.id, today, start, end, offset, limit),
+        total=total,
+        offset=offset,
+        limit=limit,
+    )
+
+
 # ════════════════════════════════════════════════════════════
 # GET: Dettaglio singola rata
 # ════════════════════════════════════════════════════════════
@@ -558,15 +668,7 @@ def pay_rate(
 
     # E-auto) Auto-close: contratto saldato + crediti esauriti → chiuso
     if contract.stato_pagamento == "SALDATO" and contract.crediti_totali:
-        crediti_usati = session.exec(
-            select(func.count(Event.id)).where(
-                Event.id_contratto == contract.id,
-                Event.categoria == "PT",
-                Event.stato != "Cancellato",
-                Event.deleted_at == None,
-            )
-        ).one()
-        if crediti_usati >= contract.crediti_totali:
+        if (contract.crediti_usati or 0) >= contract.crediti_totali:
             contract.chiuso = True
 
     session.add(contract)
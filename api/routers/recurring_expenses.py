@@ -359,22 +359,26 @@ def _estimate_close_deltas(
         )
     ).all()
 
-    storni_creati_previsti = 0
-    storni_rimossi_previsti = 0
-
-    for movement in linked_expense_movements:
-        should_be_storned = movement.data_effettiva > cutoff_date
-        storno_key = f"STORNO:{movement.id}"
-
-        active_storno = session.exec(
+    # Storni attivi della spesa in una query (chiave STORNO:<id movimento>)
+    active_storni: dict[str, CashMovement] = {}
+    if linked_expense_movements:
+        for storno in session.exec(
             select(CashMovement).where(
                 CashMovement.trainer_id == trainer.id,
                 CashMovement.id_spesa_ricorrente == expense.id,
                 CashMovement.tipo == "ENTRATA",
-                CashMovement.mese_anno == storno_key,
+                CashMovement.mese_anno.in_([f"STORNO:{m.id}" for m in linked_expense_movements]),
                 CashMovement.deleted_at == None,
-            )
-        ).first()
+            ).order_by(CashMovement.id)
+        ).all():
+            active_storni.setdefault(storno.mese_anno, storno)
+
+    storni_creati_previsti = 0
+    storni_rimossi_previsti = 0
+
+    for movement in linked_expense_movements:
+        should_be_storned = movement.data_effettiva > cutoff_date
+        active_storno = active_storni.get(f"STORNO:{movement.id}")
 
         if should_be_storned:
             if active_storno:
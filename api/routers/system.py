@@ -13,12 +13,14 @@ from api.schemas.system import (
     ConnectivityConfigResponse,
     ConnectivityStatusResponse,
     ConnectivityVerifyResponse,
+    ExecutionPoolsResponse,
     SupportSnapshotResponse,
 )
 from api.services.connectivity_portal_validation import validate_public_portal_link
 from api.services.connectivity_config import apply_connectivity_config
 from api.services.connectivity_runtime import build_connectivity_status
 from api.services.connectivity_verify import verify_connectivity_setup
+from api.services.execution_pools import default_threadpool_snapshot, pool_snapshots
 from api.services.system_runtime import build_support_snapshot
 
 router = APIRouter(prefix="/system", tags=["system"])
@@ -58,6 +60,17 @@ def run_public_portal_validation(
     return validate_public_portal_link(payload)
 
 
+@router.get("/execution-pools", response_model=ExecutionPoolsResponse)
+async def get_execution_pools(
+    _trainer: Trainer = Depends(get_current_trainer),
+):
+    """Occupazione threadpool condiviso e pool dedicati: in esecuzione, coda, rifiuti."""
+    return ExecutionPoolsResponse(
+        default_threadpool=default_threadpool_snapshot(),
+        pools=pool_snapshots(),
+    )
+
+
 @router.get("/support-snapshot", response_model=SupportSnapshotResponse)
 def get_support_snapshot(
     _trainer: Trainer = Depends(get_current_trainer),
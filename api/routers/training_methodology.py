@@ -7,6 +7,8 @@ Parallelo a dashboard.py (clinical-readiness / MyPortal):
 - training-methodology: il programma di allenamento e' scientificamente solido?
 
 Pattern: batch fetch anti-N+1, analyze_plan() per piano, compliance da logs.
+Le analisi passano dalla cache persistente per contenuto
+(api/services/plan_analysis_cache.py): a piani invariati nessun ricalcolo.
 """
 
 import logging
@@ -28,6 +30,8 @@ from api.models.workout_log import WorkoutLog
 from api.schemas.projection import (
     ClientProjectionResponse,
     GoalProjectionResponse,
+    GoalRiskClientItem,
+    GoalRiskWorklistResponse,
     MetricTrendResponse,
     ProjectionChartResponse,
     ProjectionPointResponse,
@@ -40,18 +44,20 @@ from api.schemas.training_methodology import (
     TrainingMethodologySummary,
     TrainingMethodologyWorklistResponse,
 )
+from api.services.catalog_registry import get_catalog
+from api.services.execution_pools import run_in_pool
 from api.services.projection_engine import (
+    GoalProjection,
+    MetricTrend,
     compute_goal_projection,
-    compute_metric_trend,
+    compute_metric_trends,
     compute_risk_flags,
     compute_volume_accumulation,
     generate_projection_points,
 )
-from api.services.training_science.plan_analyzer import analyze_plan
-from api.services.training_science.plan_converter import (
-    convert_plan_to_template,
-    create_effective_template,
-)
+from api.services.plan_analysis_cache import PlanAnalyses, load_plan_templates, plan_template
+from api.services.training_science.plan_converter import create_effective_template
+from api.services.training_science.types import TemplatePiano
 
 logger = logging.getLogger(__name__)
 
@@ -137,6 +143,167 @@ def _compute_compliance(
     return expected, completed, pct
 
 
+def _active_plans_compliance(
+    session: Session,
+    trainer_id: int,
+    client_ids: list[int],
+) -> dict[int, tuple[WorkoutPlan, int]]:
+    """
+    Piano attivo + compliance % per cliente — 2 query per tutto il set.
+
+    Returns: {client_id: (piano_attivo, compliance_pct)}; assenti i clienti
+    senza piano attivo. A parita' di date vince il piano con id minore.
+    """
+    plans = session.exec(
+        select(WorkoutPlan).where(
+            WorkoutPlan.id_cliente.in_(client_ids),  # type: ignore[union-attr]
+            WorkoutPlan.trainer_id == trainer_id,
+            WorkoutPlan.deleted_at.is_(None),  # type: ignore[union-attr]
+        ).order_by(WorkoutPlan.id)
+    ).all()
+
+    active: dict[int, WorkoutPlan] = {}
+    for p in plans:
+        if p.id_cliente not in active and _get_plan_status(p) == "attivo":
+            active[p.id_cliente] = p
+    if not active:
+        return {}
+
+    log_counts: dict[int, int] = dict(session.exec(
+        select(WorkoutLog.id_scheda, func.count(WorkoutLog.id)).where(
+            WorkoutLog.id_scheda.in_([p.id for p in active.values()]),  # type: ignore[union-attr]
+            WorkoutLog.deleted_at.is_(None),  # type: ignore[union-attr]
+        ).group_by(WorkoutLog.id_scheda)
+    ).all())
+
+    return {
+        cid: (plan, _compute_compliance(plan, "attivo", log_counts.get(plan.id, 0))[2])
+        for cid, plan in active.items()
+    }
+
+
+def _load_metric_series(
+    session: Session,
+    trainer_id: int,
+    client_ids: list[int],
+) -> tuple[dict[tuple[int, int], list[tuple[date, float]]], set[int]]:
+    """
+    Storico misurazioni per (cliente, metrica) — una query per tutto il set.
+
+    Returns: ({(client_id, metric_id): [(data, valore), ...]}, clienti con
+    almeno una sessione di misurazione). Valori nell'ordine di inserimento.
+    """
+    rows = session.exec(
+        select(
+            ClientMeasurement.id_cliente,
+            ClientMeasurement.data_misurazione,
+            MeasurementValue.id_metrica,
+            MeasurementValue.valore,
+        )
+        .outerjoin(MeasurementValue, MeasurementValue.id_misurazione == ClientMeasurement.id)
+        .where(
+            ClientMeasurement.id_cliente.in_(client_ids),  # type: ignore[union-attr]
+            ClientMeasurement.trainer_id == trainer_id,
+            ClientMeasurement.deleted_at.is_(None),  # type: ignore[union-attr]
+        )
+        .order_by(MeasurementValue.id)
+    ).all()
+
+    series: dict[tuple[int, int], list[tuple[date, float]]] = {}
+    measured: set[int] = set()
+    for client_id, d, metric_id, valore in rows:
+        measured.add(client_id)
+        if metric_id is None:
+            continue
+        if isinstance(d, str):
+            try:
+                d = date.fromisoformat(d)
+            except (ValueError, TypeError):
+                continue
+        series.setdefault((client_id, metric_id), []).append((d, valore))
+    return series, measured
+
+
+def _project_goal(
+    goal: ClientGoal,
+    trend: MetricTrend | None,
+    compliance_pct: int,
+) -> GoalProjection | None:
+    """Proiezione di un goal attivo dal trend della sua metrica."""
+    if trend is None:
+        return GoalProjection(
+            status="insufficient_data",
+            message="Servono almeno 2 misurazioni per proiettare",
+        )
+
+    deadline = None
+    if goal.data_scadenza:
+        try:
+            deadline = (
+                date.fromisoformat(goal.data_scadenza)
+                if isinstance(goal.data_scadenza, str)
+                else goal.data_scadenza
+            )
+        except (ValueError, TypeError):
+            pass
+
+    return compute_goal_projection(
+        trend=trend,
+        target=goal.valore_target or 0,
+        direction=goal.direzione,
+        compliance_pct=compliance_pct or 50,
+        goal_deadline=deadline,
+    )
+
+
+def _projection_response(
+    goal: ClientGoal,
+    proj: GoalProjection,
+    met: Metric | None,
+) -> GoalProjectionResponse:
+    return GoalProjectionResponse(
+        goal_id=goal.id,
+        metric_name=met.nome if met else f"Metrica {goal.id_metrica}",
+        unit=met.unita_misura if met else "",
+        status=proj.status,
+        message=proj.message,
+        weekly_rate=proj.weekly_rate,
+        current_value=proj.current_value,
+        target_value=proj.target_value,
+        eta=str(proj.eta) if proj.eta else None,
+        eta_perfect=str(proj.eta_perfect) if proj.eta_perfect else None,
+        days_saved=proj.days_saved,
+        days_per_missed_session=proj.days_per_missed_session,
+        r_squared=proj.r_squared,
+        confidence=proj.confidence,
+        on_track=proj.on_track,
+        goal_deadline=str(proj.goal_deadline) if proj.goal_deadline else None,
+    )
+
+
+def _goal_risk_flags(
+    trends: dict[int, MetricTrend],
+    goals: list[ClientGoal],
+) -> list[RiskFlagResponse]:
+    goal_dicts = [
+        {
+            "id_metrica": g.id_metrica,
+            "direzione": g.direzione,
+            "valore_target": g.valore_target,
+        }
+        for g in goals
+    ]
+    return [
+        RiskFlagResponse(
+            severity=f.severity,
+            code=f.code,
+            message=f.message,
+            metric_id=f.metric_id,
+        )
+        for f in compute_risk_flags(trends, goal_dicts)
+    ]
+
+
 def _compute_priority(
     science_score: float,
     compliance_pct: int,
@@ -258,7 +425,7 @@ def _compute_training_methodology_data(
     """
     Calcola dati MyTrainer per tutti i piani con cliente assegnato.
 
-    Pattern anti-N+1: 6 batch query + N pure computations.
+    Pattern anti-N+1: 7 batch query + analisi solo per i piani mai visti.
     """
     # 1. Piani con cliente assegnato (non eliminati)
     plans = session.exec(
@@ -339,6 +506,18 @@ def _compute_training_methodology_data(
             log_by_plan_session.setdefault(pid, {})[sid] = cnt
             log_counts[pid] = log_counts.get(pid, 0) + cnt
 
+    # 7. Template + analisi gia' salvate (1 query batch sulla cache per contenuto)
+    templates: dict[int, TemplatePiano | None] = {}
+    for plan in plans:
+        client = client_map.get(plan.id_cliente) if plan.id_cliente else None
+        if client:
+            templates[plan.id] = plan_template(
+                plan, sessions_by_plan.get(plan.id, []), exercises_by_session,
+                exercise_catalog, client,
+            )
+    analyses = PlanAnalyses(session)
+    analyses.prefetch(t for t in templates.values() if t is not None)
+
     # ── Build items ──
     items: list[TrainingMethodologyPlanItem] = []
 
@@ -349,25 +528,7 @@ def _compute_training_methodology_data(
 
         plan_status = _get_plan_status(plan)
         plan_sessions = sessions_by_plan.get(plan.id, [])
-
-        # Raccogli esercizi per sessione di QUESTO piano
-        plan_ex_by_session: dict[int, list[WorkoutExercise]] = {}
-        for s in plan_sessions:
-            plan_ex_by_session[s.id] = exercises_by_session.get(s.id, [])
-
-        # Converti e analizza
-        template = convert_plan_to_template(
-            plan=plan,
-            sessions=plan_sessions,
-            exercises_by_session=plan_ex_by_session,
-            exercise_catalog=exercise_catalog,
-            client_sesso=client.sesso,
-            client_data_nascita=(
-                date.fromisoformat(client.data_nascita)
-                if isinstance(client.data_nascita, str) and client.data_nascita
-                else client.data_nascita if isinstance(client.data_nascita, date) else None
-            ),
-        )
+        template = templates[plan.id]
 
         analyzable = template is not None
         science_score = 0.0
@@ -380,7 +541,7 @@ def _compute_training_methodology_data(
 
         if template:
             try:
-                analysis = analyze_plan(template)
+                analysis = analyses.analyze(template)
                 science_score = analysis.score
                 sotto_mev = len(analysis.volume.muscoli_sotto_mev)
                 sopra_mrv = len(analysis.volume.muscoli_sopra_mrv)
@@ -457,7 +618,7 @@ def _compute_training_methodology_data(
             eff_template = create_effective_template(template, session_weights)
             if eff_template:
                 try:
-                    eff_analysis = analyze_plan(eff_template)
+                    eff_analysis = analyses.analyze(eff_template)
                     effective_score_val = round(eff_analysis.score, 1)
                     effective_sotto_mev = len(
                         eff_analysis.volume.muscoli_sotto_mev
@@ -523,6 +684,8 @@ def _compute_training_methodology_data(
 
         items.append(item)
 
+    analyses.save()
+
     # ── Summary ──
     active_items = [i for i in items if i.status == "attivo"]
     analyzable_items = [i for i in items if i.analyzable]
@@ -617,6 +780,7 @@ def _sort_items(
 
 
 @router.get("/worklist", response_model=TrainingMethodologyWorklistResponse)
+@run_in_pool("analytics")
 def get_training_methodology_worklist(
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=24, ge=1, le=100),
@@ -697,42 +861,17 @@ def get_client_projection(
     today = date.today()
 
     # ── 1. Piano attivo + compliance ──
-    active_plan = session.exec(
-        select(WorkoutPlan).where(
-            WorkoutPlan.id_cliente == client_id,
-            WorkoutPlan.trainer_id == trainer.id,
-            WorkoutPlan.deleted_at.is_(None),  # type: ignore[union-attr]
-        )
-    ).all()
-
-    # Trova piano attivo (da date)
-    plan: WorkoutPlan | None = None
-    for p in active_plan:
-        if _get_plan_status(p) == "attivo":
-            plan = p
-            break
+    plan: WorkoutPlan | None
+    plan, compliance_pct = _active_plans_compliance(
+        session, trainer.id, [client_id],
+    ).get(client_id, (None, 0))
 
     plan_name: str | None = None
-    compliance_pct = 0
     volume_resp: VolumeAccumulationResponse | None = None
     weeks_active = 0
 
     if plan:
         plan_name = plan.nome
-        plan_status = "attivo"
-
-        # Compliance
-        log_count_row = session.exec(
-            select(func.count(WorkoutLog.id)).where(
-                WorkoutLog.id_scheda == plan.id,
-                WorkoutLog.deleted_at.is_(None),  # type: ignore[union-attr]
-            )
-        ).one()
-        log_count = log_count_row or 0
-
-        expected, completed, compliance_pct = _compute_compliance(
-            plan, plan_status, log_count
-        )
 
         # Weeks active
         try:
@@ -746,55 +885,14 @@ def get_client_projection(
         weeks_active = max(1, ((today - d_inizio).days // 7) + 1)
 
         # Layer 1: Volume accumulation
-        plan_sessions = session.exec(
-            select(WorkoutSession).where(
-                WorkoutSession.id_scheda == plan.id,
-            )
-        ).all()
-
-        session_ids = [s.id for s in plan_sessions]
-        plan_exercises: list[WorkoutExercise] = []
-        if session_ids:
-            plan_exercises = list(session.exec(
-                select(WorkoutExercise).where(
-                    WorkoutExercise.id_sessione.in_(session_ids),
-                )
-            ).all())
-
-        ex_by_session: dict[int, list[WorkoutExercise]] = {}
-        ref_ids: set[int] = set()
-        for e in plan_exercises:
-            ex_by_session.setdefault(e.id_sessione, []).append(e)
-            ref_ids.add(e.id_esercizio)
-
-        exercise_catalog: dict[int, Exercise] = {}
-        if ref_ids:
-            refs = session.exec(
-                select(Exercise).where(Exercise.id.in_(list(ref_ids)))
-            ).all()
-            exercise_catalog = {r.id: r for r in refs}
-
-        template = convert_plan_to_template(
-            plan=plan,
-            sessions=list(plan_sessions),
-            exercises_by_session={
-                s.id: ex_by_session.get(s.id, []) for s in plan_sessions
-            },
-            exercise_catalog=exercise_catalog,
-            client_sesso=client.sesso,
-            client_data_nascita=(
-                date.fromisoformat(client.data_nascita)
-                if isinstance(client.data_nascita, str) and client.data_nascita
-                else client.data_nascita
-                if isinstance(client.data_nascita, date)
-                else None
-            ),
-        )
+        template = load_plan_templates(session, [plan], {client.id: client}).get(plan.id)
 
         weekly_volume = 0.0
         if template:
             try:
-                analysis = analyze_plan(template)
+                analyses = PlanAnalyses(session)
+                analysis = analyses.analyze(template)
+                analyses.save()
                 weekly_volume = analysis.volume.volume_totale_settimana
             except Exception:
                 logger.warning(
@@ -815,63 +913,19 @@ def get_client_projection(
                 total_volume_missed=vol.total_volume_missed,
             )
 
-    # ── 2. Misurazioni — fetch da business DB + metrica da catalog ──
-    measurements = session.exec(
-        select(ClientMeasurement).where(
-            ClientMeasurement.id_cliente == client_id,
-            ClientMeasurement.trainer_id == trainer.id,
-            ClientMeasurement.deleted_at.is_(None),  # type: ignore[union-attr]
-        )
-    ).all()
-
-    has_measurements = len(measurements) > 0
-    measurement_ids = [m.id for m in measurements]
+    # ── 2. Misurazioni — storico per metrica (stessa query del roster) ──
+    series, measured = _load_metric_series(session, trainer.id, [client_id])
+    has_measurements = client_id in measured
+    metric_values = {mid: vals for (_, mid), vals in series.items()}
 
-    # Raggruppa valori per metrica: {metric_id: [(date, value), ...]}
-    metric_values: dict[int, list[tuple[date, float]]] = {}
-    if measurement_ids:
-        values = session.exec(
-            select(MeasurementValue).where(
-                MeasurementValue.id_misurazione.in_(measurement_ids),
-            )
-        ).all()
-
-        # Build measurement date map
-        meas_date_map: dict[int, date] = {}
-        for m in measurements:
-            d = m.data_misurazione
-            if isinstance(d, str):
-                try:
-                    d = date.fromisoformat(d)
-                except (ValueError, TypeError):
-                    continue
-            meas_date_map[m.id] = d
-
-        for v in values:
-            d = meas_date_map.get(v.id_misurazione)
-            if d is not None:
-                metric_values.setdefault(v.id_metrica, []).append((d, v.valore))
-
-    # Fetch metric catalog info
-    metric_ids_needed = list(metric_values.keys())
-    metric_catalog: dict[int, Metric] = {}
-    if metric_ids_needed:
-        metrics = catalog.exec(
-            select(Metric).where(Metric.id.in_(metric_ids_needed))
-        ).all()
-        metric_catalog = {m.id: m for m in metrics}
+    # Catalogo metriche (registro in memoria)
+    metric_catalog: dict[int, Metric] = get_catalog(catalog).metrics
 
     # Layer 2: Compute trends
-    trends_internal: dict[int, object] = {}  # metric_id -> MetricTrend
+    trends_internal: dict[int, MetricTrend] = {}
     trends_resp: list[MetricTrendResponse] = []
 
-    for mid, vals in metric_values.items():
-        if len(vals) < 2:
-            continue
-        trend = compute_metric_trend(vals)
-        if trend is None:
-            continue
-
+    for mid, trend in compute_metric_trends(metric_values).items():
         met = metric_catalog.get(mid)
         if not met:
             continue
@@ -908,69 +962,13 @@ def get_client_projection(
 
     for goal in goals:
         met = metric_catalog.get(goal.id_metrica)
-        if not met:
-            # Fetch from catalog if not yet loaded
-            m = catalog.exec(
-                select(Metric).where(Metric.id == goal.id_metrica)
-            ).first()
-            if m:
-                metric_catalog[m.id] = m
-                met = m
-
-        met_name = met.nome if met else f"Metrica {goal.id_metrica}"
-        met_unit = met.unita_misura if met else ""
-
         trend = trends_internal.get(goal.id_metrica)
-        if not trend:
-            projections_resp.append(GoalProjectionResponse(
-                goal_id=goal.id,
-                metric_name=met_name,
-                unit=met_unit,
-                status="insufficient_data",
-                message="Servono almeno 2 misurazioni per proiettare",
-            ))
-            continue
-
-        deadline = None
-        if goal.data_scadenza:
-            try:
-                deadline = (
-                    date.fromisoformat(goal.data_scadenza)
-                    if isinstance(goal.data_scadenza, str)
-                    else goal.data_scadenza
-                )
-            except (ValueError, TypeError):
-                pass
-
-        proj = compute_goal_projection(
-            trend=trend,
-            target=goal.valore_target or 0,
-            direction=goal.direzione,
-            compliance_pct=compliance_pct or 50,
-            goal_deadline=deadline,
-        )
-
+        proj = _project_goal(goal, trend, compliance_pct)
         if proj is None:
             continue
 
-        projections_resp.append(GoalProjectionResponse(
-            goal_id=goal.id,
-            metric_name=met_name,
-            unit=met_unit,
-            status=proj.status,
-            message=proj.message,
-            weekly_rate=proj.weekly_rate,
-            current_value=proj.current_value,
-            target_value=proj.target_value,
-            eta=str(proj.eta) if proj.eta else None,
-            eta_perfect=str(proj.eta_perfect) if proj.eta_perfect else None,
-            days_saved=proj.days_saved,
-            days_per_missed_session=proj.days_per_missed_session,
-            r_squared=proj.r_squared,
-            confidence=proj.confidence,
-            on_track=proj.on_track,
-            goal_deadline=str(proj.goal_deadline) if proj.goal_deadline else None,
-        ))
+        projection = _projection_response(goal, proj, met)
+        projections_resp.append(projection)
 
         # Chart data for goals with projections
         if proj.status == "projected" and trend and goal.valore_target:
@@ -999,8 +997,8 @@ def get_client_projection(
 
             charts_resp.append(ProjectionChartResponse(
                 metric_id=goal.id_metrica,
-                metric_name=met_name,
-                unit=met_unit,
+                metric_name=projection.metric_name,
+                unit=projection.unit,
                 historical=historical,
                 projected=projected,
                 target_value=goal.valore_target,
@@ -1008,24 +1006,7 @@ def get_client_projection(
             ))
 
     # ── Risk flags ──
-    goal_dicts = [
-        {
-            "id_metrica": g.id_metrica,
-            "direzione": g.direzione,
-            "valore_target": g.valore_target,
-        }
-        for g in goals
-    ]
-    risk_flags_internal = compute_risk_flags(trends_internal, goal_dicts)
-    risk_flags_resp = [
-        RiskFlagResponse(
-            severity=f.severity,
-            code=f.code,
-            message=f.message,
-            metric_id=f.metric_id,
-        )
-        for f in risk_flags_internal
-    ]
+    risk_flags_resp = _goal_risk_flags(trends_internal, goals)
 
     return ClientProjectionResponse(
         client_id=client.id,
@@ -1042,3 +1023,98 @@ def get_client_projection(
         has_measurements=has_measurements,
         has_goals=has_goals,
     )
+
+
+# ════════════════════════════════════════════════════════════
+# Roster: goal fuori traiettoria
+# ════════════════════════════════════════════════════════════
+
+_OFF_TRACK_STATUSES = {"wrong_direction", "plateau", "unreachable"}
+
+
+@router.get("/goal-risks", response_model=GoalRiskWorklistResponse)
+@run_in_pool("analytics")
+def get_goal_risk_worklist(
+    trainer: Trainer = Depends(get_current_trainer),
+    session: Session = Depends(get_session),
+    catalog: Session = Depends(get_catalog_session),
+):
+    """
+    Clienti con goal fuori traiettoria — tutto il roster in una richiesta.
+
+    Stessi layer 2-3 di /projection/{client_id}, in batch:
+    goal attivi, storico misurazioni, piani + log (4 query totali),
+    trend di tutte le coppie cliente × metrica con OLS vettoriale.
+
+    Fuori traiettoria: proiezione wrong_direction | plateau | unreachable,
+    ETA oltre la deadline, oppure almeno un risk flag "alert".
+    """
+    rows = session.exec(
+        select(ClientGoal, Client)
+        .join(Client, Client.id == ClientGoal.id_cliente)
+        .where(
+            ClientGoal.trainer_id == trainer.id,
+            ClientGoal.stato == "attivo",
+            ClientGoal.deleted_at.is_(None),  # type: ignore[union-attr]
+            Client.trainer_id == trainer.id,
+            Client.deleted_at.is_(None),  # type: ignore[union-attr]
+        )
+        .order_by(ClientGoal.id)
+    ).all()
+
+    clients: dict[int, Client] = {}
+    goals_by_client: dict[int, list[ClientGoal]] = {}
+    for goal, client in rows:
+        clients[client.id] = client
+        goals_by_client.setdefault(client.id, []).append(goal)
+
+    client_ids = list(clients)
+    if not client_ids:
+        return GoalRiskWorklistResponse(items=[], total=0, clients_analyzed=0, goals_analyzed=0)
+
+    series, _ = _load_metric_series(session, trainer.id, client_ids)
+    compliance = _active_plans_compliance(session, trainer.id, client_ids)
+    metric_catalog: dict[int, Metric] = get_catalog(catalog).metrics
+
+    trends_by_client: dict[int, dict[int, MetricTrend]] = {}
+    for (cid, mid), trend in compute_metric_trends(series).items():
+        if mid in metric_catalog:
+            trends_by_client.setdefault(cid, {})[mid] = trend
+
+    items: list[GoalRiskClientItem] = []
+    for cid, goals in goals_by_client.items():
+        client = clients[cid]
+        trends = trends_by_client.get(cid, {})
+        compliance_pct = compliance.get(cid, (None, 0))[1]
+
+        off_track: list[GoalProjectionResponse] = []
+        for goal in goals:
+            proj = _project_goal(goal, trends.get(goal.id_metrica), compliance_pct)
+            if proj is None:
+                continue
+            if proj.status in _OFF_TRACK_STATUSES or proj.on_track is False:
+                off_track.append(_projection_response(goal, proj, metric_catalog.get(goal.id_metrica)))
+
+        flags = _goal_risk_flags(trends, goals)
+        alert_count = sum(1 for f in flags if f.severity == "alert")
+        if not off_track and not alert_count:
+            continue
+
+        items.append(GoalRiskClientItem(
+            client_id=cid,
+            client_nome=client.nome,
+            client_cognome=client.cognome,
+            compliance_pct=compliance_pct,
+            off_track=off_track,
+            risk_flags=flags,
+            alert_count=alert_count,
+        ))
+
+    items.sort(key=lambda it: (-it.alert_count, -len(it.off_track), it.client_cognome, it.client_nome))
+
+    return GoalRiskWorklistResponse(
+        items=items,
+        total=len(items),
+        clients_analyzed=len(client_ids),
+        goals_analyzed=len(rows),
+    )
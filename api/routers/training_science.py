@@ -24,6 +24,8 @@ from api.database import get_catalog_session, get_session
 from api.dependencies import get_current_trainer
 from api.models.trainer import Trainer
 from api.schemas.training_science import TSPlanPackage, TSPlanPackageRequest
+from api.services.execution_pools import run_in_pool
+from api.services.response_cache import cache_response
 from api.services.training_science import (
     Obiettivo,
     Livello,
@@ -100,6 +102,7 @@ def generate_plan(
 
 
 @router.post("/plan-package", response_model=TSPlanPackage)
+@run_in_pool("training_science")
 def generate_plan_package(
     data: TSPlanPackageRequest,
     trainer: Trainer = Depends(get_current_trainer),
@@ -127,6 +130,7 @@ def generate_plan_package(
 
 
 @router.post("/analyze", response_model=AnalisiPiano)
+@run_in_pool("training_science")
 def analyze_existing_plan(
     data: AnalyzeRequest,
     trainer: Trainer = Depends(get_current_trainer),
@@ -145,6 +149,7 @@ def analyze_existing_plan(
 
 
 @router.post("/mesocycle", response_model=Mesociclo)
+@run_in_pool("training_science")
 def generate_mesocycle(
     data: MesocycleRequest,
     trainer: Trainer = Depends(get_current_trainer),
@@ -171,6 +176,7 @@ def generate_mesocycle(
 
 
 @router.get("/parameters/{obiettivo}", response_model=ParametriCarico)
+@cache_response()
 def get_load_parameters(
     obiettivo: Obiettivo,
     trainer: Trainer = Depends(get_current_trainer),
@@ -184,6 +190,7 @@ def get_load_parameters(
 
 
 @router.get("/volume-targets", response_model=list[VolumeTarget])
+@cache_response()
 def get_volume_targets(
     livello: Livello,
     obiettivo: Obiettivo,
@@ -31,6 +31,7 @@ from api.schemas.workout_log import (
     WorkoutLogListResponse,
 )
 from api.routers._audit import log_audit
+from api.services.client_activity import refresh_client_activity
 
 router = APIRouter(tags=["workout-logs"])
 
@@ -158,6 +159,7 @@ def create_workout_log(
     session.add(log)
     session.flush()
     log_audit(session, "workout_log", log.id, "CREATE", trainer.id)
+    refresh_client_activity(session, client_id, "allenamenti")
     session.commit()
     session.refresh(log)
 
@@ -273,4 +275,5 @@ def delete_workout_log(
 
     log.deleted_at = datetime.now(timezone.utc)
     log_audit(session, "workout_log", log.id, "DELETE", trainer.id)
+    refresh_client_activity(session, client_id, "allenamenti")
     session.commit()
@@ -7,12 +7,14 @@ IDOR chain: WorkoutExercise → WorkoutSession → WorkoutPlan.trainer_id
 
 Operazioni atomiche: plan + sessioni + blocchi + esercizi in una transazione.
 Full-replace sessions: DELETE old → INSERT new (semplice e sicuro).
+Dopo ogni salvataggio di una scheda assegnata, l'analisi scientifica viene
+pre-calcolata dopo la risposta (cache per contenuto, vedi plan_analysis_cache).
 """
 
 from datetime import date, datetime, timezone
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
 from sqlmodel import Session, select, func
 
 from api.database import get_session
@@ -29,6 +31,7 @@ from api.schemas.workout import (
     SessionBlockResponse,
 )
 from api.routers._audit import log_audit
+from api.services.plan_analysis_cache import warm_plan_analysis
 
 router = APIRouter(prefix="/workouts", tags=["workouts"])
 
@@ -54,6 +57,14 @@ def _bouncer_workout(session: Session, workout_id: int, trainer_id: int) -> Work
     return plan
 
 
+def _schedule_analysis_warmup(
+    background_tasks: BackgroundTasks, session: Session, plan: WorkoutPlan,
+) -> None:
+    """Pre-calcola l'analisi del piano dopo la risposta (solo schede assegnate)."""
+    if plan.id_cliente is not None:
+        background_tasks.add_task(warm_plan_analysis, session.get_bind(), plan.id)
+
+
 def _check_client_ownership(session: Session, client_id: int, trainer_id: int) -> None:
     """Relational IDOR: verifica che il cliente appartenga al trainer."""
     client = session.exec(
@@ -376,6 +387,7 @@ def _delete_sessions_cascade(session: Session, session_ids: list[int]) -> None:
 @router.post("", response_model=WorkoutPlanResponse, status_code=status.HTTP_201_CREATED)
 def create_workout(
     data: WorkoutPlanCreate,
+    background_tasks: BackgroundTasks,
     trainer: Trainer = Depends(get_current_trainer),
     session: Session = Depends(get_session),
 ):
@@ -407,6 +419,7 @@ def create_workout(
     log_audit(session, "workout_plan", plan.id, "CREATE", trainer.id)
     session.commit()
     session.refresh(plan)
+    _schedule_analysis_warmup(background_tasks, session, plan)
 
     return _build_plan_response(session, plan)
 
@@ -484,6 +497,7 @@ def get_workout(
 def update_workout(
     workout_id: int,
     data: WorkoutPlanUpdate,
+    background_tasks: BackgroundTasks,
     trainer: Trainer = Depends(get_current_trainer),
     session: Session = Depends(get_session),
 ):
@@ -524,6 +538,7 @@ def update_workout(
     log_audit(session, "workout_plan", plan.id, "UPDATE", trainer.id)
     session.commit()
     session.refresh(plan)
+    _schedule_analysis_warmup(background_tasks, session, plan)
 
     return _build_plan_response(session, plan)
 
@@ -536,6 +551,7 @@ def update_workout(
 def replace_sessions(
     workout_id: int,
     sessions: list[WorkoutSessionInput],
+    background_tasks: BackgroundTasks,
     trainer: Trainer = Depends(get_current_trainer),
     session: Session = Depends(get_session),
 ):
@@ -568,6 +584,7 @@ def replace_sessions(
     log_audit(session, "workout_plan", plan.id, "UPDATE_SESSIONS", trainer.id)
     session.commit()
     session.refresh(plan)
+    _schedule_analysis_warmup(background_tasks, session, plan)
 
     return _build_plan_response(session, plan)
 
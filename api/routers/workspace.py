@@ -12,6 +12,7 @@ from api.schemas.workspace import (
     WorkspaceCaseListResponse,
     WorkspaceTodayResponse,
 )
+from api.services.execution_pools import run_in_pool
 from api.services.session_prep import build_session_prep
 from api.services.workspace_engine import (
     build_workspace_case_detail,
@@ -23,6 +24,7 @@ router = APIRouter(prefix="/workspace", tags=["workspace"])
 
 
 @router.get("/today", response_model=WorkspaceTodayResponse)
+@run_in_pool("analytics")
 def get_workspace_today(
     trainer: Trainer = Depends(get_current_trainer),
     session: Session = Depends(get_session),
@@ -85,6 +87,7 @@ def get_workspace_case_detail(
 
 
 @router.get("/today/session-prep", response_model=SessionPrepResponse)
+@run_in_pool("analytics")
 def get_session_prep(
     trainer: Trainer = Depends(get_current_trainer),
     session: Session = Depends(get_session),
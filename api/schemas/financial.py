@@ -441,6 +441,24 @@ class DashboardAlerts(BaseModel):
     items: List[AlertItem] = []
 
 
+class DashboardBundle(BaseModel):
+    """
+    Dashboard in una richiesta: solo le sezioni richieste sono valorizzate.
+
+    Le liste (overdue_rates, expiring_contracts, inactive_clients) hanno la
+    forma degli endpoint singoli: {"items": [...], "total": n}.
+    """
+    summary: Optional[DashboardSummary] = None
+    alerts: Optional[DashboardAlerts] = None
+    clinical_readiness: Optional[ClinicalReadinessResponse] = None
+    overdue_rates: Optional[dict] = None
+    expiring_contracts: Optional[dict] = None
+    inactive_clients: Optional[dict] = None
+    sections: List[str] = []
+    timings_ms: dict[str, float] = {}     # tempo di calcolo per sezione
+    total_ms: float = 0.0
+
+
 # Backward compatibility:
 # readiness schemas moved to `api.schemas.clinical` but remain re-exported here.
 
@@ -466,6 +484,26 @@ class ReconciliationResponse(BaseModel):
     items: List[ReconciliationItem] = []
 
 
+# ════════════════════════════════════════════════════════════
+# RICONCILIAZIONE CREDITI PT (contatori vs agenda)
+# ════════════════════════════════════════════════════════════
+
+class CreditDriftItem(BaseModel):
+    """Contatore salvato diverso dal valore ricalcolato dagli eventi PT."""
+    id: int
+    salvato: int
+    atteso: int
+
+
+class CreditReconciliationResponse(BaseModel):
+    """Esito riconciliazione contratti.crediti_usati / clienti.crediti_residui."""
+    contratti_verificati: int
+    clienti_verificati: int
+    contratti: List[CreditDriftItem] = []
+    clienti: List[CreditDriftItem] = []
+    corretto: bool
+
+
 # ════════════════════════════════════════════════════════════
 # AGING REPORT (Orizzonte Finanziario)
 # ════════════════════════════════════════════════════════════
@@ -487,12 +525,13 @@ class AgingItem(BaseModel):
 
 class AgingBucket(BaseModel):
     """Fascia temporale con rate raggruppate."""
+    key: str                  # "overdue:0-30", "upcoming:8-30", ...
     label: str                # "0-30", "31-60", "61-90", "90+"
     min_days: int
     max_days: int             # 999 per "90+"
     totale: float             # somma importo_residuo nel bucket
     count: int                # numero rate
-    items: List[AgingItem]
+    items: List[AgingItem] = []   # valorizzati solo per i bucket espansi (expand=...)
 
 
 class AgingResponse(BaseModel):
@@ -504,3 +543,12 @@ class AgingResponse(BaseModel):
     clienti_con_scaduto: int
     overdue_buckets: List[AgingBucket]    # 4 bucket: 0-30, 31-60, 61-90, 90+
     upcoming_buckets: List[AgingBucket]   # 4 bucket: 0-7, 8-30, 31-60, 61-90
+
+
+class AgingItemsPage(BaseModel):
+    """Pagina di rate di un singolo bucket aging (GET /rates/aging/items)."""
+    bucket: str
+    items: List[AgingItem]
+    total: int                # rate totali nel bucket
+    offset: int
+    limit: int
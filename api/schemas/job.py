@@ -0,0 +1,43 @@
+"""Schemas per i job in background (api/services/job_runner.py)."""
+
+import json
+from datetime import datetime
+from typing import Any, Literal
+
+from pydantic import BaseModel
+
+from api.models.background_job import BackgroundJob
+
+JobStatus = Literal["queued", "running", "succeeded", "failed", "cancelled"]
+
+
+class JobResponse(BaseModel):
+    id: str
+    kind: str
+    status: JobStatus
+    progress: int
+    message: str | None = None
+    result: dict[str, Any] | None = None
+    error: str | None = None
+    has_artifact: bool = False
+    cancel_requested: bool = False
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+    @classmethod
+    def from_job(cls, job: BackgroundJob) -> "JobResponse":
+        return cls(
+            id=job.id,
+            kind=job.kind,
+            status=job.status,
+            progress=job.progress,
+            message=job.message,
+            result=json.loads(job.result_json) if job.result_json else None,
+            error=job.error,
+            has_artifact=job.artifact is not None,
+            cancel_requested=job.cancel_requested,
+            created_at=job.created_at,
+            started_at=job.started_at,
+            finished_at=job.finished_at,
+        )
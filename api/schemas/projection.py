@@ -141,3 +141,28 @@ class ClientProjectionResponse(BaseModel):
     has_active_plan: bool = False
     has_measurements: bool = False
     has_goals: bool = False
+
+
+class GoalRiskClientItem(BaseModel):
+    """Cliente con almeno un goal fuori traiettoria o un risk flag alert."""
+
+    client_id: int
+    client_nome: str
+    client_cognome: str
+    compliance_pct: int = Field(default=0, description="Compliance piano attivo")
+    off_track: List[GoalProjectionResponse] = Field(
+        default_factory=list,
+        description="Goal wrong_direction | plateau | unreachable o con ETA oltre la deadline",
+    )
+    risk_flags: List[RiskFlagResponse] = Field(default_factory=list)
+    alert_count: int = 0
+
+
+class GoalRiskWorklistResponse(BaseModel):
+    """Worklist roster: clienti con goal fuori traiettoria."""
+
+    items: List[GoalRiskClientItem] = Field(default_factory=list)
+    total: int
+    clients_analyzed: int = Field(description="Clienti con almeno un goal attivo")
+    goals_analyzed: int
+
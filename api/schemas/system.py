@@ -57,11 +57,70 @@ class SupportSnapshotBackupItem(BaseModel):
     checksum: str | None = None
 
 
+class ExecutionPoolStatus(BaseModel):
+    name: str
+    workers: int
+    running: int
+    queued: int
+    max_queue: int | None = None
+    peak_queued: int | None = None
+    completed: int | None = None
+    failed: int | None = None
+    rejected: int | None = None
+
+
+class RouteLatencySummary(BaseModel):
+    method: str
+    route: str
+    count: int
+    avg_ms: float
+    p95_ms: float | None = None
+
+
+class DatabasePoolStatus(BaseModel):
+    engine: str
+    pool: str
+    size: int | None = None
+    checked_out: int | None = None
+    peak_checked_out: int
+    checkouts: int
+    checkins: int
+    connects: int
+    saturated_checkouts: int
+    queries: int
+    slow_queries: int
+
+
+class CacheHitRate(BaseModel):
+    name: str
+    hits: int
+    misses: int
+    hit_rate: float | None = None
+
+
+class RuntimeMetricsSummary(BaseModel):
+    requests_total: int
+    requests_5xx: int
+    in_flight: int
+    slowest_routes: list[RouteLatencySummary]
+    default_threadpool: ExecutionPoolStatus | None = None
+    pools: list[ExecutionPoolStatus]
+    databases: list[DatabasePoolStatus]
+    caches: list[CacheHitRate]
+    log_records_dropped: int
+
+
 class SupportSnapshotResponse(BaseModel):
     generated_at: datetime
     public_base_url: str | None = None
     health: HealthResponse
     recent_backups: list[SupportSnapshotBackupItem]
+    metrics: RuntimeMetricsSummary | None = None
+
+
+class ExecutionPoolsResponse(BaseModel):
+    default_threadpool: ExecutionPoolStatus | None = None
+    pools: list[ExecutionPoolStatus]
 
 
 class ConnectivityCheck(BaseModel):
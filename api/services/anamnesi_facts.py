@@ -0,0 +1,211 @@
+"""
+Fatti derivati dall'anamnesi — un solo json.loads per scrittura, mai in lettura.
+
+`clienti.anamnesi_json` resta la fonte di verita'. Ad ogni scrittura
+(create/update cliente, submit portale pubblico) il chiamante invoca
+refresh_anamnesi_facts(): il JSON viene decodificato una volta e i fatti
+usati dai percorsi di lettura finiscono in colonne tipizzate e indicizzate:
+
+  - stato anamnesi (missing | legacy | structured) + data di riferimento
+    → readiness clinica
+  - condition_id + flag farmacologici → safety engine
+  - peso/altezza → generazione e validazione piani alimentari
+
+I lettori usano load_anamnesi_facts() / get_anamnesi_facts(). Per clienti senza
+riga (es. dati importati prima del backfill) o con riga di una derivazione
+precedente (facts_version != FACTS_VERSION: regole keyword/farmaci cambiate) i
+fatti vengono derivati al volo dal JSON, senza scrivere: il risultato e'
+identico, solo piu' lento. backfill_anamnesi_facts() riallinea le righe.
+"""
+
+import hashlib
+import json
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from typing import Any, Iterable, Optional
+
+from sqlmodel import Session, delete, select
+
+from api.models.anamnesi_facts import ClientAnamnesiFacts, ClientConditionFact
+from api.models.client import Client
+from api.services.client_freshness import parse_reference_date
+from api.services.condition_rules import ANAMNESI_KEYWORD_RULES, MEDICATION_RULES, STRUCTURAL_FLAGS
+from api.services.safety_engine import conditions_from_anamnesi, medication_flag_names
+
+
+@dataclass(frozen=True)
+class AnamnesiFacts:
+    """Fatti derivati dall'anamnesi di un cliente (read model)."""
+    stato: str = "missing"
+    data_riferimento: Optional[date] = None
+    condition_ids: frozenset[int] = frozenset()
+    medication_flags: tuple[str, ...] = ()
+    peso_kg: Optional[float] = None
+    altezza_cm: Optional[float] = None
+
+
+MISSING_FACTS = AnamnesiFacts()
+
+# Logica di estrazione: incrementare quando cambia il codice di derivazione
+_DERIVATION_VERSION = 1
+
+# Derivazione + tabelle regole: una regola modificata invalida i fatti salvati
+FACTS_VERSION = hashlib.sha256(json.dumps(
+    [_DERIVATION_VERSION, STRUCTURAL_FLAGS, ANAMNESI_KEYWORD_RULES, MEDICATION_RULES],
+    sort_keys=True,
+).encode("utf-8")).hexdigest()[:16]
+
+
+# ════════════════════════════════════════════════════════════
+# DERIVAZIONE (pura, nessun accesso al DB)
+# ════════════════════════════════════════════════════════════
+
+def _anamnesi_state(payload: Any) -> str:
+    if isinstance(payload, dict) and "data_compilazione" in payload and (
+        "obiettivo_principale" in payload
+    ):
+        return "structured"
+    return "legacy"
+
+
+def _reference_date(payload: dict) -> Optional[date]:
+    updated = parse_reference_date(payload.get("data_ultimo_aggiornamento"))
+    if updated:
+        return updated
+    return parse_reference_date(payload.get("data_compilazione"))
+
+
+def _optional_float(value: Any) -> Optional[float]:
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def derive_anamnesi_facts(anamnesi_json: Optional[str]) -> AnamnesiFacts:
+    """Decodifica anamnesi_json una volta ed estrae tutti i fatti derivati."""
+    if not anamnesi_json:
+        return MISSING_FACTS
+
+    try:
+        payload = json.loads(anamnesi_json)
+    except (TypeError, json.JSONDecodeError):
+        return AnamnesiFacts(stato="legacy")
+
+    if not isinstance(payload, dict):
+        return AnamnesiFacts(stato="legacy")
+
+    return AnamnesiFacts(
+        stato=_anamnesi_state(payload),
+        data_riferimento=_reference_date(payload),
+        condition_ids=frozenset(conditions_from_anamnesi(payload)),
+        medication_flags=tuple(medication_flag_names(payload)),
+        peso_kg=_optional_float(payload.get("peso_kg") or payload.get("peso")),
+        altezza_cm=_optional_float(payload.get("altezza_cm") or payload.get("altezza")),
+    )
+
+
+# ════════════════════════════════════════════════════════════
+# SCRITTURA
+# ════════════════════════════════════════════════════════════
+
+def refresh_anamnesi_facts(session: Session, client: Client) -> AnamnesiFacts:
+    """
+    Ricalcola e salva i fatti derivati del cliente (upsert, niente commit).
+
+    Da chiamare ad ogni scrittura di `client.anamnesi_json`, prima del commit
+    del chiamante. Il cliente deve avere gia' un id (flush dopo la create).
+    """
+    if client.id is None:
+        session.flush()
+
+    facts = derive_anamnesi_facts(client.anamnesi_json)
+
+    row = session.get(ClientAnamnesiFacts, client.id)
+    if row is None:
+        row = ClientAnamnesiFacts(client_id=client.id)
+    row.trainer_id = client.trainer_id
+    row.stato = facts.stato
+    row.data_riferimento = facts.data_riferimento
+    row.medication_flags = json.dumps(list(facts.medication_flags)) if facts.medication_flags else None
+    row.peso_kg = facts.peso_kg
+    row.altezza_cm = facts.altezza_cm
+    row.facts_version = FACTS_VERSION
+    row.updated_at = datetime.now(timezone.utc)
+    session.add(row)
+
+    session.exec(delete(ClientConditionFact).where(ClientConditionFact.client_id == client.id))
+    for condition_id in sorted(facts.condition_ids):
+        session.add(ClientConditionFact(
+            client_id=client.id,
+            condition_id=condition_id,
+            trainer_id=client.trainer_id,
+        ))
+    return facts
+
+
+def backfill_anamnesi_facts(session: Session) -> int:
+    """Ricalcola i fatti per tutti i clienti (migrazione / riparazione). Ritorna il numero."""
+    count = 0
+    for client in session.exec(select(Client)).all():
+        refresh_anamnesi_facts(session, client)
+        count += 1
+    session.commit()
+    return count
+
+
+# ════════════════════════════════════════════════════════════
+# LETTURA
+# ════════════════════════════════════════════════════════════
+
+def _facts_from_row(row: ClientAnamnesiFacts, condition_ids: Iterable[int]) -> AnamnesiFacts:
+    try:
+        flags = tuple(json.loads(row.medication_flags)) if row.medication_flags else ()
+    except (TypeError, json.JSONDecodeError):
+        flags = ()
+    return AnamnesiFacts(
+        stato=row.stato,
+        data_riferimento=row.data_riferimento,
+        condition_ids=frozenset(condition_ids),
+        medication_flags=flags,
+        peso_kg=row.peso_kg,
+        altezza_cm=row.altezza_cm,
+    )
+
+
+def load_anamnesi_facts(session: Session, clients: Iterable[Client]) -> dict[int, AnamnesiFacts]:
+    """Fatti per un insieme di clienti: 2 query batch, fallback derivato per righe mancanti o vecchie."""
+    by_id = {c.id: c for c in clients if c.id is not None}
+    if not by_id:
+        return {}
+
+    client_ids = list(by_id)
+    rows = session.exec(
+        select(ClientAnamnesiFacts).where(ClientAnamnesiFacts.client_id.in_(client_ids))
+    ).all()
+    conditions: dict[int, list[int]] = {}
+    for client_id, condition_id in session.exec(
+        select(ClientConditionFact.client_id, ClientConditionFact.condition_id)
+        .where(ClientConditionFact.client_id.in_(client_ids))
+    ).all():
+        conditions.setdefault(client_id, []).append(condition_id)
+
+    facts = {
+        row.client_id: _facts_from_row(row, conditions.get(row.client_id, ()))
+        for row in rows
+        if row.facts_version == FACTS_VERSION
+    }
+    for client_id, client in by_id.items():
+        if client_id not in facts:
+            facts[client_id] = derive_anamnesi_facts(client.anamnesi_json)
+    return facts
+
+
+def get_anamnesi_facts(session: Session, client: Client) -> AnamnesiFacts:
+    """Fatti di un singolo cliente."""
+    if client.id is None:
+        return derive_anamnesi_facts(client.anamnesi_json)
+    return load_anamnesi_facts(session, [client])[client.id]
+
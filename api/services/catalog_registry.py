@@ -0,0 +1,168 @@
+"""
+Registro in memoria del catalogo scientifico (catalog.db) — caricato una volta.
+
+catalog.db e' immutabile a runtime: build_catalog.py lo ricostruisce offline e
+scrive il sidecar catalog.sha256. Metriche, muscoli, articolazioni, condizioni
+mediche e relazioni esercizio → tassonomia stanno in un CatalogSnapshot
+condiviso da misurazioni, obiettivi, safety engine e dettaglio esercizio.
+
+Versione del catalogo (nessuna query):
+  - checksum letto da catalog.sha256 (stat del sidecar a ogni accesso,
+    rilettura del contenuto solo se il file cambia)
+  - senza sidecar: impronta mtime/size del .db (build di sviluppo)
+  - DB non su file (test in-memory): fisso, uno snapshot per engine
+
+Caricamento all'avvio (lifespan, warm_catalog) e lazy al primo accesso;
+un checksum diverso ricarica lo snapshot alla richiesta successiva.
+"""
+
+import logging
+import os
+import threading
+import weakref
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from api.database import sqlite_file_path
+from api.models.joint import ExerciseJoint, Joint
+from api.models.measurement import Metric
+from api.models.medical_condition import ExerciseCondition, MedicalCondition
+from api.models.muscle import ExerciseMuscle, Muscle
+from api.services.runtime_metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CatalogSnapshot:
+    """Catalogo completo in memoria. Oggetti staccati dalla sessione: sola lettura."""
+    version: str
+    metrics: dict[int, Metric] = field(default_factory=dict)
+    muscles: dict[int, Muscle] = field(default_factory=dict)
+    joints: dict[int, Joint] = field(default_factory=dict)
+    conditions: dict[int, MedicalCondition] = field(default_factory=dict)
+    # Relazioni per esercizio, in ordine di id
+    exercise_muscles: dict[int, list[ExerciseMuscle]] = field(default_factory=dict)
+    exercise_joints: dict[int, list[ExerciseJoint]] = field(default_factory=dict)
+    exercise_conditions: dict[int, list[ExerciseCondition]] = field(default_factory=dict)
+    # esercizi_condizioni completa in ordine di id (indice safety engine)
+    condition_links: list[ExerciseCondition] = field(default_factory=list)
+
+    @property
+    def metrics_ordered(self) -> list[Metric]:
+        """Metriche per categoria e ordinamento (GET /metrics)."""
+        return sorted(self.metrics.values(), key=lambda m: (m.categoria, m.ordinamento))
+
+
+# ════════════════════════════════════════════════════════════
+# VERSIONE
+# ════════════════════════════════════════════════════════════
+
+_lock = threading.Lock()
+# Per engine (weak: un engine dismesso libera il suo snapshot)
+_snapshots: "weakref.WeakKeyDictionary[Engine, CatalogSnapshot]" = weakref.WeakKeyDictionary()
+# sidecar → (stat, checksum): il contenuto si rilegge solo se cambia lo stat
+_checksums: dict[Path, tuple[tuple[int, int], str]] = {}
+
+
+def _stat(path: Path) -> Optional[tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def catalog_version(bind: Engine) -> str:
+    """Versione corrente del catalogo servito da `bind`."""
+    db_path = sqlite_file_path(str(bind.url))
+    if db_path is None:
+        return "memory"
+
+    sidecar = db_path.with_suffix(".sha256")
+    stamp = _stat(sidecar)
+    if stamp is not None:
+        cached = _checksums.get(sidecar)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        try:
+            checksum = sidecar.read_text(encoding="utf-8").split()[0]
+        except (OSError, IndexError):
+            checksum = None
+        if checksum:
+            _checksums[sidecar] = (stamp, checksum)
+            return checksum
+
+    stamp = _stat(db_path)
+    return f"file:{stamp[0]}:{stamp[1]}" if stamp else "missing"
+
+
+# ════════════════════════════════════════════════════════════
+# CARICAMENTO
+# ════════════════════════════════════════════════════════════
+
+def _group_by_exercise(rows: list) -> dict[int, list]:
+    grouped: dict[int, list] = {}
+    for row in rows:
+        grouped.setdefault(row.id_esercizio, []).append(row)
+    return grouped
+
+
+def _load_snapshot(bind: Engine, version: str) -> CatalogSnapshot:
+    """7 query, una per tabella catalogo. Sessione dedicata: oggetti staccati alla chiusura."""
+    with Session(bind) as session:
+        condition_links = list(session.exec(select(ExerciseCondition).order_by(ExerciseCondition.id)).all())
+        return CatalogSnapshot(
+            version=version,
+            metrics={m.id: m for m in session.exec(select(Metric)).all()},
+            muscles={m.id: m for m in session.exec(select(Muscle)).all()},
+            joints={j.id: j for j in session.exec(select(Joint)).all()},
+            conditions={c.id: c for c in session.exec(select(MedicalCondition)).all()},
+            exercise_muscles=_group_by_exercise(
+                session.exec(select(ExerciseMuscle).order_by(ExerciseMuscle.id)).all()
+            ),
+            exercise_joints=_group_by_exercise(
+                session.exec(select(ExerciseJoint).order_by(ExerciseJoint.id)).all()
+            ),
+            exercise_conditions=_group_by_exercise(condition_links),
+            condition_links=condition_links,
+        )
+
+
+def get_catalog(catalog_session: Session) -> CatalogSnapshot:
+    """Snapshot del catalogo della sessione, ricaricato solo se cambia la versione."""
+    bind = catalog_session.get_bind()
+    version = catalog_version(bind)
+    snapshot = _snapshots.get(bind)
+    if snapshot is not None and snapshot.version == version:
+        record_cache("catalog", hits=1)
+        return snapshot
+    record_cache("catalog", misses=1)
+    with _lock:
+        snapshot = _snapshots.get(bind)
+        if snapshot is None or snapshot.version != version:
+            snapshot = _load_snapshot(bind, version)
+            _snapshots[bind] = snapshot
+            logger.info(
+                "Catalogo caricato (versione %s): %d metriche, %d muscoli, %d articolazioni, %d condizioni",
+                version[:12], len(snapshot.metrics), len(snapshot.muscles),
+                len(snapshot.joints), len(snapshot.conditions),
+            )
+    return snapshot
+
+
+def warm_catalog(bind: Engine) -> CatalogSnapshot:
+    """Caricamento all'avvio (lifespan)."""
+    with Session(bind) as session:
+        return get_catalog(session)
+
+
+def clear_catalog_registry() -> None:
+    """Dimentica snapshot e checksum (test, rebuild forzato)."""
+    with _lock:
+        _snapshots.clear()
+        _checksums.clear()
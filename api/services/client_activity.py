@@ -0,0 +1,170 @@
+"""
+Ultima attivita' per cliente — calcolata in scrittura, letta con un indice.
+
+Le fonti di verita' restano agenda, allenamenti_eseguiti e misurazioni_cliente.
+`clienti_attivita` ne tiene le date piu' recenti per cliente:
+
+  - ultimo_evento_at / _categoria  = evento non cancellato piu' recente (anche futuro)
+  - ultimo_completato_at           = evento Completato piu' recente
+  - ultimo_programmato_at          = evento Programmato piu' recente
+  - ultimo_allenamento_data        = allenamento eseguito piu' recente
+  - ultima_misurazione_data        = misurazione piu' recente
+
+Aggiornate nella stessa transazione della mutazione, con un UPDATE per dominio
+i cui valori sono subquery sul solo cliente toccato (id_cliente indicizzato):
+  - agenda create / update / delete       → refresh_client_activity(..., "agenda")
+  - allenamenti_eseguiti create / delete  → refresh_client_activity(..., "allenamenti")
+  - misurazioni create / update / delete  → refresh_client_activity(..., "misurazioni")
+
+Lettori: clienti inattivi (dashboard, workspace), lista clienti, readiness
+clinica. Nessuna riga = nessuna attivita'. reconcile_client_activity()
+ricalcola tutto (avvio, dopo un restore) e corregge le differenze.
+"""
+
+import logging
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from sqlmodel import Session, delete, func, select, update
+
+from api.models.client import Client
+from api.models.client_activity import ClientActivity
+from api.models.event import Event
+from api.models.measurement import ClientMeasurement
+from api.models.workout_log import WorkoutLog
+
+logger = logging.getLogger("fitmanager.activity")
+
+_DOMAIN_COLUMNS: dict[str, tuple[str, ...]] = {
+    "agenda": (
+        "ultimo_evento_at",
+        "ultimo_evento_categoria",
+        "ultimo_completato_at",
+        "ultimo_programmato_at",
+    ),
+    "allenamenti": ("ultimo_allenamento_data",),
+    "misurazioni": ("ultima_misurazione_data",),
+}
+_ACTIVITY_COLUMNS = tuple(c for cols in _DOMAIN_COLUMNS.values() for c in cols)
+
+
+def _activity_subqueries(client_id: Any) -> dict[str, Any]:
+    """Subquery scalari per colonna; client_id e' un valore o una colonna correlata."""
+    event_alive = (Event.id_cliente == client_id, Event.deleted_at == None)  # noqa: E711
+
+    def last_event_at(*where) -> Any:
+        return select(func.max(Event.data_inizio)).where(*event_alive, *where).scalar_subquery()
+
+    return {
+        "ultimo_evento_at": last_event_at(Event.stato != "Cancellato"),
+        "ultimo_evento_categoria": (
+            select(Event.categoria)
+            .where(*event_alive, Event.stato != "Cancellato")
+            .order_by(Event.data_inizio.desc(), Event.id.desc())
+            .limit(1)
+            .scalar_subquery()
+        ),
+        "ultimo_completato_at": last_event_at(Event.stato == "Completato"),
+        "ultimo_programmato_at": last_event_at(Event.stato == "Programmato"),
+        "ultimo_allenamento_data": (
+            select(func.max(WorkoutLog.data_esecuzione))
+            .where(WorkoutLog.id_cliente == client_id, WorkoutLog.deleted_at == None)  # noqa: E711
+            .scalar_subquery()
+        ),
+        "ultima_misurazione_data": (
+            select(func.max(ClientMeasurement.data_misurazione))
+            .where(ClientMeasurement.id_cliente == client_id, ClientMeasurement.deleted_at == None)  # noqa: E711
+            .scalar_subquery()
+        ),
+    }
+
+
+# ════════════════════════════════════════════════════════════
+# SCRITTURA (stessa transazione del chiamante, nessun commit)
+# ════════════════════════════════════════════════════════════
+
+def refresh_client_activity(session: Session, client_id: Optional[int], *domains: str) -> None:
+    """
+    Ricalcola le colonne dei domini indicati ("agenda", "allenamenti", "misurazioni").
+
+    Da chiamare dopo la mutazione, prima del commit del chiamante. Eventi
+    senza cliente (SALA, CORSO, ...) non hanno riga: client_id None e' un no-op.
+    """
+    if client_id is None:
+        return
+    session.flush()
+
+    if session.get(ClientActivity, client_id) is None:
+        trainer_id = session.exec(select(Client.trainer_id).where(Client.id == client_id)).first()
+        session.add(ClientActivity(client_id=client_id, trainer_id=trainer_id))
+        session.flush()
+
+    subqueries = _activity_subqueries(client_id)
+    values = {col: subqueries[col] for domain in domains for col in _DOMAIN_COLUMNS[domain]}
+    session.exec(
+        update(ClientActivity)
+        .where(ClientActivity.client_id == client_id)
+        .values(**values, updated_at=datetime.now(timezone.utc))
+        .execution_options(synchronize_session="fetch")
+    )
+
+
+# ════════════════════════════════════════════════════════════
+# RICONCILIAZIONE
+# ════════════════════════════════════════════════════════════
+
+def _normalized(value: Any) -> Any:
+    """Date dal DB: SQLite restituisce datetime naive, il confronto ignora il fuso."""
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.replace(tzinfo=None)
+    return value
+
+
+def reconcile_client_activity(session: Session, trainer_id: Optional[int] = None) -> int:
+    """
+    Ricalcola l'attivita' di tutti i clienti (di un trainer se indicato).
+
+    Una SELECT con subquery correlate per cliente; inserisce le righe mancanti,
+    corregge quelle divergenti, elimina quelle orfane. Committa e ritorna il
+    numero di righe corrette.
+    """
+    subqueries = _activity_subqueries(Client.id)
+    expected_query = select(Client.id, Client.trainer_id, *(subqueries[c] for c in _ACTIVITY_COLUMNS))
+    stored_query = select(ClientActivity)
+    if trainer_id is not None:
+        expected_query = expected_query.where(Client.trainer_id == trainer_id)
+        stored_query = stored_query.where(ClientActivity.trainer_id == trainer_id)
+
+    expected = {
+        row[0]: (row[1], dict(zip(_ACTIVITY_COLUMNS, row[2:])))
+        for row in session.exec(expected_query).all()
+    }
+    stored = {row.client_id: row for row in session.exec(stored_query).all()}
+
+    fixed = 0
+    now = datetime.now(timezone.utc)
+    for client_id, (owner_id, values) in expected.items():
+        row = stored.pop(client_id, None)
+        if row is None:
+            if not any(v is not None for v in values.values()):
+                continue  # nessuna attivita': nessuna riga
+            row = ClientActivity(client_id=client_id)
+        elif row.trainer_id == owner_id and all(
+            _normalized(getattr(row, col)) == _normalized(values[col]) for col in _ACTIVITY_COLUMNS
+        ):
+            continue
+        row.trainer_id = owner_id
+        for col, value in values.items():
+            setattr(row, col, value)
+        row.updated_at = now
+        session.add(row)
+        fixed += 1
+
+    if stored:
+        session.exec(delete(ClientActivity).where(ClientActivity.client_id.in_(list(stored))))
+        fixed += len(stored)
+
+    if fixed:
+        logger.info("Attivita' clienti riallineata: %d righe", fixed)
+    session.commit()
+    return fixed
@@ -6,62 +6,26 @@ so dashboard and workspace can consume the same deterministic rules without
 drift.
 """
 
-import json
 import unicodedata
 from datetime import date, datetime, timedelta
 
 from sqlmodel import Session, select, func
 
 from api.models.client import Client
-from api.models.measurement import ClientMeasurement
+from api.models.client_activity import ClientActivity
 from api.models.workout import WorkoutPlan
 from api.schemas.clinical import (
     ClinicalReadinessClientItem,
     ClinicalFreshnessSignal,
     ClinicalReadinessSummary,
 )
+from api.services.anamnesi_facts import load_anamnesi_facts
 from api.services.client_freshness import (
     build_measurement_freshness,
     build_workout_freshness,
-    parse_reference_date,
 )
 
 
-def _get_anamnesi_state(anamnesi_json: str | None) -> str:
-    if not anamnesi_json:
-        return "missing"
-
-    try:
-        data = json.loads(anamnesi_json)
-    except (TypeError, json.JSONDecodeError):
-        return "legacy"
-
-    if isinstance(data, dict) and "data_compilazione" in data and (
-        "obiettivo_principale" in data
-    ):
-        return "structured"
-
-    return "legacy"
-
-
-def _extract_anamnesi_reference_date(anamnesi_json: str | None) -> date | None:
-    if not anamnesi_json:
-        return None
-
-    try:
-        data = json.loads(anamnesi_json)
-    except (TypeError, json.JSONDecodeError):
-        return None
-
-    if not isinstance(data, dict):
-        return None
-
-    updated = parse_reference_date(data.get("data_ultimo_aggiornamento"))
-    if updated:
-        return updated
-    return parse_reference_date(data.get("data_compilazione"))
-
-
 def _timeline_status(days_to_due: int | None) -> str:
     if days_to_due is None:
         return "none"
@@ -180,10 +144,10 @@ def _build_clinical_readiness_item(
     workout_activated: bool = False,
     latest_measurement_date: date | None,
     latest_workout_updated_at: str | date | datetime | None,
+    anamnesi_state: str,
     anamnesi_reference_date: date | None,
     reference_date: date,
 ) -> ClinicalReadinessClientItem:
-    anamnesi_state = _get_anamnesi_state(client.anamnesi_json)
 
     missing_steps: list[str] = []
     readiness_score = 0
@@ -319,14 +283,13 @@ def compute_clinical_readiness_data(
     if not client_ids:
         return ClinicalReadinessSummary(), []
 
+    # Ultima misurazione da clienti_attivita (mantenuta in scrittura)
     measurement_rows = session.exec(
-        select(ClientMeasurement.id_cliente, func.max(ClientMeasurement.data_misurazione))
+        select(ClientActivity.client_id, ClientActivity.ultima_misurazione_data)
         .where(
-            ClientMeasurement.trainer_id == trainer_id,
-            ClientMeasurement.deleted_at == None,
-            ClientMeasurement.id_cliente.in_(client_ids),
+            ClientActivity.client_id.in_(client_ids),
+            ClientActivity.ultima_misurazione_data != None,
         )
-        .group_by(ClientMeasurement.id_cliente)
     ).all()
     latest_measurement_by_client = {
         row[0]: row[1]
@@ -382,12 +345,16 @@ def compute_clinical_readiness_data(
         if cid is not None and cid not in latest_plan_info:
             latest_plan_info[cid] = (row[1], row[2], row[3])
 
+    # Stato + data anamnesi dai fatti derivati (calcolati in scrittura)
+    anamnesi_facts = load_anamnesi_facts(session, active_clients)
+
     items: list[ClinicalReadinessClientItem] = []
     for client in active_clients:
         if client.id is None:
             continue
         client_id = client.id
         plan_info = latest_plan_info.get(client_id)
+        facts = anamnesi_facts[client_id]
         items.append(
             _build_clinical_readiness_item(
                 client,
@@ -400,7 +367,8 @@ def compute_clinical_readiness_data(
                 ) if plan_info else False,
                 latest_measurement_date=latest_measurement_by_client.get(client_id),
                 latest_workout_updated_at=latest_workout_by_client.get(client_id),
-                anamnesi_reference_date=_extract_anamnesi_reference_date(client.anamnesi_json),
+                anamnesi_state=facts.stato,
+                anamnesi_reference_date=facts.data_riferimento,
                 reference_date=reference_date,
             )
         )
@@ -0,0 +1,148 @@
+"""
+Pool di esecuzione dedicati per gli endpoint pesanti — gli interattivi restano reattivi.
+
+Gli endpoint sync di FastAPI girano tutti nel threadpool di default di anyio
+(API_THREADPOOL_SIZE token). Un endpoint decorato con @run_in_pool("nome") gira
+invece con un CapacityLimiter dedicato:
+
+  - al massimo `workers` esecuzioni concorrenti per pool (capacita' propria,
+    non consuma token del threadpool condiviso da agenda, health, ecc.)
+  - al massimo `max_queue` richieste in attesa; oltre → 503 + Retry-After
+  - contatori per pool (in esecuzione, in coda, picco coda, completate,
+    rifiutate) esposti da GET /api/system/execution-pools
+
+Uso (sotto il decoratore della route):
+
+    @router.post("/plan-package")
+    @run_in_pool("training_science")
+    def generate_plan_package(...):
+        ...
+"""
+
+import functools
+import inspect
+import threading
+from typing import Any, Callable, Optional
+
+import anyio
+import anyio.to_thread
+from fastapi import HTTPException
+
+from api.config import EXECUTION_POOLS, HEAVY_POOL_MAX_QUEUE
+
+
+class WorkPool:
+    """Capacita' dedicata (thread anyio) + coda limitata per una famiglia di endpoint."""
+
+    def __init__(self, name: str, workers: int, max_queue: int) -> None:
+        if workers < 1:
+            raise ValueError("workers deve essere >= 1")
+        self.name = name
+        self.workers = workers
+        self.max_queue = max_queue
+        self.limiter = anyio.CapacityLimiter(workers)
+        self._lock = threading.Lock()
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._peak_queue = 0
+        self._pending = 0  # in esecuzione + in coda (contate all'ingresso)
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Esegue `func` in un thread del pool; 503 se la coda e' piena."""
+        with self._lock:
+            if self._pending >= self.workers + self.max_queue:
+                self._rejected += 1
+                rejected = True
+            else:
+                self._pending += 1
+                self._peak_queue = max(self._peak_queue, self._pending - self.workers)
+                rejected = False
+        if rejected:
+            raise HTTPException(
+                status_code=503,
+                detail=f"Servizio occupato ({self.name}), riprova tra poco",
+                headers={"Retry-After": "2"},
+            )
+
+        try:
+            result = await anyio.to_thread.run_sync(
+                functools.partial(func, *args, **kwargs), limiter=self.limiter,
+            )
+        except Exception:
+            with self._lock:
+                self._failed += 1
+            raise
+        else:
+            with self._lock:
+                self._completed += 1
+            return result
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def snapshot(self) -> dict:
+        """Stato corrente del pool (per diagnostica / metriche)."""
+        with self._lock:
+            running = min(self._pending, self.workers)
+            return {
+                "name": self.name,
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "running": running,
+                "queued": self._pending - running,
+                "peak_queued": self._peak_queue,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+            }
+
+
+_pools: dict[str, WorkPool] = {
+    name: WorkPool(name, workers, HEAVY_POOL_MAX_QUEUE)
+    for name, workers in EXECUTION_POOLS.items()
+}
+
+
+def get_pool(name: str) -> WorkPool:
+    """Pool per nome (KeyError se non configurato in EXECUTION_POOLS)."""
+    return _pools[name]
+
+
+def pool_snapshots() -> list[dict]:
+    """Snapshot di tutti i pool dedicati, ordinati per nome."""
+    return [_pools[name].snapshot() for name in sorted(_pools)]
+
+
+def default_threadpool_snapshot() -> Optional[dict]:
+    """Threadpool condiviso degli endpoint sync (solo dentro l'event loop)."""
+    try:
+        stats = anyio.to_thread.current_default_thread_limiter().statistics()
+    except Exception:
+        return None
+    return {
+        "name": "default",
+        "workers": int(stats.total_tokens),
+        "running": stats.borrowed_tokens,
+        "queued": stats.tasks_waiting,
+    }
+
+
+def run_in_pool(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    Decoratore per endpoint sync: li esegue nel pool `name` invece del threadpool
+    condiviso. La firma resta quella originale (FastAPI la legge via __wrapped__).
+    """
+    pool = get_pool(name)
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        if inspect.iscoroutinefunction(func):
+            raise TypeError("run_in_pool si applica solo a endpoint sync")
+
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            return await pool.run(func, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -18,7 +18,8 @@ from datetime import datetime, timezone
 from sqlmodel import Session, select
 
 from api.models.goal import ClientGoal
-from api.models.measurement import Metric, ClientMeasurement, MeasurementValue
+from api.models.measurement import ClientMeasurement, MeasurementValue
+from api.services.catalog_registry import get_catalog
 
 
 def _is_goal_reached(goal: ClientGoal, current_value: float) -> bool:
@@ -43,7 +44,7 @@ def sync_goal_completion(
     Controlla obiettivi corporei attivi vs misurazioni piu' recenti.
     Auto-completa quelli che raggiungono il target.
 
-    Dual session: business (Goals, Measurements) + catalog (Metric nomi).
+    Dual session: business (Goals, Measurements) + catalog (nomi metriche, registro in memoria).
 
     Returns: lista di {id, nome_metrica, valore_target, valore_raggiunto}
              per toast/notification nella response.
@@ -88,11 +89,7 @@ def sync_goal_completion(
     value_map = {v.id_metrica: v.valore for v in values}
 
     # 4. Catalogo metriche per enrichment response (catalog)
-    metric_ids = {g.id_metrica for g in active_goals}
-    metrics = catalog_session.exec(
-        select(Metric).where(Metric.id.in_(metric_ids))
-    ).all()
-    metric_map = {m.id: m for m in metrics}
+    metric_map = get_catalog(catalog_session).metrics
 
     # 5. Controlla ogni obiettivo
     completed = []
@@ -0,0 +1,310 @@
+"""
+Job in background — operazioni lunghe fuori dalla richiesta HTTP.
+
+Backup, export e verifiche possono richiedere decine di secondi su dischi lenti
+o dataset grandi. Gli endpoint che li supportano accettano `?background=true`:
+la richiesta crea una riga in `background_jobs`, ritorna subito 202 + job id e
+il lavoro prosegue in un pool di JOB_WORKERS thread.
+
+  - stato persistito in SQLite (queued → running → succeeded | failed | cancelled)
+  - avanzamento 0-100 + messaggio, aggiornati dal job via JobContext.progress()
+  - cancellazione cooperativa: i job in coda non partono, quelli in esecuzione
+    si fermano al prossimo progress() / check_cancelled()
+  - artefatti su disco in JOB_ARTIFACTS_DIR (es. export JSON), scaricabili da
+    GET /api/jobs/{id}/artifact
+
+I tipi di job si registrano con @register_job("tipo") accanto al codice che
+eseguono (es. api/routers/backup.py). All'avvio i job rimasti a meta' da un
+processo precedente vengono marcati failed e quelli vecchi eliminati.
+"""
+
+import json
+import logging
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, col, select
+
+from api.config import JOB_ARTIFACTS_DIR, JOB_RETENTION_DAYS, JOB_WORKERS
+from api.models.background_job import JOB_FINAL_STATUSES, BackgroundJob
+
+logger = logging.getLogger("fitmanager.jobs")
+
+
+class JobCancelled(Exception):
+    """Sollevata dentro il job quando ne e' stata chiesta la cancellazione."""
+
+
+class JobContext:
+    """Cio' che un job vede del runner: parametri, avanzamento, DB, artefatti."""
+
+    def __init__(self, runner: "JobRunner", job_id: str, trainer_id: int, params: dict) -> None:
+        self.runner = runner
+        self.job_id = job_id
+        self.trainer_id = trainer_id
+        self.params = params
+        self.artifact: Optional[str] = None
+
+    def check_cancelled(self) -> None:
+        """Solleva JobCancelled se il trainer ha annullato il job."""
+        if self.runner.cancel_requested(self.job_id):
+            raise JobCancelled()
+
+    def progress(self, percent: int, message: Optional[str] = None) -> None:
+        """Aggiorna l'avanzamento (0-100) e controlla la cancellazione."""
+        self.check_cancelled()
+        self.runner._update(self.job_id, progress=max(0, min(100, int(percent))), message=message)
+
+    def session(self) -> Session:
+        """Nuova Session sul DB business (da usare con `with`)."""
+        return Session(self.runner.engine)
+
+    def artifact_path(self, suffix: str) -> Path:
+        """Path dell'artefatto del job; registrato sul job a fine esecuzione."""
+        self.artifact = f"{self.job_id}{suffix}"
+        self.runner.artifacts_dir.mkdir(parents=True, exist_ok=True)
+        return self.runner.artifacts_dir / self.artifact
+
+
+JobHandler = Callable[[JobContext], Optional[dict]]
+
+_handlers: dict[str, JobHandler] = {}
+
+
+def register_job(kind: str) -> Callable[[JobHandler], JobHandler]:
+    """Registra la funzione che esegue i job di tipo `kind` (ritorna il risultato JSON)."""
+    def decorator(func: JobHandler) -> JobHandler:
+        _handlers[kind] = func
+        return func
+    return decorator
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class JobRunner:
+    """Coda di job persistita su DB + pool di thread che li esegue."""
+
+    def __init__(self, engine: Engine, artifacts_dir: Path, workers: int = JOB_WORKERS) -> None:
+        self.engine = engine
+        self.artifacts_dir = artifacts_dir
+        self.workers = max(1, workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._futures: dict[str, Future] = {}
+        self._cancel_events: dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    # ── API ──
+
+    def submit(self, trainer_id: int, kind: str, params: Optional[dict] = None) -> BackgroundJob:
+        """Accoda un job e ritorna la riga appena creata (status queued)."""
+        if kind not in _handlers:
+            raise ValueError(f"Tipo di job sconosciuto: {kind}")
+
+        job = BackgroundJob(
+            id=uuid.uuid4().hex,
+            trainer_id=trainer_id,
+            kind=kind,
+            params_json=json.dumps(params or {}),
+            message="In coda",
+        )
+        with Session(self.engine) as session:
+            session.add(job)
+            session.commit()
+            session.refresh(job)
+            session.expunge(job)
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+            self._cancel_events[job.id] = threading.Event()
+            self._futures[job.id] = self._executor.submit(self._execute, job.id)
+        logger.info("Job %s accodato: %s (trainer %d)", job.id, kind, trainer_id)
+        return job
+
+    def get(self, job_id: str, trainer_id: int) -> Optional[BackgroundJob]:
+        """Job del trainer, None se inesistente o di un altro trainer."""
+        with Session(self.engine) as session:
+            job = session.get(BackgroundJob, job_id)
+            if job is None or job.trainer_id != trainer_id:
+                return None
+            session.expunge(job)
+            return job
+
+    def list(self, trainer_id: int, limit: int = 50) -> list[BackgroundJob]:
+        """Job del trainer, piu' recenti prima."""
+        with Session(self.engine) as session:
+            jobs = session.exec(
+                select(BackgroundJob)
+                .where(BackgroundJob.trainer_id == trainer_id)
+                .order_by(col(BackgroundJob.created_at).desc())
+                .limit(limit)
+            ).all()
+            for job in jobs:
+                session.expunge(job)
+            return list(jobs)
+
+    def cancel(self, job_id: str) -> None:
+        """Chiede la cancellazione: immediata se in coda, cooperativa se in esecuzione."""
+        with self._lock:
+            event = self._cancel_events.get(job_id)
+            future = self._futures.get(job_id)
+        if event is not None:
+            event.set()
+        self._update(job_id, cancel_requested=True)
+        if future is not None and future.cancel():
+            self._finish(job_id, "cancelled", message="Annullato prima dell'avvio")
+
+    def cancel_requested(self, job_id: str) -> bool:
+        with self._lock:
+            event = self._cancel_events.get(job_id)
+        return event is not None and event.is_set()
+
+    def artifact_file(self, job: BackgroundJob) -> Optional[Path]:
+        """Path dell'artefatto del job se esiste ancora su disco."""
+        if not job.artifact:
+            return None
+        path = self.artifacts_dir / job.artifact
+        return path if path.is_file() else None
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> None:
+        """Attende la fine del job (shutdown ordinato, test)."""
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None and not future.cancelled():
+            future.result(timeout=timeout)
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Ferma il pool: i job in coda non partono, quelli in esecuzione ricevono cancel."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            for event in self._cancel_events.values():
+                event.set()
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    # ── Manutenzione (avvio) ──
+
+    def recover_interrupted(self) -> int:
+        """Marca failed i job rimasti queued/running da un processo precedente."""
+        with Session(self.engine) as session:
+            jobs = session.exec(
+                select(BackgroundJob).where(col(BackgroundJob.status).in_(("queued", "running")))
+            ).all()
+            for job in jobs:
+                job.status = "failed"
+                job.error = "Interrotto dal riavvio dell'applicazione"
+                job.finished_at = _now()
+                session.add(job)
+            session.commit()
+        if jobs:
+            logger.warning("Job interrotti dal riavvio: %d", len(jobs))
+        return len(jobs)
+
+    def purge_expired(self, days: int = JOB_RETENTION_DAYS) -> int:
+        """Elimina job conclusi (e artefatti) piu' vecchi di `days` giorni."""
+        cutoff = _now() - timedelta(days=days)
+        with Session(self.engine) as session:
+            jobs = session.exec(
+                select(BackgroundJob).where(
+                    col(BackgroundJob.status).in_(JOB_FINAL_STATUSES),
+                    BackgroundJob.created_at < cutoff,
+                )
+            ).all()
+            for job in jobs:
+                if job.artifact:
+                    (self.artifacts_dir / job.artifact).unlink(missing_ok=True)
+                session.delete(job)
+            session.commit()
+        return len(jobs)
+
+    # ── Esecuzione ──
+
+    def _update(self, job_id: str, **fields: Any) -> None:
+        with Session(self.engine) as session:
+            job = session.get(BackgroundJob, job_id)
+            if job is None:
+                return
+            for key, value in fields.items():
+                setattr(job, key, value)
+            session.add(job)
+            session.commit()
+
+    def _finish(self, job_id: str, status: str, **fields: Any) -> None:
+        self._update(job_id, status=status, finished_at=_now(), **fields)
+        with self._lock:
+            self._futures.pop(job_id, None)
+            self._cancel_events.pop(job_id, None)
+
+    def _execute(self, job_id: str) -> None:
+        with Session(self.engine) as session:
+            job = session.get(BackgroundJob, job_id)
+            if job is None:
+                return
+            kind, trainer_id = job.kind, job.trainer_id
+            params = json.loads(job.params_json or "{}")
+
+        ctx = JobContext(self, job_id, trainer_id, params)
+        try:
+            ctx.check_cancelled()
+            self._update(job_id, status="running", started_at=_now(), message="In esecuzione")
+            result = _handlers[kind](ctx)
+        except JobCancelled:
+            self._discard_artifact(ctx)
+            self._finish(job_id, "cancelled", message="Annullato")
+            logger.info("Job %s annullato", job_id)
+        except HTTPException as exc:
+            self._discard_artifact(ctx)
+            self._finish(job_id, "failed", error=str(exc.detail), message="Fallito")
+            logger.warning("Job %s fallito: %s", job_id, exc.detail)
+        except Exception as exc:
+            self._discard_artifact(ctx)
+            self._finish(job_id, "failed", error=str(exc) or type(exc).__name__, message="Fallito")
+            logger.exception("Job %s (%s) fallito", job_id, kind)
+        else:
+            self._finish(
+                job_id, "succeeded",
+                progress=100,
+                message="Completato",
+                result_json=json.dumps(result) if result is not None else None,
+                artifact=ctx.artifact,
+            )
+            logger.info("Job %s completato: %s", job_id, kind)
+
+    def _discard_artifact(self, ctx: JobContext) -> None:
+        if ctx.artifact:
+            (self.artifacts_dir / ctx.artifact).unlink(missing_ok=True)
+
+
+# ============================================================================
+# RUNNER DI PROCESSO
+# ============================================================================
+
+_runner: Optional[JobRunner] = None
+_runner_lock = threading.Lock()
+
+
+def get_job_runner() -> JobRunner:
+    """Runner condiviso sul DB business (dependency FastAPI, sovrascrivibile nei test)."""
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            from api.database import engine
+            _runner = JobRunner(engine, JOB_ARTIFACTS_DIR)
+        return _runner
+
+
+def shutdown_job_runner() -> None:
+    """Ferma il runner condiviso se e' stato creato (shutdown dell'app)."""
+    global _runner
+    with _runner_lock:
+        runner, _runner = _runner, None
+    if runner is not None:
+        runner.shutdown()
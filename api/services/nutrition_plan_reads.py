@@ -0,0 +1,160 @@
+"""
+Letture piani alimentari cross-DB (crm.db ↔ nutrition.db).
+
+Due percorsi con lo stesso risultato:
+  - ATTACH (SQLite + REFERENCE_DB_ATTACH=true): una sola query joined/aggregata
+    sulla session business, con `nutrition.alimenti` come schema attached.
+  - Fallback: componenti dal business DB, poi lookup `IN` su nutrition.db
+    e merge in Python (deploy non-SQLite o ATTACH disattivo).
+
+Il chiamante ha gia' passato il Bouncer sul piano: qui solo letture per meal_ids.
+"""
+
+from typing import Optional, Sequence
+
+from sqlalchemy import MetaData, func, select as sa_select
+from sqlmodel import Session, select
+
+from api.database import NUTRITION_ATTACH_SCHEMA, has_reference_attach
+from api.models.nutrition import Food, FoodCategory, MealComponent
+
+MACRO_FIELDS = ("energia_kcal", "proteine_g", "carboidrati_g", "grassi_g")
+
+# Copie delle tabelle catalogo qualificate con lo schema attached
+_attached_metadata = MetaData()
+_attached_categories = FoodCategory.__table__.to_metadata(
+    _attached_metadata, schema=NUTRITION_ATTACH_SCHEMA,
+)
+_attached_foods = Food.__table__.to_metadata(
+    _attached_metadata, schema=NUTRITION_ATTACH_SCHEMA,
+)
+
+
+def _active_components_filter(meal_ids: Sequence[int]):
+    return (
+        MealComponent.pasto_id.in_(meal_ids),
+        MealComponent.deleted_at == None,  # noqa: E711
+    )
+
+
+def load_plan_components(
+    session: Session,
+    nutrition_session: Session,
+    meal_ids: Sequence[int],
+) -> tuple[list[MealComponent], dict[int, Food], dict[int, str]]:
+    """Componenti attivi dei pasti + mappa alimenti + mappa nomi categoria."""
+    if not meal_ids:
+        return [], {}, {}
+
+    if has_reference_attach(session):
+        rows = session.execute(
+            sa_select(MealComponent, _attached_foods, _attached_categories.c.nome)
+            .outerjoin(_attached_foods, _attached_foods.c.id == MealComponent.alimento_id)
+            .outerjoin(
+                _attached_categories,
+                _attached_categories.c.id == _attached_foods.c.categoria_id,
+            )
+            .where(*_active_components_filter(meal_ids))
+        ).all()
+
+        components: list[MealComponent] = []
+        food_map: dict[int, Food] = {}
+        cat_map: dict[int, str] = {}
+        for row in rows:
+            comp = row[0]
+            components.append(comp)
+            mapping = row._mapping
+            food_id = mapping[_attached_foods.c.id]
+            if food_id is None or food_id in food_map:
+                continue
+            food = Food(**{col.name: mapping[col] for col in _attached_foods.c})
+            food_map[food_id] = food
+            categoria_nome = mapping[_attached_categories.c.nome]
+            if categoria_nome is not None:
+                cat_map[food.categoria_id] = categoria_nome
+        return components, food_map, cat_map
+
+    components = list(session.exec(
+        select(MealComponent).where(*_active_components_filter(meal_ids))
+    ).all())
+    if not components:
+        return [], {}, {}
+
+    food_ids = list({c.alimento_id for c in components})
+    foods = nutrition_session.exec(
+        select(Food).where(Food.id.in_(food_ids))
+    ).all()
+    food_map = {f.id: f for f in foods}
+
+    cat_ids = list({f.categoria_id for f in foods})
+    cats = nutrition_session.exec(
+        select(FoodCategory).where(FoodCategory.id.in_(cat_ids))
+    ).all()
+    cat_map = {c.id: c.nome for c in cats}
+    return components, food_map, cat_map
+
+
+def sum_plan_nutrients(
+    session: Session,
+    nutrition_session: Session,
+    meal_ids: Sequence[int],
+    fields: Sequence[str] = MACRO_FIELDS,
+) -> Optional[dict[str, Optional[float]]]:
+    """
+    Totali nutrienti (valore per 100g scalato su quantita_g) dei componenti attivi.
+
+    Ritorna None se i pasti non hanno componenti; per ogni campo None se nessun
+    alimento del piano ha il dato (stessa semantica "has data" della validazione LARN).
+    """
+    if not meal_ids:
+        return None
+
+    if has_reference_attach(session):
+        columns = [func.count(MealComponent.id)]
+        for field in fields:
+            col = _attached_foods.c[field]
+            columns.append(func.sum(col * MealComponent.quantita_g / 100.0))
+            columns.append(func.count(col))
+        row = session.execute(
+            sa_select(*columns)
+            .select_from(MealComponent)
+            .outerjoin(_attached_foods, _attached_foods.c.id == MealComponent.alimento_id)
+            .where(*_active_components_filter(meal_ids))
+        ).one()
+        if not row[0]:
+            return None
+        return {
+            field: (float(row[1 + 2 * i]) if row[2 + 2 * i] else None)
+            for i, field in enumerate(fields)
+        }
+
+    components = session.exec(
+        select(MealComponent.alimento_id, MealComponent.quantita_g)
+        .where(*_active_components_filter(meal_ids))
+    ).all()
+    if not components:
+        return None
+
+    food_ids = list({alimento_id for alimento_id, _ in components})
+    foods = nutrition_session.exec(
+        select(Food).where(Food.id.in_(food_ids))
+    ).all()
+    food_map = {f.id: f for f in foods}
+
+    totals: dict[str, float] = {field: 0.0 for field in fields}
+    has_data: dict[str, bool] = {field: False for field in fields}
+    for alimento_id, quantita_g in components:
+        food = food_map.get(alimento_id)
+        if food is None:
+            continue
+        ratio = quantita_g / 100.0
+        for field in fields:
+            val = getattr(food, field, None)
+            if val is not None:
+                totals[field] += val * ratio
+                has_data[field] = True
+
+    return {
+        field: (totals[field] if has_data[field] else None)
+        for field in fields
+    }
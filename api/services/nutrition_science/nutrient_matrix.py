@@ -0,0 +1,86 @@
+"""
+Matrice nutrienti alimenti × nutrienti (NumPy) per calcoli vettoriali.
+
+Costruita una volta dal food pool (nutrition.db): ogni riga e' un alimento,
+ogni colonna un campo nutrizionale per 100g. I totali di un insieme di
+porzioni diventano un singolo prodotto matrice-vettore:
+
+    totali = (grammi / 100) @ values[righe]
+
+Valori NULL nel DB → 0 nella matrice; `has_data` tiene traccia dei campi
+effettivamente presenti (per distinguere "0" da "non valutabile").
+"""
+
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+from sqlmodel import Session, select
+
+from api.models.nutrition import Food
+
+MACRO_FIELDS: tuple[str, ...] = ("energia_kcal", "proteine_g", "carboidrati_g", "grassi_g")
+
+MICRO_FIELDS: tuple[str, ...] = (
+    "calcio_mg", "ferro_mg", "zinco_mg", "magnesio_mg", "fosforo_mg",
+    "potassio_mg", "selenio_ug", "sodio_mg", "fibra_g",
+    "vitamina_a_ug", "vitamina_d_ug", "vitamina_e_mg", "vitamina_c_mg",
+    "vitamina_b1_mg", "vitamina_b2_mg", "vitamina_b3_mg", "vitamina_b6_mg",
+    "vitamina_b9_ug", "vitamina_b12_ug",
+)
+
+NUTRIENT_FIELDS: tuple[str, ...] = MACRO_FIELDS + MICRO_FIELDS
+
+
+class NutrientMatrix:
+    """Matrice densa alimenti × nutrienti con lookup per food_id e campo."""
+
+    def __init__(self, foods: Iterable[Food], fields: Sequence[str] = NUTRIENT_FIELDS) -> None:
+        self.fields: tuple[str, ...] = tuple(fields)
+        self.field_index: dict[str, int] = {f: i for i, f in enumerate(self.fields)}
+        self.row_index: dict[int, int] = {}
+        self.foods: list[Food] = []
+        for food in foods:
+            if food.id is None or food.id in self.row_index:
+                continue
+            self.row_index[food.id] = len(self.foods)
+            self.foods.append(food)
+
+        raw = np.array(
+            [[getattr(food, f, None) for f in self.fields] for food in self.foods],
+            dtype=float,
+        ).reshape(len(self.foods), len(self.fields))
+        self.has_data: np.ndarray = ~np.isnan(raw)
+        self.values: np.ndarray = np.nan_to_num(raw, nan=0.0)
+
+    @classmethod
+    def from_session(
+        cls,
+        session: Session,
+        food_ids: Optional[Iterable[int]] = None,
+        fields: Sequence[str] = NUTRIENT_FIELDS,
+    ) -> "NutrientMatrix":
+        """Carica gli alimenti da nutrition.db (tutti o solo `food_ids`)."""
+        query = select(Food)
+        if food_ids is not None:
+            query = query.where(Food.id.in_(list(set(food_ids))))
+        return cls(session.exec(query).all(), fields)
+
+    def __contains__(self, food_id: int) -> bool:
+        return food_id in self.row_index
+
+    def rows(self, food_ids: Sequence[int]) -> np.ndarray:
+        """Indici di riga per una sequenza di food_id (KeyError se sconosciuto)."""
+        return np.fromiter((self.row_index[i] for i in food_ids), dtype=np.intp, count=len(food_ids))
+
+    def totals(self, rows: np.ndarray, grams: np.ndarray) -> np.ndarray:
+        """Vettore totali nutrienti per le porzioni (righe, grammi)."""
+        if len(rows) == 0:
+            return np.zeros(len(self.fields))
+        return (np.asarray(grams, dtype=float) / 100.0) @ self.values[rows]
+
+    def totals_dict(self, food_ids: Sequence[int], grams: Sequence[float]) -> dict[str, float]:
+        """Totali come dict {campo: valore}; i food_id assenti dalla matrice sono ignorati."""
+        pairs = [(fid, g) for fid, g in zip(food_ids, grams) if fid in self.row_index]
+        rows = self.rows([fid for fid, _ in pairs])
+        vec = self.totals(rows, np.array([g for _, g in pairs], dtype=float))
+        return {f: float(vec[i]) for i, f in enumerate(self.fields)}
@@ -29,6 +29,10 @@ from api.services.nutrition_science.meal_archetypes import (
     MEAL_ORDER,
     WEEKLY_PROTEIN_ROTATION,
 )
+from api.services.nutrition_science.nutrient_matrix import (
+    MICRO_FIELDS,
+    NutrientMatrix,
+)
 from api.services.nutrition_science.portion_optimizer import optimize_day
 from api.services.nutrition_science.plan_validator import validate_plan
 from api.services.nutrition_science.types import ClientProfile
@@ -106,6 +110,9 @@ def generate_plan(
     # 1. Risolvi food pool
     pools = resolve_food_pools(session)
 
+    # Matrice nutrienti del pool: costruita una volta, riusata per 7 giorni + validazione
+    matrix = NutrientMatrix(food for pool in pools.values() for food in pool)
+
     # 2-3. Per ogni giorno: seleziona + ottimizza
     all_meals: list[GeneratedMeal] = []
     used_yesterday: set[int] = set()
@@ -131,7 +138,9 @@ def generate_plan(
             day_for_opt.append((tipo_pasto, items))
 
         # Ottimizza porzioni
-        optimized = optimize_day(day_for_opt, target_kcal, target_prot_g, target_fat_g)
+        optimized = optimize_day(
+            day_for_opt, target_kcal, target_prot_g, target_fat_g, matrix=matrix,
+        )
 
         # Converti in GeneratedMeal
         used_today: set[int] = set()
@@ -153,45 +162,19 @@ def generate_plan(
 
         used_yesterday = used_today
 
-    # 4. Valida vs LARN (calcola media settimanale)
-    micro_fields = [
-        "calcio_mg", "ferro_mg", "zinco_mg", "magnesio_mg", "fosforo_mg",
-        "potassio_mg", "selenio_ug", "sodio_mg", "fibra_g",
-        "vitamina_a_ug", "vitamina_d_ug", "vitamina_e_mg", "vitamina_c_mg",
-        "vitamina_b1_mg", "vitamina_b2_mg", "vitamina_b3_mg", "vitamina_b6_mg",
-        "vitamina_b9_ug", "vitamina_b12_ug",
-    ]
-
-    # Build food_map per il calcolo
-    all_food_ids = {c.food_id for m in all_meals for c in m.componenti}
-    from sqlmodel import select
-    foods_db = session.exec(select(Food).where(Food.id.in_(list(all_food_ids)))).all()
-    food_map = {f.id: f for f in foods_db}
-
-    # Somma totali settimanali
-    total_kcal = 0.0
-    total_prot = 0.0
-    total_carb = 0.0
-    total_fat = 0.0
-    micro_totals: dict[str, float] = {f: 0.0 for f in micro_fields}
-
-    for meal in all_meals:
-        for comp in meal.componenti:
-            food = food_map.get(comp.food_id)
-            if not food:
-                continue
-            ratio = comp.quantita_g / 100.0
-            total_kcal += food.energia_kcal * ratio
-            total_prot += food.proteine_g * ratio
-            total_carb += food.carboidrati_g * ratio
-            total_fat += food.grassi_g * ratio
-            for field_name in micro_fields:
-                val = getattr(food, field_name, None)
-                if val is not None:
-                    micro_totals[field_name] += val * ratio
+    # 4. Valida vs LARN (calcola media settimanale): totali settimanali in un mat-vec
+    components = [c for m in all_meals for c in m.componenti]
+    weekly = matrix.totals_dict(
+        [c.food_id for c in components],
+        [c.quantita_g for c in components],
+    )
 
     n_giorni = 7
-    daily_nutrients = {k: v / n_giorni for k, v in micro_totals.items()}
+    total_kcal = weekly["energia_kcal"]
+    total_prot = weekly["proteine_g"]
+    total_carb = weekly["carboidrati_g"]
+    total_fat = weekly["grassi_g"]
+    daily_nutrients = {k: weekly[k] / n_giorni for k in MICRO_FIELDS}
 
     validation = validate_plan(
         profile=profile,
@@ -9,9 +9,15 @@ Approccio: scaling proporzionale iterativo.
 2. Aggiusta proteine (scala fonti proteiche)
 3. Aggiusta grassi (scala olio + frutta secca)
 4. Verifica micro e genera warning se irrecuperabili
+
+I totali giornalieri sono un prodotto matrice-vettore sulla NutrientMatrix
+(costruita una volta dal generatore e riusata per tutti i giorni).
 """
 
+import numpy as np
+
 from api.models.nutrition import Food
+from api.services.nutrition_science.nutrient_matrix import NutrientMatrix
 
 
 # Limiti porzione ragionevoli (grammi)
@@ -36,37 +42,38 @@ PORTION_LIMITS: dict[str, tuple[float, float]] = {
 }
 
 
+# Chiave totale giornaliero → campo Food
+_DAY_TOTAL_FIELDS: dict[str, str] = {
+    "kcal": "energia_kcal",
+    "proteine_g": "proteine_g",
+    "carboidrati_g": "carboidrati_g",
+    "grassi_g": "grassi_g",
+    "fibra_g": "fibra_g",
+    "calcio_mg": "calcio_mg",
+    "ferro_mg": "ferro_mg",
+    "zinco_mg": "zinco_mg",
+    "vitamina_d_ug": "vitamina_d_ug",
+    "vitamina_c_mg": "vitamina_c_mg",
+    "vitamina_b12_ug": "vitamina_b12_ug",
+}
+
+
 def _calc_day_totals(
     day_meals: list[tuple[str, list[tuple[Food, float, str]]]],
+    matrix: NutrientMatrix | None = None,
 ) -> dict[str, float]:
-    """Calcola totali giornalieri (kcal + macro + micro)."""
-    totals: dict[str, float] = {
-        "kcal": 0, "proteine_g": 0, "carboidrati_g": 0, "grassi_g": 0,
-        "fibra_g": 0, "calcio_mg": 0, "ferro_mg": 0, "zinco_mg": 0,
-        "vitamina_d_ug": 0, "vitamina_c_mg": 0, "vitamina_b12_ug": 0,
+    """Calcola totali giornalieri (kcal + macro + micro) con un solo mat-vec."""
+    day_foods = [food for _, foods in day_meals for food, _, _ in foods]
+    grams = np.array([grammi for _, foods in day_meals for _, grammi, _ in foods], dtype=float)
+
+    if matrix is None or not all(food.id in matrix for food in day_foods):
+        matrix = NutrientMatrix(day_foods, tuple(_DAY_TOTAL_FIELDS.values()))
+
+    vec = matrix.totals(matrix.rows([food.id for food in day_foods]), grams)
+    return {
+        key: float(vec[matrix.field_index[campo]])
+        for key, campo in _DAY_TOTAL_FIELDS.items()
     }
-    for _, foods in day_meals:
-        for food, grammi, _ in foods:
-            ratio = grammi / 100.0
-            totals["kcal"] += food.energia_kcal * ratio
-            totals["proteine_g"] += food.proteine_g * ratio
-            totals["carboidrati_g"] += food.carboidrati_g * ratio
-            totals["grassi_g"] += food.grassi_g * ratio
-            if food.fibra_g:
-                totals["fibra_g"] += food.fibra_g * ratio
-            if food.calcio_mg:
-                totals["calcio_mg"] += food.calcio_mg * ratio
-            if food.ferro_mg:
-                totals["ferro_mg"] += food.ferro_mg * ratio
-            if food.zinco_mg:
-                totals["zinco_mg"] += food.zinco_mg * ratio
-            if food.vitamina_d_ug:
-                totals["vitamina_d_ug"] += food.vitamina_d_ug * ratio
-            if food.vitamina_c_mg:
-                totals["vitamina_c_mg"] += food.vitamina_c_mg * ratio
-            if food.vitamina_b12_ug:
-                totals["vitamina_b12_ug"] += food.vitamina_b12_ug * ratio
-    return totals
 
 
 def _clamp(value: float, ruolo: str) -> float:
@@ -80,6 +87,7 @@ def optimize_day(
     target_kcal: float,
     target_prot_g: float | None = None,
     target_fat_g: float | None = None,
+    matrix: NutrientMatrix | None = None,
 ) -> list[tuple[str, list[tuple[Food, float, str]]]]:
     """
     Ottimizza le porzioni di un giorno per avvicinarsi ai target.
@@ -89,6 +97,7 @@ def optimize_day(
         target_kcal: obiettivo calorico giornaliero
         target_prot_g: obiettivo proteine (opzionale)
         target_fat_g: obiettivo grassi (opzionale)
+        matrix: matrice nutrienti del food pool (costruita al volo se assente)
 
     Returns:
         day_meals aggiornato con porzioni ottimizzate
@@ -97,7 +106,7 @@ def optimize_day(
         return day_meals
 
     # --- Step 1: scala globale per centrare kcal ---
-    totals = _calc_day_totals(day_meals)
+    totals = _calc_day_totals(day_meals, matrix)
     if totals["kcal"] <= 0:
         return day_meals
 
@@ -115,7 +124,7 @@ def optimize_day(
 
     # --- Step 2: aggiusta proteine ---
     if target_prot_g and target_prot_g > 0:
-        totals = _calc_day_totals(result)
+        totals = _calc_day_totals(result, matrix)
         prot_delta = target_prot_g - totals["proteine_g"]
 
         if abs(prot_delta) > 5:  # margine di 5g
@@ -141,7 +150,7 @@ def optimize_day(
 
     # --- Step 3: aggiusta grassi (olio + noci) ---
     if target_fat_g and target_fat_g > 0:
-        totals = _calc_day_totals(result)
+        totals = _calc_day_totals(result, matrix)
         fat_delta = target_fat_g - totals["grassi_g"]
 
         if abs(fat_delta) > 3:
@@ -163,7 +172,7 @@ def optimize_day(
     # --- Step 4: ri-bilancia kcal via carboidrati ---
     # Dopo aggiustamento proteine/grassi, le kcal possono essere sbilanciate.
     # Correggi scalando le fonti di carboidrati.
-    totals = _calc_day_totals(result)
+    totals = _calc_day_totals(result, matrix)
     kcal_gap = target_kcal - totals["kcal"]
     if abs(kcal_gap) > 50:  # margine 50 kcal
         carb_roles = {"carb_cooked", "carb_light", "cereal", "bread"}
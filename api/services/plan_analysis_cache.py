@@ -0,0 +1,244 @@
+"""
+Cache persistente di analyze_plan() — chiave = hash del contenuto del piano.
+
+La worklist MyTrainer e la proiezione cliente convertono ogni scheda in un
+TemplatePiano e lo analizzano. L'analisi dipende solo dal template (sessioni,
+esercizi, pattern, profilo cliente) e dalla logica dell'analizzatore, quindi:
+
+  - chiave: sha256(ANALYSIS_CACHE_VERSION + TemplatePiano JSON)
+  - valore: AnalisiPiano serializzata in `schede_analisi_cache`
+  - nessuna invalidazione esplicita: piano modificato → template diverso → hash nuovo
+
+Uso per richiesta (worklist): PlanAnalyses(session) → prefetch(templates) con
+una query batch, analyze(template) ritorna l'analisi salvata o la calcola,
+save() scrive i risultati nuovi in una transazione separata.
+
+Warm-up: dopo il salvataggio di una scheda assegnata, warm_plan_analysis()
+(BackgroundTasks, dopo la risposta) calcola e salva l'analisi del piano.
+Le analisi "effettive" (pesate per compliance) cambiano con i log e si
+riempiono in modo lazy.
+"""
+
+import hashlib
+import logging
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, col, delete, select
+
+from api import __version__
+from api.models.client import Client
+from api.models.exercise import Exercise
+from api.models.plan_analysis import PlanAnalysisCache
+from api.models.workout import WorkoutExercise, WorkoutPlan, WorkoutSession
+from api.services.runtime_metrics import record_cache
+from api.services.training_science.plan_analyzer import ANALYZER_VERSION, analyze_plan
+from api.services.training_science.plan_converter import convert_plan_to_template
+from api.services.training_science.types import AnalisiPiano, TemplatePiano
+
+logger = logging.getLogger(__name__)
+
+# Versione analizzatore + versione app: un aggiornamento invalida tutto
+ANALYSIS_CACHE_VERSION = f"{ANALYZER_VERSION}:{__version__}"
+
+# Righe piu' vecchie eliminate all'avvio (le analisi effettive cambiano con i log)
+ANALYSIS_CACHE_MAX_AGE_DAYS = 90
+
+_LOOKUP_CHUNK = 500
+
+
+def template_hash(template: TemplatePiano) -> str:
+    """Hash del contenuto del template + versione dell'analizzatore."""
+    payload = f"{ANALYSIS_CACHE_VERSION}\n{template.model_dump_json()}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# ════════════════════════════════════════════════════════════
+# TEMPLATE DA DB
+# ════════════════════════════════════════════════════════════
+
+def _client_birth_date(client: Client) -> Optional[date]:
+    if isinstance(client.data_nascita, str) and client.data_nascita:
+        return date.fromisoformat(client.data_nascita)
+    return client.data_nascita if isinstance(client.data_nascita, date) else None
+
+
+def plan_template(
+    plan: WorkoutPlan,
+    sessions: list[WorkoutSession],
+    exercises_by_session: dict[int, list[WorkoutExercise]],
+    exercise_catalog: dict[int, Exercise],
+    client: Client,
+) -> Optional[TemplatePiano]:
+    """TemplatePiano del piano con il profilo demografico del cliente."""
+    return convert_plan_to_template(
+        plan=plan,
+        sessions=sessions,
+        exercises_by_session=exercises_by_session,
+        exercise_catalog=exercise_catalog,
+        client_sesso=client.sesso,
+        client_data_nascita=_client_birth_date(client),
+    )
+
+
+def load_plan_templates(
+    session: Session,
+    plans: list[WorkoutPlan],
+    client_map: dict[int, Client],
+) -> dict[int, Optional[TemplatePiano]]:
+    """
+    Template per piani assegnati: 3 query batch (sessioni, esercizi, catalogo).
+
+    Stesso ordinamento della worklist (numero_sessione, ordine) → stesso hash.
+    """
+    plans = [p for p in plans if p.id_cliente in client_map]
+    if not plans:
+        return {}
+
+    sessions = session.exec(
+        select(WorkoutSession)
+        .where(col(WorkoutSession.id_scheda).in_([p.id for p in plans]))
+        .order_by(WorkoutSession.numero_sessione)
+    ).all()
+    sessions_by_plan: dict[int, list[WorkoutSession]] = {}
+    for s in sessions:
+        sessions_by_plan.setdefault(s.id_scheda, []).append(s)
+
+    exercises_by_session: dict[int, list[WorkoutExercise]] = {}
+    ref_ids: set[int] = set()
+    if sessions:
+        for e in session.exec(
+            select(WorkoutExercise)
+            .where(col(WorkoutExercise.id_sessione).in_([s.id for s in sessions]))
+            .order_by(WorkoutExercise.ordine)
+        ).all():
+            exercises_by_session.setdefault(e.id_sessione, []).append(e)
+            ref_ids.add(e.id_esercizio)
+
+    exercise_catalog: dict[int, Exercise] = {}
+    if ref_ids:
+        exercise_catalog = {
+            r.id: r for r in session.exec(select(Exercise).where(col(Exercise.id).in_(list(ref_ids)))).all()
+        }
+
+    return {
+        plan.id: plan_template(
+            plan, sessions_by_plan.get(plan.id, []), exercises_by_session,
+            exercise_catalog, client_map[plan.id_cliente],
+        )
+        for plan in plans
+    }
+
+
+# ════════════════════════════════════════════════════════════
+# CACHE
+# ════════════════════════════════════════════════════════════
+
+class PlanAnalyses:
+    """Analisi dei piani per una richiesta: lookup batch, calcolo lazy, salvataggio unico."""
+
+    def __init__(self, session: Session) -> None:
+        self.session = session
+        self._memo: dict[str, AnalisiPiano] = {}
+        self._pending: dict[str, AnalisiPiano] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def prefetch(self, templates: Iterable[TemplatePiano]) -> None:
+        """Carica in una query (a blocchi) le analisi gia' salvate per i template."""
+        hashes = list({template_hash(t) for t in templates} - self._memo.keys())
+        for i in range(0, len(hashes), _LOOKUP_CHUNK):
+            chunk = hashes[i:i + _LOOKUP_CHUNK]
+            rows = self.session.exec(
+                select(PlanAnalysisCache.content_hash, PlanAnalysisCache.analysis_json)
+                .where(col(PlanAnalysisCache.content_hash).in_(chunk))
+            ).all()
+            for content_hash, analysis_json in rows:
+                self._memo[content_hash] = AnalisiPiano.model_validate_json(analysis_json)
+
+    def analyze(self, template: TemplatePiano) -> AnalisiPiano:
+        """Analisi salvata se presente, altrimenti analyze_plan() (errori propagati)."""
+        content_hash = template_hash(template)
+        if content_hash not in self._memo:
+            self.prefetch([template])
+        cached = self._memo.get(content_hash)
+        if cached is not None:
+            self.hits += 1
+            record_cache("plan_analysis", hits=1)
+            return cached
+        self.misses += 1
+        record_cache("plan_analysis", misses=1)
+        analysis = analyze_plan(template)
+        self._memo[content_hash] = analysis
+        self._pending[content_hash] = analysis
+        return analysis
+
+    def save(self) -> int:
+        """Scrive le analisi nuove (sessione dedicata: non tocca quella della richiesta)."""
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+        return _store(self.session.get_bind(), pending)
+
+
+def _store(bind: Engine, analyses: dict[str, AnalisiPiano]) -> int:
+    with Session(bind) as writer:
+        existing = set(writer.exec(
+            select(PlanAnalysisCache.content_hash)
+            .where(col(PlanAnalysisCache.content_hash).in_(list(analyses)))
+        ).all())
+        rows = [
+            PlanAnalysisCache(
+                content_hash=content_hash,
+                analyzer_version=ANALYSIS_CACHE_VERSION,
+                score=analysis.score,
+                analysis_json=analysis.model_dump_json(),
+            )
+            for content_hash, analysis in analyses.items()
+            if content_hash not in existing
+        ]
+        if not rows:
+            return 0
+        writer.add_all(rows)
+        try:
+            writer.commit()
+        except IntegrityError:
+            # Richiesta concorrente sullo stesso contenuto: le righe sono equivalenti
+            writer.rollback()
+            return 0
+        return len(rows)
+
+
+def warm_plan_analysis(bind: Engine, plan_id: int) -> None:
+    """Calcola e salva l'analisi di un piano assegnato (BackgroundTasks dopo il salvataggio)."""
+    try:
+        with Session(bind) as session:
+            plan = session.get(WorkoutPlan, plan_id)
+            if plan is None or plan.deleted_at is not None or plan.id_cliente is None:
+                return
+            client = session.get(Client, plan.id_cliente)
+            if client is None:
+                return
+            template = load_plan_templates(session, [plan], {client.id: client}).get(plan.id)
+            if template is None:
+                return
+            analyses = PlanAnalyses(session)
+            analyses.analyze(template)
+            analyses.save()
+    except Exception:
+        logger.warning("Warm-up analisi fallito per piano %s", plan_id, exc_info=True)
+
+
+def purge_plan_analysis_cache(session: Session, max_age_days: int = ANALYSIS_CACHE_MAX_AGE_DAYS) -> int:
+    """Elimina righe di versioni precedenti o piu' vecchie di max_age_days. Ritorna il numero."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=max_age_days)
+    result = session.exec(
+        delete(PlanAnalysisCache).where(
+            (PlanAnalysisCache.analyzer_version != ANALYSIS_CACHE_VERSION)
+            | (PlanAnalysisCache.created_at < cutoff)
+        )
+    )
+    session.commit()
+    return result.rowcount or 0
@@ -10,16 +10,20 @@ Projection Engine — proiezione deterministica per obiettivi cliente.
 Ogni layer funziona indipendentemente. Se mancano dati per un layer,
 gli altri producono comunque output utile.
 
-Regressione: OLS pura (stdlib, zero numpy). R² come indicatore di fiducia.
-Nessuna finestra temporale fissa — tutti i punti disponibili,
-i dati parlano da soli.
+Regressione: OLS pura (stdlib) per la singola serie, OLS vettoriale NumPy
+per lotti di serie (roster: una serie per coppia cliente × metrica).
+R² come indicatore di fiducia. Nessuna finestra temporale fissa — tutti
+i punti disponibili, i dati parlano da soli.
 """
 
 from __future__ import annotations
 
 import logging
+from collections.abc import Hashable, Mapping, Sequence
 from datetime import date, timedelta
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
 
@@ -95,6 +99,16 @@ def compute_metric_trend(
         return None
 
     slope_per_day, intercept, r_squared = result
+    return _build_trend(sorted_vals, slope_per_day, intercept, r_squared)
+
+
+def _build_trend(
+    sorted_vals: Sequence[tuple[date, float]],
+    slope_per_day: float,
+    intercept: float,
+    r_squared: float,
+) -> MetricTrend:
+    """MetricTrend da una regressione gia' calcolata (serie ordinata per data)."""
     weekly_rate = slope_per_day * 7
 
     # Span temporale dei dati
@@ -129,6 +143,68 @@ def compute_metric_trend(
     )
 
 
+def compute_metric_trends(
+    series: Mapping[Hashable, Sequence[tuple[date, float]]],
+) -> dict[Hashable, MetricTrend]:
+    """
+    compute_metric_trend su molte serie in un colpo (OLS vettoriale NumPy).
+
+    series: {chiave: [(data, valore), ...]} — tipicamente (id_cliente, id_metrica)
+    Tutte le serie in un unico array; somme per gruppo con np.bincount.
+    Stesse formule e stesso ordine di somma di linear_regression: a parita'
+    di input i trend coincidono con quelli della versione per singola serie.
+
+    Returns: {chiave: MetricTrend} — assenti le serie non regredibili
+    (< 2 punti o tutte sulla stessa data).
+    """
+    keys = [k for k, vals in series.items() if len(vals) >= 2]
+    if not keys:
+        return {}
+
+    ordered = [sorted(series[k], key=lambda v: v[0]) for k in keys]
+    n_groups = len(keys)
+    counts = np.fromiter((len(v) for v in ordered), dtype=np.int64, count=n_groups)
+    total = int(counts.sum())
+    group = np.repeat(np.arange(n_groups), counts)
+
+    days = np.fromiter(
+        (d.toordinal() for vals in ordered for d, _ in vals), dtype=np.float64, count=total,
+    )
+    y = np.fromiter(
+        (v for vals in ordered for _, v in vals), dtype=np.float64, count=total,
+    )
+    starts = np.cumsum(counts) - counts
+
+    # x = giorni dal primo punto della serie
+    x = days - days[starts][group]
+    n = counts.astype(np.float64)
+
+    mean_x = np.bincount(group, weights=x, minlength=n_groups) / n
+    mean_y = np.bincount(group, weights=y, minlength=n_groups) / n
+    dx = x - mean_x[group]
+    dy = y - mean_y[group]
+    ss_xx = np.bincount(group, weights=dx * dx, minlength=n_groups)
+    ss_xy = np.bincount(group, weights=dx * dy, minlength=n_groups)
+    ss_yy = np.bincount(group, weights=dy * dy, minlength=n_groups)
+
+    valid = ss_xx >= 1e-12  # altrimenti tutti i punti sulla stessa x
+    slope = np.divide(ss_xy, ss_xx, out=np.zeros(n_groups), where=valid)
+    intercept = mean_y - slope * mean_x
+
+    residual = y - (slope[group] * x + intercept[group])
+    ss_res = np.bincount(group, weights=residual * residual, minlength=n_groups)
+    has_var = ss_yy > 1e-12
+    r_squared = np.zeros(n_groups)
+    np.divide(ss_res, ss_yy, out=r_squared, where=has_var)
+    r_squared = np.clip(np.where(has_var, 1.0 - r_squared, 0.0), 0.0, 1.0)
+
+    return {
+        key: _build_trend(vals, float(slope[i]), float(intercept[i]), float(r_squared[i]))
+        for i, (key, vals) in enumerate(zip(keys, ordered))
+        if valid[i]
+    }
+
+
 # ════════════════════════════════════════════════════════════
 # Layer 3: Proiezione goal
 # ════════════════════════════════════════════════════════════
@@ -0,0 +1,195 @@
+"""
+Contatori crediti PT mantenuti in scrittura — mai ricontati in lettura.
+
+La fonte di verita' restano gli eventi `agenda`: un evento consuma un credito
+se categoria = PT, stato != Cancellato e non eliminato. Due colonne ne tengono
+il conto:
+
+  - contratti.crediti_usati  = eventi che consumano il contratto (id_contratto)
+  - clienti.crediti_residui  = SUM(crediti_totali dei contratti non eliminati)
+                               - eventi che consumano crediti del cliente
+
+Aggiornate nella stessa transazione della mutazione, con UPDATE incrementali
+(col = col + delta, nessuna lettura-poi-scrittura):
+  - agenda create / cambio stato / delete → apply_event_credit()
+  - contratti create / rinnovo / modifica crediti_totali / delete
+    → adjust_client_purchased()
+
+reconcile_credits() ricalcola tutto dagli eventi, segnala e corregge le
+differenze (avvio, dopo un restore, job "credits_reconcile" su richiesta).
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Optional
+
+from sqlmodel import Session, func, select, update
+
+from api.models.client import Client
+from api.models.contract import Contract
+from api.models.event import Event
+
+logger = logging.getLogger("fitmanager.credits")
+
+# Predicato SQL equivalente a consumes_credit()
+CONSUMING_EVENT = (
+    Event.categoria == "PT",
+    Event.stato != "Cancellato",
+    Event.deleted_at == None,  # noqa: E711
+)
+
+
+def consumes_credit(event: Event) -> bool:
+    """True se l'evento consuma un credito PT."""
+    return event.categoria == "PT" and event.stato != "Cancellato" and event.deleted_at is None
+
+
+# ════════════════════════════════════════════════════════════
+# SCRITTURA (stessa transazione del chiamante, nessun commit)
+# ════════════════════════════════════════════════════════════
+
+def apply_event_credit(session: Session, event: Event, delta: int) -> None:
+    """
+    Applica +1 / -1 crediti consumati dall'evento a contratto e cliente.
+
+    Il chiamante calcola delta come consumes_credit(dopo) - consumes_credit(prima).
+    """
+    if delta == 0:
+        return
+    if event.id_contratto:
+        session.exec(
+            update(Contract)
+            .where(Contract.id == event.id_contratto)
+            .values(crediti_usati=Contract.crediti_usati + delta)
+        )
+    if event.id_cliente:
+        session.exec(
+            update(Client)
+            .where(Client.id == event.id_cliente)
+            .values(crediti_residui=Client.crediti_residui - delta)
+        )
+
+
+def adjust_client_purchased(session: Session, client_id: int, delta: int) -> None:
+    """Crediti acquistati dal cliente variati di delta (contratto creato/modificato/eliminato)."""
+    if delta == 0:
+        return
+    session.exec(
+        update(Client)
+        .where(Client.id == client_id)
+        .values(crediti_residui=Client.crediti_residui + delta)
+    )
+
+
+# ════════════════════════════════════════════════════════════
+# RICONCILIAZIONE
+# ════════════════════════════════════════════════════════════
+
+@dataclass(frozen=True)
+class CreditDrift:
+    """Valore salvato diverso da quello ricalcolato dagli eventi."""
+    id: int
+    salvato: int
+    atteso: int
+
+
+@dataclass
+class CreditReconciliation:
+    contratti_verificati: int = 0
+    clienti_verificati: int = 0
+    contratti: list[CreditDrift] = field(default_factory=list)
+    clienti: list[CreditDrift] = field(default_factory=list)
+
+    @property
+    def drift(self) -> int:
+        return len(self.contratti) + len(self.clienti)
+
+
+def _expected_contract_usage(session: Session, trainer_id: Optional[int]) -> dict[int, int]:
+    query = (
+        select(Event.id_contratto, func.count(Event.id))
+        .where(*CONSUMING_EVENT, Event.id_contratto != None)  # noqa: E711
+        .group_by(Event.id_contratto)
+    )
+    if trainer_id is not None:
+        query = query.where(Event.trainer_id == trainer_id)
+    return {row[0]: int(row[1]) for row in session.exec(query).all()}
+
+
+def _expected_client_residuals(
+    session: Session, clients: list[tuple[int, Optional[int], int]], trainer_id: Optional[int],
+) -> dict[int, int]:
+    """crediti acquistati - consumati, per (cliente, trainer del cliente)."""
+    purchased_query = (
+        select(Contract.id_cliente, Contract.trainer_id, func.coalesce(func.sum(Contract.crediti_totali), 0))
+        .where(Contract.deleted_at == None)  # noqa: E711
+        .group_by(Contract.id_cliente, Contract.trainer_id)
+    )
+    usage_query = (
+        select(Event.id_cliente, Event.trainer_id, func.count(Event.id))
+        .where(*CONSUMING_EVENT, Event.id_cliente != None)  # noqa: E711
+        .group_by(Event.id_cliente, Event.trainer_id)
+    )
+    if trainer_id is not None:
+        purchased_query = purchased_query.where(Contract.trainer_id == trainer_id)
+        usage_query = usage_query.where(Event.trainer_id == trainer_id)
+    purchased = {(r[0], r[1]): int(r[2]) for r in session.exec(purchased_query).all()}
+    used = {(r[0], r[1]): int(r[2]) for r in session.exec(usage_query).all()}
+    return {
+        client_id: purchased.get((client_id, owner), 0) - used.get((client_id, owner), 0)
+        for client_id, owner, _ in clients
+    }
+
+
+def reconcile_credits(
+    session: Session, trainer_id: Optional[int] = None, repair: bool = True,
+) -> CreditReconciliation:
+    """
+    Confronta i contatori con gli eventi (tutti i trainer se trainer_id e' None).
+
+    Con repair=True corregge le righe divergenti e committa. La correzione e'
+    condizionata al valore letto (compare-and-set): se nel frattempo una
+    richiesta ha aggiornato il contatore, la riga resta al prossimo giro.
+    """
+    contract_query = select(Contract.id, Contract.crediti_usati).where(Contract.deleted_at == None)  # noqa: E711
+    client_query = select(Client.id, Client.trainer_id, Client.crediti_residui).where(Client.deleted_at == None)  # noqa: E711
+    if trainer_id is not None:
+        contract_query = contract_query.where(Contract.trainer_id == trainer_id)
+        client_query = client_query.where(Client.trainer_id == trainer_id)
+    contracts = session.exec(contract_query).all()
+    clients = session.exec(client_query).all()
+
+    usage = _expected_contract_usage(session, trainer_id)
+    residuals = _expected_client_residuals(session, clients, trainer_id)
+
+    result = CreditReconciliation(contratti_verificati=len(contracts), clienti_verificati=len(clients))
+    for contract_id, stored in contracts:
+        expected = usage.get(contract_id, 0)
+        if (stored or 0) != expected:
+            result.contratti.append(CreditDrift(contract_id, stored or 0, expected))
+    for client_id, _, stored in clients:
+        expected = residuals[client_id]
+        if (stored or 0) != expected:
+            result.clienti.append(CreditDrift(client_id, stored or 0, expected))
+
+    if not result.drift:
+        return result
+    logger.warning(
+        "Crediti PT disallineati: %d contratti, %d clienti%s",
+        len(result.contratti), len(result.clienti), " (corretti)" if repair else "",
+    )
+    if repair:
+        for d in result.contratti:
+            session.exec(
+                update(Contract)
+                .where(Contract.id == d.id, func.coalesce(Contract.crediti_usati, 0) == d.salvato)
+                .values(crediti_usati=d.atteso)
+            )
+        for d in result.clienti:
+            session.exec(
+                update(Client)
+                .where(Client.id == d.id, func.coalesce(Client.crediti_residui, 0) == d.salvato)
+                .values(crediti_residui=d.atteso)
+            )
+        session.commit()
+    return result
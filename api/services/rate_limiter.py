@@ -0,0 +1,88 @@
+"""
+Rate limiting in-process a token bucket — stato fisso per chiave, LRU eviction.
+
+Ogni chiave (tipicamente l'IP del chiamante) possiede un bucket per ciascun
+limite configurato: `tokens` residui + timestamp dell'ultimo refill. Il check
+e' O(1) per richiesta e la memoria e' limitata da `max_keys`: le chiavi inattive
+da piu' tempo vengono espulse per prime (OrderedDict come LRU).
+
+Riusabile da qualunque endpoint pubblico:
+
+    limiter = TokenBucketLimiter([RateLimit(10, 60.0), RateLimit(30, 3600.0)])
+    if not limiter.allow(ip):
+        raise HTTPException(429, ...)
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Sequence
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """Limite: al massimo `capacity` richieste in `window_seconds` (refill continuo)."""
+
+    capacity: int
+    window_seconds: float
+
+    @property
+    def refill_per_second(self) -> float:
+        return self.capacity / self.window_seconds
+
+
+class TokenBucketLimiter:
+    """Limiter multi-finestra thread-safe con numero massimo di chiavi tracciate."""
+
+    def __init__(
+        self,
+        limits: Sequence[RateLimit],
+        *,
+        max_keys: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not limits:
+            raise ValueError("Almeno un RateLimit e' richiesto")
+        if max_keys < 1:
+            raise ValueError("max_keys deve essere >= 1")
+        self._limits = tuple(limits)
+        self._max_keys = max_keys
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> [last_ts, tokens_limit_0, tokens_limit_1, ...]
+        self._buckets: "OrderedDict[str, list[float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def allow(self, key: str) -> bool:
+        """Consuma un token da ogni bucket della chiave; False se anche uno e' vuoto."""
+        now = self._clock()
+        with self._lock:
+            state = self._buckets.get(key)
+            if state is None:
+                state = [now, *(float(limit.capacity) for limit in self._limits)]
+                self._buckets[key] = state
+                while len(self._buckets) > self._max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                elapsed = max(0.0, now - state[0])
+                for i, limit in enumerate(self._limits, start=1):
+                    state[i] = min(
+                        float(limit.capacity),
+                        state[i] + elapsed * limit.refill_per_second,
+                    )
+                state[0] = now
+
+            if any(state[i] < 1.0 for i in range(1, len(state))):
+                return False
+            for i in range(1, len(state)):
+                state[i] -= 1.0
+            return True
+
+    def reset(self) -> None:
+        """Svuota tutti i bucket (test, cambio configurazione)."""
+        with self._lock:
+            self._buckets.clear()
@@ -1,15 +1,33 @@
-"""Shared occurrence and pending logic for recurring expenses."""
+"""
+Shared occurrence and pending logic for recurring expenses.
+
+Occurrence calendar: load_recurring_expense_calendar() expands all active
+expenses of a trainer over a window of months in one pass and joins the
+result once with the confirmed `movimenti_cassa` occurrence keys. Forecast,
+pending list, cash protection, workspace due cases all read the same
+RecurringExpenseCalendar.
+
+The expansion only depends on the expense set, so it is memoized per
+(trainer, expense-set version, window): the version is a hash of the active
+expenses' scheduling fields, an edit produces a new version. Confirmations
+change with the ledger and are always re-read (one query per calendar).
+"""
 
 from __future__ import annotations
 
 import calendar
+import hashlib
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
 from datetime import date
+from typing import Iterable
 
 from sqlmodel import Session, select
 
 from api.models.movement import CashMovement
 from api.models.recurring_expense import RecurringExpense
+from api.services.runtime_metrics import record_cache
 
 VALID_RECURRING_EXPENSE_FREQUENCIES = {
     "MENSILE",
@@ -21,7 +39,7 @@ VALID_RECURRING_EXPENSE_FREQUENCIES = {
 
 
 @dataclass(frozen=True)
-class PendingRecurringExpenseOccurrence:
+class RecurringExpenseOccurrence:
     expense_id: int
     nome: str
     categoria: str | None
@@ -31,6 +49,9 @@ class PendingRecurringExpenseOccurrence:
     occurrence_key: str
 
 
+PendingRecurringExpenseOccurrence = RecurringExpenseOccurrence
+
+
 def get_recurring_expense_start_date(expense: RecurringExpense) -> date:
     """Return the anchoring date for the recurrence cycle."""
     if expense.data_inizio:
@@ -40,26 +61,24 @@ def get_recurring_expense_start_date(expense: RecurringExpense) -> date:
     return date.today()
 
 
-def get_recurring_expense_occurrences_in_month(
-    expense: RecurringExpense,
+def _occurrences_in_month(
+    freq: str,
+    giorno_scadenza: int,
+    start: date,
     anno: int,
     mese: int,
+    days_in_month: int,
 ) -> list[tuple[date, str]]:
-    """Return all occurrence dates and dedupe keys for a target month."""
-    days_in_month = calendar.monthrange(anno, mese)[1]
-    freq = expense.frequenza or "MENSILE"
-    start = get_recurring_expense_start_date(expense)
-
     last_day_of_month = date(anno, mese, days_in_month)
     if start > last_day_of_month:
         return []
 
     if freq == "MENSILE":
-        giorno = min(expense.giorno_scadenza, days_in_month)
+        giorno = min(giorno_scadenza, days_in_month)
         return [(date(anno, mese, giorno), f"{anno:04d}-{mese:02d}")]
 
     if freq == "SETTIMANALE":
-        base = min(expense.giorno_scadenza, 7)
+        base = min(giorno_scadenza, 7)
         occurrences: list[tuple[date, str]] = []
         day = base
         week = 1
@@ -76,25 +95,55 @@ def get_recurring_expense_occurrences_in_month(
     if freq == "TRIMESTRALE":
         if (abs_target - abs_start) % 3 != 0:
             return []
-        giorno = min(expense.giorno_scadenza, days_in_month)
+        giorno = min(giorno_scadenza, days_in_month)
         return [(date(anno, mese, giorno), f"{anno:04d}-{mese:02d}")]
 
     if freq == "SEMESTRALE":
         if (abs_target - abs_start) % 6 != 0:
             return []
-        giorno = min(expense.giorno_scadenza, days_in_month)
+        giorno = min(giorno_scadenza, days_in_month)
         return [(date(anno, mese, giorno), f"{anno:04d}-{mese:02d}")]
 
     if freq == "ANNUALE":
         if mese != start.month:
             return []
-        giorno = min(expense.giorno_scadenza, days_in_month)
+        giorno = min(giorno_scadenza, days_in_month)
         return [(date(anno, mese, giorno), f"{anno:04d}")]
 
-    giorno = min(expense.giorno_scadenza, days_in_month)
+    giorno = min(giorno_scadenza, days_in_month)
     return [(date(anno, mese, giorno), f"{anno:04d}-{mese:02d}")]
 
 
+def get_recurring_expense_occurrences_in_month(
+    expense: RecurringExpense,
+    anno: int,
+    mese: int,
+) -> list[tuple[date, str]]:
+    """Return all occurrence dates and dedupe keys for a target month."""
+    return _occurrences_in_month(
+        expense.frequenza or "MENSILE",
+        expense.giorno_scadenza,
+        get_recurring_expense_start_date(expense),
+        anno,
+        mese,
+        calendar.monthrange(anno, mese)[1],
+    )
+
+
+def estimate_monthly_recurring_expense(expense: RecurringExpense) -> float:
+    """Weighted monthly amount of a recurring expense based on its frequency."""
+    freq = expense.frequenza or "MENSILE"
+    if freq == "SETTIMANALE":
+        return expense.importo * 4.33
+    if freq == "TRIMESTRALE":
+        return expense.importo / 3
+    if freq == "SEMESTRALE":
+        return expense.importo / 6
+    if freq == "ANNUALE":
+        return expense.importo / 12
+    return expense.importo
+
+
 def resolve_recurring_expense_occurrence_date(
     expense: RecurringExpense,
     occurrence_key: str,
@@ -116,14 +165,47 @@ def resolve_recurring_expense_occurrence_date(
     return None
 
 
-def list_pending_recurring_expense_occurrences(
-    *,
-    trainer_id: int,
-    session: Session,
-    anno: int,
-    mese: int,
-) -> list[PendingRecurringExpenseOccurrence]:
-    """List active recurring expense occurrences not yet confirmed in the ledger."""
+# ════════════════════════════════════════════════════════════
+# OCCURRENCE CALENDAR
+# ════════════════════════════════════════════════════════════
+
+@dataclass(frozen=True)
+class _ExpenseSpec:
+    """Immutable snapshot of the fields the schedule depends on."""
+    id: int
+    nome: str
+    categoria: str | None
+    importo: float
+    frequenza: str
+    giorno_scadenza: int
+    start: date
+
+
+@dataclass(frozen=True)
+class RecurringExpenseCalendar:
+    """Occurrences of all active expenses over a window, with ledger confirmations."""
+    months: tuple[tuple[int, int], ...]
+    occurrences: tuple[RecurringExpenseOccurrence, ...]  # sorted by due date
+    confirmed: frozenset[tuple[int, str]]
+    monthly_estimate: float
+
+    def in_month(self, anno: int, mese: int) -> list[RecurringExpenseOccurrence]:
+        return [o for o in self.occurrences if (o.due_date.year, o.due_date.month) == (anno, mese)]
+
+    def is_confirmed(self, occurrence: RecurringExpenseOccurrence) -> bool:
+        return (occurrence.expense_id, occurrence.occurrence_key) in self.confirmed
+
+    def pending(self) -> list[RecurringExpenseOccurrence]:
+        """Occurrences in the window not yet confirmed in the ledger."""
+        return [o for o in self.occurrences if not self.is_confirmed(o)]
+
+
+_MEMO_SIZE = 128
+_memo_lock = threading.Lock()
+_memo: "OrderedDict[tuple, tuple[RecurringExpenseOccurrence, ...]]" = OrderedDict()
+
+
+def _load_specs(session: Session, trainer_id: int) -> tuple[tuple[_ExpenseSpec, ...], float]:
     recurring = session.exec(
         select(RecurringExpense).where(
             RecurringExpense.trainer_id == trainer_id,
@@ -131,38 +213,122 @@ def list_pending_recurring_expense_occurrences(
             RecurringExpense.deleted_at == None,
         )
     ).all()
+    specs = tuple(
+        _ExpenseSpec(
+            id=expense.id,
+            nome=expense.nome,
+            categoria=expense.categoria,
+            importo=expense.importo,
+            frequenza=expense.frequenza or "MENSILE",
+            giorno_scadenza=expense.giorno_scadenza,
+            start=get_recurring_expense_start_date(expense),
+        )
+        for expense in recurring
+        if expense.id is not None
+    )
+    return specs, sum(estimate_monthly_recurring_expense(e) for e in recurring)
 
-    if not recurring:
-        return []
 
-    existing = session.exec(
-        select(CashMovement.id_spesa_ricorrente, CashMovement.mese_anno).where(
-            CashMovement.trainer_id == trainer_id,
-            CashMovement.id_spesa_ricorrente != None,
-            CashMovement.deleted_at == None,
-        )
-    ).all()
-    existing_keys: set[tuple[int, str]] = {(row[0], row[1]) for row in existing}
-
-    pending: list[PendingRecurringExpenseOccurrence] = []
-    for expense in recurring:
-        if expense.id is None:
-            continue
-        occurrences = get_recurring_expense_occurrences_in_month(expense, anno, mese)
-        for due_date, occurrence_key in occurrences:
-            if (expense.id, occurrence_key) in existing_keys:
-                continue
-            pending.append(
-                PendingRecurringExpenseOccurrence(
-                    expense_id=expense.id,
-                    nome=expense.nome,
-                    categoria=expense.categoria,
-                    importo=expense.importo,
-                    frequenza=expense.frequenza or "MENSILE",
-                    due_date=due_date,
-                    occurrence_key=occurrence_key,
+def _expense_set_version(specs: tuple[_ExpenseSpec, ...]) -> str:
+    return hashlib.sha256(repr(specs).encode("utf-8")).hexdigest()
+
+
+def _expand(
+    specs: tuple[_ExpenseSpec, ...],
+    months: tuple[tuple[int, int], ...],
+) -> tuple[RecurringExpenseOccurrence, ...]:
+    occurrences: list[RecurringExpenseOccurrence] = []
+    for anno, mese in months:
+        days_in_month = calendar.monthrange(anno, mese)[1]
+        for spec in specs:
+            for due_date, occurrence_key in _occurrences_in_month(
+                spec.frequenza, spec.giorno_scadenza, spec.start, anno, mese, days_in_month,
+            ):
+                occurrences.append(
+                    RecurringExpenseOccurrence(
+                        expense_id=spec.id,
+                        nome=spec.nome,
+                        categoria=spec.categoria,
+                        importo=spec.importo,
+                        frequenza=spec.frequenza,
+                        due_date=due_date,
+                        occurrence_key=occurrence_key,
+                    )
                 )
+    occurrences.sort(key=lambda item: (item.due_date, item.nome.lower(), item.expense_id, item.occurrence_key))
+    return tuple(occurrences)
+
+
+def _expanded(
+    trainer_id: int,
+    specs: tuple[_ExpenseSpec, ...],
+    months: tuple[tuple[int, int], ...],
+) -> tuple[RecurringExpenseOccurrence, ...]:
+    key = (trainer_id, _expense_set_version(specs), months)
+    with _memo_lock:
+        cached = _memo.get(key)
+        if cached is not None:
+            _memo.move_to_end(key)
+    if cached is not None:
+        record_cache("recurring_calendar", hits=1)
+        return cached
+
+    record_cache("recurring_calendar", misses=1)
+    occurrences = _expand(specs, months)
+    with _memo_lock:
+        _memo[key] = occurrences
+        while len(_memo) > _MEMO_SIZE:
+            _memo.popitem(last=False)
+    return occurrences
+
+
+def clear_recurring_expense_calendar_cache() -> None:
+    """Drop memoized expansions (tests, reload)."""
+    with _memo_lock:
+        _memo.clear()
+
+
+def load_recurring_expense_calendar(
+    *,
+    trainer_id: int,
+    session: Session,
+    months: Iterable[tuple[int, int]],
+) -> RecurringExpenseCalendar:
+    """Active expenses of the trainer expanded over `months`, joined with confirmed keys."""
+    window = tuple(sorted(set(months)))
+    specs, monthly_estimate = _load_specs(session, trainer_id)
+    occurrences = _expanded(trainer_id, specs, window) if specs and window else ()
+
+    confirmed: frozenset[tuple[int, str]] = frozenset()
+    if occurrences:
+        existing = session.exec(
+            select(CashMovement.id_spesa_ricorrente, CashMovement.mese_anno).where(
+                CashMovement.trainer_id == trainer_id,
+                CashMovement.id_spesa_ricorrente.in_({o.expense_id for o in occurrences}),
+                CashMovement.mese_anno.in_({o.occurrence_key for o in occurrences}),
+                CashMovement.deleted_at == None,
             )
+        ).all()
+        confirmed = frozenset((row[0], row[1]) for row in existing)
+
+    return RecurringExpenseCalendar(
+        months=window,
+        occurrences=occurrences,
+        confirmed=confirmed,
+        monthly_estimate=monthly_estimate,
+    )
 
-    pending.sort(key=lambda item: (item.due_date, item.nome.lower(), item.expense_id, item.occurrence_key))
-    return pending
+
+def list_pending_recurring_expense_occurrences(
+    *,
+    trainer_id: int,
+    session: Session,
+    anno: int,
+    mese: int,
+) -> list[PendingRecurringExpenseOccurrence]:
+    """List active recurring expense occurrences not yet confirmed in the ledger."""
+    return load_recurring_expense_calendar(
+        trainer_id=trainer_id,
+        session=session,
+        months=[(anno, mese)],
+    ).pending()
@@ -0,0 +1,248 @@
+"""
+Cache risposte + ETag per i dati di riferimento (catalogo, parametri, categorie).
+
+Parametri di carico, target di volume, catalogo metriche, categorie alimenti,
+dettaglio esercizio e statistiche archivio cambiano solo quando cambiano i DB
+di riferimento o gli esercizi. Un endpoint marcato con @cache_response(...)
+passa dal middleware `serve_cached` (registrato in api/main.py):
+
+  - chiave: path + query + trainer (dal JWT) + versione degli scope dichiarati
+  - hit: risposta servita dalla memoria, senza dipendenze; unica query la
+    lettura per chiave primaria di trainers.is_active (come get_current_trainer),
+    nel threadpool come le dipendenze sync: il loop non attende il pool del DB
+  - If-None-Match uguale all'ETag → 304 (anche su miss, dopo il calcolo)
+  - ETag forte = sha256 del body; Cache-Control: private, no-cache (il browser
+    rivalida sempre, ma con 304 il body non viaggia)
+
+Versioni degli scope:
+  - "exercises": contatore in memoria, incrementato da bump_cache_version()
+    dopo ogni mutazione esercizi/media/relazioni
+  - "catalog": contatore + catalog_version() del registro catalogo (checksum
+    del sidecar catalog.sha256, la stessa versione che ricarica lo snapshot)
+  - "nutrition": contatore + impronta del file SQLite (mtime e dimensione di
+    .db e -wal) → un rebuild offline invalida senza riavvio
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+from sqlmodel import select
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import Response
+
+from api.auth.service import decode_access_token
+from api.config import NUTRITION_DATABASE_URL, RESPONSE_CACHE_MAX_ENTRIES
+from api.database import catalog_engine, get_session, sqlite_file_path
+from api.models.trainer import Trainer
+from api.services.catalog_registry import catalog_version
+from api.services.runtime_metrics import record_cache
+
+CACHE_SCOPES = ("exercises", "catalog", "nutrition")
+
+_NUTRITION_PATH = sqlite_file_path(NUTRITION_DATABASE_URL)
+
+# Path gia' visti → policy dell'endpoint (None = non cacheabile)
+_ROUTE_MEMO_SIZE = 2048
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    scopes: tuple[str, ...]
+    max_age: int = 0
+
+
+def cache_response(*scopes: str, max_age: int = 0) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    Marca un endpoint GET come cacheabile, invalidato dagli scope indicati.
+
+    Da mettere sotto il decoratore della route. Senza scope la risposta dipende
+    solo da path, query e trainer (dati statici nel codice).
+    """
+    unknown = set(scopes) - set(CACHE_SCOPES)
+    if unknown:
+        raise ValueError(f"Scope cache sconosciuti: {sorted(unknown)}")
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        func.__response_cache__ = CachePolicy(tuple(scopes), max_age)
+        return func
+
+    return decorator
+
+
+# ════════════════════════════════════════════════════════════
+# VERSIONI
+# ════════════════════════════════════════════════════════════
+
+_lock = threading.Lock()
+_counters: dict[str, int] = {scope: 0 for scope in CACHE_SCOPES}
+_entries: "OrderedDict[tuple, tuple[str, bytes, str]]" = OrderedDict()
+_route_memo: dict[str, tuple[Optional[CachePolicy], Any]] = {}   # path → (policy, route)
+
+
+def bump_cache_version(scope: str) -> None:
+    """Invalida le risposte che dipendono da `scope` (chiamare dopo il commit)."""
+    with _lock:
+        _counters[scope] += 1
+
+
+def _file_fingerprint(path) -> tuple:
+    if path is None:
+        return ()
+    stamp = []
+    for candidate in (path, path.with_name(path.name + "-wal")):
+        try:
+            st = os.stat(candidate)
+        except OSError:
+            stamp.append(None)
+        else:
+            stamp.append((st.st_mtime_ns, st.st_size))
+    return tuple(stamp)
+
+
+def _scope_stamp(scope: str) -> Any:
+    if scope == "catalog":
+        return catalog_version(catalog_engine)
+    if scope == "nutrition":
+        return _file_fingerprint(_NUTRITION_PATH)
+    return None
+
+
+def scope_versions(scopes: tuple[str, ...]) -> tuple:
+    """Versione corrente degli scope (nessun accesso al DB)."""
+    return tuple((_counters[scope], _scope_stamp(scope)) for scope in scopes)
+
+
+def clear_response_cache() -> None:
+    """Svuota risposte e memo delle route (test, reload)."""
+    with _lock:
+        _entries.clear()
+        _route_memo.clear()
+
+
+# ════════════════════════════════════════════════════════════
+# MIDDLEWARE
+# ════════════════════════════════════════════════════════════
+
+_UNKNOWN = object()
+
+
+def _learn_route_policy(request: Request) -> Optional[CachePolicy]:
+    """Policy dell'endpoint risolto dal router (scope["endpoint"] dopo call_next)."""
+    endpoint = request.scope.get("endpoint")
+    policy = getattr(endpoint, "__response_cache__", None)
+    with _lock:
+        if len(_route_memo) >= _ROUTE_MEMO_SIZE:
+            _route_memo.clear()
+        _route_memo[request.url.path] = (policy, request.scope.get("route"))
+    return policy
+
+
+def _trainer_key(request: Request) -> Optional[str]:
+    auth = request.headers.get("authorization", "")
+    scheme, _, token = auth.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    payload = decode_access_token(token)
+    return str(payload["sub"]) if payload and "sub" in payload else None
+
+
+def _trainer_is_active(request: Request, trainer: str) -> bool:
+    """
+    Trainer esistente e attivo: il controllo di get_current_trainer, saltato dagli hit.
+
+    Sessione dal provider dell'app (rispetta dependency_overrides). Query sync:
+    chiamare via run_in_threadpool, mai direttamente dal loop.
+    """
+    provider = request.app.dependency_overrides.get(get_session, get_session)
+    sessions = provider()
+    session = next(sessions)
+    try:
+        return bool(session.exec(select(Trainer.is_active).where(Trainer.id == int(trainer))).first())
+    finally:
+        sessions.close()
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def _cache_headers(etag: str, policy: CachePolicy) -> dict[str, str]:
+    control = f"private, max-age={policy.max_age}" if policy.max_age else "private, no-cache"
+    return {"ETag": etag, "Cache-Control": control}
+
+
+async def serve_cached(
+    request: Request,
+    call_next: Callable[[Request], Awaitable[Response]],
+) -> Response:
+    """
+    Middleware HTTP: serve/aggiorna la cache per gli endpoint @cache_response.
+
+    La policy di un path si impara alla prima richiesta (endpoint risolto dal
+    router); da li' in poi i path non cacheabili passano senza altro lavoro.
+    """
+    if request.method != "GET":
+        return await call_next(request)
+    policy, route = _route_memo.get(request.url.path, (_UNKNOWN, None))
+    if policy is None:
+        return await call_next(request)
+    trainer = _trainer_key(request)
+    if trainer is None:
+        return await call_next(request)       # 401 gestito dall'endpoint
+
+    # Versioni lette PRIMA del calcolo: un bump concorrente non lascia in cache dati vecchi
+    scopes = CACHE_SCOPES if policy is _UNKNOWN else policy.scopes
+    versions = dict(zip(scopes, scope_versions(scopes)))
+    query = tuple(sorted(request.query_params.multi_items()))
+    if_none_match = request.headers.get("if-none-match")
+
+    if policy is not _UNKNOWN:
+        key = (request.url.path, query, trainer, tuple(versions.values()))
+        with _lock:
+            cached = _entries.get(key)
+            if cached is not None:
+                _entries.move_to_end(key)
+        if cached is not None and not await run_in_threadpool(_trainer_is_active, request, trainer):
+            return await call_next(request)   # 401 dall'endpoint
+        record_cache("response", hits=int(cached is not None), misses=int(cached is None))
+        if cached is not None:
+            # Nessun routing sugli hit: la route memorizzata etichetta le metriche di latenza
+            request.scope["route"] = route
+            etag, body, media_type = cached
+            headers = _cache_headers(etag, policy)
+            if _etag_matches(if_none_match, etag):
+                return Response(status_code=304, headers=headers)
+            return Response(content=body, media_type=media_type, headers=headers)
+
+    response = await call_next(request)
+    if policy is _UNKNOWN:
+        policy = _learn_route_policy(request)
+        if policy is None:
+            return response
+        record_cache("response", misses=1)
+        key = (request.url.path, query, trainer, tuple(versions[s] for s in policy.scopes))
+
+    media_type = response.headers.get("content-type", "")
+    if response.status_code != 200 or not media_type.startswith("application/json"):
+        return response
+
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    with _lock:
+        _entries[key] = (etag, body, media_type)
+        while len(_entries) > RESPONSE_CACHE_MAX_ENTRIES:
+            _entries.popitem(last=False)
+
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=_cache_headers(etag, policy))
+    headers = {k: v for k, v in response.headers.items() if k.lower() != "content-length"}
+    headers.update(_cache_headers(etag, policy))
+    return Response(content=body, status_code=200, headers=headers, media_type=media_type)
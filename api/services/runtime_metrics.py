@@ -0,0 +1,383 @@
+"""
+Metriche runtime in memoria — esposte in formato Prometheus su GET /metrics.
+
+Raccolta (contatori di processo, azzerati al riavvio):
+  - richieste HTTP: conteggio per metodo/route/status, istogramma latenze
+    per metodo/route, richieste in corso (request_context_middleware)
+  - threadpool condiviso + pool dedicati (execution_pools, letti al momento)
+  - pool connessioni SQLAlchemy dei tre engine: checkout, checkin, nuove
+    connessioni, connessioni in uso / picco, checkout a pool saturo (il
+    chiamante successivo attende: SQLAlchemy non ha un hook pre-checkout,
+    l'attesa si misura cosi')
+  - query: conteggio e query lente (> SLOW_QUERY_MS) per engine
+  - cache: hit/miss per nome (response cache, analisi piani, ...)
+  - coda log: record in coda / scartati (logging_config)
+
+Label route = template del router ("/api/clients/{client_id}"), mai il path
+concreto: cardinalita' limitata dal numero di endpoint.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from api.config import SLOW_QUERY_MS
+from api.logging_config import log_pipeline_stats
+from api.services.execution_pools import default_threadpool_snapshot, pool_snapshots
+
+# Bucket latenza (secondi), stile Prometheus client
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()
+
+
+class _Histogram:
+    __slots__ = ("buckets", "total", "count")
+
+    def __init__(self) -> None:
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)  # ultimo = +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.buckets[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Stima per bucket (limite superiore del bucket che contiene il quantile)."""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(LATENCY_BUCKETS, self.buckets):
+            seen += n
+            if seen >= target:
+                return bound
+        return float("inf")
+
+
+class _EngineStats:
+    __slots__ = (
+        "engine", "checkouts", "checkins", "connects", "saturated_checkouts",
+        "peak_checked_out", "queries", "slow_queries",
+    )
+
+    def __init__(self, engine: Engine) -> None:
+        self.engine = engine
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.saturated_checkouts = 0
+        self.peak_checked_out = 0
+        self.queries = 0
+        self.slow_queries = 0
+
+
+_requests: dict[tuple[str, str, int], int] = {}
+_latency: dict[tuple[str, str], _Histogram] = {}
+_in_flight = 0
+_engines: dict[str, _EngineStats] = {}
+_cache: dict[str, list[int]] = {}  # nome → [hit, miss]
+
+
+# ════════════════════════════════════════════════════════════
+# RACCOLTA
+# ════════════════════════════════════════════════════════════
+
+def request_started() -> None:
+    global _in_flight
+    with _lock:
+        _in_flight += 1
+
+
+def request_finished(method: str, route: str, status_code: int, seconds: float) -> None:
+    global _in_flight
+    with _lock:
+        _in_flight -= 1
+        key = (method, route, status_code)
+        _requests[key] = _requests.get(key, 0) + 1
+        hist = _latency.get((method, route))
+        if hist is None:
+            hist = _latency[(method, route)] = _Histogram()
+        hist.observe(seconds)
+
+
+def route_template(scope: dict) -> str:
+    """
+    Template della route risolta ("/api/clients/{client_id}"), "unmatched" se nessuna.
+
+    Risposte date prima del routing: gli hit della cache risposte impostano
+    scope["route"] (route memorizzata), gli altri middleware un'etichetta in
+    request.state.metrics_route (es. "license_denied"). "unmatched" resta per
+    i veri 404.
+
+    Con router annidati il path_format della route puo' essere relativo al
+    router incluso: il prefisso si ricava dal path concreto (suffisso piu'
+    lungo che combacia con la regex della route).
+    """
+    route = scope.get("route")
+    path_format = getattr(route, "path_format", None)
+    regex = getattr(route, "path_regex", None)
+    if not path_format or regex is None:
+        return (scope.get("state") or {}).get("metrics_route", "unmatched")
+    path = scope.get("path", "")
+    for i, ch in enumerate(path):
+        if ch == "/" and regex.match(path[i:]):
+            return path[:i] + path_format
+    return path_format
+
+
+def record_cache(name: str, hits: int = 0, misses: int = 0) -> None:
+    """Hit/miss di una cache applicativa."""
+    if not hits and not misses:
+        return
+    with _lock:
+        counts = _cache.setdefault(name, [0, 0])
+        counts[0] += hits
+        counts[1] += misses
+
+
+def _checked_out(pool) -> Optional[int]:
+    fn = getattr(pool, "checkedout", None)
+    return fn() if callable(fn) else None
+
+
+def _capacity(pool) -> Optional[int]:
+    size = getattr(pool, "size", None)
+    overflow = getattr(pool, "_max_overflow", None)
+    if not callable(size) or overflow is None or overflow < 0:
+        return None  # overflow illimitato: mai saturo
+    return size() + overflow
+
+
+def instrument_engine(name: str, engine: Engine) -> None:
+    """Eventi pool + cursore sull'engine (idempotente per nome)."""
+    with _lock:
+        if name in _engines:
+            return
+        stats = _engines[name] = _EngineStats(engine)
+
+    def on_connect(dbapi_conn, record):
+        with _lock:
+            stats.connects += 1
+
+    def on_checkout(dbapi_conn, record, proxy):
+        in_use = _checked_out(engine.pool)
+        capacity = _capacity(engine.pool)
+        with _lock:
+            stats.checkouts += 1
+            if in_use is not None:
+                stats.peak_checked_out = max(stats.peak_checked_out, in_use)
+                if capacity is not None and in_use >= capacity:
+                    stats.saturated_checkouts += 1
+
+    def on_checkin(dbapi_conn, record):
+        with _lock:
+            stats.checkins += 1
+
+    def before_cursor(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_metrics_query_start", []).append(time.perf_counter())
+
+    def after_cursor(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("_metrics_query_start")
+        if not starts:
+            return
+        elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+        with _lock:
+            stats.queries += 1
+            if elapsed_ms >= SLOW_QUERY_MS:
+                stats.slow_queries += 1
+
+    def on_error(exception_context):
+        conn = exception_context.connection
+        starts = conn.info.get("_metrics_query_start") if conn is not None else None
+        if starts:
+            starts.pop()
+
+    event.listen(engine, "connect", on_connect)
+    event.listen(engine, "checkout", on_checkout)
+    event.listen(engine, "checkin", on_checkin)
+    event.listen(engine, "before_cursor_execute", before_cursor)
+    event.listen(engine, "after_cursor_execute", after_cursor)
+    event.listen(engine, "handle_error", on_error)
+
+
+def reset_metrics() -> None:
+    """Azzera contatori richieste/cache (test). Gli engine restano strumentati."""
+    global _in_flight
+    with _lock:
+        _requests.clear()
+        _latency.clear()
+        _cache.clear()
+        _in_flight = 0
+
+
+# ════════════════════════════════════════════════════════════
+# LETTURA
+# ════════════════════════════════════════════════════════════
+
+def _engine_snapshot(name: str, stats: _EngineStats) -> dict:
+    pool = stats.engine.pool
+    return {
+        "engine": name,
+        "pool": type(pool).__name__,
+        "size": pool.size() if callable(getattr(pool, "size", None)) else None,
+        "checked_out": _checked_out(pool),
+        "peak_checked_out": stats.peak_checked_out,
+        "checkouts": stats.checkouts,
+        "checkins": stats.checkins,
+        "connects": stats.connects,
+        "saturated_checkouts": stats.saturated_checkouts,
+        "queries": stats.queries,
+        "slow_queries": stats.slow_queries,
+    }
+
+
+def metrics_summary(slowest: int = 5) -> dict:
+    """Riepilogo compatto per il support snapshot."""
+    with _lock:
+        total = sum(_requests.values())
+        errors = sum(n for (_, _, status), n in _requests.items() if status >= 500)
+        routes = [
+            {
+                "method": method,
+                "route": route,
+                "count": hist.count,
+                "avg_ms": round(hist.total / hist.count * 1000, 1),
+                "p95_ms": _ms(hist.quantile(0.95)),
+            }
+            for (method, route), hist in _latency.items()
+        ]
+        engines = [_engine_snapshot(name, stats) for name, stats in sorted(_engines.items())]
+        caches = [
+            {
+                "name": name,
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+            }
+            for name, (hits, misses) in sorted(_cache.items())
+        ]
+        in_flight = _in_flight
+
+    routes.sort(key=lambda r: r["avg_ms"], reverse=True)
+    logs = log_pipeline_stats()
+    return {
+        "requests_total": total,
+        "requests_5xx": errors,
+        "in_flight": in_flight,
+        "slowest_routes": routes[:slowest],
+        "default_threadpool": default_threadpool_snapshot(),
+        "pools": pool_snapshots(),
+        "databases": engines,
+        "caches": caches,
+        "log_records_dropped": sum(p["dropped"] for p in logs.values()),
+    }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    if seconds is None or seconds == float("inf"):
+        return None
+    return round(seconds * 1000, 1)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def render_prometheus() -> str:
+    """Tutte le metriche in formato testo Prometheus (exposition 0.0.4)."""
+    lines: list[str] = []
+
+    def metric(name: str, kind: str, help_text: str, samples: list[tuple[dict, float]]) -> None:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            lines.append(f"{name}{_labels(**labels) if labels else ''} {_fmt(value)}")
+
+    with _lock:
+        requests = sorted(_requests.items())
+        latency = sorted((key, list(h.buckets), h.total, h.count) for key, h in _latency.items())
+        in_flight = _in_flight
+        engines = [_engine_snapshot(name, stats) for name, stats in sorted(_engines.items())]
+        caches = sorted((name, hits, misses) for name, (hits, misses) in _cache.items())
+
+    metric("fitmanager_http_requests_total", "counter", "Richieste HTTP servite.", [
+        ({"method": m, "route": r, "status": s}, n) for (m, r, s), n in requests
+    ])
+    metric("fitmanager_http_requests_in_flight", "gauge", "Richieste HTTP in corso.", [({}, in_flight)])
+
+    lines.append("# HELP fitmanager_http_request_duration_seconds Latenza richieste HTTP.")
+    lines.append("# TYPE fitmanager_http_request_duration_seconds histogram")
+    for (method, route), buckets, total, count in latency:
+        cumulative = 0
+        for bound, n in zip((*LATENCY_BUCKETS, float("inf")), buckets):
+            cumulative += n
+            labels = _labels(method=method, route=route, le=_fmt(bound))
+            lines.append(f"fitmanager_http_request_duration_seconds_bucket{labels} {cumulative}")
+        labels = _labels(method=method, route=route)
+        lines.append(f"fitmanager_http_request_duration_seconds_sum{labels} {_fmt(total)}")
+        lines.append(f"fitmanager_http_request_duration_seconds_count{labels} {count}")
+
+    pools = pool_snapshots()
+    default = default_threadpool_snapshot()
+    if default is not None:
+        pools = [default, *pools]
+    metric("fitmanager_pool_workers", "gauge", "Thread disponibili per pool di esecuzione.", [
+        ({"pool": p["name"]}, p["workers"]) for p in pools
+    ])
+    metric("fitmanager_pool_running", "gauge", "Esecuzioni in corso per pool.", [
+        ({"pool": p["name"]}, p["running"]) for p in pools
+    ])
+    metric("fitmanager_pool_queued", "gauge", "Richieste in attesa per pool.", [
+        ({"pool": p["name"]}, p["queued"]) for p in pools
+    ])
+    metric("fitmanager_pool_rejected_total", "counter", "Richieste rifiutate (503) per coda piena.", [
+        ({"pool": p["name"]}, p["rejected"]) for p in pools if "rejected" in p
+    ])
+
+    for field, kind, help_text in (
+        ("checked_out", "gauge", "Connessioni DB in uso."),
+        ("peak_checked_out", "gauge", "Picco connessioni DB in uso."),
+        ("checkouts", "counter", "Checkout connessioni dal pool."),
+        ("connects", "counter", "Nuove connessioni DBAPI aperte."),
+        ("saturated_checkouts", "counter", "Checkout a pool saturo (richieste successive in attesa)."),
+        ("queries", "counter", "Query eseguite."),
+        ("slow_queries", "counter", f"Query oltre {SLOW_QUERY_MS} ms."),
+    ):
+        suffix = "_total" if kind == "counter" else ""
+        metric(f"fitmanager_db_{field}{suffix}", kind, help_text, [
+            ({"engine": e["engine"]}, e[field]) for e in engines if e[field] is not None
+        ])
+
+    metric("fitmanager_cache_hits_total", "counter", "Hit per cache applicativa.", [
+        ({"cache": name}, hits) for name, hits, _ in caches
+    ])
+    metric("fitmanager_cache_misses_total", "counter", "Miss per cache applicativa.", [
+        ({"cache": name}, misses) for name, _, misses in caches
+    ])
+
+    logs = log_pipeline_stats()
+    metric("fitmanager_log_queue_size", "gauge", "Record di log in attesa di scrittura.", [
+        ({"file": path}, s["queued"]) for path, s in sorted(logs.items())
+    ])
+    metric("fitmanager_log_dropped_total", "counter", "Record di log scartati a coda piena.", [
+        ({"file": path}, s["dropped"]) for path, s in sorted(logs.items())
+    ])
+
+    return "\n".join(lines) + "\n"
@@ -7,25 +7,33 @@ una safety map per-esercizio. Deterministico, zero Ollama.
 
 Flusso:
   1. extract_client_conditions(anamnesi_json) → set[condition_id]
+     (calcolato in scrittura e salvato in clienti_condizioni, vedi anamnesi_facts)
   2. build_safety_map(session, client_id, trainer_id) → SafetyMapResponse
+     build_safety_maps(session, client_ids, trainer_id) → {client_id: ...}
+     (esercizi_condizioni indicizzata una volta per versione catalogo,
+      letta dal registro in memoria api/services/catalog_registry.py)
 """
 
 import json
 import logging
-from typing import Optional
+import threading
+import weakref
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
 
 from fastapi import HTTPException
+from sqlalchemy.engine import Engine
 from sqlmodel import Session, select
 
 from api.models.client import Client
 from api.models.exercise import Exercise
-from api.models.medical_condition import ExerciseCondition, MedicalCondition
 from api.schemas.safety import (
     ExerciseSafetyEntry,
     MedicationFlag,
     SafetyConditionDetail,
     SafetyMapResponse,
 )
+from api.services.catalog_registry import CatalogSnapshot, get_catalog
 from api.services.condition_rules import (
     ANAMNESI_KEYWORD_RULES,
     MEDICATION_RULES,
@@ -40,6 +48,8 @@ logger = logging.getLogger(__name__)
 # (adattare ROM, grip, carico), mentre "caution" e' solo consapevolezza.
 _SEVERITY_ORDER = {"caution": 0, "modify": 1, "avoid": 2}
 
+_MEDICATION_NOTES = {flag_name: note for _, flag_name, note in MEDICATION_RULES}
+
 # Campi AnamnesiData con struttura {presente: bool, dettaglio: str|null}
 # Include sia v2 (questionario Chiara) che v1 (backward compat).
 # Se un campo non esiste nel JSON, .get() ritorna None → skippato.
@@ -81,6 +91,16 @@ _ARRAY_TEXT_FIELDS = [
 ]
 
 
+def _parse_anamnesi(anamnesi_json: Optional[str]) -> Optional[dict]:
+    if not anamnesi_json:
+        return None
+    try:
+        anamnesi = json.loads(anamnesi_json)
+    except (json.JSONDecodeError, TypeError):
+        return None
+    return anamnesi if isinstance(anamnesi, dict) else None
+
+
 def extract_client_conditions(anamnesi_json: Optional[str]) -> set[int]:
     """
     Estrae condition_id rilevanti dall'anamnesi di un cliente.
@@ -91,17 +111,14 @@ def extract_client_conditions(anamnesi_json: Optional[str]) -> set[int]:
 
     Returns: set di condition_id dalla tabella condizioni_mediche.
     """
-    if not anamnesi_json:
-        return set()
-
-    try:
-        anamnesi = json.loads(anamnesi_json)
-    except (json.JSONDecodeError, TypeError):
+    anamnesi = _parse_anamnesi(anamnesi_json)
+    if anamnesi is None:
         return set()
+    return conditions_from_anamnesi(anamnesi)
 
-    if not isinstance(anamnesi, dict):
-        return set()
 
+def conditions_from_anamnesi(anamnesi: dict) -> set[int]:
+    """Come extract_client_conditions, su anamnesi gia' decodificata."""
     condition_ids: set[int] = set()
 
     # ── Livello 1: Flag strutturali ──
@@ -152,17 +169,14 @@ def extract_medication_flags(anamnesi_json: Optional[str]) -> list[MedicationFla
     Scansiona il campo `farmaci.dettaglio` con keyword matching.
     Returns: lista di MedicationFlag (flag_name + nota clinica).
     """
-    if not anamnesi_json:
+    anamnesi = _parse_anamnesi(anamnesi_json)
+    if anamnesi is None:
         return []
+    return medication_flags_from_names(medication_flag_names(anamnesi))
 
-    try:
-        anamnesi = json.loads(anamnesi_json)
-    except (json.JSONDecodeError, TypeError):
-        return []
-
-    if not isinstance(anamnesi, dict):
-        return []
 
+def medication_flag_names(anamnesi: dict) -> list[str]:
+    """Nomi flag farmacologici (ordine MEDICATION_RULES) da anamnesi decodificata."""
     # Estrai testo farmaci — v1: farmaci.dettaglio, v2: farmaci_dettaglio
     dettaglio = None
 
@@ -182,114 +196,205 @@ def extract_medication_flags(anamnesi_json: Optional[str]) -> list[MedicationFla
     if not dettaglio:
         return []
 
-    flags: list[MedicationFlag] = []
-    for keywords, flag_name, clinical_note in MEDICATION_RULES:
-        if match_keywords(dettaglio, keywords):
-            flags.append(MedicationFlag(flag=flag_name, nota=clinical_note))
+    return [
+        flag_name
+        for keywords, flag_name, _ in MEDICATION_RULES
+        if match_keywords(dettaglio, keywords)
+    ]
 
-    return flags
 
+def medication_flags_from_names(flag_names: Iterable[str]) -> list[MedicationFlag]:
+    """Ricostruisce i MedicationFlag (con nota clinica) dai nomi salvati."""
+    return [
+        MedicationFlag(flag=name, nota=_MEDICATION_NOTES[name])
+        for name in flag_names
+        if name in _MEDICATION_NOTES
+    ]
 
-def build_safety_map(
-    session: Session,
-    catalog_session: Session,
-    client_id: int,
-    trainer_id: int,
-) -> SafetyMapResponse:
-    """
-    Costruisce la safety map per un cliente specifico.
 
-    Dual session: business (Client, Exercise) + catalog (MedicalCondition, ExerciseCondition).
-    Bouncer: client.trainer_id == trainer_id → 404.
-    Anti-N+1: 4 query (client, active_ids, conditions, exercise-conditions).
+# ════════════════════════════════════════════════════════════
+# INDICE CONDIZIONE → ESERCIZI (catalogo, cache per versione)
+# ════════════════════════════════════════════════════════════
+
+@dataclass
+class ConditionExerciseIndex:
     """
-    # ── Bouncer (business session) ──
-    client = session.get(Client, client_id)
-    if not client or client.trainer_id != trainer_id or client.deleted_at is not None:
-        raise HTTPException(404, "Cliente non trovato")
+    esercizi_condizioni caricata una volta: condition_id → mapping per esercizio.
 
-    client_nome = f"{client.nome} {client.cognome}"
+    `mappings[cond]` e' una lista (ec_id, exercise_id, SafetyConditionDetail) in
+    ordine di id; i dettagli sono immutabili e condivisi tra le safety map.
+    """
+    version: str
+    condition_names: dict[int, str] = field(default_factory=dict)
+    mappings: dict[int, list[tuple[int, int, SafetyConditionDetail]]] = field(default_factory=dict)
+
+
+# Per engine catalogo, confrontato con la versione del registro
+_condition_index_cache: "weakref.WeakKeyDictionary[Engine, ConditionExerciseIndex]" = weakref.WeakKeyDictionary()
+_condition_index_lock = threading.Lock()
+
+
+def _load_condition_index(catalog: CatalogSnapshot) -> ConditionExerciseIndex:
+    index = ConditionExerciseIndex(version=catalog.version)
+    conditions = catalog.conditions
+    index.condition_names = {cid: c.nome for cid, c in conditions.items()}
+
+    details: dict[tuple, SafetyConditionDetail] = {}
+    for ec in catalog.condition_links:
+        mc = conditions.get(ec.id_condizione)
+        if mc is None:
+            continue
+        key = (mc.id, ec.severita, ec.nota)
+        detail = details.get(key)
+        if detail is None:
+            try:
+                tags = json.loads(mc.body_tags) if mc.body_tags else []
+            except (json.JSONDecodeError, TypeError):
+                tags = []
+            detail = details[key] = SafetyConditionDetail(
+                id=mc.id,
+                nome=mc.nome,
+                severita=ec.severita,
+                nota=ec.nota,
+                categoria=mc.categoria,
+                body_tags=tags,
+            )
+        index.mappings.setdefault(mc.id, []).append((ec.id, ec.id_esercizio, detail))
+    return index
+
+
+def get_condition_index(catalog_session: Session) -> ConditionExerciseIndex:
+    """Indice condizione → esercizi dal registro catalogo, ricostruito solo se cambia versione."""
+    catalog = get_catalog(catalog_session)
+    key = catalog_session.get_bind()
+    with _condition_index_lock:
+        cached = _condition_index_cache.get(key)
+        if cached is not None and cached.version == catalog.version:
+            return cached
+    index = _load_condition_index(catalog)
+    with _condition_index_lock:
+        _condition_index_cache[key] = index
+    return index
+
+
+def _combine_entries(
+    index: ConditionExerciseIndex,
+    condition_ids: Iterable[int],
+    active_ids: set[int],
+) -> dict[int, ExerciseSafetyEntry]:
+    """Safety entries per esercizio attivo: dettagli in ordine catalogo, severity worst-case."""
+    rows = sorted(
+        (ec_id, ex_id, detail)
+        for cid in condition_ids
+        for ec_id, ex_id, detail in index.mappings.get(cid, ())
+        if ex_id in active_ids
+    )
 
-    # ── Estrai condizioni dal JSON anamnesi ──
-    condition_ids = extract_client_conditions(client.anamnesi_json)
+    entries: dict[int, ExerciseSafetyEntry] = {}
+    for _, ex_id, detail in rows:
+        entry = entries.get(ex_id)
+        if entry is None:
+            entries[ex_id] = ExerciseSafetyEntry(
+                exercise_id=ex_id,
+                severity=detail.severita,
+                conditions=[detail],
+            )
+        else:
+            entry.conditions.append(detail)
+            # Worst-case severity: avoid > modify > caution
+            if _SEVERITY_ORDER.get(detail.severita, 0) > _SEVERITY_ORDER.get(entry.severity, 0):
+                entry.severity = detail.severita
+    return entries
 
-    # ── Estrai flag farmacologici ──
-    medication_flags = extract_medication_flags(client.anamnesi_json)
 
-    if not condition_ids:
-        return SafetyMapResponse(
-            client_id=client_id,
-            client_nome=client_nome,
-            has_anamnesi=client.anamnesi_json is not None,
-            condition_count=0,
-            condition_names=[],
-            entries={},
-            medication_flags=medication_flags,
-        )
+# ════════════════════════════════════════════════════════════
+# SAFETY MAP (singola e batch)
+# ════════════════════════════════════════════════════════════
 
-    # ── Query: nomi condizioni per overview panel (catalog) ──
-    cond_stmt = select(MedicalCondition).where(MedicalCondition.id.in_(condition_ids))
-    conditions_list = catalog_session.exec(cond_stmt).all()
-    condition_names = sorted([c.nome for c in conditions_list])
+def build_safety_maps(
+    session: Session,
+    catalog_session: Session,
+    client_ids: Iterable[int],
+    trainer_id: int,
+) -> dict[int, SafetyMapResponse]:
+    """
+    Safety map per un insieme di clienti del trainer, in un numero fisso di query.
 
-    # ── Query: ID esercizi attivi (business — cross-DB split) ──
-    active_ids = session.exec(
-        select(Exercise.id).where(
-            Exercise.in_subset == True,  # noqa: E712
-            Exercise.deleted_at == None,  # noqa: E711
+    Query: clienti, fatti anamnesi (2), esercizi attivi. Le condizioni dei
+    clienti vengono combinate in memoria con l'indice condizione → esercizi
+    (costruito dal registro catalogo, nessuna query per versione).
+    Clienti inesistenti, eliminati o di altri trainer sono omessi dal risultato.
+    """
+    ids = list(dict.fromkeys(client_ids))
+    if not ids:
+        return {}
+
+    clients = session.exec(
+        select(Client).where(
+            Client.id.in_(ids),
+            Client.trainer_id == trainer_id,
+            Client.deleted_at == None,  # noqa: E711
         )
     ).all()
+    if not clients:
+        return {}
+
+    # Import locale: anamnesi_facts dipende dalle funzioni di estrazione qui sopra
+    from api.services.anamnesi_facts import load_anamnesi_facts
+
+    facts_by_client = load_anamnesi_facts(session, clients)
+
+    index: Optional[ConditionExerciseIndex] = None
+    active_ids: set[int] = set()
+    if any(f.condition_ids for f in facts_by_client.values()):
+        index = get_condition_index(catalog_session)
+        # ID esercizi attivi (business — cross-DB split)
+        active_ids = set(session.exec(
+            select(Exercise.id).where(
+                Exercise.in_subset == True,  # noqa: E712
+                Exercise.deleted_at == None,  # noqa: E711
+            )
+        ).all())
+
+    maps: dict[int, SafetyMapResponse] = {}
+    for client in clients:
+        facts = facts_by_client[client.id]
+        condition_ids = set(facts.condition_ids)
+        if index is None or not condition_ids:
+            condition_names: list[str] = []
+            entries: dict[int, ExerciseSafetyEntry] = {}
+        else:
+            condition_names = sorted(
+                index.condition_names[cid] for cid in condition_ids if cid in index.condition_names
+            )
+            entries = _combine_entries(index, condition_ids, active_ids)
 
-    # ── Query: exercise-condition mappings (catalog) ──
-    stmt = (
-        select(ExerciseCondition, MedicalCondition)
-        .join(MedicalCondition, ExerciseCondition.id_condizione == MedicalCondition.id)
-        .where(
-            ExerciseCondition.id_condizione.in_(condition_ids),
-            ExerciseCondition.id_esercizio.in_(active_ids),
+        maps[client.id] = SafetyMapResponse(
+            client_id=client.id,
+            client_nome=f"{client.nome} {client.cognome}",
+            has_anamnesi=client.anamnesi_json is not None,
+            condition_count=len(condition_ids),
+            condition_names=condition_names,
+            entries=entries,
+            medication_flags=medication_flags_from_names(facts.medication_flags),
         )
-    )
-    rows = catalog_session.exec(stmt).all()
+    return maps
 
-    # ── Aggregazione per exercise_id ──
-    entries: dict[int, ExerciseSafetyEntry] = {}
 
-    for ec, mc in rows:
-        ex_id = ec.id_esercizio
-        # Parse body_tags JSON
-        try:
-            tags = json.loads(mc.body_tags) if mc.body_tags else []
-        except (json.JSONDecodeError, TypeError):
-            tags = []
-
-        detail = SafetyConditionDetail(
-            id=mc.id,
-            nome=mc.nome,
-            severita=ec.severita,
-            nota=ec.nota,
-            categoria=mc.categoria,
-            body_tags=tags,
-        )
+def build_safety_map(
+    session: Session,
+    catalog_session: Session,
+    client_id: int,
+    trainer_id: int,
+) -> SafetyMapResponse:
+    """
+    Costruisce la safety map per un cliente specifico.
 
-        if ex_id not in entries:
-            entries[ex_id] = ExerciseSafetyEntry(
-                exercise_id=ex_id,
-                severity=ec.severita,
-                conditions=[detail],
-            )
-        else:
-            entry = entries[ex_id]
-            entry.conditions.append(detail)
-            # Worst-case severity: avoid > modify > caution
-            if _SEVERITY_ORDER.get(ec.severita, 0) > _SEVERITY_ORDER.get(entry.severity, 0):
-                entry.severity = ec.severita
-
-    return SafetyMapResponse(
-        client_id=client_id,
-        client_nome=client_nome,
-        has_anamnesi=client.anamnesi_json is not None,
-        condition_count=len(condition_ids),
-        condition_names=condition_names,
-        entries=entries,
-        medication_flags=medication_flags,
-    )
+    Dual session: business (Client, Exercise) + catalog (MedicalCondition, ExerciseCondition).
+    Bouncer: client.trainer_id == trainer_id → 404.
+    Delega a build_safety_maps (stesse query, indice catalogo condiviso).
+    """
+    safety_map = build_safety_maps(session, catalog_session, [client_id], trainer_id).get(client_id)
+    if safety_map is None:
+        raise HTTPException(404, "Cliente non trovato")
+    return safety_map
@@ -29,8 +29,8 @@ from api.schemas.workspace import (
     SessionPrepItem,
     SessionPrepResponse,
 )
+from api.services.anamnesi_facts import load_anamnesi_facts
 from api.services.clinical_readiness import compute_clinical_readiness_data
-from api.services.safety_engine import extract_client_conditions
 
 
 def _client_age(data_nascita: date | None, reference: date) -> int | None:
@@ -275,9 +275,9 @@ def build_session_prep(
     if client_ids:
         condition_ids_by_client: dict[int, set[int]] = {}
         all_condition_ids: set[int] = set()
+        facts_by_client = load_anamnesi_facts(session, [client_map[cid] for cid in client_ids])
         for cid in client_ids:
-            client_obj = client_map[cid]
-            cond_ids = extract_client_conditions(client_obj.anamnesi_json)
+            cond_ids = set(facts_by_client[cid].condition_ids)
             if cond_ids:
                 condition_ids_by_client[cid] = cond_ids
                 all_condition_ids.update(cond_ids)
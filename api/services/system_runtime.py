@@ -11,10 +11,12 @@ from api import __version__
 from api.config import DATA_DIR, DATABASE_URL
 from api.schemas.system import (
     HealthResponse,
+    RuntimeMetricsSummary,
     SupportSnapshotBackupItem,
     SupportSnapshotResponse,
 )
 from api.services.license import check_license
+from api.services.runtime_metrics import metrics_summary
 
 BACKUP_DIR = DATA_DIR / "backups"
 APP_STARTED_AT = datetime.now(timezone.utc)
@@ -123,4 +125,5 @@ def build_support_snapshot(
         public_base_url=get_public_base_url(),
         health=build_health_response(session, catalog_session),
         recent_backups=list_recent_backups(),
+        metrics=RuntimeMetricsSummary(**metrics_summary()),
     )
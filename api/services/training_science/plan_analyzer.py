@@ -47,6 +47,12 @@ from .balance_ratios import analyze_balance as _analyze_balance, BALANCE_RATIOS
 from .load_model import compute_tonnage, classify_intensity_zone
 
 
+# Versione della logica di analisi: entra nella chiave della cache persistente
+# (api/services/plan_analysis_cache.py). Incrementare ad ogni modifica che cambia
+# l'output di analyze_plan() a parita' di TemplatePiano.
+ANALYZER_VERSION = 1
+
+
 # ════════════════════════════════════════════════════════════
 # SOGLIA RECUPERO — Overlap muscolare tra sessioni consecutive
 # ════════════════════════════════════════════════════════════
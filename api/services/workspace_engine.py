@@ -1,13 +1,13 @@
 """Read-only orchestration layer for the operational workspace."""
 
 from collections import defaultdict
-from datetime import date, datetime, timedelta
+from datetime import date, datetime, timedelta, timezone
 import unicodedata
 
-from sqlalchemy import bindparam
-from sqlmodel import Session, select, text
+from sqlmodel import Session, or_, select
 
 from api.models.client import Client
+from api.models.client_activity import ClientActivity
 from api.models.contract import Contract
 from api.models.event import Event
 from api.models.recurring_expense import RecurringExpense
@@ -32,7 +32,7 @@ from api.schemas.workspace import (
 )
 from api.services.clinical_readiness import compute_clinical_readiness_data
 from api.services.recurring_expense_schedule import (
-    list_pending_recurring_expense_occurrences,
+    load_recurring_expense_calendar,
 )
 
 _SECTION_ORDER = ("now", "today", "upcoming_3d", "upcoming_7d", "waiting")
@@ -1202,30 +1202,9 @@ def _load_expiring_contract_rows(
         .order_by(Contract.data_scadenza.asc())
     ).all()
 
-    if not contracts:
-        return []
-
-    contract_ids = [contract.id for contract, _ in contracts if contract.id is not None]
-    credit_rows = session.execute(
-        text(
-            """
-            SELECT e.id_contratto, COUNT(*) as usati
-            FROM agenda e
-            WHERE e.id_contratto IN :contract_ids
-              AND e.categoria = 'PT'
-              AND e.stato != 'Cancellato'
-              AND e.deleted_at IS NULL
-            GROUP BY e.id_contratto
-            """
-        ).bindparams(bindparam("contract_ids", expanding=True)),
-        {"contract_ids": contract_ids},
-    ).fetchall()
-    credits_map = {row[0]: row[1] for row in credit_rows}
-
     items = []
     for contract, client in contracts:
-        contract_id = contract.id or 0
-        used = credits_map.get(contract_id, 0)
+        used = contract.crediti_usati or 0
         total = contract.crediti_totali or 0
         residual = max(total - used, 0)
         if residual <= 0:
@@ -1327,30 +1306,15 @@ def _build_recurring_expense_due_cases(
     session: Session,
     reference_date: date,
 ) -> list[OperationalCase]:
-    deadlines = {reference_date.month: reference_date.year}
-    future_deadline = reference_date + timedelta(days=7)
-    deadlines[future_deadline.month] = future_deadline.year
-
-    pending_occurrences: list = []
-    for mese, anno in deadlines.items():
-        pending_occurrences.extend(
-            list_pending_recurring_expense_occurrences(
-                trainer_id=trainer_id,
-                session=session,
-                anno=anno,
-                mese=mese,
-            )
-        )
-
-    cases: list[OperationalCase] = []
-    seen_keys: set[tuple[int, str]] = set()
     window_end = reference_date + timedelta(days=7)
+    schedule = load_recurring_expense_calendar(
+        trainer_id=trainer_id,
+        session=session,
+        months=[(reference_date.year, reference_date.month), (window_end.year, window_end.month)],
+    )
 
-    for occurrence in pending_occurrences:
-        identity = (occurrence.expense_id, occurrence.occurrence_key)
-        if identity in seen_keys:
-            continue
-        seen_keys.add(identity)
+    cases: list[OperationalCase] = []
+    for occurrence in schedule.pending():
         if occurrence.due_date > window_end:
             continue
 
@@ -1415,65 +1379,26 @@ def _build_reactivation_cases(
     reference_date: date,
 ) -> list[OperationalCase]:
     cutoff_14 = reference_date - timedelta(days=14)
-    cutoff_start = datetime.combine(cutoff_14, datetime.min.time())
-    inactive_clients = session.execute(
-        text(
-            """
-            SELECT cl.id, cl.nome, cl.cognome, cl.telefono, cl.email
-            FROM clienti cl
-            WHERE cl.trainer_id = :tid
-              AND cl.stato = 'Attivo'
-              AND cl.deleted_at IS NULL
-              AND NOT EXISTS (
-                  SELECT 1 FROM agenda e
-                  WHERE e.id_cliente = cl.id
-                    AND e.data_inizio >= :cutoff
-                    AND e.stato != 'Cancellato'
-                    AND e.deleted_at IS NULL
-              )
-            ORDER BY cl.nome, cl.cognome
-            """
-        ),
-        {"tid": trainer_id, "cutoff": cutoff_start.isoformat()},
-    ).fetchall()
-
-    if not inactive_clients:
-        return []
-
-    client_ids = [row[0] for row in inactive_clients]
-    last_events = session.execute(
-        text(
-            """
-            SELECT e.id_cliente, e.data_inizio, e.categoria
-            FROM agenda e
-            INNER JOIN (
-                SELECT id_cliente, MAX(data_inizio) as max_data
-                FROM agenda
-                WHERE id_cliente IN :client_ids
-                  AND stato != 'Cancellato'
-                  AND deleted_at IS NULL
-                GROUP BY id_cliente
-            ) latest ON e.id_cliente = latest.id_cliente AND e.data_inizio = latest.max_data
-            WHERE e.deleted_at IS NULL AND e.stato != 'Cancellato'
-            """
-        ).bindparams(bindparam("client_ids", expanding=True)),
-        {"client_ids": client_ids},
-    ).fetchall()
-    last_event_map = {row[0]: (row[1], row[2]) for row in last_events}
+    cutoff_start = datetime.combine(cutoff_14, datetime.min.time(), tzinfo=timezone.utc)
+    # Ultimo evento da clienti_attivita: nessuna riga = nessun evento
+    inactive_clients = session.exec(
+        select(Client.id, Client.nome, Client.cognome, ClientActivity.ultimo_evento_at)
+        .outerjoin(ClientActivity, ClientActivity.client_id == Client.id)
+        .where(
+            Client.trainer_id == trainer_id,
+            Client.stato == "Attivo",
+            Client.deleted_at == None,
+            or_(
+                ClientActivity.ultimo_evento_at == None,
+                ClientActivity.ultimo_evento_at < cutoff_start,
+            ),
+        )
+        .order_by(Client.nome, Client.cognome)
+    ).all()
 
     cases: list[OperationalCase] = []
-    for client_id, nome, cognome, _telefono, _email in inactive_clients:
-        last = last_event_map.get(client_id)
-        days_inactive = 14
-        if last:
-            raw = last[0]
-            if isinstance(raw, str):
-                last_dt = datetime.fromisoformat(raw.replace(" ", "T"))
-                days_inactive = (reference_date - last_dt.date()).days
-            elif isinstance(raw, datetime):
-                days_inactive = (reference_date - raw.date()).days
-            elif isinstance(raw, date):
-                days_inactive = (reference_date - raw).days
+    for client_id, nome, cognome, last_at in inactive_clients:
+        days_inactive = (reference_date - last_at.date()).days if last_at else 14
         client_label = _full_name(nome, cognome)
         severity = _reactivation_severity(days_inactive)
         bucket = _reactivation_bucket(days_inactive)
@@ -1955,19 +1880,7 @@ def _build_contract_renewal_case_detail(
         return _default_case_detail(case)
 
     contract, client = contract_row
-    used_credits = session.execute(
-        text(
-            """
-            SELECT COUNT(*)
-            FROM agenda e
-            WHERE e.id_contratto = :contract_id
-              AND e.categoria = 'PT'
-              AND e.stato != 'Cancellato'
-              AND e.deleted_at IS NULL
-            """
-        ),
-        {"contract_id": contract_id},
-    ).scalar_one()
+    used_credits = contract.crediti_usati or 0
     total_credits = contract.crediti_totali or 0
     residual_credits = max(total_credits - used_credits, 0)
     due_date = contract.data_scadenza
@@ -11,10 +11,11 @@ Designed around real trainer documents, not clean spreadsheets.
 import io
 import re
 from dataclasses import dataclass, field
-from difflib import SequenceMatcher
-from typing import List, Optional, Tuple
+from itertools import chain, islice
+from typing import Iterator, List, Optional, Tuple
 
 from core.exercise_archive import ExerciseArchive
+from core.exercise_name_index import get_exercise_name_index
 
 
 # ============================================================================
@@ -163,6 +164,20 @@ DAY_PATTERN = re.compile(
     re.IGNORECASE
 )
 
+# Metadata patterns (applied to lowercased text)
+WEEKS_PATTERN = re.compile(r'(\d+)\s*(?:settiman[ae]|weeks?)')
+WEEKS_ORDINAL_PATTERN = re.compile(r'(\d+)\s*[°^]\s*(?:sett)?')
+SESSIONS_PATTERN = re.compile(
+    r'(\d+)\s*(?:volte|sessioni|allenamenti|x)\s*(?:a\s*)?(?:settimana|week)'
+)
+
+# Rows scanned for a header row, and for content-based column detection
+HEADER_SCAN_ROWS = 5
+CONTENT_SCAN_ROWS = 6
+
+# Rows buffered before column detection when streaming: covers every scan window
+HEADER_LOOKAHEAD = max(HEADER_SCAN_ROWS, CONTENT_SCAN_ROWS)
+
 # Rest time pattern from text
 REST_PATTERN = re.compile(
     r"(\d+)['\"]?\s*(?:sec(?:ondi)?|s\b|\"|'')|"
@@ -172,20 +187,85 @@ REST_PATTERN = re.compile(
 )
 
 
+class _MetadataScanner:
+    """
+    Incremental metadata detection over a text stream.
+
+    Text is fed chunk by chunk (e.g. one spreadsheet row at a time); only a
+    short tail of the previous chunk is kept so keywords and patterns that
+    span a chunk boundary are still found. apply() gives the same result as
+    running the detection once on the whole concatenated text.
+    """
+
+    OVERLAP = 128
+
+    def __init__(self):
+        self.goals = set()
+        self.splits = set()
+        self.weeks: Optional[int] = None
+        self.weeks_ordinal: Optional[int] = None
+        self.sessions: Optional[int] = None
+        self._tail = ""
+
+    def feed(self, text: str) -> None:
+        text = text.lower()
+        if not text:
+            return
+        window = f"{self._tail} {text}" if self._tail else text
+
+        for goal, keywords in GOAL_KEYWORDS.items():
+            if goal not in self.goals and any(kw in window for kw in keywords):
+                self.goals.add(goal)
+        for split, keywords in SPLIT_KEYWORDS.items():
+            if split not in self.splits and any(kw in window for kw in keywords):
+                self.splits.add(split)
+
+        if self.weeks is None:
+            match = WEEKS_PATTERN.search(window)
+            if match:
+                self.weeks = int(match.group(1))
+        if self.weeks_ordinal is None:
+            match = WEEKS_ORDINAL_PATTERN.search(window)
+            if match:
+                self.weeks_ordinal = int(match.group(1))
+        if self.sessions is None:
+            match = SESSIONS_PATTERN.search(window)
+            if match:
+                self.sessions = int(match.group(1))
+
+        # Keep a tail starting at a word boundary (never inside a number)
+        tail = window[-self.OVERLAP:]
+        if len(window) > self.OVERLAP:
+            tail = tail.split(" ", 1)[1] if " " in tail else ""
+        self._tail = tail
+
+    def apply(self, metadata: "ParsedCardMetadata") -> None:
+        for goal in GOAL_KEYWORDS:
+            if goal in self.goals:
+                metadata.detected_goal = goal
+                break
+        for split in SPLIT_KEYWORDS:
+            if split in self.splits:
+                metadata.detected_split = split
+                break
+
+        if self.weeks is not None:
+            metadata.detected_weeks = self.weeks
+        # Also "4^" week pattern (Chiara's format)
+        if not metadata.detected_weeks and self.weeks_ordinal is not None:
+            metadata.detected_weeks = self.weeks_ordinal
+
+        if not metadata.detected_sessions_per_week and self.sessions is not None:
+            metadata.detected_sessions_per_week = self.sessions
+
+
 class CardParser:
     """Parses workout cards from Excel and Word files."""
 
-    def __init__(self):
-        self._exercise_names = {}
-        archive = ExerciseArchive()
-        for ex in archive.get_all():
-            name = ex.get('name', '').lower()
-            italian = (ex.get('italian_name') or '').lower()
-            ex_id = str(ex.get('id', ''))
-            if name:
-                self._exercise_names[name] = ex_id
-            if italian:
-                self._exercise_names[italian] = ex_id
+    def __init__(self, archive: Optional[ExerciseArchive] = None):
+        # Indice nomi condiviso, ricostruito solo se cambia il catalogo
+        self._name_index = get_exercise_name_index(archive)
+        self._exercise_names = self._name_index.names
 
     def parse_file(self, file_bytes: bytes, filename: str) -> ParsedCard:
         """Auto-detect file format and parse."""
@@ -208,39 +288,10 @@ class CardParser:
     # ================================================================
 
     def parse_excel(self, file_bytes: bytes, filename: str) -> ParsedCard:
-        """Parse an Excel workout card."""
-        import openpyxl
-
-        wb = openpyxl.load_workbook(io.BytesIO(file_bytes), data_only=True)
-        all_exercises: List[ParsedExercise] = []
+        """Parse an Excel workout card (streaming, see iter_excel_exercises)."""
+        metadata = ParsedCardMetadata()
         raw_lines: List[str] = []
-        metadata = ParsedCardMetadata(sheet_names=wb.sheetnames)
-
-        for sheet_name in wb.sheetnames:
-            ws = wb[sheet_name]
-            rows = list(ws.iter_rows(values_only=True))
-            if not rows:
-                continue
-
-            col_map = self._detect_columns(rows)
-            start_row = 1 if col_map["header_row"] == 0 else col_map["header_row"] + 1
-            for i, row in enumerate(rows[start_row:], start=start_row):
-                line = " | ".join(str(c) for c in row if c is not None)
-                raw_lines.append(line)
-
-                ex = self._parse_exercise_row(row, col_map, i)
-                if ex:
-                    all_exercises.append(ex)
-
-            all_text = " ".join(
-                str(cell) for row in rows for cell in row if cell is not None
-            ).lower()
-            self._detect_metadata(all_text, metadata)
-
-        for ex in all_exercises:
-            canonical_id, score = self._normalize_exercise_name(ex.name)
-            ex.canonical_id = canonical_id
-            ex.match_score = score
+        all_exercises = list(self.iter_excel_exercises(file_bytes, metadata, raw_lines))
 
         confidence = self._calculate_confidence(all_exercises)
 
@@ -251,6 +302,61 @@ class CardParser:
             parse_confidence=confidence,
         )
 
+    def iter_excel_exercises(
+        self,
+        file_bytes: bytes,
+        metadata: Optional[ParsedCardMetadata] = None,
+        raw_lines: Optional[List[str]] = None,
+    ) -> Iterator[ParsedExercise]:
+        """
+        Stream exercises from an Excel workout card, sheet by sheet.
+
+        The workbook is opened read-only and rows are scanned lazily: only
+        the first HEADER_LOOKAHEAD rows of a sheet are buffered for column
+        detection, metadata is detected incrementally, and each exercise is
+        yielded (already matched against the catalog) as soon as its row is
+        read. Memory stays bounded regardless of sheet size.
+
+        Args:
+            metadata: filled in place (sheet names, goal, split, weeks...)
+            raw_lines: if given, receives the text of every data row
+        """
+        import openpyxl
+
+        wb = openpyxl.load_workbook(io.BytesIO(file_bytes), read_only=True, data_only=True)
+        try:
+            if metadata is not None:
+                metadata.sheet_names = list(wb.sheetnames)
+
+            for sheet_name in wb.sheetnames:
+                rows = wb[sheet_name].iter_rows(values_only=True)
+                scanner = _MetadataScanner()
+
+                head = list(islice(rows, HEADER_LOOKAHEAD))
+                if not head:
+                    continue
+                col_map = self._detect_columns(head)
+                start_row = 1 if col_map["header_row"] == 0 else col_map["header_row"] + 1
+
+                for i, row in enumerate(chain(head, rows)):
+                    line = " ".join(str(c) for c in row if c is not None)
+                    scanner.feed(line)
+                    if i < start_row:
+                        continue
+
+                    if raw_lines is not None:
+                        raw_lines.append(" | ".join(str(c) for c in row if c is not None))
+
+                    ex = self._parse_exercise_row(row, col_map, i)
+                    if ex:
+                        ex.canonical_id, ex.match_score = self._normalize_exercise_name(ex.name)
+                        yield ex
+
+                if metadata is not None:
+                    scanner.apply(metadata)
+        finally:
+            wb.close()
+
     # ================================================================
     # WORD PARSING (redesigned for hybrid documents)
     # ================================================================
@@ -505,7 +611,7 @@ class CardParser:
             return False
 
         # Scan first rows for headers
-        for row_idx, row in enumerate(rows[:5]):
+        for row_idx, row in enumerate(rows[:HEADER_SCAN_ROWS]):
             if row is None:
                 continue
             for col_idx, cell in enumerate(row):
@@ -549,7 +655,7 @@ class CardParser:
             return col_map
 
         # Find the first column with text that looks like exercise names
-        for row in rows[:6]:
+        for row in rows[:CONTENT_SCAN_ROWS]:
             if row is None:
                 continue
             for col_idx, cell in enumerate(row):
@@ -878,7 +984,7 @@ class CardParser:
                     return True
             return False
 
-        for row_idx, row in enumerate(rows[:5]):
+        for row_idx, row in enumerate(rows[:HEADER_SCAN_ROWS]):
             if row is None:
                 continue
             for col_idx, cell in enumerate(row):
@@ -987,6 +1093,9 @@ class CardParser:
         """
         Match exercise name against exercise database using fuzzy matching.
 
+        Fuzzy scoring runs on the trigram shortlist of ExerciseNameIndex
+        instead of the whole catalog.
+
         Lower threshold (0.45) for Chiara's informal Italian names.
         Also tries partial matching for compound names like
         "AFFONDI POSTERIORI + ALZATE FRONTALI".
@@ -1011,20 +1120,18 @@ class CardParser:
             if part in self._exercise_names:
                 return self._exercise_names[part], 0.95
 
-            # Fuzzy match on part
-            for db_name, ex_id in self._exercise_names.items():
-                score = SequenceMatcher(None, part, db_name).ratio()
-                if score > best_score:
-                    best_score = score
-                    best_id = ex_id
-
-        # Also fuzzy match the full name
-        for db_name, ex_id in self._exercise_names.items():
-            score = SequenceMatcher(None, name_lower, db_name).ratio()
+            # Fuzzy match on part (shortlist da trigrammi)
+            ex_id, score = self._name_index.best_match(part)
             if score > best_score:
                 best_score = score
                 best_id = ex_id
 
+        # Also fuzzy match the full name
+        ex_id, score = self._name_index.best_match(name_lower)
+        if score > best_score:
+            best_score = score
+            best_id = ex_id
+
         # Lower threshold for real trainer documents
         if best_score >= 0.45:
             return best_id, round(best_score, 2)
@@ -1041,39 +1148,9 @@ class CardParser:
 
     def _detect_metadata(self, text: str, metadata: ParsedCardMetadata):
         """Detect goal, split, and other metadata from text."""
-        text_lower = text.lower()
-
-        # Detect goal
-        for goal, keywords in GOAL_KEYWORDS.items():
-            if any(kw in text_lower for kw in keywords):
-                metadata.detected_goal = goal
-                break
-
-        # Detect split
-        for split, keywords in SPLIT_KEYWORDS.items():
-            if any(kw in text_lower for kw in keywords):
-                metadata.detected_split = split
-                break
-
-        # Detect weeks
-        weeks_match = re.search(r'(\d+)\s*(?:settiman[ae]|weeks?)', text_lower)
-        if weeks_match:
-            metadata.detected_weeks = int(weeks_match.group(1))
-
-        # Also detect "4^" week pattern (Chiara's format)
-        if not metadata.detected_weeks:
-            weeks_match = re.search(r'(\d+)\s*[°^]\s*(?:sett)?', text_lower)
-            if weeks_match:
-                metadata.detected_weeks = int(weeks_match.group(1))
-
-        # Detect sessions per week
-        if not metadata.detected_sessions_per_week:
-            sessions_match = re.search(
-                r'(\d+)\s*(?:volte|sessioni|allenamenti|x)\s*(?:a\s*)?(?:settimana|week)',
-                text_lower
-            )
-            if sessions_match:
-                metadata.detected_sessions_per_week = int(sessions_match.group(1))
+        scanner = _MetadataScanner()
+        scanner.feed(text)
+        scanner.apply(metadata)
 
     def _calculate_confidence(self, exercises: List[ParsedExercise]) -> float:
         """Calculate overall parsing confidence."""
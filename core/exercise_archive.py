@@ -14,12 +14,13 @@ per compatibilita' con knowledge_chain.py.
 
 import sqlite3
 import json
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator
 from dataclasses import dataclass, field
 
 from core.error_handler import logger
-from core.repositories.base_repository import DB_FILE
+from core.repositories.base_repository import DB_FILE, connection_manager
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -67,68 +68,75 @@ class ExerciseArchive:
 
     def _ensure_table(self):
         """Crea tabella exercises se non esiste."""
-        conn = self._get_conn()
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS exercises (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL UNIQUE,
-                italian_name TEXT,
-                category TEXT NOT NULL,
-                movement_pattern TEXT NOT NULL,
-                primary_muscles TEXT NOT NULL,
-                secondary_muscles TEXT,
-                equipment TEXT NOT NULL,
-                difficulty TEXT NOT NULL,
-                rep_range_strength TEXT,
-                rep_range_hypertrophy TEXT,
-                rep_range_endurance TEXT,
-                recovery_hours INTEGER DEFAULT 48,
-                instructions TEXT,
-                contraindications TEXT,
-                is_custom INTEGER DEFAULT 0,
-                source TEXT DEFAULT 'builtin',
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        conn.commit()
-        conn.close()
-
-    def _get_conn(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        conn.execute("PRAGMA foreign_keys = ON")
-        return conn
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS exercises (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL UNIQUE,
+                    italian_name TEXT,
+                    category TEXT NOT NULL,
+                    movement_pattern TEXT NOT NULL,
+                    primary_muscles TEXT NOT NULL,
+                    secondary_muscles TEXT,
+                    equipment TEXT NOT NULL,
+                    difficulty TEXT NOT NULL,
+                    rep_range_strength TEXT,
+                    rep_range_hypertrophy TEXT,
+                    rep_range_endurance TEXT,
+                    recovery_hours INTEGER DEFAULT 48,
+                    instructions TEXT,
+                    contraindications TEXT,
+                    is_custom INTEGER DEFAULT 0,
+                    source TEXT DEFAULT 'builtin',
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            # Revisione dei nomi: ogni rinomina (anche da SQL esterno) cambia catalog_version()
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(exercises)")}
+            if "name_revision" not in columns:
+                conn.execute("ALTER TABLE exercises ADD COLUMN name_revision INTEGER NOT NULL DEFAULT 0")
+            conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS exercises_name_revision
+                AFTER UPDATE OF name, italian_name ON exercises
+                BEGIN
+                    UPDATE exercises SET name_revision = name_revision + 1 WHERE id = NEW.id;
+                END
+            """)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Connessione riusata del thread (stesso pool/PRAGMA dei repository)."""
+        with connection_manager.transaction(self.db_path) as conn:
+            yield conn
 
     # ─────────────── CRUD ───────────────
 
     def add_exercise(self, data: Dict[str, Any]) -> Optional[int]:
         """Aggiunge un esercizio. Ritorna ID o None se duplicato."""
         try:
-            conn = self._get_conn()
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO exercises (name, italian_name, category, movement_pattern,
-                    primary_muscles, secondary_muscles, equipment, difficulty,
-                    rep_range_strength, rep_range_hypertrophy, rep_range_endurance,
-                    recovery_hours, instructions, contraindications, is_custom, source)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                data['name'], data.get('italian_name'),
-                data['category'], data['movement_pattern'],
-                json.dumps(data['primary_muscles']),
-                json.dumps(data.get('secondary_muscles', [])),
-                data['equipment'], data['difficulty'],
-                data.get('rep_range_strength'), data.get('rep_range_hypertrophy'),
-                data.get('rep_range_endurance'),
-                data.get('recovery_hours', 48),
-                json.dumps(data.get('instructions')) if data.get('instructions') else None,
-                json.dumps(data.get('contraindications', [])),
-                1 if data.get('is_custom') else 0,
-                data.get('source', 'manual'),
-            ))
-            conn.commit()
-            exercise_id = cursor.lastrowid
-            conn.close()
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    INSERT INTO exercises (name, italian_name, category, movement_pattern,
+                        primary_muscles, secondary_muscles, equipment, difficulty,
+                        rep_range_strength, rep_range_hypertrophy, rep_range_endurance,
+                        recovery_hours, instructions, contraindications, is_custom, source)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    data['name'], data.get('italian_name'),
+                    data['category'], data['movement_pattern'],
+                    json.dumps(data['primary_muscles']),
+                    json.dumps(data.get('secondary_muscles', [])),
+                    data['equipment'], data['difficulty'],
+                    data.get('rep_range_strength'), data.get('rep_range_hypertrophy'),
+                    data.get('rep_range_endurance'),
+                    data.get('recovery_hours', 48),
+                    json.dumps(data.get('instructions')) if data.get('instructions') else None,
+                    json.dumps(data.get('contraindications', [])),
+                    1 if data.get('is_custom') else 0,
+                    data.get('source', 'manual'),
+                ))
+                exercise_id = cursor.lastrowid
             return exercise_id
         except sqlite3.IntegrityError:
             return None  # Nome duplicato
@@ -138,111 +146,121 @@ class ExerciseArchive:
 
     def get_exercise(self, exercise_id: int) -> Optional[Dict[str, Any]]:
         """Recupera un esercizio per ID."""
-        conn = self._get_conn()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM exercises WHERE id = ?", (exercise_id,))
-        row = cursor.fetchone()
-        conn.close()
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM exercises WHERE id = ?", (exercise_id,))
+            row = cursor.fetchone()
         return self._row_to_dict(row) if row else None
 
     def get_by_name(self, name: str) -> Optional[Dict[str, Any]]:
         """Recupera esercizio per nome (case-insensitive)."""
-        conn = self._get_conn()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM exercises WHERE LOWER(name) = LOWER(?)", (name,))
-        row = cursor.fetchone()
-        conn.close()
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM exercises WHERE LOWER(name) = LOWER(?)", (name,))
+            row = cursor.fetchone()
         return self._row_to_dict(row) if row else None
 
     def search(self, query: str, filters: Optional[Dict] = None) -> List[Dict[str, Any]]:
         """Cerca esercizi per nome/nome IT + filtri opzionali."""
-        conn = self._get_conn()
-        cursor = conn.cursor()
-
-        conditions = ["(LOWER(name) LIKE ? OR LOWER(italian_name) LIKE ?)"]
-        params: list = [f"%{query.lower()}%", f"%{query.lower()}%"]
-
-        if filters:
-            if filters.get('category'):
-                conditions.append("category = ?")
-                params.append(filters['category'])
-            if filters.get('movement_pattern'):
-                conditions.append("movement_pattern = ?")
-                params.append(filters['movement_pattern'])
-            if filters.get('equipment'):
-                conditions.append("equipment = ?")
-                params.append(filters['equipment'])
-            if filters.get('difficulty'):
-                conditions.append("difficulty = ?")
-                params.append(filters['difficulty'])
+        with self._connect() as conn:
+            cursor = conn.cursor()
 
-        sql = f"SELECT * FROM exercises WHERE {' AND '.join(conditions)} ORDER BY name"
-        cursor.execute(sql, params)
-        rows = cursor.fetchall()
-        conn.close()
+            conditions = ["(LOWER(name) LIKE ? OR LOWER(italian_name) LIKE ?)"]
+            params: list = [f"%{query.lower()}%", f"%{query.lower()}%"]
+
+            if filters:
+                if filters.get('category'):
+                    conditions.append("category = ?")
+                    params.append(filters['category'])
+                if filters.get('movement_pattern'):
+                    conditions.append("movement_pattern = ?")
+                    params.append(filters['movement_pattern'])
+                if filters.get('equipment'):
+                    conditions.append("equipment = ?")
+                    params.append(filters['equipment'])
+                if filters.get('difficulty'):
+                    conditions.append("difficulty = ?")
+                    params.append(filters['difficulty'])
+
+            sql = f"SELECT * FROM exercises WHERE {' AND '.join(conditions)} ORDER BY name"
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
         return [self._row_to_dict(r) for r in rows]
 
     def get_all(self, filters: Optional[Dict] = None) -> List[Dict[str, Any]]:
         """Ritorna tutti gli esercizi con filtri opzionali."""
-        conn = self._get_conn()
-        cursor = conn.cursor()
-
-        conditions = []
-        params: list = []
-
-        if filters:
-            if filters.get('category'):
-                conditions.append("category = ?")
-                params.append(filters['category'])
-            if filters.get('movement_pattern'):
-                conditions.append("movement_pattern = ?")
-                params.append(filters['movement_pattern'])
-            if filters.get('equipment'):
-                conditions.append("equipment = ?")
-                params.append(filters['equipment'])
-            if filters.get('difficulty'):
-                conditions.append("difficulty = ?")
-                params.append(filters['difficulty'])
-            if filters.get('primary_muscle'):
-                conditions.append("primary_muscles LIKE ?")
-                params.append(f'%"{filters["primary_muscle"]}"%')
-
-        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
-        cursor.execute(f"SELECT * FROM exercises{where} ORDER BY name", params)
-        rows = cursor.fetchall()
-        conn.close()
+        with self._connect() as conn:
+            cursor = conn.cursor()
+
+            conditions = []
+            params: list = []
+
+            if filters:
+                if filters.get('category'):
+                    conditions.append("category = ?")
+                    params.append(filters['category'])
+                if filters.get('movement_pattern'):
+                    conditions.append("movement_pattern = ?")
+                    params.append(filters['movement_pattern'])
+                if filters.get('equipment'):
+                    conditions.append("equipment = ?")
+                    params.append(filters['equipment'])
+                if filters.get('difficulty'):
+                    conditions.append("difficulty = ?")
+                    params.append(filters['difficulty'])
+                if filters.get('primary_muscle'):
+                    conditions.append("primary_muscles LIKE ?")
+                    params.append(f'%"{filters["primary_muscle"]}"%')
+
+            where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+            cursor.execute(f"SELECT * FROM exercises{where} ORDER BY name", params)
+            rows = cursor.fetchall()
         return [self._row_to_dict(r) for r in rows]
 
+    def get_name_entries(self) -> List[tuple]:
+        """(id, name, italian_name) di tutti gli esercizi, ordinati per nome."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, name, italian_name FROM exercises ORDER BY name"
+            ).fetchall()
+        return [tuple(r) for r in rows]
+
+    def catalog_version(self) -> tuple:
+        """Impronta economica del catalogo (conteggio, id massimo, rinomine) per invalidare cache."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT COUNT(*), COALESCE(MAX(id), 0), COALESCE(SUM(name_revision), 0) FROM exercises"
+            ).fetchone()
+        return (row[0], row[1], row[2])
+
     def count(self) -> int:
         """Conta esercizi totali."""
-        conn = self._get_conn()
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM exercises")
-        n = cursor.fetchone()[0]
-        conn.close()
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM exercises")
+            n = cursor.fetchone()[0]
         return n
 
     def get_by_pattern(self, pattern: str, equipment: Optional[List[str]] = None,
                        level: Optional[str] = None) -> List[Dict[str, Any]]:
         """Recupera esercizi per movement_pattern con filtri."""
-        conn = self._get_conn()
-        cursor = conn.cursor()
-
-        conditions = ["movement_pattern = ?"]
-        params: list = [pattern]
-
-        if equipment:
-            placeholders = ','.join('?' * len(equipment))
-            conditions.append(f"equipment IN ({placeholders})")
-            params.extend(equipment)
-        if level:
-            conditions.append("difficulty = ?")
-            params.append(level)
-
-        sql = f"SELECT * FROM exercises WHERE {' AND '.join(conditions)} ORDER BY name"
-        cursor.execute(sql, params)
-        rows = cursor.fetchall()
-        conn.close()
+        with self._connect() as conn:
+            cursor = conn.cursor()
+
+            conditions = ["movement_pattern = ?"]
+            params: list = [pattern]
+
+            if equipment:
+                placeholders = ','.join('?' * len(equipment))
+                conditions.append(f"equipment IN ({placeholders})")
+                params.extend(equipment)
+            if level:
+                conditions.append("difficulty = ?")
+                params.append(level)
+
+            sql = f"SELECT * FROM exercises WHERE {' AND '.join(conditions)} ORDER BY name"
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
         return [self._row_to_dict(r) for r in rows]
 
     # ─────────────── SELEZIONE CON PUNTEGGIO ───────────────
@@ -271,15 +289,14 @@ class ExerciseArchive:
         compatible = COMPATIBLE_PATTERNS.get(slot_pattern, [])
         all_patterns = [slot_pattern] + compatible
 
-        conn = self._get_conn()
-        cursor = conn.cursor()
-        placeholders = ','.join('?' * len(all_patterns))
-        cursor.execute(
-            f"SELECT * FROM exercises WHERE movement_pattern IN ({placeholders})",
-            all_patterns
-        )
-        rows = cursor.fetchall()
-        conn.close()
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            placeholders = ','.join('?' * len(all_patterns))
+            cursor.execute(
+                f"SELECT * FROM exercises WHERE movement_pattern IN ({placeholders})",
+                all_patterns
+            )
+            rows = cursor.fetchall()
 
         candidates = [self._row_to_dict(r) for r in rows]
 
@@ -385,7 +402,7 @@ class ExerciseArchive:
 
     def _row_to_dict(self, row: sqlite3.Row) -> Dict[str, Any]:
         """Converte Row in dict con deserializzazione JSON."""
-        d = {key: row[key] for key in row.keys()}
+        d = {key: row[key] for key in row.keys() if key != 'name_revision'}
         # Deserializza campi JSON
         for field_name in ('primary_muscles', 'secondary_muscles', 'contraindications'):
             if d.get(field_name):
@@ -407,43 +424,40 @@ class ExerciseArchive:
 
     def _seed_if_empty(self):
         """Popola con 300+ esercizi se tabella vuota."""
-        conn = self._get_conn()
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM exercises")
-        count = cursor.fetchone()[0]
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM exercises")
+            count = cursor.fetchone()[0]
 
-        if count > 0:
-            conn.close()
-            return
+            if count > 0:
+                return
 
-        logger.info("ExerciseArchive: seeding 300+ exercises...")
-        exercises = _get_seed_exercises()
+            logger.info("ExerciseArchive: seeding 300+ exercises...")
+            exercises = _get_seed_exercises()
 
-        for ex in exercises:
-            try:
-                cursor.execute("""
-                    INSERT OR IGNORE INTO exercises
-                        (name, italian_name, category, movement_pattern,
-                         primary_muscles, secondary_muscles, equipment, difficulty,
-                         rep_range_strength, rep_range_hypertrophy, rep_range_endurance,
-                         recovery_hours, instructions, contraindications, is_custom, source)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0, 'builtin')
-                """, (
-                    ex['name'], ex.get('it'),
-                    ex['cat'], ex['pat'],
-                    json.dumps(ex['pm']), json.dumps(ex.get('sm', [])),
-                    ex['eq'], ex['diff'],
-                    ex.get('str'), ex.get('hyp'), ex.get('end'),
-                    ex.get('rec', 48),
-                    json.dumps(ex['instr']) if ex.get('instr') else None,
-                    json.dumps(ex.get('contra', [])),
-                ))
-            except Exception as e:
-                logger.warning(f"Seed skip '{ex['name']}': {e}")
-
-        conn.commit()
-        final_count = cursor.execute("SELECT COUNT(*) FROM exercises").fetchone()[0]
-        conn.close()
+            for ex in exercises:
+                try:
+                    cursor.execute("""
+                        INSERT OR IGNORE INTO exercises
+                            (name, italian_name, category, movement_pattern,
+                             primary_muscles, secondary_muscles, equipment, difficulty,
+                             rep_range_strength, rep_range_hypertrophy, rep_range_endurance,
+                             recovery_hours, instructions, contraindications, is_custom, source)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0, 'builtin')
+                    """, (
+                        ex['name'], ex.get('it'),
+                        ex['cat'], ex['pat'],
+                        json.dumps(ex['pm']), json.dumps(ex.get('sm', [])),
+                        ex['eq'], ex['diff'],
+                        ex.get('str'), ex.get('hyp'), ex.get('end'),
+                        ex.get('rec', 48),
+                        json.dumps(ex['instr']) if ex.get('instr') else None,
+                        json.dumps(ex.get('contra', [])),
+                    ))
+                except Exception as e:
+                    logger.warning(f"Seed skip '{ex['name']}': {e}")
+
+            final_count = cursor.execute("SELECT COUNT(*) FROM exercises").fetchone()[0]
         logger.info(f"ExerciseArchive: seeded {final_count} exercises")
 
 
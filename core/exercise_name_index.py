@@ -0,0 +1,204 @@
+"""
+ExerciseNameIndex - Indice nomi esercizi per matching fuzzy veloce.
+
+Costruito una volta per versione del catalogo (ExerciseArchive.catalog_version)
+e condiviso tra le istanze di CardParser e la ricerca esercizi:
+
+- nomi normalizzati (minuscolo, senza accenti, solo alfanumerici) → token
+- postings per trigrammi: trigramma → indici dei nomi che lo contengono
+- shortlist candidati: i nomi con piu' trigrammi in comune (coefficiente di
+  Dice), valutati per primi con SequenceMatcher.ratio()
+
+best_match() e' esatto: stesso (id, punteggio) del confronto esaustivo con
+SequenceMatcher(None, query, nome).ratio(). La shortlist fissa subito un
+punteggio alto; il resto del catalogo viene scartato con i limiti superiori
+economici (real_quick_ratio, quick_ratio) e ratio() si calcola solo sui nomi
+che potrebbero ancora batterlo. search() classifica la sola shortlist.
+"""
+
+import re
+import threading
+import unicodedata
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from core.exercise_archive import ExerciseArchive
+
+# Candidati valutati con SequenceMatcher per ogni query
+SHORTLIST_SIZE = 40
+
+# Query gia' risolte tenute in memoria per indice (le schede ripetono i nomi)
+MATCH_MEMO_SIZE = 4096
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_name(text: str) -> str:
+    """Minuscolo, senza accenti, separatori ridotti a singolo spazio."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    ascii_only = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return _NON_ALNUM.sub(" ", ascii_only).strip()
+
+
+def name_trigrams(text: str) -> set:
+    """Trigrammi dei token normalizzati, con padding ai bordi di ogni token."""
+    grams = set()
+    for token in normalize_name(text).split():
+        padded = f"  {token} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class ExerciseNameIndex:
+    """Nomi esercizio (inglese + italiano) → id, con postings per trigrammi."""
+
+    def __init__(self, entries: Iterable[Tuple[str, str]]):
+        """
+        Args:
+            entries: coppie (nome, exercise_id) nell'ordine di priorita';
+                a parita' di punteggio vince il nome inserito per primo.
+        """
+        self.names: Dict[str, str] = {}
+        for name, ex_id in entries:
+            key = name.lower()
+            if key:
+                self.names[key] = ex_id
+
+        self._keys: List[str] = list(self.names)
+        self._gram_counts: List[int] = []
+        self._char_counts: List[Counter] = [Counter(key) for key in self._keys]
+        self._postings: Dict[str, List[int]] = {}
+        self._memo: Dict[str, Tuple[Optional[str], float]] = {}
+        for idx, key in enumerate(self._keys):
+            grams = name_trigrams(key)
+            self._gram_counts.append(len(grams))
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(idx)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def exact(self, name: str) -> Optional[str]:
+        """Id per nome esatto (case-insensitive), None se assente."""
+        return self.names.get(name.lower().strip())
+
+    def candidates(self, query: str, limit: int = SHORTLIST_SIZE) -> List[int]:
+        """Indici dei nomi con piu' trigrammi in comune con la query (Dice decrescente)."""
+        grams = name_trigrams(query)
+        if not grams:
+            return []
+        shared: Counter = Counter()
+        for gram in grams:
+            for idx in self._postings.get(gram, ()):
+                shared[idx] += 1
+        n = len(grams)
+        ranked = sorted(
+            shared,
+            key=lambda idx: (-2 * shared[idx] / (n + self._gram_counts[idx]), idx),
+        )
+        return ranked[:limit]
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, str, float]]:
+        """
+        Nomi piu' simili alla query.
+
+        Returns:
+            Lista (nome, exercise_id, score) per score decrescente, dove score e'
+            SequenceMatcher.ratio() sul nome minuscolo.
+        """
+        query_lower = query.lower().strip()
+        if not query_lower:
+            return []
+        scored = []
+        for idx in self.candidates(query_lower):
+            key = self._keys[idx]
+            scored.append((SequenceMatcher(None, query_lower, key).ratio(), idx, key))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [(key, self.names[key], score) for score, _, key in scored[:limit]]
+
+    @staticmethod
+    def _beaten(score: float, idx: int, best_idx: Optional[int], best_score: float) -> bool:
+        """True se score (o un suo limite superiore) non batte il migliore: a parita' vince l'indice minore."""
+        return score < best_score or (score == best_score and best_idx is not None and idx > best_idx)
+
+    def best_match(self, query: str) -> Tuple[Optional[str], float]:
+        """
+        (exercise_id, score) del nome piu' simile; (None, 0.0) se nessun nome ha score > 0.
+
+        Stesso risultato del confronto esaustivo (a parita' vince il nome
+        inserito per primo): shortlist prima, poi il resto del catalogo, saltando
+        i nomi il cui limite superiore non puo' battere il migliore trovato.
+        """
+        query_lower = query.lower().strip()
+        memo = self._memo.get(query_lower)
+        if memo is not None:
+            return memo
+
+        shortlist = self.candidates(query_lower)
+        shortlisted = set(shortlist)
+        order = shortlist + [idx for idx in range(len(self._keys)) if idx not in shortlisted]
+
+        # Limiti superiori di ratio() (stesse formule di real_quick_ratio / quick_ratio),
+        # dai conteggi caratteri precalcolati: SequenceMatcher solo per chi li supera
+        query_chars = Counter(query_lower)
+        best_idx, best_score = None, 0.0
+        matcher = SequenceMatcher(None, query_lower, "")
+        for idx in order:
+            key = self._keys[idx]
+            total = len(query_lower) + len(key)
+            if self._beaten(2.0 * min(len(query_lower), len(key)) / total, idx, best_idx, best_score):
+                continue
+            chars = self._char_counts[idx]
+            shared = sum(min(n, chars[c]) for c, n in query_chars.items())
+            if self._beaten(2.0 * shared / total, idx, best_idx, best_score):
+                continue
+            matcher.set_seq2(key)
+            score = matcher.ratio()
+            if not self._beaten(score, idx, best_idx, best_score):
+                best_idx, best_score = idx, score
+
+        if best_idx is None or best_score == 0.0:
+            result = (None, 0.0)
+        else:
+            result = (self.names[self._keys[best_idx]], best_score)
+        if len(self._memo) >= MATCH_MEMO_SIZE:
+            self._memo.clear()
+        self._memo[query_lower] = result
+        return result
+
+
+# ============================================================================
+# CACHE PER VERSIONE CATALOGO
+# ============================================================================
+
+_cache: Dict[str, Tuple[Tuple[int, int, int], ExerciseNameIndex]] = {}
+_cache_lock = threading.Lock()
+
+
+def build_name_index(archive: ExerciseArchive) -> ExerciseNameIndex:
+    """Costruisce l'indice dai nomi del catalogo (inglese, poi italiano)."""
+    entries = []
+    for ex_id, name, italian in archive.get_name_entries():
+        entries.append((name or "", str(ex_id)))
+        entries.append((italian or "", str(ex_id)))
+    return ExerciseNameIndex(entries)
+
+
+def get_exercise_name_index(archive: Optional[ExerciseArchive] = None) -> ExerciseNameIndex:
+    """
+    Indice condiviso per il catalogo dell'archivio.
+
+    Ricostruito solo quando cambia catalog_version() (esercizi aggiunti, rimossi o rinominati).
+    """
+    archive = archive or ExerciseArchive()
+    key = str(archive.db_path)
+    version = archive.catalog_version()
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+    index = build_name_index(archive)
+    with _cache_lock:
+        _cache[key] = (version, index)
+    return index
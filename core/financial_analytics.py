@@ -13,8 +13,9 @@ Funzionalità:
 """
 
 from __future__ import annotations
-from typing import Dict, List, Optional, Tuple
-from datetime import date, datetime, timedelta
+from typing import Dict, Optional
+from datetime import date, datetime
+from pathlib import Path
 from dateutil.relativedelta import relativedelta
 import pandas as pd
 import numpy as np
@@ -23,6 +24,224 @@ from core.repositories.base_repository import BaseRepository
 from core.constants import MovementType, RateStatus
 
 
+# Aggregato cliente × contratti: una riga per cliente, una sola query.
+# MIN/MAX ignorano i NULL di data_vendita come il vecchio calcolo per-cliente.
+_CUSTOMER_SQL = """
+    SELECT
+        c.id AS id_cliente,
+        c.nome,
+        c.cognome,
+        c.stato,
+        c.data_creazione,
+        COUNT(k.id) AS num_contracts,
+        COALESCE(SUM(k.totale_versato), 0) AS revenue_total,
+        MIN(k.data_vendita) AS first_purchase,
+        MAX(k.data_vendita) AS last_purchase,
+        COALESCE(SUM(k.crediti_totali), 0) AS crediti_totali,
+        COALESCE(SUM(k.crediti_usati), 0) AS crediti_usati
+    FROM clienti c
+    LEFT JOIN contratti k ON k.id_cliente = c.id
+    {where}
+    GROUP BY c.id
+    ORDER BY c.data_creazione, c.id
+"""
+
+
+def _to_datetime(values: pd.Series) -> pd.Series:
+    """Date ISO (anche con orario) → datetime64; NULL/non validi → NaT."""
+    return pd.to_datetime(values.astype("string").str[:10], format="%Y-%m-%d", errors="coerce")
+
+
+def _month_diff(later: date, earlier: pd.Series) -> pd.Series:
+    """Differenza in mesi di calendario (later - earlier), vettoriale."""
+    return (later.year - earlier.dt.year) * 12 + (later.month - earlier.dt.month)
+
+
+def _round2(values) -> list[float]:
+    """round(x, 2) di Python elemento per elemento (np.round differisce sui casi .xx5)."""
+    return [round(float(v), 2) for v in values]
+
+
+def _compute_ltv_columns(frame: pd.DataFrame, as_of_date: date) -> pd.DataFrame:
+    """Aggiunge le colonne LTV (stesse formule di calculate_customer_ltv) al frame clienti."""
+    first = _to_datetime(frame["first_purchase"])
+    active_months = _month_diff(as_of_date, first).fillna(1).clip(lower=1).astype(int)
+
+    revenue = frame["revenue_total"].astype(float)
+    num_contracts = frame["num_contracts"].astype(int)
+    crediti_totali = frame["crediti_totali"].astype(float)
+    crediti_usati = frame["crediti_usati"].astype(float)
+
+    ltv_monthly = revenue / active_months
+    retention = np.where(
+        crediti_totali > 0,
+        crediti_usati / crediti_totali.where(crediti_totali > 0, 1.0) * 100,
+        0.0,
+    )
+    avg_contract = np.where(
+        num_contracts > 0, revenue / num_contracts.where(num_contracts > 0, 1), 0.0,
+    )
+    predicted = np.where(frame["stato"] == "Attivo", ltv_monthly * 12, 0.0)
+
+    out = frame.copy()
+    out["created"] = _to_datetime(frame["data_creazione"])
+    out["active_months"] = np.where(num_contracts > 0, active_months, 0)
+    out["revenue_total"] = _round2(revenue.to_numpy())
+    out["ltv_total"] = out["revenue_total"]
+    out["ltv_monthly"] = _round2(np.where(num_contracts > 0, ltv_monthly, 0.0))
+    out["avg_contract_value"] = _round2(avg_contract)
+    out["retention_rate"] = _round2(retention)
+    out["predicted_ltv_12m"] = _round2(np.where(num_contracts > 0, predicted, 0.0))
+    out["cliente_nome"] = frame["nome"].fillna("") + " " + frame["cognome"].fillna("")
+    return out
+
+
+def _ltv_dict(row: pd.Series) -> Dict:
+    """Riga del frame LTV → dict nel formato storico di calculate_customer_ltv."""
+    has_contracts = int(row["num_contracts"]) > 0
+    return {
+        'ltv_total': float(row["ltv_total"]),
+        'ltv_monthly': float(row["ltv_monthly"]),
+        'revenue_total': float(row["revenue_total"]),
+        'num_contracts': int(row["num_contracts"]),
+        'active_months': int(row["active_months"]),
+        'avg_contract_value': float(row["avg_contract_value"]),
+        'retention_rate': float(row["retention_rate"]),
+        'first_purchase': row["first_purchase"] if has_contracts and pd.notna(row["first_purchase"]) else None,
+        'last_purchase': row["last_purchase"] if has_contracts and pd.notna(row["last_purchase"]) else None,
+        'status': row["stato"],
+        'predicted_ltv_12m': float(row["predicted_ltv_12m"]),
+        'cliente_nome': row["cliente_nome"],
+    }
+
+
+def _cohort_keys(created: pd.Series, cohort_by: str) -> pd.Series:
+    if cohort_by == 'month':
+        return created.dt.strftime('%Y-%m')
+    if cohort_by == 'quarter':
+        return created.dt.year.astype(str) + "-Q" + created.dt.quarter.astype(str)
+    return created.dt.year.astype(str)
+
+
+def _cohort_table(frame: pd.DataFrame, cohort_by: str) -> pd.DataFrame:
+    """Group-by per coorte sul frame LTV (clienti gia' filtrati per periodo)."""
+    frame = frame[frame["created"].notna()]
+    if frame.empty:
+        return pd.DataFrame()
+
+    grouped = frame.groupby(_cohort_keys(frame["created"], cohort_by), sort=True).agg(
+        num_customers=("id_cliente", "size"),
+        avg_ltv=("ltv_total", "mean"),
+        avg_retention=("retention_rate", "mean"),
+        total_revenue=("revenue_total", "sum"),
+    )
+    grouped = grouped.round({"avg_ltv": 2, "avg_retention": 2, "total_revenue": 2})
+    return grouped.rename_axis("cohort").reset_index()
+
+
+def _churn_from_frame(
+    frame: pd.DataFrame,
+    data_inizio: date,
+    data_fine: date,
+) -> Dict:
+    """Churn del periodo dal frame LTV di tutti i clienti (nessuna query aggiuntiva)."""
+    created = frame["created"]
+    start = pd.Timestamp(data_inizio)
+    end = pd.Timestamp(data_fine)
+    attivo = frame["stato"] == "Attivo"
+
+    customers_start = int((attivo & (created < start)).sum())
+    customers_end = int((attivo & (created <= end)).sum())
+    customers_gained = int(((created >= start) & (created <= end)).sum())
+    customers_lost = (customers_start + customers_gained) - customers_end
+
+    churn_rate = (customers_lost / customers_start * 100) if customers_start > 0 else 0
+    retention_rate = 100 - churn_rate
+
+    # Revenue mensile persa: clienti gia' presenti a inizio periodo, ora non attivi
+    revenue_churn = float(frame.loc[~attivo & (created < start), "ltv_monthly"].sum())
+
+    return {
+        'churn_rate': round(churn_rate, 2),
+        'retention_rate': round(retention_rate, 2),
+        'customers_start': customers_start,
+        'customers_end': customers_end,
+        'customers_lost': customers_lost,
+        'customers_gained': customers_gained,
+        'net_growth': customers_gained - customers_lost,
+        'revenue_churn': round(revenue_churn, 2)
+    }
+
+
+def _portfolio_from_frame(frame: pd.DataFrame) -> Dict:
+    """LTV di portfolio (clienti attivi) dal frame LTV."""
+    active = frame[frame["stato"] == "Attivo"]
+    if active.empty:
+        return {
+            'avg_ltv_per_customer': 0.0,
+            'median_ltv': 0.0,
+            'total_ltv_portfolio': 0.0,
+            'num_customers': 0,
+            'ltv_distribution': []
+        }
+
+    ltv = active["ltv_total"].to_numpy(dtype=float)
+    distribution = (
+        active[["id_cliente", "ltv_total", "ltv_monthly", "cliente_nome"]]
+        .rename(columns={"ltv_total": "ltv"})
+        .sort_values("ltv", ascending=False, kind="stable")
+    )
+    return {
+        'avg_ltv_per_customer': round(float(np.mean(ltv)), 2),
+        'median_ltv': round(float(np.median(ltv)), 2),
+        'total_ltv_portfolio': round(float(ltv.sum()), 2),
+        'num_customers': len(active),
+        'ltv_distribution': [
+            {
+                'id_cliente': int(r.id_cliente),
+                'ltv': float(r.ltv),
+                'ltv_monthly': float(r.ltv_monthly),
+                'cliente_nome': r.cliente_nome,
+            }
+            for r in distribution.itertuples(index=False)
+        ]
+    }
+
+
+def _mrr_from_contracts(contratti: pd.DataFrame) -> Dict:
+    """MRR/ARR vettoriale: totale_versato / durata contratto in mesi (min 1)."""
+    if contratti.empty:
+        return {
+            'mrr': 0.0,
+            'arr': 0.0,
+            'active_subscriptions': 0,
+            'avg_revenue_per_customer': 0.0,
+            'mrr_growth_rate': 0.0
+        }
+
+    inizio = _to_datetime(contratti["data_inizio"])
+    scadenza = _to_datetime(contratti["data_scadenza"])
+    durata_mesi = (
+        (scadenza.dt.year - inizio.dt.year) * 12 + (scadenza.dt.month - inizio.dt.month)
+    ).fillna(1).clip(lower=1)
+    mrr_total = float((contratti["totale_versato"].fillna(0).astype(float) / durata_mesi).sum())
+
+    active_subscriptions = len(contratti)
+    avg_revenue_per_customer = mrr_total / active_subscriptions
+
+    # MRR Growth Rate (vs mese precedente)
+    # TODO: Implementare calcolo storico
+    mrr_growth_rate = 0.0  # Placeholder
+
+    return {
+        'mrr': round(mrr_total, 2),
+        'arr': round(mrr_total * 12, 2),
+        'active_subscriptions': active_subscriptions,
+        'avg_revenue_per_customer': round(avg_revenue_per_customer, 2),
+        'mrr_growth_rate': round(mrr_growth_rate, 2)
+    }
+
+
 class FinancialAnalytics(BaseRepository):
     """
     Advanced Financial Analytics Engine
@@ -36,10 +255,41 @@ class FinancialAnalytics(BaseRepository):
 
     Eredita da BaseRepository per accesso diretto al DB
     senza dipendere dal legacy CrmDBManager.
+
+    Set-based: ogni metrica parte da un unico caricamento aggregato
+    clienti × contratti (_load_customer_frame) e calcola con group-by
+    pandas/NumPy, senza query per-cliente.
     """
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, db_path: Optional[Path] = None):
+        super().__init__(db_path)
+
+    # ══════════════════════════════════════════════════════════
+    # 0. CARICAMENTO SET-BASED
+    # ══════════════════════════════════════════════════════════
+
+    def _load_customer_frame(
+        self,
+        conn,
+        as_of_date: date,
+        where: str = "",
+        params: tuple = (),
+    ) -> pd.DataFrame:
+        """Frame LTV (una riga per cliente) con una sola query aggregata."""
+        frame = pd.read_sql_query(_CUSTOMER_SQL.format(where=where), conn, params=params)
+        return _compute_ltv_columns(frame, as_of_date)
+
+    def _load_active_contracts(self, conn, as_of_date: date) -> pd.DataFrame:
+        return pd.read_sql_query("""
+            SELECT
+                id, id_cliente, prezzo_totale, totale_versato,
+                data_inizio, data_scadenza,
+                crediti_totali, crediti_usati
+            FROM contratti
+            WHERE stato_pagamento != ?
+              AND DATE(data_scadenza) >= ?
+              AND chiuso = 0
+        """, conn, params=(RateStatus.PENDENTE.value, as_of_date.isoformat()))
 
     # ══════════════════════════════════════════════════════════
     # 1. LIFETIME VALUE (LTV) ANALYSIS
@@ -79,89 +329,13 @@ class FinancialAnalytics(BaseRepository):
             as_of_date = date.today()
 
         with self._connect() as conn:
-            # Recupera dati cliente
-            cliente = conn.execute("""
-                SELECT nome, cognome, stato, data_creazione
-                FROM clienti
-                WHERE id = ?
-            """, (id_cliente,)).fetchone()
-
-            if not cliente:
-                return None
-
-            # Recupera tutti i contratti del cliente
-            contratti = conn.execute("""
-                SELECT
-                    id, data_vendita, data_inizio, data_scadenza,
-                    prezzo_totale, totale_versato, crediti_totali,
-                    crediti_usati, stato_pagamento
-                FROM contratti
-                WHERE id_cliente = ?
-                ORDER BY data_vendita
-            """, (id_cliente,)).fetchall()
-
-            if not contratti:
-                return {
-                    'ltv_total': 0.0,
-                    'ltv_monthly': 0.0,
-                    'revenue_total': 0.0,
-                    'num_contracts': 0,
-                    'active_months': 0,
-                    'avg_contract_value': 0.0,
-                    'retention_rate': 0.0,
-                    'first_purchase': None,
-                    'last_purchase': None,
-                    'status': cliente['stato'],
-                    'predicted_ltv_12m': 0.0
-                }
-
-            # Calcoli base
-            num_contracts = len(contratti)
-            revenue_total = sum(c['totale_versato'] for c in contratti)
-            avg_contract_value = revenue_total / num_contracts if num_contracts > 0 else 0
-
-            # Date primo/ultimo acquisto
-            first_purchase = min(c['data_vendita'] for c in contratti if c['data_vendita'])
-            last_purchase = max(c['data_vendita'] for c in contratti if c['data_vendita'])
-
-            # Calcola mesi di attività (dalla prima vendita a oggi)
-            if first_purchase:
-                first_date = datetime.strptime(first_purchase, '%Y-%m-%d').date()
-                active_months = ((as_of_date.year - first_date.year) * 12 +
-                               (as_of_date.month - first_date.month))
-                active_months = max(1, active_months)  # Almeno 1 mese
-            else:
-                active_months = 1
-
-            # LTV mensile
-            ltv_monthly = revenue_total / active_months if active_months > 0 else 0
-
-            # Retention rate (% di crediti utilizzati rispetto al totale acquistato)
-            crediti_totali = sum(c['crediti_totali'] or 0 for c in contratti)
-            crediti_usati = sum(c['crediti_usati'] or 0 for c in contratti)
-            retention_rate = (crediti_usati / crediti_totali * 100) if crediti_totali > 0 else 0
-
-            # Predizione LTV prossimi 12 mesi (media ultimi mesi * 12)
-            # Semplificato: se cliente attivo, usa media mensile * 12
-            if cliente['stato'] == 'Attivo':
-                predicted_ltv_12m = ltv_monthly * 12
-            else:
-                predicted_ltv_12m = 0.0
+            frame = self._load_customer_frame(
+                conn, as_of_date, "WHERE c.id = ?", (id_cliente,),
+            )
 
-            return {
-                'ltv_total': round(revenue_total, 2),
-                'ltv_monthly': round(ltv_monthly, 2),
-                'revenue_total': round(revenue_total, 2),
-                'num_contracts': num_contracts,
-                'active_months': active_months,
-                'avg_contract_value': round(avg_contract_value, 2),
-                'retention_rate': round(retention_rate, 2),
-                'first_purchase': first_purchase,
-                'last_purchase': last_purchase,
-                'status': cliente['stato'],
-                'predicted_ltv_12m': round(predicted_ltv_12m, 2),
-                'cliente_nome': f"{cliente['nome']} {cliente['cognome']}"
-            }
+        if frame.empty:
+            return None
+        return _ltv_dict(frame.iloc[0])
 
     def calculate_portfolio_ltv(self, as_of_date: date = None) -> Dict:
         """
@@ -180,50 +354,9 @@ class FinancialAnalytics(BaseRepository):
             as_of_date = date.today()
 
         with self._connect() as conn:
-            # Tutti i clienti attivi
-            clienti = conn.execute("""
-                SELECT id FROM clienti WHERE stato = 'Attivo'
-            """).fetchall()
-
-            if not clienti:
-                return {
-                    'avg_ltv_per_customer': 0.0,
-                    'median_ltv': 0.0,
-                    'total_ltv_portfolio': 0.0,
-                    'num_customers': 0,
-                    'ltv_distribution': []
-                }
+            frame = self._load_customer_frame(conn, as_of_date, "WHERE c.stato = 'Attivo'")
 
-            # Calcola LTV per ogni cliente
-            ltv_values = []
-            for c in clienti:
-                ltv_data = self.calculate_customer_ltv(c['id'], as_of_date)
-                if ltv_data:
-                    ltv_values.append({
-                        'id_cliente': c['id'],
-                        'ltv': ltv_data['ltv_total'],
-                        'ltv_monthly': ltv_data['ltv_monthly'],
-                        'cliente_nome': ltv_data['cliente_nome']
-                    })
-
-            if not ltv_values:
-                return {
-                    'avg_ltv_per_customer': 0.0,
-                    'median_ltv': 0.0,
-                    'total_ltv_portfolio': 0.0,
-                    'num_customers': 0,
-                    'ltv_distribution': []
-                }
-
-            ltv_amounts = [v['ltv'] for v in ltv_values]
-
-            return {
-                'avg_ltv_per_customer': round(np.mean(ltv_amounts), 2),
-                'median_ltv': round(np.median(ltv_amounts), 2),
-                'total_ltv_portfolio': round(sum(ltv_amounts), 2),
-                'num_customers': len(ltv_values),
-                'ltv_distribution': sorted(ltv_values, key=lambda x: x['ltv'], reverse=True)
-            }
+        return _portfolio_from_frame(frame)
 
     # ══════════════════════════════════════════════════════════
     # 2. CUSTOMER ACQUISITION COST (CAC)
@@ -259,12 +392,12 @@ class FinancialAnalytics(BaseRepository):
             }
         """
         with self._connect() as conn:
-            # Nuovi clienti nel periodo
-            nuovi_clienti = conn.execute("""
-                SELECT id, nome, cognome, data_creazione
-                FROM clienti
-                WHERE DATE(data_creazione) BETWEEN ? AND ?
-            """, (data_inizio, data_fine)).fetchall()
+            # Nuovi clienti nel periodo (LTV calcolato nello stesso caricamento)
+            nuovi_clienti = self._load_customer_frame(
+                conn, date.today(),
+                "WHERE DATE(c.data_creazione) BETWEEN ? AND ?",
+                (data_inizio, data_fine),
+            )
 
             num_new_customers = len(nuovi_clienti)
 
@@ -288,60 +421,57 @@ class FinancialAnalytics(BaseRepository):
                   AND data_effettiva BETWEEN ? AND ?
             """, (MovementType.USCITA.value, data_inizio, data_fine)).fetchone()
 
-            total_acquisition_cost = (
-                costi_marketing +
-                costi_sales +
-                (spese_marketing_db['totale'] if spese_marketing_db else 0)
-            )
+            # Primo contratto di ogni nuovo cliente: window function, una query
+            primi_contratti = conn.execute("""
+                SELECT totale_versato FROM (
+                    SELECT
+                        k.totale_versato,
+                        ROW_NUMBER() OVER (
+                            PARTITION BY k.id_cliente ORDER BY k.data_vendita
+                        ) AS rn
+                    FROM contratti k
+                    JOIN clienti c ON c.id = k.id_cliente
+                    WHERE DATE(c.data_creazione) BETWEEN ? AND ?
+                )
+                WHERE rn = 1
+            """, (data_inizio, data_fine)).fetchall()
 
-            # CAC medio
-            cac = total_acquisition_cost / num_new_customers
-
-            # Valore medio primo acquisto (per calcolare payback)
-            first_purchases = []
-            for cliente in nuovi_clienti:
-                primo_contratto = conn.execute("""
-                    SELECT prezzo_totale, totale_versato
-                    FROM contratti
-                    WHERE id_cliente = ?
-                    ORDER BY data_vendita
-                    LIMIT 1
-                """, (cliente['id'],)).fetchone()
-
-                if primo_contratto:
-                    first_purchases.append(primo_contratto['totale_versato'] or 0)
-
-            avg_first_purchase = (
-                sum(first_purchases) / len(first_purchases)
-                if first_purchases else 0
-            )
+        total_acquisition_cost = (
+            costi_marketing +
+            costi_sales +
+            (spese_marketing_db['totale'] if spese_marketing_db else 0)
+        )
 
-            # LTV medio dei nuovi clienti (per calcolare LTV/CAC ratio)
-            ltv_sum = 0
-            for cliente in nuovi_clienti:
-                ltv_data = self.calculate_customer_ltv(cliente['id'])
-                if ltv_data:
-                    ltv_sum += ltv_data['ltv_total']
+        # CAC medio
+        cac = total_acquisition_cost / num_new_customers
 
-            avg_ltv = ltv_sum / num_new_customers if num_new_customers > 0 else 0
+        # Valore medio primo acquisto (per calcolare payback)
+        first_purchases = [row['totale_versato'] or 0 for row in primi_contratti]
+        avg_first_purchase = (
+            sum(first_purchases) / len(first_purchases)
+            if first_purchases else 0
+        )
 
-            # LTV/CAC Ratio (Industry benchmark: 3+ è buono)
-            ltv_cac_ratio = avg_ltv / cac if cac > 0 else 0
+        # LTV medio dei nuovi clienti (per calcolare LTV/CAC ratio)
+        avg_ltv = float(nuovi_clienti["ltv_total"].sum()) / num_new_customers
 
-            # Payback period (mesi per recuperare il CAC)
-            # Assumendo revenue mensile costante
-            ltv_monthly_avg = avg_ltv / 12 if avg_ltv > 0 else 0
-            payback_months = cac / ltv_monthly_avg if ltv_monthly_avg > 0 else 0
+        # LTV/CAC Ratio (Industry benchmark: 3+ è buono)
+        ltv_cac_ratio = avg_ltv / cac if cac > 0 else 0
 
-            return {
-                'cac': round(cac, 2),
-                'num_new_customers': num_new_customers,
-                'total_acquisition_cost': round(total_acquisition_cost, 2),
-                'avg_first_purchase': round(avg_first_purchase, 2),
-                'ltv_cac_ratio': round(ltv_cac_ratio, 2),
-                'payback_months': round(payback_months, 1),
-                'avg_ltv_new_customers': round(avg_ltv, 2)
-            }
+        # Payback period (mesi per recuperare il CAC)
+        # Assumendo revenue mensile costante
+        ltv_monthly_avg = avg_ltv / 12 if avg_ltv > 0 else 0
+        payback_months = cac / ltv_monthly_avg if ltv_monthly_avg > 0 else 0
+
+        return {
+            'cac': round(cac, 2),
+            'num_new_customers': num_new_customers,
+            'total_acquisition_cost': round(total_acquisition_cost, 2),
+            'avg_first_purchase': round(avg_first_purchase, 2),
+            'ltv_cac_ratio': round(ltv_cac_ratio, 2),
+            'payback_months': round(payback_months, 1),
+            'avg_ltv_new_customers': round(avg_ltv, 2)
+        }
 
     # ══════════════════════════════════════════════════════════
     # 3. CHURN RATE & RETENTION
@@ -377,66 +507,9 @@ class FinancialAnalytics(BaseRepository):
             }
         """
         with self._connect() as conn:
-            # Clienti attivi all'inizio del periodo
-            customers_start = conn.execute("""
-                SELECT COUNT(*) as count
-                FROM clienti
-                WHERE stato = 'Attivo'
-                  AND DATE(data_creazione) < ?
-            """, (data_inizio,)).fetchone()['count']
-
-            # Clienti attivi alla fine del periodo
-            customers_end = conn.execute("""
-                SELECT COUNT(*) as count
-                FROM clienti
-                WHERE stato = 'Attivo'
-                  AND DATE(data_creazione) <= ?
-            """, (data_fine,)).fetchone()['count']
-
-            # Nuovi clienti nel periodo
-            customers_gained = conn.execute("""
-                SELECT COUNT(*) as count
-                FROM clienti
-                WHERE DATE(data_creazione) BETWEEN ? AND ?
-            """, (data_inizio, data_fine)).fetchone()['count']
-
-            # Clienti persi = (Inizio + Nuovi) - Fine
-            customers_lost = (customers_start + customers_gained) - customers_end
-
-            # Churn rate
-            churn_rate = (
-                (customers_lost / customers_start * 100)
-                if customers_start > 0 else 0
-            )
-
-            # Retention rate (inverso del churn)
-            retention_rate = 100 - churn_rate
+            frame = self._load_customer_frame(conn, date.today())
 
-            # Revenue churn (quanto fatturato abbiamo perso)
-            # Clienti che erano attivi a inizio periodo ma non più a fine
-            clienti_persi = conn.execute("""
-                SELECT id, nome, cognome
-                FROM clienti
-                WHERE stato != 'Attivo'
-                  AND DATE(data_creazione) < ?
-            """, (data_inizio,)).fetchall()
-
-            revenue_churn = 0.0
-            for cliente in clienti_persi:
-                ltv_data = self.calculate_customer_ltv(cliente['id'])
-                if ltv_data:
-                    revenue_churn += ltv_data['ltv_monthly']  # Revenue mensile persa
-
-            return {
-                'churn_rate': round(churn_rate, 2),
-                'retention_rate': round(retention_rate, 2),
-                'customers_start': customers_start,
-                'customers_end': customers_end,
-                'customers_lost': customers_lost,
-                'customers_gained': customers_gained,
-                'net_growth': customers_gained - customers_lost,
-                'revenue_churn': round(revenue_churn, 2)
-            }
+        return _churn_from_frame(frame, data_inizio, data_fine)
 
     def predict_churn_risk(self, id_cliente: int) -> Dict:
         """
@@ -544,73 +617,11 @@ class FinancialAnalytics(BaseRepository):
         if as_of_date is None:
             as_of_date = date.today()
 
-        # Per ora calcoliamo MRR come media dei contratti attivi
+        # MRR come somma di totale_versato / durata dei contratti attivi
         with self._connect() as conn:
-            # Contratti attivi con scadenza futura
-            contratti_attivi = conn.execute("""
-                SELECT
-                    id, id_cliente, prezzo_totale, totale_versato,
-                    data_inizio, data_scadenza,
-                    crediti_totali, crediti_usati
-                FROM contratti
-                WHERE stato_pagamento != ?
-                  AND DATE(data_scadenza) >= ?
-                  AND chiuso = 0
-            """, (RateStatus.PENDENTE.value, as_of_date)).fetchall()
-
-            if not contratti_attivi:
-                return {
-                    'mrr': 0.0,
-                    'arr': 0.0,
-                    'active_subscriptions': 0,
-                    'avg_revenue_per_customer': 0.0,
-                    'mrr_growth_rate': 0.0
-                }
+            contratti_attivi = self._load_active_contracts(conn, as_of_date)
 
-            # Calcola MRR come: totale_versato / mesi di durata contratto
-            mrr_total = 0.0
-            for contratto in contratti_attivi:
-                data_inizio = datetime.strptime(
-                    contratto['data_inizio'], '%Y-%m-%d'
-                ).date()
-                data_scadenza = datetime.strptime(
-                    contratto['data_scadenza'], '%Y-%m-%d'
-                ).date()
-
-                # Durata in mesi
-                durata_mesi = (
-                    (data_scadenza.year - data_inizio.year) * 12 +
-                    (data_scadenza.month - data_inizio.month)
-                )
-                durata_mesi = max(1, durata_mesi)
-
-                # MRR = versato / durata
-                mrr_contratto = (
-                    contratto['totale_versato'] / durata_mesi
-                    if durata_mesi > 0 else 0
-                )
-                mrr_total += mrr_contratto
-
-            active_subscriptions = len(contratti_attivi)
-            avg_revenue_per_customer = (
-                mrr_total / active_subscriptions
-                if active_subscriptions > 0 else 0
-            )
-
-            # ARR = MRR * 12
-            arr = mrr_total * 12
-
-            # MRR Growth Rate (vs mese precedente)
-            # TODO: Implementare calcolo storico
-            mrr_growth_rate = 0.0  # Placeholder
-
-            return {
-                'mrr': round(mrr_total, 2),
-                'arr': round(arr, 2),
-                'active_subscriptions': active_subscriptions,
-                'avg_revenue_per_customer': round(avg_revenue_per_customer, 2),
-                'mrr_growth_rate': round(mrr_growth_rate, 2)
-            }
+        return _mrr_from_contracts(contratti_attivi)
 
     # ══════════════════════════════════════════════════════════
     # 5. COHORT ANALYSIS
@@ -635,7 +646,7 @@ class FinancialAnalytics(BaseRepository):
             - cohort: Nome coorte (es. "2026-01")
             - num_customers: Clienti nella coorte
             - avg_ltv: LTV medio
-            - retention_rate: % retention
+            - avg_retention: % retention media
             - total_revenue: Fatturato totale coorte
         """
         if start_date is None:
@@ -644,56 +655,55 @@ class FinancialAnalytics(BaseRepository):
             end_date = date.today()
 
         with self._connect() as conn:
-            clienti = conn.execute("""
-                SELECT id, nome, cognome, data_creazione
-                FROM clienti
-                WHERE DATE(data_creazione) BETWEEN ? AND ?
-                ORDER BY data_creazione
-            """, (start_date, end_date)).fetchall()
-
-            if not clienti:
-                return pd.DataFrame()
-
-            # Raggruppa per coorte
-            cohorts = {}
-            for cliente in clienti:
-                created = datetime.strptime(
-                    cliente['data_creazione'], '%Y-%m-%d %H:%M:%S'
-                ).date()
-
-                if cohort_by == 'month':
-                    cohort_key = created.strftime('%Y-%m')
-                elif cohort_by == 'quarter':
-                    quarter = (created.month - 1) // 3 + 1
-                    cohort_key = f"{created.year}-Q{quarter}"
-                else:  # year
-                    cohort_key = str(created.year)
-
-                if cohort_key not in cohorts:
-                    cohorts[cohort_key] = []
-                cohorts[cohort_key].append(cliente['id'])
-
-            # Calcola metriche per coorte
-            cohort_data = []
-            for cohort_name, cliente_ids in cohorts.items():
-                ltv_sum = 0
-                retention_sum = 0
-                revenue_sum = 0
-
-                for id_cliente in cliente_ids:
-                    ltv_data = self.calculate_customer_ltv(id_cliente)
-                    if ltv_data:
-                        ltv_sum += ltv_data['ltv_total']
-                        retention_sum += ltv_data['retention_rate']
-                        revenue_sum += ltv_data['revenue_total']
-
-                num_customers = len(cliente_ids)
-                cohort_data.append({
-                    'cohort': cohort_name,
-                    'num_customers': num_customers,
-                    'avg_ltv': round(ltv_sum / num_customers, 2) if num_customers > 0 else 0,
-                    'avg_retention': round(retention_sum / num_customers, 2) if num_customers > 0 else 0,
-                    'total_revenue': round(revenue_sum, 2)
-                })
-
-            return pd.DataFrame(cohort_data)
+            frame = self._load_customer_frame(
+                conn, date.today(),
+                "WHERE DATE(c.data_creazione) BETWEEN ? AND ?",
+                (start_date, end_date),
+            )
+
+        return _cohort_table(frame, cohort_by)
+
+    # ══════════════════════════════════════════════════════════
+    # 6. SNAPSHOT COMPLETO (un solo passaggio)
+    # ══════════════════════════════════════════════════════════
+
+    def portfolio_snapshot(
+        self,
+        as_of_date: date = None,
+        cohort_by: str = 'month',
+        cohort_months: int = 12,
+        churn_start: date = None,
+    ) -> Dict:
+        """
+        LTV portfolio, MRR/ARR, churn e coorti da un unico caricamento.
+
+        Due query in tutto (frame clienti × contratti + contratti attivi),
+        indipendentemente dal numero di clienti.
+
+        Args:
+            as_of_date: Data di riferimento (default: oggi)
+            cohort_by: Raggruppamento coorti ('month', 'quarter', 'year')
+            cohort_months: Finestra coorti in mesi prima di as_of_date
+            churn_start: Inizio periodo churn (default: un mese prima di as_of_date)
+
+        Returns:
+            {'ltv': Dict, 'mrr_arr': Dict, 'churn': Dict, 'cohorts': pd.DataFrame}
+        """
+        if as_of_date is None:
+            as_of_date = date.today()
+        if churn_start is None:
+            churn_start = as_of_date - relativedelta(months=1)
+
+        with self._connect() as conn:
+            frame = self._load_customer_frame(conn, as_of_date)
+            contratti_attivi = self._load_active_contracts(conn, as_of_date)
+
+        cohort_start = pd.Timestamp(as_of_date - relativedelta(months=cohort_months))
+        in_window = (frame["created"] >= cohort_start) & (frame["created"] <= pd.Timestamp(as_of_date))
+
+        return {
+            'ltv': _portfolio_from_frame(frame),
+            'mrr_arr': _mrr_from_contracts(contratti_attivi),
+            'churn': _churn_from_frame(frame, churn_start, as_of_date),
+            'cohorts': _cohort_table(frame[in_window], cohort_by),
+        }
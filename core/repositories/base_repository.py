@@ -8,12 +8,21 @@ Responsabilità:
 - Row to dict mapping
 - Error handling centralizzato
 - Foreign keys enforcement
+
+CONNESSIONI: una connessione per thread e per file DB, riusata tra le chiamate
+(ConnectionManager). Stesso profilo PRAGMA di api/database.py (WAL,
+foreign_keys, busy_timeout); la cache statement di sqlite3 resta calda tra una
+chiamata e l'altra. Le transazioni sono esplicite: BEGIN/COMMIT sullo scope
+piu' esterno, SAVEPOINT per gli scope annidati.
 """
 
+import os
 import sqlite3
+import threading
+import weakref
 from pathlib import Path
 from contextlib import contextmanager
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator
 from datetime import date, datetime
 import json
 
@@ -22,6 +31,166 @@ from core.error_handler import logger
 # Database file path (default)
 DB_FILE = Path(__file__).resolve().parents[2] / "data" / "crm.db"
 
+# Profilo PRAGMA allineato a api/database.py (_setup_sqlite_pragmas)
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA foreign_keys=ON",
+    "PRAGMA busy_timeout=5000",
+)
+
+# Statement preparati tenuti in cache per connessione (default sqlite3: 128)
+STATEMENT_CACHE_SIZE = 256
+
+
+class _PooledConnection:
+    """Connessione riusabile + profondita' transazione corrente + identita' file."""
+
+    __slots__ = ("conn", "depth", "file_id")
+
+    def __init__(self, conn: sqlite3.Connection, file_id: Optional[tuple]):
+        self.conn = conn
+        self.depth = 0
+        self.file_id = file_id
+
+
+def _file_id(path: str) -> Optional[tuple]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_dev, st.st_ino)
+
+
+class _ThreadPool:
+    """Connessioni di un thread (path → _PooledConnection), tenute solo dal thread-local."""
+
+    __slots__ = ("entries", "__weakref__")
+
+    def __init__(self) -> None:
+        self.entries: Dict[str, _PooledConnection] = {}
+
+
+def _close_entries(entries: Dict[str, _PooledConnection]) -> None:
+    """Chiude e rimuove le connessioni di un pool (anche come finalizer del thread)."""
+    while entries:
+        _, pooled = entries.popitem()
+        try:
+            pooled.conn.close()
+        except sqlite3.Error:
+            pass
+
+
+class ConnectionManager:
+    """
+    Connessioni SQLite thread-local per il layer legacy (core/).
+
+    Ogni thread ottiene al massimo una connessione per file DB, creata al primo
+    uso e riusata finche' il file non viene sostituito (restore, ricreazione nei
+    test): in quel caso viene chiusa e riaperta in modo trasparente.
+    Il pool del thread vive solo nel thread-local: quando il thread termina un
+    finalizer chiude le sue connessioni; il manager ne tiene un riferimento
+    debole per close_all().
+    """
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pools: "weakref.WeakSet[_ThreadPool]" = weakref.WeakSet()
+
+    def _open(self, path: str) -> _PooledConnection:
+        # isolation_level=None: transazioni gestite esplicitamente da transaction()
+        conn = sqlite3.connect(
+            path,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        conn.row_factory = sqlite3.Row  # Accesso colonne per nome
+        for pragma in SQLITE_PRAGMAS:
+            conn.execute(pragma)
+        return _PooledConnection(conn, _file_id(path))
+
+    def _thread_pool(self) -> _ThreadPool:
+        pool = getattr(self._local, "pool", None)
+        if pool is None:
+            pool = self._local.pool = _ThreadPool()
+            weakref.finalize(pool, _close_entries, pool.entries)
+            with self._lock:
+                self._pools.add(pool)
+        return pool
+
+    def _acquire(self, db_path: Path) -> _PooledConnection:
+        path = str(db_path)
+        entries = self._thread_pool().entries
+
+        pooled = entries.get(path)
+        if pooled is not None and pooled.depth == 0 and pooled.file_id != _file_id(path):
+            del entries[path]
+            try:
+                pooled.conn.close()
+            except sqlite3.Error:
+                pass
+            pooled = None
+        if pooled is None:
+            pooled = entries[path] = self._open(path)
+        return pooled
+
+    @contextmanager
+    def transaction(self, db_path: Path) -> Iterator[sqlite3.Connection]:
+        """
+        Scope transazionale sulla connessione del thread corrente.
+
+        Scope esterno: BEGIN → COMMIT, ROLLBACK su eccezione.
+        Scope annidato (un metodo repository che ne chiama un altro):
+        SAVEPOINT → RELEASE, ROLLBACK TO su eccezione — il fallimento interno
+        non annulla il lavoro dello scope esterno.
+        """
+        pooled = self._acquire(db_path)
+        conn = pooled.conn
+        level = pooled.depth
+        savepoint = f"sp_{level}"
+
+        conn.execute("BEGIN" if level == 0 else f"SAVEPOINT {savepoint}")
+        pooled.depth += 1
+        try:
+            yield conn
+        except BaseException:
+            pooled.depth -= 1
+            if conn.in_transaction:
+                if level == 0:
+                    conn.rollback()
+                else:
+                    conn.execute(f"ROLLBACK TO {savepoint}")
+                    conn.execute(f"RELEASE {savepoint}")
+            raise
+        else:
+            pooled.depth -= 1
+            if conn.in_transaction:
+                if level == 0:
+                    try:
+                        conn.commit()
+                    except sqlite3.Error:
+                        conn.rollback()
+                        raise
+                else:
+                    conn.execute(f"RELEASE {savepoint}")
+
+    def close_all(self) -> None:
+        """Chiude tutte le connessioni aperte (shutdown, restore backup, test)."""
+        with self._lock:
+            pools, self._pools = list(self._pools), weakref.WeakSet()
+        for pool in pools:
+            _close_entries(pool.entries)
+        self._local = threading.local()
+
+
+connection_manager = ConnectionManager()
+
+
+def close_pooled_connections() -> None:
+    """Chiude le connessioni riusate del layer legacy."""
+    connection_manager.close_all()
+
 
 class BaseRepository:
     """
@@ -67,7 +236,8 @@ class BaseRepository:
         - Foreign keys enforced
         - Auto commit on success
         - Auto rollback on exception (con logging)
-        - Auto close connection
+        - Connessione thread-local riusata (ConnectionManager), niente
+          connect/close per chiamata; scope annidati → SAVEPOINT
         
         ROLLBACK AUTOMATICO: Su qualsiasi Exception durante yield, esegue rollback
         e propaga l'eccezione al decoratore @safe_operation del metodo chiamante.
@@ -78,19 +248,12 @@ class BaseRepository:
                 cursor.execute("INSERT INTO ...")
                 # commit automatico se nessuna eccezione
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row  # Accesso colonne per nome
-        conn.execute("PRAGMA foreign_keys = ON")  # Enforce referential integrity
-        
-        try:
-            yield conn
-            conn.commit()
-        except Exception as e:
-            conn.rollback()
-            logger.error(f"🔄 DB Transaction rollback: {type(e).__name__} - {str(e)[:100]}")
-            raise  # Re-raise per @safe_operation decorator
-        finally:
-            conn.close()
+        with connection_manager.transaction(self.db_path) as conn:
+            try:
+                yield conn
+            except Exception as e:
+                logger.error(f"🔄 DB Transaction rollback: {type(e).__name__} - {str(e)[:100]}")
+                raise  # Re-raise per @safe_operation decorator
     
     @contextmanager
     def get_connection(self):
@@ -18,10 +18,28 @@ from datetime import date, datetime, timedelta
 
 from .base_repository import BaseRepository
 from core.models import MovimentoCassa, MovimentoCassaCreate, SpesaRicorrente, SpesaRicorrenteCreate
-from core.error_handler import safe_operation, ErrorSeverity, ConflictError
+from core.error_handler import safe_operation, ErrorSeverity, ConflictError, ValidationError
 from core.constants import MovementType, RateStatus, ExpenseFrequency
 
 
+# Totali grezzi aggregabili (somme) alla base delle metriche unificate
+_EMPTY_TOTALS: Dict[str, float] = {
+    'entrate': 0.0,
+    'uscite_totali': 0.0,
+    'uscite_variabili': 0.0,
+    'ore_fatturate': 0.0,
+    'ore_eseguite': 0.0,
+    'rate_mancanti': 0.0,
+}
+
+# Chiave di periodo (primo giorno) per granularita'
+_GRANULARITIES = {
+    'day': lambda d: d,
+    'week': lambda d: d - timedelta(days=d.weekday()),
+    'month': lambda d: d.replace(day=1),
+}
+
+
 class FinancialRepository(BaseRepository):
     """
     Repository per gestione Finanza.
@@ -30,6 +48,7 @@ class FinancialRepository(BaseRepository):
     - register_cash_movement(movement: MovimentoCassaCreate) -> MovimentoCassa
     - get_cash_balance(start_date, end_date) -> Dict
     - calculate_unified_metrics(start_date, end_date) -> Dict
+    - get_metrics_range(start_date, end_date, granularity) -> List[Dict]
     - get_cash_forecast(days) -> Dict
     - add_recurring_expense(expense: SpesaRicorrenteCreate) -> SpesaRicorrente
     - get_recurring_expenses() -> List[SpesaRicorrente]
@@ -209,7 +228,6 @@ class FinancialRepository(BaseRepository):
         """
         with self._connect() as conn:
             cursor = conn.cursor()
-            giorni_periodo = (end_date - start_date).days + 1
 
             # 1. ENTRATE (da movimenti_cassa)
             entrate = cursor.execute("""
@@ -240,7 +258,6 @@ class FinancialRepository(BaseRepository):
                 FROM spese_ricorrenti
                 WHERE attiva = 1 AND frequenza = ?
             """, (ExpenseFrequency.MENSILE.value,)).fetchone()[0]
-            costi_fissi_periodo = (costi_fissi_mensili / 30) * giorni_periodo
 
             # 5. ORE FATTURATE (crediti da contratti pagati)
             ore_fatturate = cursor.execute("""
@@ -265,45 +282,81 @@ class FinancialRepository(BaseRepository):
                 AND data_scadenza BETWEEN ? AND ?
             """, (RateStatus.SALDATA.value, start_date, end_date)).fetchone()[0]
 
-            # 8. CALCOLI MARGINE
-            margine_lordo = entrate - uscite_variabili - costi_fissi_periodo
-            margine_orario = (margine_lordo / ore_fatturate) if ore_fatturate > 0 else 0
-            fatturato_per_ora = (entrate / ore_fatturate) if ore_fatturate > 0 else 0
-            saldo = entrate - uscite_totali
+            return self._build_unified_metrics(
+                start_date,
+                end_date,
+                {
+                    'entrate': entrate,
+                    'uscite_totali': uscite_totali,
+                    'uscite_variabili': uscite_variabili,
+                    'ore_fatturate': ore_fatturate,
+                    'ore_eseguite': ore_eseguite,
+                    'rate_mancanti': rate_mancanti,
+                },
+                costi_fissi_mensili,
+            )
 
-            return {
-                'periodo_inizio': str(start_date),
-                'periodo_fine': str(end_date),
-                'giorni': giorni_periodo,
+    @staticmethod
+    def _build_unified_metrics(
+        start_date: date,
+        end_date: date,
+        totals: Dict[str, float],
+        costi_fissi_mensili: float
+    ) -> Dict[str, Any]:
+        """
+        Costruisce il dict metriche unificate da totali gia' aggregati.
+
+        Condiviso da calculate_unified_metrics e dal range engine
+        (get_metrics_range): stessa formula, stesso arrotondamento.
+        """
+        giorni_periodo = (end_date - start_date).days + 1
+        entrate = totals['entrate']
+        uscite_totali = totals['uscite_totali']
+        uscite_variabili = totals['uscite_variabili']
+        ore_fatturate = totals['ore_fatturate']
+        ore_eseguite = totals['ore_eseguite']
+        rate_mancanti = totals['rate_mancanti']
+        costi_fissi_periodo = (costi_fissi_mensili / 30) * giorni_periodo
+
+        # CALCOLI MARGINE
+        margine_lordo = entrate - uscite_variabili - costi_fissi_periodo
+        margine_orario = (margine_lordo / ore_fatturate) if ore_fatturate > 0 else 0
+        fatturato_per_ora = (entrate / ore_fatturate) if ore_fatturate > 0 else 0
+        saldo = entrate - uscite_totali
+
+        return {
+            'periodo_inizio': str(start_date),
+            'periodo_fine': str(end_date),
+            'giorni': giorni_periodo,
+
+            # ORE
+            'ore_fatturate': round(ore_fatturate, 2),
+            'ore_eseguite': round(ore_eseguite, 2),
+            'ore_rimanenti': round(ore_fatturate - ore_eseguite, 2),
+
+            # ENTRATE & SALDO
+            'entrate_totali': round(entrate, 2),
+            'rate_mancanti': round(rate_mancanti, 2),
+            'saldo_effettivo': round(saldo, 2),
+            'fatturato_per_ora': round(fatturato_per_ora, 2),
+
+            # USCITE
+            'uscite_totali': round(uscite_totali, 2),
+            'uscite_variabili': round(uscite_variabili, 2),
+            'costi_fissi_mensili': round(costi_fissi_mensili, 2),
+            'costi_fissi_periodo': round(costi_fissi_periodo, 2),
+            'costi_totali': round(uscite_variabili + costi_fissi_periodo, 2),
+
+            # MARGINE
+            'margine_lordo': round(margine_lordo, 2),
+            'margine_netto': round(margine_lordo, 2),
+            'margine_orario': round(margine_orario, 2),
+
+            # METADATA
+            'formula': 'Margine = Entrate - Uscite_Variabili - Costi_Fissi_Periodo',
+            'note': 'Tutti i dati basati su data_effettiva (movimenti) e data_vendita (contratti)'
+        }
 
-                # ORE
-                'ore_fatturate': round(ore_fatturate, 2),
-                'ore_eseguite': round(ore_eseguite, 2),
-                'ore_rimanenti': round(ore_fatturate - ore_eseguite, 2),
-
-                # ENTRATE & SALDO
-                'entrate_totali': round(entrate, 2),
-                'rate_mancanti': round(rate_mancanti, 2),
-                'saldo_effettivo': round(saldo, 2),
-                'fatturato_per_ora': round(fatturato_per_ora, 2),
-
-                # USCITE
-                'uscite_totali': round(uscite_totali, 2),
-                'uscite_variabili': round(uscite_variabili, 2),
-                'costi_fissi_mensili': round(costi_fissi_mensili, 2),
-                'costi_fissi_periodo': round(costi_fissi_periodo, 2),
-                'costi_totali': round(uscite_variabili + costi_fissi_periodo, 2),
-
-                # MARGINE
-                'margine_lordo': round(margine_lordo, 2),
-                'margine_netto': round(margine_lordo, 2),
-                'margine_orario': round(margine_orario, 2),
-
-                # METADATA
-                'formula': 'Margine = Entrate - Uscite_Variabili - Costi_Fissi_Periodo',
-                'note': 'Tutti i dati basati su data_effettiva (movimenti) e data_vendita (contratti)'
-            }
-    
     @safe_operation(
         operation_name="Get Cash Forecast",
         severity=ErrorSeverity.MEDIUM,
@@ -695,6 +748,125 @@ class FinancialRepository(BaseRepository):
                 'rate_mancanti': round(fatturato_potenziale - incassato, 2)
             }
     
+    def _load_daily_totals(
+        self,
+        conn,
+        start_date: date,
+        end_date: date
+    ) -> Dict[date, Dict[str, float]]:
+        """
+        Totali giornalieri per il range: una query GROUP BY per tabella sorgente.
+
+        Filtro a intervallo semiaperto [start, end+1) sulla colonna grezza
+        (usa gli indici), raggruppamento sui primi 10 caratteri (YYYY-MM-DD).
+        I giorni senza righe non compaiono: il riempimento e' a carico del chiamante.
+        """
+        lo, hi = start_date.isoformat(), (end_date + timedelta(days=1)).isoformat()
+        daily: Dict[date, Dict[str, float]] = {}
+
+        def _add(day: str, **values: float) -> None:
+            bucket = daily.setdefault(date.fromisoformat(day), dict(_EMPTY_TOTALS))
+            for key, value in values.items():
+                bucket[key] += value or 0
+
+        for row in conn.execute("""
+            SELECT substr(data_effettiva, 1, 10) AS giorno,
+                   SUM(CASE WHEN tipo = ? THEN importo ELSE 0 END),
+                   SUM(CASE WHEN tipo = ? THEN importo ELSE 0 END),
+                   SUM(CASE WHEN tipo = ? AND categoria IN ('SPESE_ATTREZZATURE', 'ALTRO')
+                            THEN importo ELSE 0 END)
+            FROM movimenti_cassa
+            WHERE data_effettiva >= ? AND data_effettiva < ?
+            GROUP BY giorno
+        """, (MovementType.ENTRATA.value, MovementType.USCITA.value,
+              MovementType.USCITA.value, lo, hi)):
+            _add(row[0], entrate=row[1], uscite_totali=row[2], uscite_variabili=row[3])
+
+        for row in conn.execute("""
+            SELECT substr(data_vendita, 1, 10) AS giorno,
+                   SUM(CASE WHEN totale_versato > 0 THEN crediti_totali ELSE 0 END),
+                   SUM(crediti_usati)
+            FROM contratti
+            WHERE data_vendita >= ? AND data_vendita < ?
+            GROUP BY giorno
+        """, (lo, hi)):
+            _add(row[0], ore_fatturate=row[1], ore_eseguite=row[2])
+
+        for row in conn.execute("""
+            SELECT substr(data_scadenza, 1, 10) AS giorno, SUM(importo_previsto)
+            FROM rate_programmate
+            WHERE stato != ? AND data_scadenza >= ? AND data_scadenza < ?
+            GROUP BY giorno
+        """, (RateStatus.SALDATA.value, lo, hi)):
+            _add(row[0], rate_mancanti=row[1])
+
+        return daily
+
+    @safe_operation(
+        operation_name="Get Metrics Range",
+        severity=ErrorSeverity.MEDIUM,
+        fallback_return=[]
+    )
+    def get_metrics_range(
+        self,
+        start_date: date,
+        end_date: date,
+        granularity: str = "day"
+    ) -> List[Dict[str, Any]]:
+        """
+        Metriche unificate per giorno, settimana o mese in un range di date.
+
+        Range engine: 4 query in tutto (movimenti, contratti, rate, costi fissi)
+        indipendentemente dalla lunghezza del range; i giorni senza dati vengono
+        riempiti in Python con totali a zero.
+
+        Args:
+            start_date: Data inizio
+            end_date: Data fine
+            granularity: 'day' | 'week' (ISO, da lunedi') | 'month'
+
+        Returns:
+            Lista dict nello stesso formato di calculate_unified_metrics, uno per
+            periodo, con 'data' = primo giorno del periodo. Settimane e mesi sono
+            troncati ai limiti del range (giorni e costi fissi scalati di conseguenza).
+        """
+        if granularity not in _GRANULARITIES:
+            raise ValidationError(f"granularity non valida: {granularity}", field="granularity")
+        if end_date < start_date:
+            return []
+
+        with self._connect() as conn:
+            daily = self._load_daily_totals(conn, start_date, end_date)
+            costi_fissi_mensili = conn.execute("""
+                SELECT COALESCE(SUM(importo), 0)
+                FROM spese_ricorrenti
+                WHERE attiva = 1 AND frequenza = ?
+            """, (ExpenseFrequency.MENSILE.value,)).fetchone()[0]
+
+        # Riempimento calendario + accorpamento per periodo
+        periods: Dict[date, Dict[str, Any]] = {}
+        current = start_date
+        while current <= end_date:
+            key = _GRANULARITIES[granularity](current)
+            period = periods.get(key)
+            if period is None:
+                period = periods[key] = {
+                    'inizio': current, 'fine': current, 'totals': dict(_EMPTY_TOTALS),
+                }
+            period['fine'] = current
+            for name, value in daily.get(current, _EMPTY_TOTALS).items():
+                period['totals'][name] += value
+            current += timedelta(days=1)
+
+        metrics = []
+        for period in periods.values():
+            row = self._build_unified_metrics(
+                period['inizio'], period['fine'], period['totals'], costi_fissi_mensili,
+            )
+            row['data'] = str(period['inizio'])
+            metrics.append(row)
+        return metrics
+
     @safe_operation(
         operation_name="Get Daily Metrics Range",
         severity=ErrorSeverity.MEDIUM,
@@ -716,18 +888,10 @@ class FinancialRepository(BaseRepository):
             Lista dict con metriche per ogni giorno
         
         NOTE:
-            Usa calculate_unified_metrics per ogni giorno
+            Delega a get_metrics_range (granularity='day'): query aggregate
+            per giorno, non una calculate_unified_metrics per data.
         """
-        metrics = []
-        current = start_date
-        
-        while current <= end_date:
-            daily = self.calculate_unified_metrics(current, current)
-            daily['data'] = str(current)
-            metrics.append(daily)
-            current += timedelta(days=1)
-        
-        return metrics
+        return self.get_metrics_range(start_date, end_date, "day")
     
     @safe_operation(
         operation_name="Get Margine Per Cliente",
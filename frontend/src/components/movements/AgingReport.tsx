@@ -9,14 +9,17 @@
  * 2. Sezione Scadute: 4 bucket (0-30, 31-60, 61-90, 90+)
  * 3. Sezione In Arrivo: 4 bucket (0-7, 8-30, 31-60, 61-90)
  *
- * Dati: singola chiamata GET /api/rates/aging via useAgingReport().
+ * Dati: GET /api/rates/aging via useAgingReport() (solo totali e conteggi);
+ * le rate di un bucket sono caricate on-demand all'espansione, paginate
+ * (GET /api/rates/aging/items via useAgingBucketItems()).
  */
 
-import { AlertTriangle, Clock, Users, TrendingUp } from "lucide-react";
+import { useState } from "react";
+import { AlertTriangle, ChevronDown, ChevronUp, Clock, Users, TrendingUp } from "lucide-react";
 
 import { Skeleton } from "@/components/ui/skeleton";
 import { ScrollArea } from "@/components/ui/scroll-area";
-import { useAgingReport } from "@/hooks/useRates";
+import { useAgingBucketItems, useAgingReport } from "@/hooks/useRates";
 import { formatCurrency } from "@/lib/format";
 import type { AgingBucket, AgingItem } from "@/types/api";
 
@@ -43,6 +46,8 @@ const OVERDUE_LABELS: Record<string, string> = {
   "90+": "Oltre 90 giorni",
 };
 
+const ITEMS_PAGE_SIZE = 20;
+
 const UPCOMING_LABELS: Record<string, string> = {
   "0-7": "Questa settimana",
   "8-30": "Entro 30 giorni",
@@ -132,7 +137,7 @@ export function AgingReport() {
           <div className="grid grid-cols-2 gap-4 md:grid-cols-4">
             {data.overdue_buckets.map((bucket, i) => (
               <BucketCard
-                key={bucket.label}
+                key={bucket.key}
                 bucket={bucket}
                 colors={OVERDUE_COLORS[i]}
                 labelMap={OVERDUE_LABELS}
@@ -155,7 +160,7 @@ export function AgingReport() {
           <div className="grid grid-cols-2 gap-4 md:grid-cols-4">
             {data.upcoming_buckets.map((bucket, i) => (
               <BucketCard
-                key={bucket.label}
+                key={bucket.key}
                 bucket={bucket}
                 colors={UPCOMING_COLORS[i]}
                 labelMap={UPCOMING_LABELS}
@@ -234,6 +239,17 @@ function BucketCard({
   showDays: boolean;
 }) {
   const isEmpty = bucket.count === 0;
+  const [expanded, setExpanded] = useState(false);
+  const {
+    data,
+    isLoading,
+    hasNextPage,
+    fetchNextPage,
+    isFetchingNextPage,
+  } = useAgingBucketItems(bucket.key, ITEMS_PAGE_SIZE, expanded);
+  const pages = data?.pages ?? [];
+  const items = pages.flatMap((p) => p.items);
+  const total = pages[pages.length - 1]?.total ?? 0;
 
   return (
     <div className={`rounded-xl border ${colors.border} ${colors.bg} p-4 space-y-3 transition-shadow hover:shadow-md`}>
@@ -250,15 +266,43 @@ function BucketCard({
         </p>
       </div>
 
-      {/* Lista rate */}
+      {/* Lista rate (lazy) */}
       {!isEmpty && (
-        <ScrollArea className="h-[200px]">
+        <button
+          type="button"
+          onClick={() => setExpanded((v) => !v)}
+          className="flex w-full items-center justify-center gap-1 rounded-md py-1 text-xs font-medium text-muted-foreground transition-colors hover:bg-white/60 dark:hover:bg-white/5"
+        >
+          {expanded ? <ChevronUp className="h-3.5 w-3.5" /> : <ChevronDown className="h-3.5 w-3.5" />}
+          {expanded ? "Nascondi rate" : "Mostra rate"}
+        </button>
+      )}
+      {!isEmpty && expanded && (
+        isLoading ? (
           <div className="space-y-1">
-            {bucket.items.map((item) => (
-              <ItemRow key={item.rate_id} item={item} colors={colors} showDays={showDays} />
+            {Array.from({ length: Math.min(bucket.count, 3) }).map((_, i) => (
+              <Skeleton key={i} className="h-6 w-full" />
             ))}
           </div>
-        </ScrollArea>
+        ) : (
+          <ScrollArea className="h-[200px]">
+            <div className="space-y-1">
+              {items.map((item) => (
+                <ItemRow key={item.rate_id} item={item} colors={colors} showDays={showDays} />
+              ))}
+              {hasNextPage && (
+                <button
+                  type="button"
+                  disabled={isFetchingNextPage}
+                  onClick={() => fetchNextPage()}
+                  className="w-full rounded-md py-1 text-xs text-muted-foreground transition-colors hover:bg-white/60 disabled:opacity-50 dark:hover:bg-white/5"
+                >
+                  Carica altre ({total - items.length})
+                </button>
+              )}
+            </div>
+          </ScrollArea>
+        )
       )}
 
       {/* Empty bucket */}
@@ -2,54 +2,63 @@
 /**
  * Custom hooks per la dashboard.
  *
- * - useDashboard(): KPI aggregati (GET /api/dashboard/summary)
- * - useDashboardAlerts(): warning proattivi (GET /api/dashboard/alerts)
+ * - useDashboard(): KPI aggregati (sezione summary)
+ * - useDashboardAlerts(): warning proattivi (sezione alerts)
+ * - useOverdueRates / useExpiringContracts / useInactiveClients: liste Sheet
  * - useGhostEvents(): eventi fantasma per risoluzione inline (GET /api/dashboard/ghost-events)
  *
+ * KPI, alert e liste Sheet leggono tutti la stessa query ["dashboard", "bundle"]
+ * (GET /api/dashboard/bundle): primo paint con una richiesta, Sheet gia' pronti.
  * Re-fetch automatico ogni 60 secondi.
  */
 
 import { useQuery, keepPreviousData } from "@tanstack/react-query";
 import apiClient from "@/lib/api-client";
 import type {
-  DashboardSummary,
-  DashboardAlerts,
+  DashboardBundle,
+  DashboardSection,
   ClinicalReadinessResponse,
   ClinicalReadinessWorklistResponse,
   ClinicalPriority,
   ClientProjectionResponse,
   Event,
+  GoalRiskWorklistResponse,
   ListResponse,
-  OverdueRateItem,
-  ExpiringContractItem,
-  InactiveClientItem,
   TrainingMethodologyWorklistResponse,
 } from "@/types/api";
 
-export function useDashboard() {
-  return useQuery<DashboardSummary>({
-    queryKey: ["dashboard", "summary"],
+const BUNDLE_SECTIONS: DashboardSection[] = [
+  "summary",
+  "alerts",
+  "overdue_rates",
+  "expiring_contracts",
+  "inactive_clients",
+];
+
+function useDashboardBundle<T>(
+  select: (bundle: DashboardBundle) => T,
+  options: { enabled?: boolean; refetchInterval?: number } = {},
+) {
+  return useQuery<DashboardBundle, Error, T>({
+    queryKey: ["dashboard", "bundle"],
     queryFn: async () => {
-      const { data } = await apiClient.get<DashboardSummary>(
-        "/dashboard/summary"
+      const { data } = await apiClient.get<DashboardBundle>(
+        "/dashboard/bundle",
+        { params: { sections: BUNDLE_SECTIONS.join(",") } },
       );
       return data;
     },
-    refetchInterval: 60_000,
+    select,
+    ...options,
   });
 }
 
+export function useDashboard() {
+  return useDashboardBundle((b) => b.summary!, { refetchInterval: 60_000 });
+}
+
 export function useDashboardAlerts() {
-  return useQuery<DashboardAlerts>({
-    queryKey: ["dashboard", "alerts"],
-    queryFn: async () => {
-      const { data } = await apiClient.get<DashboardAlerts>(
-        "/dashboard/alerts"
-      );
-      return data;
-    },
-    refetchInterval: 60_000,
-  });
+  return useDashboardBundle((b) => b.alerts!, { refetchInterval: 60_000 });
 }
 
 export function useClinicalReadiness() {
@@ -126,42 +135,15 @@ export function useGhostEvents(enabled = true) {
 }
 
 export function useOverdueRates(enabled = true) {
-  return useQuery<ListResponse<OverdueRateItem>>({
-    queryKey: ["dashboard", "overdue-rates"],
-    queryFn: async () => {
-      const { data } = await apiClient.get<ListResponse<OverdueRateItem>>(
-        "/dashboard/overdue-rates"
-      );
-      return data;
-    },
-    enabled,
-  });
+  return useDashboardBundle((b) => b.overdue_rates!, { enabled });
 }
 
 export function useExpiringContracts(enabled = true) {
-  return useQuery<ListResponse<ExpiringContractItem>>({
-    queryKey: ["dashboard", "expiring-contracts"],
-    queryFn: async () => {
-      const { data } = await apiClient.get<ListResponse<ExpiringContractItem>>(
-        "/dashboard/expiring-contracts"
-      );
-      return data;
-    },
-    enabled,
-  });
+  return useDashboardBundle((b) => b.expiring_contracts!, { enabled });
 }
 
 export function useInactiveClients(enabled = true) {
-  return useQuery<ListResponse<InactiveClientItem>>({
-    queryKey: ["dashboard", "inactive-clients"],
-    queryFn: async () => {
-      const { data } = await apiClient.get<ListResponse<InactiveClientItem>>(
-        "/dashboard/inactive-clients"
-      );
-      return data;
-    },
-    enabled,
-  });
+  return useDashboardBundle((b) => b.inactive_clients!, { enabled });
 }
 
 // ════════════════════════════════════════════════════════════
@@ -226,3 +208,22 @@ export function useClientProjection(clientId: number | null) {
     staleTime: 60_000,
   });
 }
+
+/**
+ * Worklist roster: clienti con goal fuori traiettoria.
+ *
+ * GET /api/training-methodology/goal-risks
+ * Stesse proiezioni di useClientProjection, calcolate in batch su tutto il roster.
+ */
+export function useGoalRiskWorklist() {
+  return useQuery<GoalRiskWorklistResponse>({
+    queryKey: ["projection", "goal-risks"],
+    queryFn: async () => {
+      const { data } = await apiClient.get<GoalRiskWorklistResponse>(
+        "/training-methodology/goal-risks",
+      );
+      return data;
+    },
+    staleTime: 60_000,
+  });
+}
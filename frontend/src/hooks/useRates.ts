@@ -8,7 +8,7 @@
  * - ["dashboard"] → le rate pendenti e revenue cambiano
  */
 
-import { useQuery, useMutation, useQueryClient } from "@tanstack/react-query";
+import { useQuery, useMutation, useQueryClient, useInfiniteQuery } from "@tanstack/react-query";
 import { toast } from "sonner";
 import apiClient, { extractErrorMessage } from "@/lib/api-client";
 import { celebrateRatePaid } from "@/lib/confetti";
@@ -20,6 +20,7 @@ import type {
   RatePayment,
   ListResponse,
   AgingResponse,
+  AgingItemsPage,
 } from "@/types/api";
 
 // ── Query: aging report (orizzonte finanziario) ──
@@ -34,6 +35,28 @@ export function useAgingReport() {
   });
 }
 
+// ── Query: rate di un bucket aging (caricate solo quando il bucket e' espanso) ──
+// Pagine a dimensione fissa: ogni "carica altre" chiede solo le rate successive
+
+export function useAgingBucketItems(bucket: string, pageSize: number, enabled: boolean) {
+  return useInfiniteQuery<AgingItemsPage>({
+    queryKey: ["aging-report", "items", bucket, pageSize],
+    queryFn: async ({ pageParam }) => {
+      const offset = typeof pageParam === "number" ? pageParam : 0;
+      const { data } = await apiClient.get<AgingItemsPage>("/rates/aging/items", {
+        params: { bucket, offset, limit: pageSize },
+      });
+      return data;
+    },
+    initialPageParam: 0,
+    getNextPageParam: (lastPage, allPages) => {
+      const loaded = allPages.reduce((sum, page) => sum + page.items.length, 0);
+      return loaded < lastPage.total && lastPage.items.length > 0 ? loaded : undefined;
+    },
+    enabled,
+  });
+}
+
 // ── Mutation: genera piano rate automatico ──
 
 export function useGeneratePaymentPlan() {
@@ -128,11 +128,54 @@ export interface InstallationHealthResponse {
   uptime_seconds: number;
 }
 
+export interface RuntimePoolStatus {
+  name: string;
+  workers: number;
+  running: number;
+  queued: number;
+  max_queue: number | null;
+  peak_queued: number | null;
+  completed: number | null;
+  failed: number | null;
+  rejected: number | null;
+}
+
+export interface RuntimeMetricsSummary {
+  requests_total: number;
+  requests_5xx: number;
+  in_flight: number;
+  slowest_routes: {
+    method: string;
+    route: string;
+    count: number;
+    avg_ms: number;
+    p95_ms: number | null;
+  }[];
+  default_threadpool: RuntimePoolStatus | null;
+  pools: RuntimePoolStatus[];
+  databases: {
+    engine: string;
+    pool: string;
+    size: number | null;
+    checked_out: number | null;
+    peak_checked_out: number;
+    checkouts: number;
+    checkins: number;
+    connects: number;
+    saturated_checkouts: number;
+    queries: number;
+    slow_queries: number;
+  }[];
+  caches: { name: string; hits: number; misses: number; hit_rate: number | null }[];
+  log_records_dropped: number;
+}
+
 export interface InstallationSupportSnapshotResponse {
   generated_at: string;
   public_base_url: string | null;
   health: InstallationHealthResponse;
   recent_backups: BackupInfo[];
+  metrics: RuntimeMetricsSummary | null;
 }
 
 export interface InstallationConnectivityCheck {
@@ -452,6 +495,8 @@ export interface ClientEnriched extends Client {
   prezzo_totale_attivo: number;
   ha_rate_scadute: boolean;
   ultimo_evento_data: string | null;
+  ultimo_allenamento_data: string | null;
+  ultima_misurazione_data: string | null;
 }
 
 /** Risposta paginata enriched per lista clienti + KPI aggregati */
@@ -655,7 +700,7 @@ export interface ContractWithRates extends Contract {
   rate_totali: number;
   rate_pagate: number;
   rate_scadute: number;
-  // Credit breakdown (computed on read da eventi PT)
+  // Credit breakdown per stato (crediti_usati mantenuto dall'agenda)
   sedute_programmate: number;
   sedute_completate: number;
   sedute_rinviate: number;
@@ -665,6 +710,22 @@ export interface ContractWithRates extends Contract {
   rinnovi_successivi: RenewalChainItem[];
 }
 
+/** Contatore crediti salvato diverso dal ricalcolo sugli eventi PT */
+export interface CreditDriftItem {
+  id: number;
+  salvato: number;
+  atteso: number;
+}
+
+/** CreditReconciliationResponse — POST /api/contracts/credits/reconcile */
+export interface CreditReconciliationResponse {
+  contratti_verificati: number;
+  clienti_verificati: number;
+  contratti: CreditDriftItem[];
+  clienti: CreditDriftItem[];
+  corretto: boolean;
+}
+
 // â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•
 // RATE (api/schemas/financial.py)
 // â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•
@@ -1032,6 +1093,28 @@ export interface DashboardAlerts {
   items: AlertItem[];
 }
 
+/** Sezioni di GET /api/dashboard/bundle (?sections=a,b) */
+export type DashboardSection =
+  | "summary"
+  | "alerts"
+  | "clinical_readiness"
+  | "overdue_rates"
+  | "expiring_contracts"
+  | "inactive_clients";
+
+/** GET /api/dashboard/bundle — solo le sezioni richieste sono valorizzate */
+export interface DashboardBundle {
+  summary: DashboardSummary | null;
+  alerts: DashboardAlerts | null;
+  clinical_readiness: ClinicalReadinessResponse | null;
+  overdue_rates: ListResponse<OverdueRateItem> | null;
+  expiring_contracts: ListResponse<ExpiringContractItem> | null;
+  inactive_clients: ListResponse<InactiveClientItem> | null;
+  sections: DashboardSection[];
+  timings_ms: Record<string, number>;
+  total_ms: number;
+}
+
 /** Stato anamnesi nella coda readiness */
 export type AnamnesiReadinessState = "missing" | "legacy" | "structured";
 
@@ -1517,12 +1600,13 @@ export interface AgingItem {
 
 /** Fascia temporale con rate raggruppate */
 export interface AgingBucket {
+  key: string;           // "overdue:0-30", "upcoming:8-30", ...
   label: string;
   min_days: number;
   max_days: number;
   totale: number;
   count: number;
-  items: AgingItem[];
+  items: AgingItem[];    // solo per i bucket espansi (?expand=...)
 }
 
 /** GET /api/rates/aging â€” Orizzonte finanziario completo */
@@ -1536,6 +1620,15 @@ export interface AgingResponse {
   upcoming_buckets: AgingBucket[];
 }
 
+/** GET /api/rates/aging/items — Pagina rate di un singolo bucket */
+export interface AgingItemsPage {
+  bucket: string;
+  items: AgingItem[];
+  total: number;
+  offset: number;
+  limit: number;
+}
+
 // â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•
 // FORECAST (api/routers/movements.py â€” GET /forecast)
 // â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•
@@ -1607,6 +1700,25 @@ export interface BackupRestoreResponse {
   safety_backup: string;
 }
 
+/** Stato job in background (api/models/background_job.py) */
+export type JobStatus = "queued" | "running" | "succeeded" | "failed" | "cancelled";
+
+/** GET /api/jobs/{id} — anche risposta 202 di create/verify/export con ?background=true */
+export interface JobResponse {
+  id: string;
+  kind: string;
+  status: JobStatus;
+  progress: number;
+  message: string | null;
+  result: Record<string, unknown> | null;
+  error: string | null;
+  has_artifact: boolean;
+  cancel_requested: boolean;
+  created_at: string;
+  started_at: string | null;
+  finished_at: string | null;
+}
+
 // â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•
 // EXERCISE (api/routers/exercises.py + api/schemas/exercise.py)
 // â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•
@@ -2816,6 +2928,25 @@ export interface ClientProjectionResponse {
   has_goals: boolean;
 }
 
+/** Cliente con goal fuori traiettoria o risk flag alert */
+export interface GoalRiskClientItem {
+  client_id: number;
+  client_nome: string;
+  client_cognome: string;
+  compliance_pct: number;
+  off_track: GoalProjectionResponse[];
+  risk_flags: RiskFlagResponse[];
+  alert_count: number;
+}
+
+/** GET /api/training-methodology/goal-risks */
+export interface GoalRiskWorklistResponse {
+  items: GoalRiskClientItem[];
+  total: number;
+  clients_analyzed: number;
+  goals_analyzed: number;
+}
+
 // â”€â”€ Portale Clienti Self-Service (UPG-2026-03-06-01) â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
 
 export interface ShareTokenResponse {
@@ -9,3 +9,9 @@ Test organization:
     Referenced deleted modules: WorkoutGeneratorV2, ExerciseArchive, DifficultyLevel
 - E2E tests: tools/admin_scripts/test_*.py (require running server)
 """
+
+import os
+
+# Segreto JWT di test, prima di qualunque import di api.config (conftest incluso):
+# evita che il bootstrap generi e salvi un segreto reale in data/.env
+os.environ.setdefault("JWT_SECRET", "test-secret-not-for-production")
@@ -14,6 +14,7 @@ from sqlmodel import SQLModel, create_engine, Session
 from api.models import *  # noqa: F401, F403
 from api.main import app
 from api.database import get_session
+from api.services.response_cache import clear_response_cache
 
 
 @pytest.fixture
@@ -41,7 +42,9 @@ def session(test_engine):
 
 @pytest.fixture
 def client(test_engine):
-    """TestClient FastAPI con session override."""
+    """TestClient FastAPI con session override (cache risposte svuotata: DB nuovo a ogni test)."""
+    clear_response_cache()
+
     def override():
         with Session(test_engine) as s:
             yield s
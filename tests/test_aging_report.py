@@ -28,7 +28,10 @@ def test_aging_bucket_assignment(client, auth_headers, sample_contract):
     # Rata futura tra 20 giorni → bucket upcoming "8-30"
     _create_rate(client, auth_headers, cid, days_offset=20, importo=150.0)
 
-    r = client.get("/api/rates/aging", headers=auth_headers)
+    r = client.get(
+        "/api/rates/aging?expand=overdue:0-30&expand=overdue:31-60",
+        headers=auth_headers,
+    )
     assert r.status_code == 200
     data = r.json()
 
@@ -62,6 +65,45 @@ def test_aging_bucket_assignment(client, auth_headers, sample_contract):
     assert bucket_8_30["label"] == "8-30"
     assert bucket_8_30["count"] == 1
     assert bucket_8_30["totale"] == 150.0
+    assert bucket_8_30["items"] == []           # non espanso
+
+
+def test_aging_bucket_boundaries(client, auth_headers, sample_contract):
+    """Oggi → upcoming 0-7; 1gg fa → overdue 0-30; 31gg fa → 31-60; 400gg fa → 90+."""
+    cid = sample_contract["id"]
+    for offset in (0, 7, 8, -1, -30, -31, -400):
+        _create_rate(client, auth_headers, cid, days_offset=offset, importo=10.0)
+
+    data = client.get("/api/rates/aging", headers=auth_headers).json()
+    overdue = {b["label"]: b["count"] for b in data["overdue_buckets"]}
+    upcoming = {b["label"]: b["count"] for b in data["upcoming_buckets"]}
+
+    assert overdue == {"0-30": 2, "31-60": 1, "61-90": 0, "90+": 1}
+    assert upcoming == {"0-7": 2, "8-30": 1, "31-60": 0, "61-90": 0}
+    assert data["overdue_buckets"][0]["key"] == "overdue:0-30"
+
+
+def test_aging_bucket_items_paged(client, auth_headers, sample_contract):
+    """GET /rates/aging/items pagina le rate di un solo bucket, per scadenza."""
+    cid = sample_contract["id"]
+    for offset in (-3, -5, -7):
+        _create_rate(client, auth_headers, cid, days_offset=offset, importo=50.0)
+
+    r = client.get(
+        "/api/rates/aging/items?bucket=overdue:0-30&limit=2", headers=auth_headers,
+    )
+    assert r.status_code == 200
+    page = r.json()
+    assert page["total"] == 3
+    assert [it["giorni"] for it in page["items"]] == [7, 5]
+
+    r = client.get(
+        "/api/rates/aging/items?bucket=overdue:0-30&limit=2&offset=2", headers=auth_headers,
+    )
+    assert [it["giorni"] for it in r.json()["items"]] == [3]
+
+    r = client.get("/api/rates/aging/items?bucket=overdue:1-2", headers=auth_headers)
+    assert r.status_code == 422
 
 
 def test_aging_excludes_saldate(client, auth_headers, sample_contract):
@@ -0,0 +1,122 @@
+"""Fatti anamnesi derivati: calcolati in scrittura, coerenti con gli estrattori JSON."""
+
+import json
+from datetime import date
+
+import pytest
+from sqlmodel import select
+
+from api.models.anamnesi_facts import ClientAnamnesiFacts, ClientConditionFact
+from api.models.client import Client
+from api.models.trainer import Trainer
+from api.services.anamnesi_facts import (
+    FACTS_VERSION,
+    derive_anamnesi_facts,
+    get_anamnesi_facts,
+    load_anamnesi_facts,
+    refresh_anamnesi_facts,
+)
+from api.services.safety_engine import extract_client_conditions, extract_medication_flags
+
+
+def _anamnesi():
+    return {
+        "data_compilazione": "2026-03-01",
+        "data_ultimo_aggiornamento": "2026-05-10",
+        "obiettivo_principale": "salute",
+        "peso_kg": "72.5",
+        "altezza": 178,
+        "farmaci": {"presente": True, "dettaglio": "bisoprololo 5mg"},
+        "dolori_attuali": ["schiena", "cervicale"],
+    }
+
+
+@pytest.mark.parametrize("raw", [
+    None,
+    "",
+    "{not valid json",
+    "[1, 2]",
+    json.dumps({"note": "vecchia scheda"}),
+    json.dumps(_anamnesi()),
+])
+def test_derived_facts_match_json_extractors(raw):
+    facts = derive_anamnesi_facts(raw)
+    assert set(facts.condition_ids) == extract_client_conditions(raw)
+    assert list(facts.medication_flags) == [f.flag for f in extract_medication_flags(raw)]
+
+
+def test_derive_structured_anamnesi():
+    facts = derive_anamnesi_facts(json.dumps(_anamnesi()))
+    assert facts.stato == "structured"
+    assert facts.data_riferimento == date(2026, 5, 10)
+    assert facts.peso_kg == 72.5
+    assert facts.altezza_cm == 178.0
+    assert facts.medication_flags == ("beta_blocker",)
+    assert facts.condition_ids
+
+    assert derive_anamnesi_facts(None).stato == "missing"
+    assert derive_anamnesi_facts("{not valid json").stato == "legacy"
+
+
+def test_facts_written_on_create_and_update(client, auth_headers, session):
+    r = client.post("/api/clients", json={
+        "nome": "Mario", "cognome": "Rossi", "anamnesi": _anamnesi(),
+    }, headers=auth_headers)
+    assert r.status_code == 201
+    client_id = r.json()["id"]
+
+    row = session.get(ClientAnamnesiFacts, client_id)
+    assert row is not None
+    assert row.stato == "structured"
+    assert row.peso_kg == 72.5
+    conditions = session.exec(
+        select(ClientConditionFact.condition_id).where(ClientConditionFact.client_id == client_id)
+    ).all()
+    assert set(conditions) == extract_client_conditions(json.dumps(_anamnesi()))
+
+    r = client.put(f"/api/clients/{client_id}", json={"anamnesi": {"note": "x"}}, headers=auth_headers)
+    assert r.status_code == 200
+
+    session.expire_all()
+    row = session.get(ClientAnamnesiFacts, client_id)
+    assert row.stato == "legacy"
+    assert row.peso_kg is None
+    assert session.exec(
+        select(ClientConditionFact).where(ClientConditionFact.client_id == client_id)
+    ).all() == []
+
+
+def test_load_falls_back_to_json_without_facts_row(session):
+    """Clienti senza riga derivata (pre-backfill): fatti calcolati al volo, nessuna scrittura."""
+    trainer = Trainer(email="f@f.it", nome="F", cognome="F", hashed_password="x")
+    session.add(trainer)
+    session.flush()
+    c = Client(trainer_id=trainer.id, nome="A", cognome="B", anamnesi_json=json.dumps(_anamnesi()))
+    session.add(c)
+    session.commit()
+
+    facts = load_anamnesi_facts(session, [c])[c.id]
+    assert facts == derive_anamnesi_facts(c.anamnesi_json)
+    assert get_anamnesi_facts(session, c) == facts
+    assert session.get(ClientAnamnesiFacts, c.id) is None
+
+
+def test_load_rederives_facts_from_older_rules(session):
+    """Riga calcolata con regole precedenti (facts_version diverso): ignorata, fatti dal JSON."""
+    trainer = Trainer(email="v@v.it", nome="V", cognome="V", hashed_password="x")
+    session.add(trainer)
+    session.flush()
+    c = Client(trainer_id=trainer.id, nome="A", cognome="B", anamnesi_json=json.dumps(_anamnesi()))
+    session.add(c)
+    refresh_anamnesi_facts(session, c)
+    session.commit()
+
+    row = session.get(ClientAnamnesiFacts, c.id)
+    assert row.facts_version == FACTS_VERSION
+    row.stato = "missing"
+    row.medication_flags = None
+    row.facts_version = "regole-vecchie"
+    session.add(row)
+    session.commit()
+
+    assert load_anamnesi_facts(session, [c])[c.id] == derive_anamnesi_facts(c.anamnesi_json)
@@ -0,0 +1,139 @@
+"""Job in background: 202 + job id, avanzamento, cancellazione, artefatti, isolamento trainer."""
+
+import threading
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from api.main import app
+from api.models.background_job import BackgroundJob
+from api.models.trainer import Trainer
+from api.services import job_runner as job_runner_module
+from api.services.job_runner import JobRunner, get_job_runner
+
+
+@pytest.fixture
+def test_engine(tmp_path):
+    """DB su file: richieste e worker dei job usano connessioni separate, come in produzione."""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'jobs_test.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    SQLModel.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def runner(client, test_engine, tmp_path):
+    """Runner con un solo worker sul DB di test, artefatti in tmp_path."""
+    r = JobRunner(test_engine, tmp_path / "jobs", workers=1)
+    app.dependency_overrides[get_job_runner] = lambda: r
+    yield r
+    r.shutdown(wait=True)
+
+
+def _trainer_id(session) -> int:
+    return session.exec(select(Trainer.id).where(Trainer.email == "test@test.com")).one()
+
+
+def test_export_in_background_matches_sync_export(client, auth_headers, sample_client, runner):
+    sync = client.get("/api/backup/export", headers=auth_headers).json()
+
+    r = client.get("/api/backup/export?background=true", headers=auth_headers)
+    assert r.status_code == 202
+    job = r.json()
+    assert job["kind"] == "backup_export"
+    assert r.headers["location"] == f"/api/jobs/{job['id']}"
+
+    runner.wait(job["id"], timeout=10)
+    r = client.get(f"/api/jobs/{job['id']}", headers=auth_headers)
+    body = r.json()
+    assert body["status"] == "succeeded", body
+    assert body["progress"] == 100
+    assert body["has_artifact"] is True
+    assert body["result"]["counts"] == sync["counts"]
+
+    r = client.get(f"/api/jobs/{job['id']}/artifact", headers=auth_headers)
+    assert r.status_code == 200
+    exported = r.json()
+    assert exported["data"]["clienti"][0]["id"] == sample_client["id"]
+    assert exported["counts"] == sync["counts"]
+
+    listed = client.get("/api/jobs", headers=auth_headers).json()
+    assert [j["id"] for j in listed] == [job["id"]]
+
+
+def test_cancel_queued_and_running_jobs(client, auth_headers, session, runner, monkeypatch):
+    started = threading.Event()
+
+    def blocking(ctx):
+        started.set()
+        while not ctx.runner.cancel_requested(ctx.job_id):
+            threading.Event().wait(0.01)
+        ctx.check_cancelled()
+
+    monkeypatch.setitem(job_runner_module._handlers, "test_blocking", blocking)
+    trainer_id = _trainer_id(session)
+
+    running = runner.submit(trainer_id, "test_blocking")
+    assert started.wait(5)
+    queued = runner.submit(trainer_id, "test_blocking")
+
+    r = client.post(f"/api/jobs/{queued.id}/cancel", headers=auth_headers)
+    assert r.status_code == 200
+    assert r.json()["status"] == "cancelled"
+
+    r = client.post(f"/api/jobs/{running.id}/cancel", headers=auth_headers)
+    assert r.status_code == 200
+    assert r.json()["cancel_requested"] is True
+    runner.wait(running.id, timeout=5)
+
+    r = client.get(f"/api/jobs/{running.id}", headers=auth_headers)
+    assert r.json()["status"] == "cancelled"
+    assert client.post(f"/api/jobs/{running.id}/cancel", headers=auth_headers).status_code == 409
+
+
+def test_failed_job_and_trainer_isolation(client, auth_headers, session, runner, monkeypatch):
+    def broken(ctx):
+        ctx.progress(50, "A meta'")
+        raise RuntimeError("disco pieno")
+
+    monkeypatch.setitem(job_runner_module._handlers, "test_broken", broken)
+    trainer_id = _trainer_id(session)
+    job = runner.submit(trainer_id, "test_broken")
+    runner.wait(job.id, timeout=5)
+
+    body = client.get(f"/api/jobs/{job.id}", headers=auth_headers).json()
+    assert body["status"] == "failed"
+    assert body["error"] == "disco pieno"
+    assert client.get(f"/api/jobs/{job.id}/artifact", headers=auth_headers).status_code == 404
+
+    r = client.post("/api/auth/register", json={
+        "email": "altro@test.com", "nome": "Altro", "cognome": "Trainer", "password": "testpass123",
+    })
+    other = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    assert client.get(f"/api/jobs/{job.id}", headers=other).status_code == 404
+    assert client.post(f"/api/jobs/{job.id}/cancel", headers=other).status_code == 404
+    assert client.get("/api/jobs", headers=other).json() == []
+
+
+def test_verify_background_rejects_missing_backup(client, auth_headers, runner):
+    r = client.post("/api/backup/verify/backup_19700101_000000.sqlite?background=true", headers=auth_headers)
+    assert r.status_code == 404
+    assert client.get("/api/jobs", headers=auth_headers).json() == []
+
+
+def test_recover_interrupted_jobs(test_engine, tmp_path):
+    with Session(test_engine) as session:
+        trainer = Trainer(email="r@r.it", nome="R", cognome="R", hashed_password="x")
+        session.add(trainer)
+        session.flush()
+        session.add(BackgroundJob(id="a", trainer_id=trainer.id, kind="backup_export", status="running"))
+        session.add(BackgroundJob(id="b", trainer_id=trainer.id, kind="backup_export", status="succeeded"))
+        session.commit()
+
+    assert JobRunner(test_engine, tmp_path).recover_interrupted() == 1
+    with Session(test_engine) as session:
+        assert session.get(BackgroundJob, "a").status == "failed"
+        assert session.get(BackgroundJob, "b").status == "succeeded"
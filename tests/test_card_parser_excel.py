@@ -0,0 +1,99 @@
+"""Parsing Excel in streaming: stesso risultato del parse completo, metadati incrementali."""
+
+import io
+
+import openpyxl
+import pytest
+
+from core.card_parser import (
+    CONTENT_SCAN_ROWS,
+    HEADER_LOOKAHEAD,
+    HEADER_SCAN_ROWS,
+    CardParser,
+    ParsedCardMetadata,
+    _MetadataScanner,
+)
+from core.exercise_archive import ExerciseArchive
+
+
+@pytest.fixture
+def parser(tmp_path):
+    return CardParser(ExerciseArchive(tmp_path / "crm.db"))
+
+
+def _workbook() -> bytes:
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Giorno 1"
+    ws.append(["Scheda ipertrofia", 8, "settimane"])
+    ws.append(["Esercizio", "Serie", "Ripetizioni", "Recupero", "Carico"])
+    ws.append(["Panca piana", 4, "8", "90''", "60kg"])
+    ws.append(["Squat", 5, "5", "2'", None])
+    ws.append([None, None, None])
+    ws.append(["Lat machine", 3, "12", "60 sec", "40kg"])
+
+    ws = wb.create_sheet("Giorno 2")
+    ws.append(["Esercizio", "Serie-Ripetizioni"])
+    ws.append(["Stacco rumeno", "4x10"])
+    ws.append(["3 volte a", "settimana"])
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def test_parse_excel_streaming(parser):
+    card = parser.parse_excel(_workbook(), "scheda.xlsx")
+
+    assert [e.name for e in card.exercises] == [
+        "Panca piana", "Squat", "Lat machine", "Stacco rumeno", "3 volte a",
+    ]
+    panca = card.exercises[0]
+    assert (panca.sets, panca.reps, panca.rest_seconds, panca.load_note) == (4, "8", 90, "60kg")
+    assert card.exercises[3].sets == 4 and card.exercises[3].reps == "10"
+    assert all(e.match_score > 0 for e in card.exercises[:4])
+
+    meta = card.metadata
+    assert meta.sheet_names == ["Giorno 1", "Giorno 2"]
+    assert meta.detected_goal == "hypertrophy"
+    assert meta.detected_weeks == 8                     # "8" e "settimane" in celle diverse
+    assert meta.detected_sessions_per_week == 3         # a cavallo di due righe
+    assert card.raw_text.splitlines()[0] == "Panca piana | 4 | 8 | 90'' | 60kg"
+
+
+def test_exercises_are_yielded_lazily(parser):
+    stream = parser.iter_excel_exercises(_workbook())
+    first = next(stream)
+    assert first.name == "Panca piana"
+    assert first.canonical_id is not None
+    stream.close()
+
+
+@pytest.mark.parametrize("chunk", [1, 7, 40])
+def test_metadata_scanner_matches_single_pass(parser, chunk):
+    text = (
+        "Programma forza e massa " + "riempitivo " * 30
+        + "split push pull legs, durata 12 settimane, 4 allenamenti a settimana"
+    )
+    whole = ParsedCardMetadata()
+    parser._detect_metadata(text, whole)
+
+    scanner = _MetadataScanner()
+    words = text.split(" ")
+    for i in range(0, len(words), chunk):
+        scanner.feed(" ".join(words[i:i + chunk]))
+    streamed = ParsedCardMetadata()
+    scanner.apply(streamed)
+
+    assert streamed == whole
+    assert (whole.detected_goal, whole.detected_weeks, whole.detected_sessions_per_week) == (
+        "strength", 12, 4,
+    )
+
+
+def test_lookahead_covers_detection_windows(parser):
+    """Le righe bufferizzate in streaming bastano a ogni rilevamento colonne."""
+    assert HEADER_LOOKAHEAD >= max(HEADER_SCAN_ROWS, CONTENT_SCAN_ROWS)
+
+    rows = [("Scheda",)] * (HEADER_SCAN_ROWS - 1) + [("Esercizio", "Serie")] + [("Panca piana", 4)] * 10
+    assert parser._detect_columns(rows[:HEADER_LOOKAHEAD]) == parser._detect_columns(rows)
+    assert parser._detect_columns_v2(rows[:HEADER_LOOKAHEAD]) == parser._detect_columns_v2(rows)
@@ -0,0 +1,72 @@
+"""Registro catalogo in memoria: caricato una volta, ricaricato solo se cambia catalog.sha256."""
+
+import pytest
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine
+
+from api.database import CATALOG_TABLE_NAMES
+from api.models.measurement import Metric
+from api.models.medical_condition import ExerciseCondition, MedicalCondition
+from api.models.muscle import ExerciseMuscle, Muscle
+from api.routers.exercises import _get_taxonomy_conditions, _get_taxonomy_muscles
+from api.services.catalog_registry import catalog_version, get_catalog
+
+
+@pytest.fixture
+def catalog_file(tmp_path):
+    db = tmp_path / "catalog.db"
+    engine = create_engine(f"sqlite:///{db}")
+    tables = [t for t in SQLModel.metadata.sorted_tables if t.name in CATALOG_TABLE_NAMES]
+    SQLModel.metadata.create_all(engine, tables=tables)
+    with Session(engine) as s:
+        s.add_all([
+            Metric(id=1, nome="Peso", nome_en="Weight", unita_misura="kg", categoria="antropometria", ordinamento=2),
+            Metric(id=2, nome="Altezza", nome_en="Height", unita_misura="cm", categoria="antropometria", ordinamento=1),
+            Muscle(id=1, nome="Grande gluteo", nome_en="Gluteus maximus", gruppo="glutes", regione="lower_body"),
+            MedicalCondition(id=1, nome="Lombalgia", nome_en="Low back pain", categoria="orthopedic"),
+            ExerciseMuscle(id_esercizio=7, id_muscolo=1, ruolo="primary", attivazione=80),
+            ExerciseCondition(id_esercizio=7, id_condizione=1, severita="caution"),
+        ])
+        s.commit()
+    (tmp_path / "catalog.sha256").write_text("aaaa  catalog.db\n")
+    yield engine
+    engine.dispose()
+
+
+def test_snapshot_loaded_once_per_checksum(catalog_file, tmp_path):
+    statements = []
+    event.listen(catalog_file, "before_cursor_execute", lambda *a: statements.append(a[2]))
+
+    with Session(catalog_file) as s:
+        first = get_catalog(s)
+    assert first.version == "aaaa"
+    assert [m.nome for m in first.metrics_ordered] == ["Altezza", "Peso"]
+
+    statements.clear()
+    with Session(catalog_file) as s:
+        assert get_catalog(s) is first
+    assert statements == []
+
+    # Rebuild: nuova metrica + nuovo checksum → nuovo snapshot
+    with Session(catalog_file) as s:
+        s.add(Metric(id=3, nome="Vita", nome_en="Waist", unita_misura="cm", categoria="circonferenze"))
+        s.commit()
+    (tmp_path / "catalog.sha256").write_text("bbbbbb  catalog.db\n")
+    with Session(catalog_file) as s:
+        rebuilt = get_catalog(s)
+    assert rebuilt is not first and rebuilt.version == "bbbbbb"
+    assert set(rebuilt.metrics) == {1, 2, 3}
+
+
+def test_version_falls_back_to_file_fingerprint(catalog_file, tmp_path):
+    (tmp_path / "catalog.sha256").unlink()
+    assert catalog_version(catalog_file).startswith("file:")
+
+
+def test_exercise_taxonomy_from_snapshot(catalog_file):
+    with Session(catalog_file) as s:
+        catalog = get_catalog(s)
+    muscles = _get_taxonomy_muscles(catalog, 7)
+    assert [(m.nome, m.ruolo, m.attivazione) for m in muscles] == [("Grande gluteo", "primary", 80)]
+    assert [c.severita for c in _get_taxonomy_conditions(catalog, 7)] == ["caution"]
+    assert _get_taxonomy_muscles(catalog, 8) == []
@@ -0,0 +1,129 @@
+"""Ultima attivita' per cliente: mantenuta da agenda/misurazioni/log, riconciliabile."""
+
+from datetime import date, datetime, time, timedelta, timezone
+
+import pytest
+from sqlmodel import Session, select
+
+from api.database import get_catalog_session
+from api.main import app
+from api.models.client_activity import ClientActivity
+from api.models.measurement import Metric
+from api.services.client_activity import reconcile_client_activity
+
+
+def _at(days: int, hour: int = 10) -> datetime:
+    return datetime.combine(date.today() + timedelta(days=days), time(hour), tzinfo=timezone.utc)
+
+
+def _event(client, headers, client_id, start, stato="Programmato"):
+    r = client.post("/api/events", json={
+        "data_inizio": start.isoformat(),
+        "data_fine": (start + timedelta(hours=1)).isoformat(),
+        "categoria": "SALA",
+        "titolo": "Sessione",
+        "id_cliente": client_id,
+        "stato": stato,
+    }, headers=headers)
+    assert r.status_code == 201, r.text
+    return r.json()["id"]
+
+
+def _activity(session, client_id) -> ClientActivity | None:
+    session.expire_all()
+    return session.get(ClientActivity, client_id)
+
+
+def _inactive_ids(client, headers) -> dict[int, dict]:
+    r = client.get("/api/dashboard/inactive-clients", headers=headers)
+    assert r.status_code == 200, r.text
+    return {item["client_id"]: item for item in r.json()["items"]}
+
+
+@pytest.fixture
+def catalog(client, test_engine):
+    with Session(test_engine) as s:
+        s.add(Metric(id=1, nome="Peso", nome_en="Weight", unita_misura="kg", categoria="antropometria"))
+        s.commit()
+
+    def override_catalog():
+        with Session(test_engine) as session:
+            yield session
+
+    app.dependency_overrides[get_catalog_session] = override_catalog
+    yield
+    app.dependency_overrides.pop(get_catalog_session, None)
+
+
+def test_agenda_writes_maintain_last_event(client, auth_headers, session, sample_client):
+    cid = sample_client["id"]
+    assert cid in _inactive_ids(client, auth_headers)
+
+    _event(client, auth_headers, cid, _at(-30), stato="Completato")
+    recent = _event(client, auth_headers, cid, _at(-20))
+    row = _activity(session, cid)
+    assert row.ultimo_evento_at.date() == _at(-20).date()
+    assert row.ultimo_completato_at.date() == _at(-30).date()
+    assert row.ultimo_programmato_at.date() == _at(-20).date()
+    assert row.ultimo_evento_categoria == "SALA"
+
+    inactive = _inactive_ids(client, auth_headers)[cid]
+    assert inactive["giorni_inattivo"] == 20
+    assert inactive["ultimo_evento_data"] == _at(-20).date().isoformat()
+
+    # Evento futuro: non piu' inattivo; eliminato: di nuovo inattivo
+    upcoming = _event(client, auth_headers, cid, _at(3))
+    assert cid not in _inactive_ids(client, auth_headers)
+    assert client.delete(f"/api/events/{upcoming}", headers=auth_headers).status_code == 204
+    assert cid in _inactive_ids(client, auth_headers)
+
+    # Cancellato: l'ultimo evento torna quello completato
+    r = client.put(f"/api/events/{recent}", json={"stato": "Cancellato"}, headers=auth_headers)
+    assert r.status_code == 200, r.text
+    row = _activity(session, cid)
+    assert row.ultimo_evento_at.date() == _at(-30).date()
+    assert row.ultimo_programmato_at is None
+
+    listed = client.get("/api/clients", headers=auth_headers).json()["items"]
+    assert [c["ultimo_evento_data"] for c in listed if c["id"] == cid] == [_at(-30).date().isoformat()]
+
+
+def test_measurement_writes_maintain_last_measurement(client, auth_headers, session, sample_client, catalog):
+    cid = sample_client["id"]
+    ids = []
+    for days in (40, 10):
+        r = client.post(f"/api/clients/{cid}/measurements", json={
+            "data_misurazione": (date.today() - timedelta(days=days)).isoformat(),
+            "valori": [{"id_metrica": 1, "valore": 80.0}],
+        }, headers=auth_headers)
+        assert r.status_code == 201, r.text
+        ids.append(r.json()["id"])
+    assert _activity(session, cid).ultima_misurazione_data == date.today() - timedelta(days=10)
+
+    r = client.delete(f"/api/clients/{cid}/measurements/{ids[1]}", headers=auth_headers)
+    assert r.status_code == 204
+    assert _activity(session, cid).ultima_misurazione_data == date.today() - timedelta(days=40)
+
+    readiness = client.get("/api/dashboard/clinical-readiness", headers=auth_headers).json()
+    item = next(i for i in readiness["items"] if i["client_id"] == cid)
+    assert item["measurement_freshness"]["days_since_last"] == 40
+
+
+def test_reconcile_rebuilds_and_repairs(client, auth_headers, session, sample_client):
+    cid = sample_client["id"]
+    _event(client, auth_headers, cid, _at(-5), stato="Completato")
+    expected = _activity(session, cid).ultimo_evento_at
+
+    # Riga persa (es. dati ripristinati da backup), poi riga divergente
+    session.delete(_activity(session, cid))
+    session.commit()
+    assert reconcile_client_activity(session) == 1
+    assert _activity(session, cid).ultimo_evento_at == expected
+
+    row = _activity(session, cid)
+    row.ultimo_evento_at = None
+    session.add(row)
+    session.commit()
+    assert reconcile_client_activity(session) == 1
+    assert reconcile_client_activity(session) == 0
+    assert session.exec(select(ClientActivity.ultimo_evento_at)).all() == [expected]
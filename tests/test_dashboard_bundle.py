@@ -0,0 +1,56 @@
+"""Bundle dashboard: stesse sezioni degli endpoint singoli in una richiesta."""
+
+from datetime import date, timedelta
+
+import pytest
+
+_LIST_ENDPOINTS = {
+    "overdue_rates": "/api/dashboard/overdue-rates",
+    "expiring_contracts": "/api/dashboard/expiring-contracts",
+    "inactive_clients": "/api/dashboard/inactive-clients",
+}
+
+
+@pytest.fixture
+def expiring_contract(client, auth_headers, sample_client):
+    today = date.today()
+    r = client.post("/api/contracts", json={
+        "id_cliente": sample_client["id"],
+        "tipo_pacchetto": "PT 5",
+        "crediti_totali": 5,
+        "prezzo_totale": 250.0,
+        "data_inizio": (today - timedelta(days=60)).isoformat(),
+        "data_scadenza": (today + timedelta(days=10)).isoformat(),
+    }, headers=auth_headers)
+    assert r.status_code == 201, r.text
+    return r.json()
+
+
+def test_bundle_matches_single_endpoints(client, auth_headers, sample_contract_with_plan, expiring_contract):
+    r = client.get(f"/api/dashboard/bundle?sections={','.join(_LIST_ENDPOINTS)}", headers=auth_headers)
+    assert r.status_code == 200, r.text
+    bundle = r.json()
+
+    assert bundle["sections"] == list(_LIST_ENDPOINTS)
+    for name, path in _LIST_ENDPOINTS.items():
+        assert bundle[name] == client.get(path, headers=auth_headers).json(), name
+
+    assert bundle["expiring_contracts"]["items"][0]["contract_id"] == expiring_contract["id"]
+    assert bundle["inactive_clients"]["total"] == 1
+
+
+def test_bundle_selected_sections_with_timings(client, auth_headers, sample_client):
+    r = client.get("/api/dashboard/bundle?sections=inactive_clients,overdue_rates", headers=auth_headers)
+    assert r.status_code == 200
+    body = r.json()
+    assert body["sections"] == ["overdue_rates", "inactive_clients"]
+    assert set(body["timings_ms"]) == {"overdue_rates", "inactive_clients"}
+    assert body["total_ms"] >= max(body["timings_ms"].values())
+    assert body["overdue_rates"] == {"items": [], "total": 0}
+    assert body["summary"] is None and body["alerts"] is None
+
+
+def test_bundle_rejects_unknown_section(client, auth_headers):
+    r = client.get("/api/dashboard/bundle?sections=summary,nope", headers=auth_headers)
+    assert r.status_code == 422
+    assert "nope" in r.json()["detail"]
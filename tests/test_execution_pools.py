@@ -0,0 +1,83 @@
+"""Pool dedicati per endpoint pesanti: concorrenza limitata, coda limitata, metriche."""
+
+import threading
+import time
+
+import anyio
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from api.services.execution_pools import WorkPool, run_in_pool
+
+
+def test_pool_bounds_concurrency_and_rejects_when_queue_full():
+    pool = WorkPool("test", workers=2, max_queue=1)
+    release = threading.Event()
+    lock = threading.Lock()
+    running = {"now": 0, "peak": 0}
+
+    def heavy():
+        with lock:
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+        release.wait(5)
+        with lock:
+            running["now"] -= 1
+        return "ok"
+
+    results, errors = [], []
+
+    async def call():
+        try:
+            results.append(await pool.run(heavy))
+        except HTTPException as exc:
+            errors.append(exc.status_code)
+
+    async def main():
+        async with anyio.create_task_group() as tg:
+            for _ in range(3):                       # 2 in esecuzione + 1 in coda
+                tg.start_soon(call)
+            while pool.snapshot()["queued"] < 1:
+                await anyio.sleep(0.01)
+            await call()                              # coda piena → 503
+            assert pool.snapshot()["running"] == 2
+            release.set()
+
+    anyio.run(main)
+
+    assert results == ["ok"] * 3
+    assert errors == [503]
+    assert running["peak"] == 2
+    snap = pool.snapshot()
+    assert (snap["completed"], snap["rejected"], snap["running"], snap["queued"]) == (3, 1, 0, 0)
+    assert snap["peak_queued"] >= 1
+
+
+def test_run_in_pool_keeps_endpoint_signature():
+    app = FastAPI()
+
+    @app.get("/heavy/{n}")
+    @run_in_pool("analytics")
+    def heavy(n: int, scale: int = 2):
+        time.sleep(0.01)
+        return {"value": n * scale, "thread": threading.current_thread().name}
+
+    with TestClient(app) as client:
+        r = client.get("/heavy/21")
+        assert r.status_code == 200
+        assert r.json()["value"] == 42
+        assert client.get("/heavy/x").status_code == 422
+
+    with pytest.raises(TypeError):
+        @run_in_pool("analytics")
+        async def not_sync():
+            return None
+
+
+def test_execution_pools_endpoint(client, auth_headers):
+    r = client.get("/api/system/execution-pools", headers=auth_headers)
+    assert r.status_code == 200
+    body = r.json()
+    assert {p["name"] for p in body["pools"]} >= {"training_science", "nutrition", "analytics", "export"}
+    assert body["default_threadpool"]["workers"] > 0
@@ -0,0 +1,96 @@
+"""Indice nomi esercizi: stesso match del confronto esaustivo, cache per versione catalogo."""
+
+import random
+import sqlite3
+import time
+from difflib import SequenceMatcher
+
+import pytest
+
+from core.card_parser import CardParser
+from core.exercise_archive import ExerciseArchive
+from core.exercise_name_index import get_exercise_name_index, normalize_name
+
+QUERIES = [
+    "squat bulgaro", "affondi posteriori", "alzate frontali", "hip-thrust monopodalico",
+    "panca piana manubri", "trazioni presa larga", "plank laterale", "rematore bilanciere",
+    "crunch inverso", "stacco rumeno", "curl bicipiti", "push up", "leg press",
+    "calf raise in piedi", "spinte manubri", "bench pres", "deadlfit", "lat machine",
+]
+
+
+@pytest.fixture
+def archive(tmp_path):
+    return ExerciseArchive(tmp_path / "crm.db")
+
+
+def _brute_force(names, query):
+    best_id, best_score = None, 0.0
+    for db_name, ex_id in names.items():
+        score = SequenceMatcher(None, query, db_name).ratio()
+        if score > best_score:
+            best_id, best_score = ex_id, score
+    return best_id, best_score
+
+
+def test_best_match_equals_exhaustive_scan(archive):
+    index = get_exercise_name_index(archive)
+    for query in QUERIES:
+        assert index.best_match(query) == _brute_force(index.names, query), query
+
+
+def test_best_match_equals_exhaustive_scan_on_seed_catalog(archive):
+    """Nomi del catalogo troncati, senza una lettera, a parole invertite, e rumore."""
+    index = get_exercise_name_index(archive)
+    rnd = random.Random(35)
+    queries = []
+    for name in list(index.names)[::6]:
+        cut = rnd.randrange(len(name))
+        queries += [name[:-2], name[:cut] + name[cut + 1:], " ".join(reversed(name.split()))]
+        queries.append("".join(rnd.choice("aeiourst ") for _ in range(rnd.randint(3, 15))))
+    for query in queries:
+        query = query.strip()
+        assert index.best_match(query) == _brute_force(index.names, query), query
+
+
+def test_index_cached_per_catalog_version(archive):
+    index = get_exercise_name_index(archive)
+    assert get_exercise_name_index(archive) is index
+
+    archive.add_exercise({
+        "name": "Goblet Box Squat", "italian_name": "Box squat con kettlebell", "category": "compound",
+        "movement_pattern": "squat", "primary_muscles": ["quadriceps"],
+        "equipment": "barbell", "difficulty": "advanced",
+    })
+    rebuilt = get_exercise_name_index(archive)
+    assert rebuilt is not index
+    assert rebuilt.exact("BOX SQUAT CON KETTLEBELL") is not None
+
+    # Rinomina (anche fuori da ExerciseArchive): stessi conteggio e id massimo, nuova versione
+    with sqlite3.connect(archive.db_path) as conn:
+        conn.execute(
+            "UPDATE exercises SET italian_name = 'Box squat al kettlebell' WHERE name = 'Goblet Box Squat'"
+        )
+    renamed = get_exercise_name_index(archive)
+    assert renamed is not rebuilt
+    assert renamed.exact("box squat al kettlebell") is not None
+    assert renamed.exact("box squat con kettlebell") is None
+
+
+def test_search_ranks_by_similarity(archive):
+    results = get_exercise_name_index(archive).search("squat zercer", limit=5)
+    scores = [score for _, _, score in results]
+    assert scores == sorted(scores, reverse=True)
+    assert normalize_name("Àlzate  laterali!") == "alzate laterali"
+
+
+def test_card_parser_matching_is_fast(archive):
+    parser = CardParser(archive)
+    rows = [f"{QUERIES[i % len(QUERIES)]} {'x' * (i % 7)}" for i in range(200)]
+
+    start = time.perf_counter()
+    matches = [parser._normalize_exercise_name(row) for row in rows]
+    elapsed = time.perf_counter() - start
+
+    assert len(matches) == 200
+    assert elapsed < 0.5
@@ -0,0 +1,56 @@
+"""Serializzazione JSON veloce: stesso output del percorso standard, una sola validazione."""
+
+import json
+import logging
+from datetime import date, datetime
+
+from fastapi.encoders import jsonable_encoder
+
+from api import responses
+from api.responses import FastJSONResponse, dumps, log_json_backend
+from api.schemas.financial import MovementResponse
+
+
+def test_dumps_matches_standard_encoding():
+    movement = MovementResponse(
+        id=1, data_movimento=datetime(2026, 3, 2, 10, 30), data_effettiva=date(2026, 3, 2),
+        tipo="ENTRATA", importo=49.9, note="Seduta è saldata",
+    )
+    content = {"items": [movement], "total": 1, "saldo": 12.5, "vuoto": None}
+
+    assert json.loads(dumps(content)) == jsonable_encoder(content)
+    assert json.loads(dumps(movement)) == movement.model_dump(mode="json")
+    assert "è".encode() in FastJSONResponse(content).body
+
+
+def test_list_endpoints_single_pass(client, auth_headers, sample_contract):
+    r = client.get("/api/contracts", headers=auth_headers)
+    assert r.status_code == 200
+    body = r.json()
+    assert body["total"] == 1 and body["kpi_attivi"] == 1
+    item = body["items"][0]
+    assert item["id"] == sample_contract["id"]
+    assert item["client_nome"] == "Mario" and item["rate_totali"] == 0
+    assert item["data_inizio"] == sample_contract["data_inizio"]
+
+    r = client.get("/api/exercises?page_size=5", headers=auth_headers)
+    assert r.status_code == 200
+    assert set(r.json()) == {"items", "total", "page", "page_size"}
+
+    r = client.get("/api/events", headers=auth_headers)
+    assert r.json() == {"items": [], "total": 0}
+
+
+def test_stdlib_fallback_logged_and_equivalent(monkeypatch, caplog):
+    logger = logging.getLogger("test.fast_json")
+    with caplog.at_level(logging.WARNING, logger="test.fast_json"):
+        log_json_backend(logger)
+    assert not caplog.records
+
+    content = {"importo": 49.9, "giorno": date(2026, 3, 2), "note": "è"}
+    expected = dumps(content)
+    monkeypatch.setattr(responses, "orjson", None)
+    with caplog.at_level(logging.WARNING, logger="test.fast_json"):
+        log_json_backend(logger)
+    assert "orjson non installato" in caplog.text
+    assert json.loads(dumps(content)) == json.loads(expected)
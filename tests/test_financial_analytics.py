@@ -0,0 +1,125 @@
+"""FinancialAnalytics set-based: stessi numeri del calcolo per-cliente, una query per report."""
+
+import sqlite3
+import time
+from datetime import date
+
+import pytest
+
+from core.financial_analytics import FinancialAnalytics
+
+AS_OF = date(2026, 6, 15)
+
+_SCHEMA = """
+CREATE TABLE clienti (
+    id INTEGER PRIMARY KEY, nome TEXT, cognome TEXT, stato TEXT, data_creazione TEXT
+);
+CREATE TABLE contratti (
+    id INTEGER PRIMARY KEY, id_cliente INTEGER, data_vendita TEXT, data_inizio TEXT,
+    data_scadenza TEXT, prezzo_totale REAL, totale_versato REAL, crediti_totali INTEGER,
+    crediti_usati INTEGER, stato_pagamento TEXT, chiuso INTEGER DEFAULT 0
+);
+CREATE TABLE movimenti_cassa (
+    id INTEGER PRIMARY KEY, importo REAL, tipo TEXT, categoria TEXT, data_effettiva TEXT
+);
+"""
+
+
+@pytest.fixture
+def analytics(tmp_path):
+    db = tmp_path / "crm.db"
+    conn = sqlite3.connect(db)
+    conn.executescript(_SCHEMA)
+    conn.executemany("INSERT INTO clienti VALUES (?, ?, ?, ?, ?)", [
+        (1, "Anna", "Bianchi", "Attivo", "2026-01-10 09:00:00"),
+        (2, "Luca", "Verdi", "Attivo", "2026-01-20 10:00:00.123456"),
+        (3, "Sara", "Neri", "Inattivo", "2025-11-05 08:00:00"),
+        (4, "Paolo", "Rossi", "Attivo", "2026-03-01 12:00:00"),   # nessun contratto
+    ])
+    conn.executemany(
+        "INSERT INTO contratti VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0)", [
+            (1, 1, "2026-01-10", "2026-01-10", "2026-07-10", 600, 600, 20, 15, "SALDATO"),
+            (2, 1, "2026-04-01", "2026-04-01", "2026-10-01", 400, 200, 10, 0, "PARZIALE"),
+            (3, 2, "2026-02-01", "2026-02-01", "2026-05-01", 300, 300, 10, 10, "SALDATO"),
+            (4, 3, "2025-11-05", "2025-11-05", "2026-02-05", 450, 450, 12, 3, "SALDATO"),
+        ],
+    )
+    conn.commit()
+    conn.close()
+    return FinancialAnalytics(db)
+
+
+def test_customer_ltv(analytics):
+    ltv = analytics.calculate_customer_ltv(1, AS_OF)
+    assert ltv["revenue_total"] == 800.0
+    assert ltv["num_contracts"] == 2
+    assert ltv["active_months"] == 5                   # gen → giu
+    assert ltv["ltv_monthly"] == 160.0
+    assert ltv["retention_rate"] == 50.0               # 15 / 30
+    assert ltv["first_purchase"] == "2026-01-10"
+    assert ltv["last_purchase"] == "2026-04-01"
+    assert ltv["predicted_ltv_12m"] == 1920.0
+
+    empty = analytics.calculate_customer_ltv(4, AS_OF)
+    assert empty["num_contracts"] == 0
+    assert empty["active_months"] == 0
+    assert empty["first_purchase"] is None
+
+    assert analytics.calculate_customer_ltv(999, AS_OF) is None
+
+
+def test_portfolio_cohorts_and_churn(analytics):
+    portfolio = analytics.calculate_portfolio_ltv(AS_OF)
+    assert portfolio["num_customers"] == 3             # solo Attivi
+    assert portfolio["total_ltv_portfolio"] == 1100.0
+    assert [d["id_cliente"] for d in portfolio["ltv_distribution"]] == [1, 2, 4]
+
+    cohorts = analytics.analyze_cohorts("month", date(2025, 1, 1), date(2026, 12, 31))
+    rows = cohorts.set_index("cohort").to_dict("index")
+    assert list(rows) == ["2025-11", "2026-01", "2026-03"]
+    assert rows["2026-01"]["num_customers"] == 2
+    assert rows["2026-01"]["total_revenue"] == 1100.0
+    assert rows["2026-01"]["avg_ltv"] == 550.0
+
+    quarters = analytics.analyze_cohorts("quarter", date(2025, 1, 1), date(2026, 12, 31))
+    assert list(quarters["cohort"]) == ["2025-Q4", "2026-Q1"]
+
+    churn = analytics.calculate_churn_rate(date(2026, 1, 1), date(2026, 3, 31))
+    assert churn["customers_start"] == 0
+    assert churn["customers_gained"] == 3
+    assert churn["customers_end"] == 3
+
+
+def test_snapshot_matches_individual_reports(analytics):
+    snap = analytics.portfolio_snapshot(AS_OF, churn_start=date(2026, 1, 1))
+    assert snap["ltv"] == analytics.calculate_portfolio_ltv(AS_OF)
+    assert snap["mrr_arr"] == analytics.calculate_mrr_arr(AS_OF)
+    assert snap["mrr_arr"]["active_subscriptions"] == 2
+    assert snap["churn"]["customers_gained"] == 3
+    assert list(snap["cohorts"]["cohort"]) == ["2025-11", "2026-01", "2026-03"]
+
+
+def test_cohort_report_scales_to_thousands_of_clients(tmp_path):
+    db = tmp_path / "big.db"
+    conn = sqlite3.connect(db)
+    conn.executescript(_SCHEMA)
+    n = 5000
+    conn.executemany("INSERT INTO clienti VALUES (?, ?, ?, ?, ?)", [
+        (i, f"N{i}", f"C{i}", "Attivo" if i % 4 else "Inattivo",
+         f"2026-{1 + i % 5:02d}-{1 + i % 27:02d} 10:00:00")
+        for i in range(1, n + 1)
+    ])
+    conn.executemany("INSERT INTO contratti VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0)", [
+        (i, 1 + i % n, "2026-02-01", "2026-02-01", "2026-08-01", 500, 250, 10, i % 10, "PARZIALE")
+        for i in range(1, 3 * n + 1)
+    ])
+    conn.commit()
+    conn.close()
+
+    analytics = FinancialAnalytics(db)
+    start = time.perf_counter()
+    cohorts = analytics.analyze_cohorts("month", date(2026, 1, 1), date(2026, 6, 30))
+    elapsed = time.perf_counter() - start
+
+    assert int(cohorts["num_customers"].sum()) == n
+    assert elapsed < 1.0
@@ -0,0 +1,104 @@
+"""Range engine metriche: stessi numeri di calculate_unified_metrics, query aggregate per periodo."""
+
+import sqlite3
+from datetime import date, timedelta
+
+import pytest
+
+from core.error_handler import ValidationError
+from core.repositories.financial_repository import FinancialRepository
+
+_SCHEMA = """
+CREATE TABLE movimenti_cassa (
+    id INTEGER PRIMARY KEY, importo REAL, tipo TEXT, categoria TEXT, data_effettiva TEXT
+);
+CREATE TABLE spese_ricorrenti (
+    id INTEGER PRIMARY KEY, importo REAL, frequenza TEXT, attiva INTEGER
+);
+CREATE TABLE contratti (
+    id INTEGER PRIMARY KEY, data_vendita TEXT, totale_versato REAL,
+    crediti_totali INTEGER, crediti_usati INTEGER
+);
+CREATE TABLE rate_programmate (
+    id INTEGER PRIMARY KEY, importo_previsto REAL, stato TEXT, data_scadenza TEXT
+);
+"""
+
+START = date(2026, 3, 1)
+END = date(2026, 4, 15)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    db = tmp_path / "crm.db"
+    conn = sqlite3.connect(db)
+    conn.executescript(_SCHEMA)
+    conn.executemany("INSERT INTO movimenti_cassa VALUES (NULL, ?, ?, ?, ?)", [
+        (120.0, "ENTRATA", "PAGAMENTO_RATA", "2026-03-02"),
+        (80.5, "ENTRATA", "PAGAMENTO_RATA", "2026-03-02"),
+        (40.0, "USCITA", "ALTRO", "2026-03-02"),
+        (300.0, "USCITA", "AFFITTO", "2026-03-10"),
+        (25.25, "USCITA", "SPESE_ATTREZZATURE", "2026-03-31"),
+        (500.0, "ENTRATA", "ACCONTO_CONTRATTO", "2026-04-15"),
+        (999.0, "ENTRATA", "ACCONTO_CONTRATTO", "2026-04-16"),   # fuori range
+    ])
+    conn.executemany("INSERT INTO spese_ricorrenti VALUES (NULL, ?, ?, ?)", [
+        (600.0, "MENSILE", 1),
+        (100.0, "MENSILE", 0),
+        (50.0, "SETTIMANALE", 1),
+    ])
+    conn.executemany("INSERT INTO contratti VALUES (NULL, ?, ?, ?, ?)", [
+        ("2026-03-02", 200.0, 10, 4),
+        ("2026-03-10", 0.0, 8, 2),
+        ("2026-04-01", 450.0, 20, 0),
+    ])
+    conn.executemany("INSERT INTO rate_programmate VALUES (NULL, ?, ?, ?)", [
+        (150.0, "PENDENTE", "2026-03-15"),
+        (150.0, "SALDATA", "2026-03-15"),
+        (75.0, "PARZIALE", "2026-04-14"),
+    ])
+    conn.commit()
+    conn.close()
+    return FinancialRepository(db)
+
+
+def test_daily_range_matches_unified_metrics(repo):
+    daily = repo.get_daily_metrics_range(START, END)
+
+    assert len(daily) == (END - START).days + 1           # giorni vuoti riempiti
+    day = START
+    for row in daily:
+        expected = repo.calculate_unified_metrics(day, day)
+        expected["data"] = str(day)
+        assert row == expected
+        day += timedelta(days=1)
+
+
+@pytest.mark.parametrize("granularity", ["week", "month"])
+def test_grouped_range_matches_unified_metrics(repo, granularity):
+    rows = repo.get_metrics_range(START, END, granularity)
+
+    assert rows[0]["periodo_inizio"] == str(START)
+    assert rows[-1]["periodo_fine"] == str(END)
+    assert sum(r["giorni"] for r in rows) == (END - START).days + 1
+    for row in rows:
+        expected = repo.calculate_unified_metrics(
+            date.fromisoformat(row["periodo_inizio"]), date.fromisoformat(row["periodo_fine"]),
+        )
+        expected["data"] = row["periodo_inizio"]
+        assert row == expected
+
+
+def test_month_buckets_are_clipped_to_range(repo):
+    rows = repo.get_metrics_range(START, END, "month")
+    assert [(r["periodo_inizio"], r["periodo_fine"]) for r in rows] == [
+        ("2026-03-01", "2026-03-31"),
+        ("2026-04-01", "2026-04-15"),
+    ]
+    assert rows[1]["entrate_totali"] == 500.0
+    assert rows[1]["costi_fissi_periodo"] == 300.0           # 600 / 30 * 15
+
+
+def test_invalid_granularity(repo):
+    with pytest.raises(ValidationError):
+        repo.get_metrics_range(START, END, "year")
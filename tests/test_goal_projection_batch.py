@@ -0,0 +1,112 @@
+"""Proiezioni goal in batch: OLS vettoriale + worklist roster dei goal fuori traiettoria."""
+
+import random
+from datetime import date, timedelta
+
+import pytest
+from sqlmodel import Session
+
+from api.database import get_catalog_session
+from api.main import app
+from api.models.measurement import Metric
+from api.services.projection_engine import compute_metric_trend, compute_metric_trends
+
+
+def test_batch_trends_match_single_series():
+    rng = random.Random(7)
+    base = date(2026, 1, 1)
+    series = {
+        (cid, mid): [
+            (base + timedelta(days=rng.randint(0, 120)), rng.uniform(50, 100))
+            for _ in range(rng.randint(1, 10))
+        ]
+        for cid in range(40)
+        for mid in (1, 3)
+    }
+    series[(99, 1)] = [(base, 70.0), (base, 71.0)]  # stessa data: non regredibile
+
+    batch = compute_metric_trends(series)
+    for key, values in series.items():
+        single = compute_metric_trend(values)
+        if single is None:
+            assert key not in batch
+            continue
+        trend = batch[key]
+        for attr in ("weekly_rate", "r_squared", "n_points", "span_days",
+                     "current_value", "current_date", "confidence"):
+            assert getattr(trend, attr) == getattr(single, attr), (key, attr)
+        assert trend.slope_per_day == pytest.approx(single.slope_per_day)
+    assert compute_metric_trends({}) == {}
+
+
+@pytest.fixture
+def catalog(client, test_engine):
+    with Session(test_engine) as s:
+        s.add(Metric(id=1, nome="Peso", nome_en="Weight", unita_misura="kg", categoria="antropometria"))
+        s.commit()
+
+    def override_catalog():
+        with Session(test_engine) as session:
+            yield session
+
+    app.dependency_overrides[get_catalog_session] = override_catalog
+    yield
+    app.dependency_overrides.pop(get_catalog_session, None)
+
+
+def _client(client, headers, nome, cognome):
+    r = client.post("/api/clients", json={"nome": nome, "cognome": cognome}, headers=headers)
+    assert r.status_code == 201, r.text
+    return r.json()["id"]
+
+
+def _weights(client, headers, client_id, values):
+    start = date.today() - timedelta(weeks=len(values))
+    for week, value in enumerate(values):
+        r = client.post(f"/api/clients/{client_id}/measurements", json={
+            "data_misurazione": (start + timedelta(weeks=week)).isoformat(),
+            "valori": [{"id_metrica": 1, "valore": value}],
+        }, headers=headers)
+        assert r.status_code == 201, r.text
+
+
+def _goal(client, headers, client_id, target):
+    r = client.post(f"/api/clients/{client_id}/goals", json={
+        "id_metrica": 1,
+        "direzione": "diminuire",
+        "valore_target": target,
+        "data_inizio": (date.today() - timedelta(weeks=6)).isoformat(),
+    }, headers=headers)
+    assert r.status_code == 201, r.text
+
+
+def test_goal_risks_worklist(client, auth_headers, catalog):
+    losing = _client(client, auth_headers, "Anna", "Bianchi")
+    gaining = _client(client, auth_headers, "Luca", "Verdi")
+    no_data = _client(client, auth_headers, "Sara", "Neri")
+
+    _weights(client, auth_headers, losing, [80.0, 79.6, 79.1, 78.7, 78.2])
+    _weights(client, auth_headers, gaining, [80.0, 80.4, 80.9, 81.3, 81.8])
+    for cid in (losing, gaining, no_data):
+        _goal(client, auth_headers, cid, 75.0)
+
+    r = client.get("/api/training-methodology/goal-risks", headers=auth_headers)
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["clients_analyzed"] == 3 and body["goals_analyzed"] == 3
+    assert [it["client_id"] for it in body["items"]] == [gaining]
+
+    item = body["items"][0]
+    assert [p["status"] for p in item["off_track"]] == ["wrong_direction"]
+    assert {f["code"] for f in item["risk_flags"]} == {"wrong_direction"}
+    assert item["alert_count"] == 1
+
+    # Stesso trend dell'endpoint per singolo cliente
+    single = client.get(f"/api/training-methodology/projection/{gaining}", headers=auth_headers).json()
+    assert single["projections"] == item["off_track"]
+    assert single["risk_flags"] == item["risk_flags"]
+    assert single["has_measurements"] is True
+
+    losing_proj = client.get(f"/api/training-methodology/projection/{losing}", headers=auth_headers).json()
+    assert losing_proj["projections"][0]["status"] == "projected"
+    assert losing_proj["trends"][0]["n_points"] == 5
@@ -0,0 +1,120 @@
+"""Connessioni riusate del layer legacy: profilo PRAGMA, scope annidati, ricreazione file, chiusura."""
+
+import gc
+import sqlite3
+import threading
+
+import pytest
+
+from api.database import close_legacy_connections
+from core.repositories.base_repository import (
+    BaseRepository,
+    close_pooled_connections,
+    connection_manager,
+)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    r = BaseRepository(tmp_path / "crm.db")
+    with r._connect() as conn:
+        conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, v TEXT)")
+    yield r
+    close_pooled_connections()
+
+
+def _values(repo):
+    with repo._connect() as conn:
+        return [row["v"] for row in conn.execute("SELECT v FROM t ORDER BY id")]
+
+
+def test_connection_reused_with_pragma_profile(repo):
+    with repo._connect() as first:
+        pass
+    with repo._connect() as second:
+        assert second is first
+        assert second.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert second.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+        assert second.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+
+
+def test_nested_scope_rolls_back_to_savepoint(repo):
+    with repo._connect() as conn:
+        conn.execute("INSERT INTO t (v) VALUES ('outer')")
+        with pytest.raises(RuntimeError):
+            with repo._connect() as inner:
+                inner.execute("INSERT INTO t (v) VALUES ('inner')")
+                raise RuntimeError("boom")
+        conn.execute("INSERT INTO t (v) VALUES ('after')")
+
+    assert _values(repo) == ["outer", "after"]
+
+
+def test_outer_failure_rolls_back_everything(repo):
+    with pytest.raises(sqlite3.IntegrityError):
+        with repo._connect() as conn:
+            conn.execute("INSERT INTO t (id, v) VALUES (1, 'a')")
+            conn.execute("INSERT INTO t (id, v) VALUES (1, 'dup')")
+
+    assert _values(repo) == []
+
+
+def test_replaced_file_reopens_connection(repo):
+    """Restore/ricreazione del file: la connessione in cache non punta piu' al DB giusto."""
+    with repo._connect() as old:
+        pass
+    repo.db_path.unlink()
+    for suffix in ("-wal", "-shm"):
+        repo.db_path.with_name(repo.db_path.name + suffix).unlink(missing_ok=True)
+    fresh = sqlite3.connect(repo.db_path)
+    fresh.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, v TEXT)")
+    fresh.close()
+
+    with repo._connect() as conn:
+        assert conn is not old
+        conn.execute("INSERT INTO t (v) VALUES ('x')")
+    assert _values(repo) == ["x"]
+
+
+def test_connections_are_per_thread(repo):
+    with repo._connect() as main_conn:
+        pass
+    seen = []
+
+    def worker():
+        with repo._connect() as conn:
+            seen.append(conn)
+
+    t = threading.Thread(target=worker)
+    t.start()
+    t.join()
+    assert seen and seen[0] is not main_conn
+
+
+def test_finished_thread_connection_is_closed(repo):
+    """Il pool del thread muore con il thread: connessione chiusa, nessun riferimento nel manager."""
+    seen = []
+
+    def worker():
+        with repo._connect() as conn:
+            seen.append(conn)
+
+    t = threading.Thread(target=worker)
+    t.start()
+    t.join()
+    del t
+    gc.collect()
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        seen[0].execute("SELECT 1")
+    assert len(connection_manager._pools) == 1     # solo il pool del thread principale
+
+
+def test_close_legacy_connections_from_api(repo):
+    with repo._connect() as conn:
+        pass
+    close_legacy_connections()
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+    with repo._connect() as fresh:
+        assert fresh is not conn
@@ -1,6 +1,16 @@
+import json
 import logging
+import threading
 
-from api.logging_config import configure_app_logging
+from fastapi.testclient import TestClient
+
+from api.logging_config import (
+    _LogPipeline,
+    bind_request_context,
+    configure_app_logging,
+    log_pipeline_stats,
+    shutdown_app_logging,
+)
 
 
 def test_configure_app_logging_uses_data_logs_and_is_idempotent(tmp_path):
@@ -44,3 +54,89 @@ def test_configure_app_logging_uses_data_logs_and_is_idempotent(tmp_path):
                 continue
             root_logger.removeHandler(handler)
             handler.close()
+
+
+def _detach(root_logger, before_handlers):
+    for handler in list(root_logger.handlers):
+        if handler in before_handlers:
+            continue
+        root_logger.removeHandler(handler)
+        handler.close()
+
+
+def test_json_format_carries_request_context(tmp_path):
+    root_logger = logging.getLogger()
+    before_handlers = list(root_logger.handlers)
+
+    try:
+        log_path = configure_app_logging(tmp_path, log_format="json")
+        handler = next(h for h in root_logger.handlers if getattr(h, "baseFilename", None) == str(log_path))
+
+        bind_request_context("req-1", "/api/clients")
+        logging.getLogger("fitmanager.test").info(
+            "Richiesta servita", extra={"duration_ms": 12.5},
+        )
+        handler.flush()
+
+        line = json.loads(log_path.read_text(encoding="utf-8").splitlines()[-1])
+        assert line["message"] == "Richiesta servita"
+        assert line["request_id"] == "req-1"
+        assert line["route"] == "/api/clients"
+        assert line["duration_ms"] == 12.5
+    finally:
+        bind_request_context(None, None)
+        _detach(root_logger, before_handlers)
+
+
+def test_full_queue_drops_low_priority_records(tmp_path):
+    release = threading.Event()
+
+    class SlowHandler(logging.Handler):
+        def emit(self, record):
+            release.wait(5)
+
+    pipeline = _LogPipeline(SlowHandler(), queue_size=1, overflow="drop")
+    try:
+        record = logging.makeLogRecord({"msg": "x", "levelno": logging.INFO})
+        for _ in range(5):
+            pipeline.put(record)  # mai bloccante
+        assert pipeline.dropped >= 3
+    finally:
+        release.set()
+        pipeline.stop()
+
+
+def test_shutdown_drains_queue_and_keeps_logging_synchronously(tmp_path):
+    root_logger = logging.getLogger()
+    before_handlers = list(root_logger.handlers)
+
+    try:
+        log_path = configure_app_logging(tmp_path)
+        log = logging.getLogger("fitmanager.test")
+        for i in range(50):
+            log.info("In coda %d", i)
+
+        shutdown_app_logging()
+        assert str(log_path.resolve()) not in log_pipeline_stats()
+        assert "In coda 49" in log_path.read_text(encoding="utf-8")
+
+        log.warning("Dopo lo shutdown")
+        assert "Dopo lo shutdown" in log_path.read_text(encoding="utf-8")
+    finally:
+        _detach(root_logger, before_handlers)
+
+
+def test_lifespan_shutdown_stops_log_pipelines(client, monkeypatch):
+    import api.main
+
+    calls = []
+    monkeypatch.setattr(api.main, "shutdown_app_logging", lambda: calls.append("stop"))
+    with TestClient(api.main.app):
+        assert calls == []
+    assert calls == ["stop"]
+
+
+def test_request_id_echoed_in_response(client):
+    r = client.get("/health", headers={"X-Request-ID": "abc123"})
+    assert r.headers["X-Request-ID"] == "abc123"
+    assert len(client.get("/health").headers["X-Request-ID"]) == 12
@@ -0,0 +1,50 @@
+import pytest
+
+from api.models.nutrition import Food
+from api.services.nutrition_science.nutrient_matrix import NutrientMatrix
+from api.services.nutrition_science.portion_optimizer import _calc_day_totals, optimize_day
+
+
+def _food(food_id: int, kcal: float, prot: float, carb: float, fat: float, **micro) -> Food:
+    return Food(
+        id=food_id, nome=f"Food {food_id}", categoria_id=1,
+        energia_kcal=kcal, proteine_g=prot, carboidrati_g=carb, grassi_g=fat,
+        **micro,
+    )
+
+
+PASTA = _food(1, 353.0, 12.9, 72.2, 1.5, fibra_g=2.7, ferro_mg=1.4)
+POLLO = _food(2, 110.0, 23.3, 0.0, 1.2, ferro_mg=0.4, vitamina_b12_ug=0.4)
+OLIO = _food(3, 899.0, 0.0, 0.0, 99.9)
+
+
+def _day():
+    return [
+        ("PRANZO", [(PASTA, 80.0, "carb_cooked"), (OLIO, 10.0, "fat")]),
+        ("CENA", [(POLLO, 150.0, "protein_poultry"), (OLIO, 10.0, "fat")]),
+    ]
+
+
+def test_nutrient_matrix_totals_match_per_food_sum():
+    matrix = NutrientMatrix([PASTA, POLLO, OLIO])
+
+    totals = matrix.totals_dict([1, 2, 3, 99], [80.0, 150.0, 20.0, 500.0])
+
+    assert totals["energia_kcal"] == pytest.approx(353.0 * 0.8 + 110.0 * 1.5 + 899.0 * 0.2)
+    assert totals["ferro_mg"] == pytest.approx(1.4 * 0.8 + 0.4 * 1.5)
+    assert totals["vitamina_c_mg"] == 0.0
+    assert matrix.has_data[matrix.row_index[1], matrix.field_index["fibra_g"]]
+    assert not matrix.has_data[matrix.row_index[3], matrix.field_index["fibra_g"]]
+
+
+def test_day_totals_are_identical_with_shared_or_local_matrix():
+    shared = NutrientMatrix([PASTA, POLLO, OLIO])
+
+    local_totals = _calc_day_totals(_day())
+    shared_totals = _calc_day_totals(_day(), shared)
+
+    assert local_totals == pytest.approx(shared_totals)
+    assert local_totals["kcal"] == pytest.approx(353.0 * 0.8 + 110.0 * 1.5 + 899.0 * 0.2)
+    assert local_totals["vitamina_b12_ug"] == pytest.approx(0.4 * 1.5)
+
+    assert optimize_day(_day(), 1800, 90, 60) == optimize_day(_day(), 1800, 90, 60, matrix=shared)
@@ -0,0 +1,63 @@
+from sqlalchemy import event
+from sqlmodel import select
+
+from api.models.client import Client
+from api.models.nutrition import MealComponent, NutritionPlan, PlanMeal
+from api.models.trainer import Trainer
+from api.routers.nutrition import _persist_meals
+
+
+def test_persist_meals_uses_fixed_number_of_inserts(session, test_engine):
+    trainer = Trainer(email="bulk@test.it", nome="Bulk", cognome="Trainer", hashed_password="x")
+    session.add(trainer)
+    session.flush()
+    client = Client(trainer_id=trainer.id, nome="Mario", cognome="Rossi")
+    session.add(client)
+    session.flush()
+    other = NutritionPlan(trainer_id=trainer.id, id_cliente=client.id, nome="Piano precedente")
+    plan = NutritionPlan(trainer_id=trainer.id, id_cliente=client.id, nome="Settimana tipo")
+    session.add_all([other, plan])
+    session.flush()
+    # Pasti gia' presenti: gli id del batch non partono da 1
+    session.add_all([PlanMeal(piano_id=other.id, tipo_pasto="PRANZO") for _ in range(3)])
+    session.flush()
+
+    meals = [
+        (
+            {"piano_id": plan.id, "giorno_settimana": giorno, "tipo_pasto": tipo, "ordine": ordine},
+            [{"alimento_id": 100 * giorno + ordine, "quantita_g": 50.0 + k} for k in range(4)],
+        )
+        for giorno in range(1, 8)
+        for ordine, tipo in enumerate(["COLAZIONE", "SPUNTINO", "PRANZO", "MERENDA", "CENA"])
+    ]
+
+    inserts: list[str] = []
+
+    def _track(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("INSERT"):
+            inserts.append(statement)
+
+    event.listen(test_engine, "before_cursor_execute", _track)
+    try:
+        total = _persist_meals(session, meals)
+        session.commit()
+    finally:
+        event.remove(test_engine, "before_cursor_execute", _track)
+
+    assert total == 35 * 4
+    assert len(inserts) == 2  # 1 batch pasti + 1 batch componenti
+
+    saved_meals = session.exec(select(PlanMeal).where(PlanMeal.piano_id == plan.id)).all()
+    assert len(saved_meals) == 35
+    saved_components = session.exec(
+        select(MealComponent).where(MealComponent.pasto_id.in_([m.id for m in saved_meals]))
+    ).all()
+    assert len(saved_components) == 140
+    meal_by_id = {m.id: m for m in saved_meals}
+    by_meal: dict[int, int] = {}
+    for comp in saved_components:
+        by_meal[comp.pasto_id] = by_meal.get(comp.pasto_id, 0) + 1
+        # Ogni componente punta al pasto giusto (giorno/ordine codificati nell'alimento)
+        meal = meal_by_id[comp.pasto_id]
+        assert comp.alimento_id == 100 * meal.giorno_settimana + meal.ordine
+    assert set(by_meal.values()) == {4}
@@ -0,0 +1,119 @@
+"""Letture piani alimentari: percorso ATTACH e fallback devono coincidere."""
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine
+
+from api.database import (
+    NUTRITION_ATTACH_SCHEMA,
+    NUTRITION_TABLE_NAMES,
+    attach_reference_databases,
+    has_reference_attach,
+)
+from api.models import *  # noqa: F401, F403
+from api.models.nutrition import Food, FoodCategory, MealComponent, NutritionPlan, PlanMeal
+from api.models.trainer import Trainer
+from api.services.nutrition_plan_reads import load_plan_components, sum_plan_nutrients
+
+
+@pytest.fixture
+def dbs(tmp_path):
+    nutrition_path = tmp_path / "nutrition.db"
+    nutrition_engine = create_engine(f"sqlite:///{nutrition_path}")
+    SQLModel.metadata.create_all(
+        nutrition_engine,
+        tables=[t for t in SQLModel.metadata.sorted_tables if t.name in NUTRITION_TABLE_NAMES],
+    )
+    with Session(nutrition_engine) as s:
+        s.add(FoodCategory(id=1, nome="Cereali e derivati", nome_en="Cereals"))
+        s.add(Food(
+            id=10, nome="Pasta", categoria_id=1,
+            energia_kcal=350.0, proteine_g=12.0, carboidrati_g=72.0, grassi_g=1.5,
+            ferro_mg=1.4,
+        ))
+        s.add(Food(
+            id=11, nome="Riso", categoria_id=1,
+            energia_kcal=330.0, proteine_g=7.0, carboidrati_g=80.0, grassi_g=0.6,
+        ))
+        s.commit()
+
+    def _business_engine(name: str, attach: bool):
+        engine = create_engine(
+            f"sqlite:///{tmp_path / name}",
+            connect_args={"uri": True} if attach else {},
+        )
+        if attach:
+            attach_reference_databases(engine, {NUTRITION_ATTACH_SCHEMA: nutrition_path})
+        SQLModel.metadata.create_all(
+            engine,
+            tables=[t for t in SQLModel.metadata.sorted_tables if t.name not in NUTRITION_TABLE_NAMES],
+        )
+        with Session(engine) as s:
+            s.add(Trainer(id=1, email="t@t.it", nome="T", cognome="T", hashed_password="x"))
+            s.add(NutritionPlan(id=1, trainer_id=1, id_cliente=1, nome="Piano"))
+            s.add(PlanMeal(id=1, piano_id=1, giorno_settimana=1, tipo_pasto="PRANZO"))
+            s.add(MealComponent(id=1, pasto_id=1, alimento_id=10, quantita_g=80.0))
+            s.add(MealComponent(id=2, pasto_id=1, alimento_id=11, quantita_g=50.0))
+            s.commit()
+        return engine
+
+    return _business_engine("attached.db", True), _business_engine("plain.db", False), nutrition_engine
+
+
+def test_attached_and_fallback_reads_match(dbs):
+    attached_engine, plain_engine, nutrition_engine = dbs
+
+    with Session(attached_engine) as attached, Session(plain_engine) as plain, \
+            Session(nutrition_engine) as nutrition:
+        assert has_reference_attach(attached) is True
+        assert has_reference_attach(plain) is False
+
+        comps_a, foods_a, cats_a = load_plan_components(attached, nutrition, [1])
+        comps_p, foods_p, cats_p = load_plan_components(plain, nutrition, [1])
+        assert sorted(c.id for c in comps_a) == sorted(c.id for c in comps_p) == [1, 2]
+        assert {k: f.nome for k, f in foods_a.items()} == {k: f.nome for k, f in foods_p.items()}
+        assert cats_a == cats_p == {1: "Cereali e derivati"}
+
+        fields = ("energia_kcal", "proteine_g", "ferro_mg", "vitamina_c_mg")
+        totals_a = sum_plan_nutrients(attached, nutrition, [1], fields)
+        totals_p = sum_plan_nutrients(plain, nutrition, [1], fields)
+        assert totals_a == pytest.approx(totals_p)
+        assert totals_a["energia_kcal"] == pytest.approx(350.0 * 0.8 + 330.0 * 0.5)
+        assert totals_a["ferro_mg"] == pytest.approx(1.4 * 0.8)
+        assert totals_a["vitamina_c_mg"] is None
+
+        assert sum_plan_nutrients(attached, nutrition, [999]) is None
+        assert sum_plan_nutrients(plain, nutrition, [999]) is None
+
+
+def test_attached_nutrition_schema_is_read_only(dbs):
+    attached_engine, _, _ = dbs
+
+    with attached_engine.connect() as conn:
+        raw = conn.connection.dbapi_connection
+        with pytest.raises(Exception, match="readonly"):
+            raw.execute(f"DELETE FROM {NUTRITION_ATTACH_SCHEMA}.alimenti")
+
+
+def test_attach_waits_for_reference_db_created_later(tmp_path):
+    """Prima installazione: il business DB nasce prima di nutrition.db."""
+    nutrition_path = tmp_path / "nutrition.db"
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'business.db'}",
+        connect_args={"uri": True},
+    )
+    attach_reference_databases(engine, {NUTRITION_ATTACH_SCHEMA: nutrition_path})
+
+    with Session(engine) as s:
+        assert has_reference_attach(s) is False
+    assert not nutrition_path.exists()
+
+    nutrition_engine = create_engine(f"sqlite:///{nutrition_path}")
+    SQLModel.metadata.create_all(
+        nutrition_engine,
+        tables=[t for t in SQLModel.metadata.sorted_tables if t.name in NUTRITION_TABLE_NAMES],
+    )
+    nutrition_engine.dispose()
+
+    # La connessione gia' in pool aggancia il DB al checkout successivo
+    with Session(engine) as s:
+        assert has_reference_attach(s) is True
@@ -0,0 +1,126 @@
+"""Cache analisi piani per contenuto: worklist senza ricalcolo, warm-up al salvataggio, parita' col calcolo diretto."""
+
+from datetime import date, timedelta
+
+import pytest
+from sqlmodel import func, select
+
+from api.models.exercise import Exercise
+from api.models.plan_analysis import PlanAnalysisCache
+from api.services import plan_analysis_cache
+from api.services.plan_analysis_cache import PlanAnalyses, load_plan_templates
+from api.services.training_science.plan_analyzer import analyze_plan
+
+_PATTERNS = ("squat", "push_h", "pull_h", "hinge", "push_v", "pull_v")
+
+
+@pytest.fixture
+def exercise_ids(session):
+    rows = [
+        Exercise(
+            nome=f"Esercizio {pattern}", categoria="compound", pattern_movimento=pattern,
+            muscoli_primari='["quadriceps"]', attrezzatura="barbell", difficolta="intermediate",
+        )
+        for pattern in _PATTERNS
+    ]
+    session.add_all(rows)
+    session.commit()
+    return [r.id for r in rows]
+
+
+def _sessions(exercise_ids, serie=3):
+    return [
+        {
+            "nome_sessione": f"Giorno {n}",
+            "esercizi": [
+                {"id_esercizio": ex_id, "ordine": i + 1, "serie": serie, "ripetizioni": "8-12"}
+                for i, ex_id in enumerate(exercise_ids[n::2])
+            ],
+        }
+        for n in range(2)
+    ]
+
+
+@pytest.fixture
+def plan(client, auth_headers, sample_client, exercise_ids):
+    r = client.post("/api/workouts", json={
+        "id_cliente": sample_client["id"], "nome": "Full body", "obiettivo": "ipertrofia",
+        "livello": "intermedio", "sessioni_per_settimana": 2, "sessioni": _sessions(exercise_ids),
+    }, headers=auth_headers)
+    assert r.status_code == 201, r.text
+    plan = r.json()
+    today = date.today()
+    r = client.put(f"/api/workouts/{plan['id']}", json={
+        "data_inizio": (today - timedelta(days=14)).isoformat(),
+        "data_fine": (today + timedelta(days=14)).isoformat(),
+    }, headers=auth_headers)
+    assert r.status_code == 200, r.text
+    return plan
+
+
+@pytest.fixture
+def analyze_calls(monkeypatch):
+    calls = []
+
+    def counting(template):
+        calls.append(template)
+        return analyze_plan(template)
+
+    monkeypatch.setattr(plan_analysis_cache, "analyze_plan", counting)
+    return calls
+
+
+def _cache_rows(session) -> int:
+    return session.exec(select(func.count()).select_from(PlanAnalysisCache)).one()
+
+
+def test_plan_save_warms_cache_and_worklist_reuses_it(client, auth_headers, session, plan, analyze_calls):
+    # Il warm-up al salvataggio ha gia' calcolato l'analisi del piano
+    assert _cache_rows(session) >= 1
+
+    first = client.get("/api/training-methodology/worklist", headers=auth_headers)
+    assert first.status_code == 200
+    item = first.json()["items"][0]
+    assert item["analyzable"] is True
+    assert item["science_score"] > 0
+
+    analyze_calls.clear()
+    second = client.get("/api/training-methodology/worklist", headers=auth_headers)
+    assert second.json() == first.json()
+    assert analyze_calls == []
+
+    r = client.get(f"/api/training-methodology/projection/{plan['id_cliente']}", headers=auth_headers)
+    assert r.status_code == 200
+    assert analyze_calls == []
+
+
+def test_changed_sessions_produce_new_entry(client, auth_headers, session, plan, exercise_ids, analyze_calls):
+    client.get("/api/training-methodology/worklist", headers=auth_headers)
+    before = _cache_rows(session)
+    analyze_calls.clear()
+
+    r = client.put(f"/api/workouts/{plan['id']}/sessions", json=_sessions(exercise_ids, serie=5), headers=auth_headers)
+    assert r.status_code == 200
+    assert len(analyze_calls) == 1                     # warm-up del nuovo contenuto
+    session.expire_all()
+    assert _cache_rows(session) == before + 1
+
+    analyze_calls.clear()
+    r = client.get("/api/training-methodology/worklist", headers=auth_headers)
+    assert r.status_code == 200
+    assert analyze_calls == []
+
+
+def test_cached_analysis_matches_direct_analysis(client, session, plan):
+    from api.models.client import Client
+    from api.models.workout import WorkoutPlan
+
+    db_plan = session.get(WorkoutPlan, plan["id"])
+    db_client = session.get(Client, db_plan.id_cliente)
+    template = load_plan_templates(session, [db_plan], {db_client.id: db_client})[db_plan.id]
+
+    cold = PlanAnalyses(session)
+    cold.prefetch([template])
+    cached = cold.analyze(template)
+    assert cold.hits == 1
+    assert cached.model_dump() == analyze_plan(template).model_dump()
@@ -0,0 +1,103 @@
+"""Contatori crediti PT mantenuti dall'agenda + riconciliazione del drift."""
+
+from sqlmodel import update
+
+from api.models.client import Client
+from api.models.contract import Contract
+
+
+def _contract(client, headers, client_id, crediti=5):
+    r = client.post("/api/contracts", json={
+        "id_cliente": client_id,
+        "tipo_pacchetto": f"PT {crediti}",
+        "crediti_totali": crediti,
+        "prezzo_totale": 500.0,
+        "data_inizio": "2026-01-01",
+        "data_scadenza": "2026-12-31",
+    }, headers=headers)
+    assert r.status_code == 201, r.text
+    return r.json()
+
+
+def _pt_event(client, headers, client_id, day):
+    r = client.post("/api/events", json={
+        "data_inizio": f"2026-03-{day:02d}T10:00:00+00:00",
+        "data_fine": f"2026-03-{day:02d}T11:00:00+00:00",
+        "categoria": "PT",
+        "titolo": "Seduta",
+        "id_cliente": client_id,
+    }, headers=headers)
+    assert r.status_code == 201, r.text
+    return r.json()
+
+
+def _credits(client, headers, client_id, contract_id):
+    contract = client.get(f"/api/contracts/{contract_id}", headers=headers).json()
+    customer = client.get(f"/api/clients/{client_id}", headers=headers).json()
+    return contract["crediti_usati"], contract["crediti_residui"], customer["crediti_residui"]
+
+
+def test_counters_follow_agenda_mutations(client, auth_headers, sample_client):
+    cid = sample_client["id"]
+    contract = _contract(client, auth_headers, cid)
+    first = _pt_event(client, auth_headers, cid, 2)
+    second = _pt_event(client, auth_headers, cid, 3)
+    assert first["id_contratto"] == contract["id"]
+    assert _credits(client, auth_headers, cid, contract["id"]) == (2, 3, 3)
+
+    r = client.put(f"/api/events/{first['id']}", json={"stato": "Cancellato"}, headers=auth_headers)
+    assert r.status_code == 200
+    assert _credits(client, auth_headers, cid, contract["id"]) == (1, 4, 4)
+
+    r = client.put(f"/api/events/{first['id']}", json={"stato": "Completato"}, headers=auth_headers)
+    assert _credits(client, auth_headers, cid, contract["id"]) == (2, 3, 3)
+
+    assert client.delete(f"/api/events/{second['id']}", headers=auth_headers).status_code == 204
+    assert _credits(client, auth_headers, cid, contract["id"]) == (1, 4, 4)
+
+    r = client.put(f"/api/contracts/{contract['id']}", json={"crediti_totali": 8}, headers=auth_headers)
+    assert r.status_code == 200
+    assert _credits(client, auth_headers, cid, contract["id"]) == (1, 7, 7)
+
+    listed = client.get("/api/contracts", headers=auth_headers).json()["items"]
+    assert listed[0]["crediti_usati"] == 1
+
+    r = client.post("/api/contracts/credits/reconcile", headers=auth_headers)
+    assert r.json()["contratti"] == [] and r.json()["clienti"] == []
+
+
+def test_fifo_moves_to_next_contract_when_exhausted(client, auth_headers, sample_client):
+    cid = sample_client["id"]
+    older = _contract(client, auth_headers, cid, crediti=1)
+    newer = _contract(client, auth_headers, cid, crediti=3)
+
+    assert _pt_event(client, auth_headers, cid, 2)["id_contratto"] == older["id"]
+    assert _pt_event(client, auth_headers, cid, 3)["id_contratto"] == newer["id"]
+
+    customer = client.get(f"/api/clients/{cid}", headers=auth_headers).json()
+    assert customer["crediti_residui"] == 2
+
+
+def test_reconcile_detects_and_repairs_drift(client, auth_headers, sample_client, session):
+    cid = sample_client["id"]
+    contract = _contract(client, auth_headers, cid)
+    _pt_event(client, auth_headers, cid, 2)
+
+    # Drift simulato: scrittura esterna che non passa dall'API
+    session.exec(update(Contract).where(Contract.id == contract["id"]).values(crediti_usati=0))
+    session.exec(update(Client).where(Client.id == cid).values(crediti_residui=99))
+    session.commit()
+
+    r = client.post("/api/contracts/credits/reconcile?dry_run=true", headers=auth_headers)
+    assert r.status_code == 200
+    body = r.json()
+    assert body["corretto"] is False
+    assert body["contratti"] == [{"id": contract["id"], "salvato": 0, "atteso": 1}]
+    assert body["clienti"] == [{"id": cid, "salvato": 99, "atteso": 4}]
+
+    r = client.post("/api/contracts/credits/reconcile", headers=auth_headers)
+    assert r.json()["corretto"] is True
+    assert _credits(client, auth_headers, cid, contract["id"]) == (1, 4, 4)
+
+    r = client.post("/api/contracts/credits/reconcile", headers=auth_headers)
+    assert r.json()["contratti"] == [] and r.json()["clienti"] == []
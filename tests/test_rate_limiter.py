@@ -0,0 +1,51 @@
+from api.services.rate_limiter import RateLimit, TokenBucketLimiter
+
+
+class _FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_token_bucket_blocks_burst_and_refills_over_time():
+    clock = _FakeClock()
+    limiter = TokenBucketLimiter([RateLimit(3, 60.0)], clock=clock)
+
+    assert [limiter.allow("1.2.3.4") for _ in range(4)] == [True, True, True, False]
+
+    clock.now = 20.0  # 1 token ricaricato (3 token / 60s)
+    assert limiter.allow("1.2.3.4") is True
+    assert limiter.allow("1.2.3.4") is False
+
+
+def test_token_bucket_enforces_every_window():
+    clock = _FakeClock()
+    limiter = TokenBucketLimiter(
+        [RateLimit(10, 60.0), RateLimit(12, 3600.0)],
+        clock=clock,
+    )
+
+    assert all(limiter.allow("ip") for _ in range(10))
+    assert limiter.allow("ip") is False
+
+    # Dopo un minuto il bucket per-minuto e' pieno, quello orario quasi vuoto
+    clock.now = 60.0
+    assert limiter.allow("ip") is True
+    assert limiter.allow("ip") is True
+    assert limiter.allow("ip") is False
+
+
+def test_token_bucket_evicts_least_recently_used_keys():
+    clock = _FakeClock()
+    limiter = TokenBucketLimiter([RateLimit(1, 60.0)], max_keys=2, clock=clock)
+
+    assert limiter.allow("a") is True
+    assert limiter.allow("b") is True
+    assert limiter.allow("a") is False  # "a" diventa la chiave piu' recente
+    assert limiter.allow("c") is True   # espelle "b"
+
+    assert len(limiter) == 2
+    assert limiter.allow("b") is True   # "b" ripartita da bucket pieno
+    assert limiter.allow("a") is True   # "a" espulsa da "b" -> bucket pieno
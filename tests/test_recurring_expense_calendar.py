@@ -0,0 +1,99 @@
+"""Calendario occorrenze spese ricorrenti: espansione condivisa, memo per versione, join conferme."""
+
+from datetime import date
+
+import pytest
+from sqlmodel import select
+
+from api.models.movement import CashMovement
+from api.models.recurring_expense import RecurringExpense
+from api.models.trainer import Trainer
+from api.services.recurring_expense_schedule import (
+    clear_recurring_expense_calendar_cache,
+    get_recurring_expense_occurrences_in_month,
+    load_recurring_expense_calendar,
+)
+from api.services.runtime_metrics import metrics_summary, reset_metrics
+
+MONTHS = [(2026, m) for m in range(1, 13)] + [(2027, 1), (2027, 2)]
+
+
+@pytest.fixture
+def trainer_id(client, auth_headers, session):
+    clear_recurring_expense_calendar_cache()
+    return session.exec(select(Trainer.id)).first()
+
+
+def _expenses(session, trainer_id):
+    rows = [
+        RecurringExpense(trainer_id=trainer_id, nome="Affitto", importo=800, frequenza="MENSILE",
+                         giorno_scadenza=31, data_inizio=date(2026, 1, 10)),
+        RecurringExpense(trainer_id=trainer_id, nome="Pulizie", importo=40, frequenza="SETTIMANALE",
+                         giorno_scadenza=3, data_inizio=date(2026, 2, 1)),
+        RecurringExpense(trainer_id=trainer_id, nome="Commercialista", importo=300, frequenza="TRIMESTRALE",
+                         giorno_scadenza=15, data_inizio=date(2026, 2, 1)),
+        RecurringExpense(trainer_id=trainer_id, nome="Software", importo=120, frequenza="SEMESTRALE",
+                         giorno_scadenza=30, data_inizio=date(2025, 11, 5)),
+        RecurringExpense(trainer_id=trainer_id, nome="Assicurazione", importo=600, frequenza="ANNUALE",
+                         giorno_scadenza=29, data_inizio=date(2024, 2, 1)),
+        RecurringExpense(trainer_id=trainer_id, nome="Vecchia", importo=10, attiva=False,
+                         data_inizio=date(2026, 1, 1)),
+    ]
+    session.add_all(rows)
+    session.commit()
+    return [r for r in rows if r.attiva]
+
+
+def _cache_counts():
+    for cache in metrics_summary()["caches"]:
+        if cache["name"] == "recurring_calendar":
+            return cache["hits"], cache["misses"]
+    return 0, 0
+
+
+def test_calendar_matches_per_month_expansion(session, trainer_id):
+    active = _expenses(session, trainer_id)
+    schedule = load_recurring_expense_calendar(trainer_id=trainer_id, session=session, months=MONTHS)
+
+    expected = sorted(
+        (due, e.nome, key)
+        for anno, mese in MONTHS
+        for e in active
+        for due, key in get_recurring_expense_occurrences_in_month(e, anno, mese)
+    )
+    assert sorted((o.due_date, o.nome, o.occurrence_key) for o in schedule.occurrences) == expected
+    assert [o.due_date for o in schedule.occurrences] == sorted(o.due_date for o in schedule.occurrences)
+    assert schedule.in_month(2026, 2) and all(o.due_date.month == 2 for o in schedule.in_month(2026, 2))
+    assert schedule.monthly_estimate == pytest.approx(800 + 40 * 4.33 + 300 / 3 + 120 / 6 + 600 / 12)
+
+
+def test_memoized_per_expense_set_version_and_confirmations_joined(session, trainer_id):
+    active = _expenses(session, trainer_id)
+    reset_metrics()
+    months = [(2026, 3)]
+
+    first = load_recurring_expense_calendar(trainer_id=trainer_id, session=session, months=months)
+    again = load_recurring_expense_calendar(trainer_id=trainer_id, session=session, months=months)
+    assert again.occurrences is first.occurrences
+    assert _cache_counts() == (1, 1)
+
+    # Conferma nel ledger: niente nuova espansione, occorrenza non piu' pending
+    affitto = active[0]
+    session.add(CashMovement(
+        trainer_id=trainer_id, data_effettiva=date(2026, 3, 31), tipo="USCITA", categoria="SPESA_FISSA",
+        importo=800, id_spesa_ricorrente=affitto.id, mese_anno="2026-03",
+    ))
+    session.commit()
+    confirmed = load_recurring_expense_calendar(trainer_id=trainer_id, session=session, months=months)
+    assert confirmed.occurrences is first.occurrences
+    assert (affitto.id, "2026-03") in confirmed.confirmed
+    assert len(confirmed.pending()) == len(first.pending()) - 1
+
+    # Modifica della spesa: nuova versione, nuova espansione
+    affitto.giorno_scadenza = 5
+    session.add(affitto)
+    session.commit()
+    edited = load_recurring_expense_calendar(trainer_id=trainer_id, session=session, months=months)
+    assert edited.occurrences is not first.occurrences
+    assert date(2026, 3, 5) in {o.due_date for o in edited.occurrences if o.expense_id == affitto.id}
+    assert _cache_counts() == (2, 2)
@@ -0,0 +1,129 @@
+"""Cache ETag dati di riferimento: 304 senza ricalcolo, invalidazione per versione, isolamento trainer."""
+
+import os
+
+from sqlalchemy import event
+from sqlmodel import create_engine, select
+
+from api.models.trainer import Trainer
+from api.services import response_cache
+
+VOLUME_URL = "/api/training-science/volume-targets?livello=intermedio&obiettivo=ipertrofia"
+
+
+def _count_queries(engine):
+    counter = {"n": 0}
+
+    def before(*args, **kwargs):
+        counter["n"] += 1
+
+    event.listen(engine, "before_cursor_execute", before)
+    return counter, lambda: event.remove(engine, "before_cursor_execute", before)
+
+
+def test_conditional_get_returns_304_without_recompute(client, auth_headers, test_engine):
+    first = client.get(VOLUME_URL, headers=auth_headers)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert etag.startswith('"') and not etag.startswith("W/")
+    assert first.headers["cache-control"] == "private, no-cache"
+
+    counter, stop = _count_queries(test_engine)
+    try:
+        cached = client.get(VOLUME_URL, headers=auth_headers)
+        not_modified = client.get(VOLUME_URL, headers={**auth_headers, "If-None-Match": etag})
+    finally:
+        stop()
+
+    assert cached.status_code == 200
+    assert cached.content == first.content
+    assert cached.headers["etag"] == etag
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["etag"] == etag
+    assert counter["n"] == 2        # solo trainers.is_active, una lettura per hit
+
+
+def test_exercise_mutation_bumps_version(client, auth_headers):
+    r = client.post("/api/exercises", json={
+        "nome": "Panca Test", "categoria": "compound", "pattern_movimento": "push_h",
+        "muscoli_primari": ["chest"], "attrezzatura": "barbell", "difficolta": "intermediate",
+    }, headers=auth_headers)
+    assert r.status_code == 201, r.text
+    exercise_id = r.json()["id"]
+    url = f"/api/exercises/{exercise_id}"
+
+    first = client.get(url, headers=auth_headers)
+    etag = first.headers["etag"]
+    assert client.get(url, headers={**auth_headers, "If-None-Match": etag}).status_code == 304
+
+    r = client.put(url, json={"nome": "Panca Test Rinominata"}, headers=auth_headers)
+    assert r.status_code == 200
+
+    after = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+    assert after.status_code == 200
+    assert after.json()["nome"] == "Panca Test Rinominata"
+    assert after.headers["etag"] != etag
+
+
+def test_cache_is_per_trainer_and_requires_auth(client, auth_headers):
+    r = client.post("/api/exercises", json={
+        "nome": "Privato", "categoria": "compound", "pattern_movimento": "squat",
+        "muscoli_primari": ["quadriceps"], "attrezzatura": "barbell", "difficolta": "beginner",
+    }, headers=auth_headers)
+    url = f"/api/exercises/{r.json()['id']}"
+    assert client.get(url, headers=auth_headers).status_code == 200
+
+    r = client.post("/api/auth/register", json={
+        "email": "altro@test.com", "nome": "Altro", "cognome": "Trainer", "password": "testpass123",
+    })
+    other = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    assert client.get(url, headers=other).status_code == 404
+    assert client.get(url).status_code in (401, 403)
+
+
+def test_catalog_version_follows_catalog_registry(tmp_path, monkeypatch):
+    db = tmp_path / "catalog.db"
+    db.write_bytes(b"v1")
+    sidecar = tmp_path / "catalog.sha256"
+    sidecar.write_text("aaaa  catalog.db\n")
+    engine = create_engine(f"sqlite:///{db}")
+    monkeypatch.setattr(response_cache, "catalog_engine", engine)
+
+    before = response_cache.scope_versions(("catalog",))
+    assert before == ((response_cache._counters["catalog"], "aaaa"),)
+
+    # Rebuild offline: build_catalog.py riscrive il sidecar
+    sidecar.write_text("bbbbbb  catalog.db\n")
+    assert response_cache.scope_versions(("catalog",)) != before
+
+    stamp = response_cache.scope_versions(("catalog",))
+    response_cache.bump_cache_version("catalog")
+    assert response_cache.scope_versions(("catalog",)) != stamp
+
+
+def test_nutrition_file_change_changes_version(tmp_path, monkeypatch):
+    db = tmp_path / "nutrition.db"
+    db.write_bytes(b"v1")
+    monkeypatch.setattr(response_cache, "_NUTRITION_PATH", db)
+
+    before = response_cache.scope_versions(("nutrition",))
+    assert response_cache.scope_versions(("nutrition",)) == before
+
+    db.write_bytes(b"v2-rebuilt")
+    os.utime(db, ns=(1, 1))
+    assert response_cache.scope_versions(("nutrition",)) != before
+
+
+def test_cache_hit_rejected_for_deactivated_trainer(client, auth_headers, session):
+    first = client.get(VOLUME_URL, headers=auth_headers)
+    assert first.status_code == 200
+
+    trainer = session.exec(select(Trainer)).first()
+    trainer.is_active = False
+    session.add(trainer)
+    session.commit()
+
+    assert client.get(VOLUME_URL, headers=auth_headers).status_code == 401
+    etag = first.headers["etag"]
+    assert client.get(VOLUME_URL, headers={**auth_headers, "If-None-Match": etag}).status_code == 401
@@ -0,0 +1,60 @@
+"""Metriche runtime: /metrics Prometheus (solo localhost) + riepilogo nel support snapshot."""
+
+from fastapi.testclient import TestClient
+
+from api.main import app
+from api.services.runtime_metrics import metrics_summary, record_cache, reset_metrics
+
+
+def test_metrics_local_only(client):
+    r = client.get("/metrics")  # host "testclient": non locale
+    assert r.status_code == 403
+
+
+def test_metrics_prometheus_text(client, auth_headers, sample_client):
+    reset_metrics()
+    client.get("/api/clients", headers=auth_headers)
+    client.get(f"/api/clients/{sample_client['id']}", headers=auth_headers)
+    client.get("/api/non-esiste", headers=auth_headers)
+    record_cache("response", hits=3, misses=1)
+
+    local = TestClient(app, client=("127.0.0.1", 50000))
+    r = local.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    body = r.text
+
+    assert 'fitmanager_http_requests_total{method="GET",route="/api/clients/{client_id}",status="200"} 1' in body
+    assert 'route="unmatched",status="404"' in body
+    assert 'fitmanager_http_request_duration_seconds_bucket{method="GET",route="/api/clients",le="+Inf"} 1' in body
+    assert 'fitmanager_cache_hits_total{cache="response"} 3' in body
+    for engine in ("business", "catalog", "nutrition"):
+        assert f'fitmanager_db_checkouts_total{{engine="{engine}"}}' in body
+    assert 'fitmanager_pool_workers{pool="analytics"}' in body
+
+    summary = metrics_summary()
+    assert summary["requests_total"] >= 3
+    assert {c["name"]: c["hit_rate"] for c in summary["caches"]}["response"] == 0.75
+    assert [d["engine"] for d in summary["databases"]] == ["business", "catalog", "nutrition"]
+
+
+def test_pre_routing_responses_labelled(client, auth_headers, monkeypatch):
+    from api.services.license import LicenseCheckResult
+
+    url = "/api/training-science/volume-targets?livello=intermedio&obiettivo=ipertrofia"
+    reset_metrics()
+    client.get(url, headers=auth_headers)
+    assert client.get(url, headers=auth_headers).status_code == 200   # hit: nessun routing
+
+    monkeypatch.setenv("LICENSE_ENFORCEMENT_ENABLED", "true")
+    monkeypatch.setattr("api.main.check_license", lambda: LicenseCheckResult(status="expired", message="x"))
+    assert client.get("/api/clients", headers=auth_headers).status_code == 403
+    monkeypatch.setenv("LICENSE_ENFORCEMENT_ENABLED", "false")
+
+    body = TestClient(app, client=("127.0.0.1", 50000)).get("/metrics").text
+    assert (
+        'fitmanager_http_requests_total{method="GET",'
+        'route="/api/training-science/volume-targets",status="200"} 2'
+    ) in body
+    assert 'route="license_denied",status="403"' in body
+    assert 'route="unmatched"' not in body
@@ -0,0 +1,115 @@
+"""Safety map batch: stessi risultati della singola, numero di query indipendente dai clienti."""
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from api.models.anamnesi_facts import ClientAnamnesiFacts, ClientConditionFact
+from api.models.client import Client
+from api.models.exercise import Exercise
+from api.models.medical_condition import ExerciseCondition, MedicalCondition
+from api.models.trainer import Trainer
+from api.services import safety_engine
+from api.services.anamnesi_facts import FACTS_VERSION
+from api.services.safety_engine import build_safety_map, build_safety_maps
+
+
+@pytest.fixture(autouse=True)
+def _fresh_index_cache(monkeypatch):
+    # Tutti i test usano "sqlite:///:memory:": la cache non deve sopravvivere al test
+    monkeypatch.setattr(safety_engine, "_condition_index_cache", {})
+
+
+@pytest.fixture
+def roster(session):
+    trainer = Trainer(email="s@s.it", nome="S", cognome="S", hashed_password="x")
+    other = Trainer(email="o@o.it", nome="O", cognome="O", hashed_password="x")
+    session.add_all([trainer, other])
+    session.flush()
+
+    session.add_all([
+        MedicalCondition(id=1, nome="Lombalgia", nome_en="Low back pain", categoria="orthopedic",
+                         body_tags='["schiena"]'),
+        MedicalCondition(id=2, nome="Ipertensione", nome_en="Hypertension", categoria="cardiovascular"),
+    ])
+    exercises = [
+        Exercise(nome=f"Es {i}", categoria="compound", pattern_movimento="hinge",
+                 muscoli_primari="[]", attrezzatura="barbell", difficolta="beginner",
+                 in_subset=i != 3)
+        for i in range(1, 5)
+    ]
+    session.add_all(exercises)
+    session.flush()
+    e1, e2, e3, e4 = (e.id for e in exercises)
+    session.add_all([
+        ExerciseCondition(id_esercizio=e1, id_condizione=1, severita="caution"),
+        ExerciseCondition(id_esercizio=e1, id_condizione=2, severita="avoid", nota="Valsalva"),
+        ExerciseCondition(id_esercizio=e2, id_condizione=1, severita="modify"),
+        ExerciseCondition(id_esercizio=e3, id_condizione=1, severita="avoid"),   # fuori subset
+        ExerciseCondition(id_esercizio=e4, id_condizione=2, severita="caution"),
+    ])
+
+    clients = {}
+    for name, conditions, owner in [
+        ("Schiena", [1], trainer), ("Entrambe", [1, 2], trainer),
+        ("Sano", [], trainer), ("Altrui", [1], other),
+    ]:
+        c = Client(trainer_id=owner.id, nome=name, cognome="X", anamnesi_json="{}")
+        session.add(c)
+        session.flush()
+        session.add(ClientAnamnesiFacts(
+            client_id=c.id, trainer_id=owner.id, stato="legacy", facts_version=FACTS_VERSION,
+        ))
+        for cid in conditions:
+            session.add(ClientConditionFact(client_id=c.id, condition_id=cid, trainer_id=owner.id))
+        clients[name] = c.id
+    session.commit()
+    return trainer, clients, (e1, e2, e3, e4)
+
+
+def test_batch_combines_conditions_per_client(session, roster):
+    trainer, clients, (e1, e2, e3, e4) = roster
+    maps = build_safety_maps(session, session, clients.values(), trainer.id)
+
+    assert set(maps) == {clients["Schiena"], clients["Entrambe"], clients["Sano"]}
+
+    both = maps[clients["Entrambe"]]
+    assert both.condition_names == ["Ipertensione", "Lombalgia"]
+    assert set(both.entries) == {e1, e2, e4}
+    assert both.entries[e1].severity == "avoid"
+    assert [d.id for d in both.entries[e1].conditions] == [1, 2]
+    assert both.entries[e1].conditions[0].body_tags == ["schiena"]
+
+    back = maps[clients["Schiena"]]
+    assert set(back.entries) == {e1, e2}
+    assert back.entries[e1].severity == "caution"
+    assert maps[clients["Sano"]].entries == {}
+
+    for client_id, safety_map in maps.items():
+        assert build_safety_map(session, session, client_id, trainer.id) == safety_map
+
+    with pytest.raises(HTTPException):
+        build_safety_map(session, session, clients["Altrui"], trainer.id)
+
+
+def test_query_count_independent_of_roster_size(session, test_engine, roster):
+    trainer, clients, _ = roster
+    for i in range(20):
+        c = Client(trainer_id=trainer.id, nome=f"N{i}", cognome="X")
+        session.add(c)
+        session.flush()
+        session.add(ClientConditionFact(client_id=c.id, condition_id=1 + i % 2, trainer_id=trainer.id))
+    session.commit()
+    all_ids = session.exec(Client.__table__.select().with_only_columns(Client.id)).scalars().all()
+
+    statements = []
+    event.listen(test_engine, "before_cursor_execute", lambda *a: statements.append(a[2]))
+    build_safety_maps(session, session, [clients["Entrambe"]], trainer.id)   # carica l'indice
+    statements.clear()
+    build_safety_maps(session, session, [clients["Entrambe"]], trainer.id)
+    single = len(statements)
+    statements.clear()
+    maps = build_safety_maps(session, session, all_ids, trainer.id)
+
+    assert len(maps) == 23
+    assert len(statements) == single
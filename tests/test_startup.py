@@ -0,0 +1,36 @@
+"""Avvio API: i passi di manutenzione non bloccano il lifespan."""
+
+import logging
+
+from fastapi.testclient import TestClient
+
+import api.main
+
+# Passi con effetti su DATA_DIR (backup, DB, seed): fuori dal test
+_SIDE_EFFECTS = (
+    "_auto_backup_on_startup", "create_db_and_tables", "create_catalog_tables", "warm_catalog",
+    "create_nutrition_tables", "seed_builtin_exercises", "seed_exercise_relations",
+    "seed_exercise_media", "_integrity_check_on_startup", "shutdown_app_logging",
+)
+
+
+def test_maintenance_failures_do_not_abort_startup(monkeypatch, caplog):
+    def boom(*args, **kwargs):
+        raise RuntimeError("tabella mancante")
+
+    for name in _SIDE_EFFECTS:
+        monkeypatch.setattr(api.main, name, lambda *args, **kwargs: None)
+    for name in ("get_job_runner", "purge_plan_analysis_cache", "reconcile_credits", "reconcile_client_activity",):
+        monkeypatch.setattr(api.main, name, boom)
+    monkeypatch.setattr(api.main, "shutdown_job_runner", boom)
+
+    with caplog.at_level(logging.WARNING, logger="fitmanager.api"):
+        with TestClient(api.main.app) as client:
+            assert client.get("/health").status_code == 200
+
+    messages = caplog.text
+    assert "job in background non eseguiti" in messages
+    assert "cache analisi piani non eseguita" in messages
+    assert "crediti PT non eseguita" in messages
+    assert "attivita' clienti non eseguita" in messages
+    assert "Stop job runner non riuscito" in messages
@@ -0,0 +1,131 @@
+# tools/admin_scripts/benchmark_json_responses.py
+"""
+Benchmark serializzazione risposte lista: percorso FastAPI standard vs fast_response.
+
+Payload sintetici, dimensioni realistiche:
+- GET /exercises: fino a 2000 esercizi (page_size max)
+- GET /events: agenda di un anno (~1500 eventi)
+- GET /movements: 200 movimenti (page_size max) x 10 pagine
+
+Percorsi misurati per payload (ms per risposta, mediana):
+- standard:  ri-validazione contro response_model + jsonable_encoder + json.dumps
+             (FastAPI con response_model=dict o versioni senza fast path Pydantic)
+- pydantic:  ri-validazione + dump_json del core Pydantic (FastAPI recente, modello tipizzato)
+- fast:      fast_response() — modello gia' costruito, orjson / model_dump_json
+
+Uso:
+    python -m tools.admin_scripts.benchmark_json_responses [--repeat 20]
+"""
+
+import argparse
+import json
+import statistics
+import time
+from datetime import date, datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from starlette.responses import JSONResponse
+
+from api.responses import fast_response, orjson
+from api.routers.agenda import EventListResponse, EventResponse
+from api.schemas.exercise import ExerciseListResponse, ExerciseResponse
+from api.schemas.financial import MovementResponse
+
+
+def _exercises(n: int) -> ExerciseListResponse:
+    items = [
+        ExerciseResponse(
+            id=i, nome=f"Esercizio {i}", nome_en=f"Exercise {i}", categoria="compound",
+            pattern_movimento="squat", muscoli_primari=["quadriceps", "glutes"],
+            muscoli_secondari=["hamstrings"], attrezzatura="barbell", difficolta="intermediate",
+            rep_range_forza="3-5", rep_range_ipertrofia="8-12", coaching_cues=["Petto alto", "Ginocchia in linea"],
+            errori_comuni=[{"errore": "Valgismo", "correzione": "Spingere le ginocchia fuori"}],
+            descrizione_anatomica="Estensione di anca e ginocchio " * 4,
+            skill_demand=2, stability_demand=3, axial_load_demand=4,
+        )
+        for i in range(n)
+    ]
+    return ExerciseListResponse(items=items, total=n, page=1, page_size=n)
+
+
+def _events(n: int) -> EventListResponse:
+    start = datetime(2026, 1, 1, 8, 0)
+    items = [
+        EventResponse(
+            id=i, data_inizio=str(start + timedelta(hours=5 * i)),
+            data_fine=str(start + timedelta(hours=5 * i + 1)), categoria="PT",
+            titolo=f"Seduta {i}", id_cliente=i % 40 + 1, id_contratto=i % 60 + 1,
+            stato="Programmato", cliente_nome="Mario", cliente_cognome="Rossi",
+        )
+        for i in range(n)
+    ]
+    return EventListResponse(items=items, total=n)
+
+
+def _movements(n: int) -> dict:
+    items = [
+        MovementResponse(
+            id=i, data_movimento=datetime(2026, 1, 1, 9, 0) + timedelta(days=i),
+            data_effettiva=date(2026, 1, 1) + timedelta(days=i), tipo="ENTRATA" if i % 3 else "USCITA",
+            categoria="Rata", importo=round(40 + i * 1.37, 2), metodo="POS", id_cliente=i % 40 + 1,
+            note="Pagamento rata",
+        )
+        for i in range(n)
+    ]
+    return {"items": items, "total": n, "page": 1, "page_size": n, "saldo_fine_periodo": 1234.5}
+
+
+def _standard(content, model) -> bytes:
+    validated = TypeAdapter(model).validate_python(content, from_attributes=True)
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+def _pydantic(content, model) -> bytes:
+    adapter = TypeAdapter(model)
+    return adapter.dump_json(adapter.validate_python(content, from_attributes=True))
+
+
+def _fast(content, model) -> bytes:
+    return fast_response(content).body
+
+
+def _timed(fn, content, model, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(content, model)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    payloads = [
+        ("exercises x2000", _exercises(2000), ExerciseListResponse),
+        ("events x1500", _events(1500), EventListResponse),
+        ("movements x200", _movements(200), dict),
+        ("movements x2000", _movements(2000), dict),
+    ]
+
+    print(f"orjson: {'si' if orjson is not None else 'no (fallback stdlib)'}  repeat={args.repeat}")
+    print(f"{'payload':<18} {'KB':>7} {'standard':>10} {'pydantic':>10} {'fast':>10} {'speedup':>8}")
+    for label, content, model in payloads:
+        body = _fast(content, model)
+        # Stesso JSON su tutti i percorsi
+        assert json.loads(body) == json.loads(_standard(content, model)) == json.loads(_pydantic(content, model))
+        standard = _timed(_standard, content, model, args.repeat)
+        pydantic_ms = _timed(_pydantic, content, model, args.repeat)
+        fast = _timed(_fast, content, model, args.repeat)
+        print(
+            f"{label:<18} {len(body) / 1024:>7.0f} {standard:>9.1f}ms {pydantic_ms:>9.1f}ms "
+            f"{fast:>9.1f}ms {standard / fast:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -24,6 +24,10 @@ def main():
         if idx + 1 < len(sys.argv):
             port = int(sys.argv[idx + 1])
 
+    # Concorrenza: connessioni max (503 oltre il limite, 0 = nessun limite).
+    # Threadpool e pool dedicati degli endpoint pesanti: vedi api/config.py
+    from api.config import API_LIMIT_CONCURRENCY
+
     uvicorn.run(
         "api.main:app",
         host=host,
@@ -31,6 +35,7 @@ def main():
         log_level="info",
         # Workers=1 per PyInstaller (multiprocessing.spawn non supportato)
         workers=1,
+        limit_concurrency=API_LIMIT_CONCURRENCY or None,
     )
 
 
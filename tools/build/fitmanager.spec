@@ -71,6 +71,9 @@ a = Analysis(
         'multipart',
         'python_multipart',
 
+        # ── JSON veloce (api/responses.py) ──
+        'orjson',
+
         # ── Validation ──
         'email_validator',
 